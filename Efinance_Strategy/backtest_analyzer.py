@@ -6,6 +6,7 @@
 
 import re
 import sys
+from collections import deque
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -21,45 +22,67 @@ if sys.platform == 'win32':
 class BacktestAnalyzer:
     """回测结果分析器"""
 
+    # 修复点：使用 (?:限价|市价) 来兼容两种订单类型，提取真正的操作(开多仓/平多仓)
+    TRADE_PATTERN = re.compile(
+        r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?标的：([a-zA-Z0-9.]+)，操作：以(?:限价|市价)(开多仓|平多仓|开空仓|平空仓)，委托价格：([\d.]+)，目标仓位：([\d.]+)%')
+
     def __init__(self, initial_cash: float = 1000000, commission_rate: float = 0.0001):
         self.initial_cash = initial_cash
         self.commission_rate = commission_rate
         self.trades = []
         self.portfolio_value = pd.DataFrame()
 
-    def parse_log(self, log_text: str) -> List[Dict]:
+    def parse_log(self, log_text: str) -> pd.DataFrame:
         """
         解析交易日志
         兼容 限价/市价，兼容不同格式的时间戳
         """
-        # 修复点：使用 (?:限价|市价) 来兼容两种订单类型，提取真正的操作(开多仓/平多仓)
-        pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?标的：([a-zA-Z0-9.]+)，操作：以(?:限价|市价)(开多仓|平多仓|开空仓|平空仓)，委托价格：([\d.]+)，目标仓位：([\d.]+)%'
-
-        for match in re.finditer(pattern, log_text):
-            date_str = match.group(1)
-            symbol = match.group(2)
-            action = match.group(3)  # 开多仓 or 平多仓
-            price = float(match.group(4))
-            target_percent = float(match.group(5))
+        return self._parse_lines(log_text.splitlines())
 
+    def parse_file(self, log_file: str) -> pd.DataFrame:
+        """
+        逐行流式解析日志文件（不把整个文件读入内存），UTF-8 解码失败时按 GBK 重新读取
+        """
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                return self._parse_lines(f)
+        except UnicodeDecodeError:
+            with open(log_file, 'r', encoding='gbk') as f:
+                return self._parse_lines(f)
+
+    def _parse_lines(self, lines) -> pd.DataFrame:
+        """逐行匹配交易记录，按列收集后一次构建 DataFrame"""
+        search = self.TRADE_PATTERN.search
+        date_strs, symbols, actions, prices, percents = [], [], [], [], []
+        for line in lines:
+            # 绝大多数日志行不含交易记录，先用关键字快速跳过
+            if '操作：以' not in line:
+                continue
+            match = search(line)
+            if match is None:
+                continue
+            date_strs.append(match.group(1))
+            symbols.append(match.group(2))
+            actions.append(match.group(3))  # 开多仓 or 平多仓
+            prices.append(float(match.group(4)))
             # 将百分比值转换为小数形式（如100 -> 1.0, 4.27 -> 0.0427）
-            target_percent_decimal = target_percent / 100.0
-
-            trade = {
-                'datetime': pd.to_datetime(date_str),
-                'date': pd.to_datetime(date_str).date(),
-                'symbol': symbol,
-                'action': action,
-                'price': price,
-                'target_percent': target_percent_decimal  # 使用小数形式
-            }
-            self.trades.append(trade)
-
-        self.trades = pd.DataFrame(self.trades)
-        if not self.trades.empty:
-            # 去重：日志可能重复输出
-            self.trades = self.trades.drop_duplicates().sort_values('datetime').reset_index(drop=True)
-
+            percents.append(float(match.group(5)) / 100.0)
+
+        if not date_strs:
+            self.trades = pd.DataFrame()
+            return self.trades
+
+        datetimes = pd.to_datetime(pd.Series(date_strs))
+        self.trades = pd.DataFrame({
+            'datetime': datetimes,
+            'date': datetimes.dt.date,
+            'symbol': symbols,
+            'action': actions,
+            'price': prices,
+            'target_percent': percents  # 使用小数形式
+        })
+        # 去重：日志可能重复输出
+        self.trades = self.trades.drop_duplicates().sort_values('datetime', kind='stable').reset_index(drop=True)
         return self.trades
 
     def calculate_position_value(self, price: float, percent: float, cash: float) -> Tuple[float, float]:
@@ -75,7 +98,12 @@ class BacktestAnalyzer:
         return position_value, position_value * (1 + self.commission_rate)
 
     def calculate_returns(self) -> pd.DataFrame:
-        """计算每日的持仓和收益率"""
+        """
+        计算每日的持仓和收益率
+
+        交易记录已按时间排序，按日期顺序单遍回放：持仓价值（按买入价计）累计维护，
+        每笔交易 O(1)，总耗时与天数 + 交易数成正比
+        """
         if self.trades.empty:
             return pd.DataFrame()
 
@@ -83,29 +111,34 @@ class BacktestAnalyzer:
                               end=self.trades['datetime'].max(),
                               freq='D')
 
-        positions = {}  # {symbol: {'shares': float, 'buy_price': float}}
-        cash = self.initial_cash
-        daily_values = []
+        trade_days = self.trades['datetime'].values.astype('datetime64[D]')
+        symbols = self.trades['symbol'].values
+        is_buy = (self.trades['action'] == '开多仓').values
+        is_sell = (self.trades['action'] == '平多仓').values
+        prices = self.trades['price'].values.astype(float)
+        percents = self.trades['target_percent'].values.astype(float)
 
-        def get_total_asset():
-            """计算总资产（现金 + 持仓市值）"""
-            total = cash
-            for symbol, pos in positions.items():
-                total += pos['shares'] * pos['buy_price']  # 使用买入价作为持仓价值
-            return total
+        # 持仓按槽位存放：{symbol: 槽位}，shares/buy_prices 为对应槽位的数组
+        slots = {symbol: i for i, symbol in enumerate(pd.unique(symbols))}
+        shares = np.zeros(len(slots))
+        buy_prices = np.zeros(len(slots))
+        held = np.zeros(len(slots), dtype=bool)
 
-        for date in dates:
-            day_trades = self.trades[self.trades['datetime'].dt.date == date.date()]
+        cash = self.initial_cash
+        position_value = 0.0  # 使用买入价作为持仓价值
+        cash_values = np.empty(len(dates))
+        total_values = np.empty(len(dates))
 
-            for _, trade in day_trades.iterrows():
-                symbol = trade['symbol']
-                action = trade['action']
-                price = trade['price']
-                percent = trade['target_percent']  # 小数形式，如1.0表示100%
+        i, n = 0, len(trade_days)
+        for d, day in enumerate(dates.values.astype('datetime64[D]')):
+            while i < n and trade_days[i] == day:
+                slot = slots[symbols[i]]
+                price = prices[i]
 
-                if action == '开多仓':
+                if is_buy[i]:
                     # 计算总资产，然后按目标仓位比例买入
-                    total_asset = get_total_asset()
+                    total_asset = cash + position_value
+                    percent = percents[i]
 
                     if percent >= 0.99:  # 100%全仓，使用所有可用资金
                         buy_amount = cash / (1 + self.commission_rate)
@@ -116,34 +149,59 @@ class BacktestAnalyzer:
                             buy_amount = cash / (1 + self.commission_rate)
 
                     calc_price = price if price > 0 else 1.0
-                    cost = buy_amount * (1 + self.commission_rate)
-                    shares = buy_amount / calc_price
-
-                    cash -= cost
-                    positions[symbol] = {
-                        'shares': shares,
-                        'buy_price': calc_price
-                    }
-
-                elif action == '平多仓':
-                    if symbol in positions:
-                        calc_price = price if price > 0 else positions[symbol]['buy_price']
-                        sell_value = positions[symbol]['shares'] * calc_price
-                        cash += sell_value * (1 - self.commission_rate)
-                        del positions[symbol]
-
-            total_value = get_total_asset()
-            daily_values.append({
-                'date': date,
-                'cash': cash,
-                'position_value': total_value - cash,
-                'total_value': total_value,
-                'return': (total_value - self.initial_cash) / self.initial_cash
-            })
-
-        self.portfolio_value = pd.DataFrame(daily_values)
+                    cash -= buy_amount * (1 + self.commission_rate)
+                    # 同一标的再次开仓时覆盖原持仓
+                    if held[slot]:
+                        position_value -= shares[slot] * buy_prices[slot]
+                    shares[slot] = buy_amount / calc_price
+                    buy_prices[slot] = calc_price
+                    held[slot] = True
+                    position_value += shares[slot] * calc_price
+
+                elif is_sell[i] and held[slot]:
+                    calc_price = price if price > 0 else buy_prices[slot]
+                    cash += shares[slot] * calc_price * (1 - self.commission_rate)
+                    position_value -= shares[slot] * buy_prices[slot]
+                    held[slot] = False
+                    if not held.any():
+                        # 清仓后归零，避免累计的浮点误差
+                        position_value = 0.0
+                i += 1
+
+            cash_values[d] = cash
+            total_values[d] = cash + position_value
+
+        self.portfolio_value = pd.DataFrame({
+            'date': dates,
+            'cash': cash_values,
+            'position_value': total_values - cash_values,
+            'total_value': total_values,
+            'return': (total_values - self.initial_cash) / self.initial_cash
+        })
         return self.portfolio_value
 
+    def match_trades(self) -> List[Tuple[str, float, float]]:
+        """
+        按标的先进先出匹配开仓/平仓
+
+        Returns:
+            [(symbol, 买入价, 卖出价)]，按平仓时间排序
+        """
+        if self.trades.empty:
+            return []
+
+        open_queues = {}
+        matched = []
+        for symbol, action, price in zip(self.trades['symbol'].values, self.trades['action'].values,
+                                         self.trades['price'].values):
+            if action == '开多仓':
+                open_queues.setdefault(symbol, deque()).append(price)
+            elif action == '平多仓':
+                queue = open_queues.get(symbol)
+                if queue:
+                    matched.append((symbol, queue.popleft(), price))
+        return matched
+
     def calculate_metrics(self) -> Dict:
         """计算各项绩效指标"""
         if self.portfolio_value.empty:
@@ -173,35 +231,15 @@ class BacktestAnalyzer:
         df['drawdown'] = (df['total_value'] - df['cummax']) / df['cummax']
         max_drawdown = df['drawdown'].min()
 
-        win_trades = 0
-        loss_trades = 0
-        total_profit = 0
-        total_loss = 0
-
-        symbols = self.trades['symbol'].unique()
-        for symbol in symbols:
-            symbol_trades = self.trades[self.trades['symbol'] == symbol].sort_values('datetime')
-            
-            # 使用更健壮的匹配逻辑：维护一个开仓队列
-            buys = []
-            for _, trade in symbol_trades.iterrows():
-                if trade['action'] == '开多仓':
-                    buys.append(trade['price'])
-                elif trade['action'] == '平多仓' and buys:
-                    buy_price = buys.pop(0)
-                    sell_price = trade['price']
-                    
-                    # 避免市价单委托价格为0导致的计算错误
-                    if buy_price <= 0 or sell_price <= 0:
-                        continue
-                        
-                    profit_pct = (sell_price - buy_price) / buy_price
-                    if profit_pct > 0:
-                        win_trades += 1
-                        total_profit += profit_pct
-                    else:
-                        loss_trades += 1
-                        total_loss += abs(profit_pct)
+        # 先进先出匹配后按收益率统计盈亏
+        matched = np.array([(buy, sell) for _, buy, sell in self.match_trades()], dtype=float).reshape(-1, 2)
+        # 避免市价单委托价格为0导致的计算错误
+        matched = matched[(matched[:, 0] > 0) & (matched[:, 1] > 0)]
+        profit_pct = (matched[:, 1] - matched[:, 0]) / matched[:, 0]
+        win_trades = int(np.sum(profit_pct > 0))
+        loss_trades = len(profit_pct) - win_trades
+        total_profit = float(profit_pct[profit_pct > 0].sum())
+        total_loss = float(np.abs(profit_pct[profit_pct <= 0]).sum())
 
         total_trades = win_trades + loss_trades
         win_rate = win_trades / total_trades if total_trades > 0 else 0
@@ -253,16 +291,18 @@ class BacktestAnalyzer:
         print("\n" + "="*60 + "\n")
 
     def get_current_positions(self) -> List[Dict]:
+        """开仓次数多于平仓次数的标的，返回最后一次开仓的时间和价格（单遍统计）"""
         if self.trades.empty: return []
-        current = []
-        for symbol in self.trades['symbol'].unique():
-            symbol_trades = self.trades[self.trades['symbol'] == symbol]
-            buys = len(symbol_trades[symbol_trades['action'] == '开多仓'])
-            sells = len(symbol_trades[symbol_trades['action'] == '平多仓'])
-            if buys > sells:
-                last_buy = symbol_trades[symbol_trades['action'] == '开多仓'].iloc[-1]
-                current.append({'symbol': symbol, 'date': last_buy['datetime'], 'price': last_buy['price']})
-        return current
+        counts, last_buys = {}, {}
+        for symbol, action, dt, price in zip(self.trades['symbol'].values, self.trades['action'].values,
+                                             self.trades['datetime'], self.trades['price'].values):
+            if action == '开多仓':
+                counts[symbol] = counts.get(symbol, 0) + 1
+                last_buys[symbol] = (dt, price)
+            elif action == '平多仓':
+                counts[symbol] = counts.get(symbol, 0) - 1
+        return [{'symbol': symbol, 'date': last_buys[symbol][0], 'price': last_buys[symbol][1]}
+                for symbol, count in counts.items() if count > 0]
 
     def export_to_csv(self, filename: str = 'backtest_results.csv'):
         if self.portfolio_value.empty: self.calculate_returns()
@@ -271,27 +311,17 @@ class BacktestAnalyzer:
 
 def main():
     import sys, os
-    log_text = ""
     if len(sys.argv) > 1:
         log_file = sys.argv[1]
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f: log_text = f.read()
-        except UnicodeDecodeError:
-            with open(log_file, 'r', encoding='gbk') as f: log_text = f.read()
     else:
         log_file = 'backtest_log_style_rotation_v3.txt'
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f: log_text = f.read()
-            except UnicodeDecodeError:
-                with open(log_file, 'r', encoding='gbk') as f: log_text = f.read()
-        else:
+        if not os.path.exists(log_file):
             print("用法: python backtest_analyzer.py <日志文件路径>")
             return
 
     analyzer = BacktestAnalyzer(initial_cash=10000000, commission_rate=0.0001) # 修正为1000万匹配主策略
     print("正在解析交易日志...")
-    analyzer.parse_log(log_text)
+    analyzer.parse_file(log_file)
     print(f"解析完成，共 {len(analyzer.trades)} 条交易记录")
     print("正在计算绩效指标...")
     analyzer.print_report()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+回测内共享的行情面板
+
+调仓时为整个股票池一次性获取日线面板（掘金 history 多代码请求，按行数分批），
+并在回测期间缓存：下一次调仓只补取缓存之后的新交易日。
+因子得分基于对齐到末端的价格窗口按列向量化计算。
+
+用法:
+    context.factor_panel = FactorPanel()                       # init 中创建
+    window = context.factor_panel.window(symbols, last_day, 260)
+    ma250 = window.ma(250)                                     # 每只股票一个值
+"""
+from __future__ import print_function, absolute_import, unicode_literals
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from gm.api import history, get_previous_n_trading_dates, ADJUST_PREV
+
+
+class PriceWindow(object):
+    """
+    对齐到末端的价格窗口
+    values 形状为 (count, 股票数)，values[-1] 为每只股票最近一个有效交易日，
+    有效数据不足 count 的列顶部为 NaN（与逐只 history_n(count) 的结果逐列一致）
+    """
+
+    def __init__(self, symbols, values):
+        self.symbols = list(symbols)
+        self.values = values
+        self.counts = np.sum(~np.isnan(values), axis=0)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def tail(self, count):
+        """最近 count 根的子窗口（等价于 history_n(count=count)）"""
+        return PriceWindow(self.symbols, self.values[-count:])
+
+    def has(self, n):
+        """有效数据是否不少于 n 根（布尔数组）"""
+        return self.counts >= n
+
+    def last(self, k=1):
+        """倒数第 k 根的价格（closes[-k]）"""
+        return self.values[-k]
+
+    def ma(self, n):
+        """最近 n 根的均值（closes[-n:] 的均值）"""
+        return self._nan(np.nanmean, self.values[-n:])
+
+    def mean(self, start, stop):
+        """指定切片的均值（closes[start:stop] 的均值）"""
+        return self._nan(np.nanmean, self.values[start:stop])
+
+    def returns(self):
+        """逐日收益率（np.diff(closes) / closes[:-1]）"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.diff(self.values, axis=0) / self.values[:-1]
+
+    def volatility(self, n=None):
+        """年化波动率（收益率标准差 × sqrt(252)），n 为最近 n 个收益率"""
+        returns = self.returns()
+        if n is not None:
+            returns = returns[-n:]
+        return self._nan(np.nanstd, returns) * np.sqrt(252)
+
+    def std(self, n=None):
+        """价格标准差"""
+        values = self.values if n is None else self.values[-n:]
+        return self._nan(np.nanstd, values)
+
+    def series(self, values):
+        """按股票代码索引的 Series"""
+        return pd.Series(values, index=self.symbols)
+
+    @staticmethod
+    def _nan(func, values):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return func(values, axis=0)
+
+
+class FactorPanel(object):
+    """
+    股票池日线面板缓存（一个回测一个实例）
+
+    与逐只调用 history_n(skip_suspended=True) 相比，每个调仓日只需
+    ceil(股票数 × 交易日数 / BATCH_ROWS) 次 history 请求
+    """
+
+    # 单次 history 请求的最大行数
+    BATCH_ROWS = 30000
+
+    def __init__(self, field='close', adjust=ADJUST_PREV, adjust_end_time=''):
+        """
+        参数:
+            field: 价格字段（close / open / high / low）
+            adjust: 复权方式
+            adjust_end_time: 复权基准时间（回测中通常为 context.backtest_end_time）
+        """
+        self.field = field
+        self.adjust = adjust
+        self.adjust_end_time = adjust_end_time
+
+        # {symbol: 按日期排序的价格 Series}
+        self._data = {}
+        # {symbol: (已获取的开始日期, 结束日期)}
+        self._covered = {}
+        self.request_count = 0
+
+    def window(self, symbols, end_time, count):
+        """
+        获取股票池截至 end_time 的最近 count 根日线（停牌日跳过）
+
+        参数:
+            symbols: 股票代码列表（掘金格式）
+            end_time: 截止时间（'YYYY-MM-DD' 或 datetime）
+            count: 窗口长度
+
+        返回:
+            PriceWindow
+        """
+        symbols = list(dict.fromkeys(symbols))
+        end_day = self._to_day(end_time)
+
+        # 多取一些交易日，覆盖窗口内的零星停牌
+        n_days = count + max(count // 2, 5)
+        start_day = self._start_day(end_day, n_days)
+        self._ensure(symbols, start_day, end_day, end_time, n_days)
+        values = self._align(symbols, start_day, end_day, count)
+
+        # 长期停牌的股票有效数据不足，只对这些股票向前多取一段
+        short = [j for j in range(len(symbols)) if np.isnan(values[0, j])]
+        if short:
+            n_deep = count * 3
+            deep_start = self._start_day(end_day, n_deep)
+            short_symbols = [symbols[j] for j in short]
+            self._ensure(short_symbols, deep_start, end_day, end_time, n_deep)
+            values[:, short] = self._align(short_symbols, deep_start, end_day, count)
+
+        return PriceWindow(symbols, values)
+
+    def latest(self, symbols, end_time):
+        """
+        获取股票池截至 end_time 的最新价格
+
+        返回:
+            {symbol: 价格}，没有数据的股票不包含在内
+        """
+        window = self.window(symbols, end_time, 1)
+        prices = window.last()
+        return {s: float(p) for s, p in zip(window.symbols, prices) if not np.isnan(p)}
+
+    def _align(self, symbols, start_day, end_day, count):
+        """缓存数据对齐到末端：每列取 [start_day, end_day] 内最近 count 个有效值"""
+        values = np.full((count, len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            data = self._data.get(symbol)
+            if data is None:
+                continue
+            tail = data.loc[start_day:end_day].dropna().values[-count:]
+            if len(tail):
+                values[count - len(tail):, j] = tail
+        return values
+
+    @staticmethod
+    def _start_day(end_day, n_days):
+        """end_day 之前第 n_days 个交易日"""
+        dates = get_previous_n_trading_dates(exchange='SHSE', date=end_day.strftime('%Y-%m-%d'), n=n_days)
+        return pd.Timestamp(dates[0]) if dates else end_day
+
+    @staticmethod
+    def _to_day(value):
+        """转换为不带时区的日期"""
+        day = pd.Timestamp(value)
+        if day.tzinfo is not None:
+            day = day.tz_localize(None)
+        return day.normalize()
+
+    def _ensure(self, symbols, start_day, end_day, end_time, n_days):
+        """补取缓存中缺失的区间：已缓存的股票只取尾部新交易日"""
+        requests = {}
+        for symbol in symbols:
+            covered = self._covered.get(symbol)
+            if covered is not None and covered[0] <= start_day and covered[1] >= end_day:
+                continue
+            if covered is not None and covered[0] <= start_day:
+                # 从已覆盖的最后一天重新取（盘中获取时当天日线可能尚未生成）
+                fetch_start = covered[1]
+            else:
+                fetch_start = start_day
+            requests.setdefault(fetch_start, []).append(symbol)
+
+        for fetch_start, group in requests.items():
+            days = max(1, min(n_days, np.busday_count(fetch_start.date(), end_day.date()) + 1))
+            batch_size = max(1, self.BATCH_ROWS // days)
+            for i in range(0, len(group), batch_size):
+                batch = group[i:i + batch_size]
+                # 请求失败的批次不记录覆盖区间，下次调仓时重试
+                if not self._fetch(batch, fetch_start, end_time):
+                    continue
+                for symbol in batch:
+                    covered = self._covered.get(symbol)
+                    if covered is not None and covered[0] <= start_day:
+                        self._covered[symbol] = (covered[0], end_day)
+                    else:
+                        self._covered[symbol] = (start_day, end_day)
+
+    def _fetch(self, symbols, start_day, end_time):
+        """一次 history 多代码请求，按股票追加到缓存，返回请求是否成功"""
+        self.request_count += 1
+        try:
+            data = history(symbol=','.join(symbols), frequency='1d',
+                           start_time=start_day.strftime('%Y-%m-%d'), end_time=end_time,
+                           fields='symbol,eob,{}'.format(self.field), skip_suspended=True,
+                           adjust=self.adjust, adjust_end_time=self.adjust_end_time, df=True)
+        except Exception as e:
+            print('获取行情面板失败: {}'.format(e))
+            return False
+
+        if data is None or len(data) == 0:
+            return True
+
+        eob = pd.to_datetime(data['eob'])
+        if eob.dt.tz is not None:
+            eob = eob.dt.tz_localize(None)
+        data = data.assign(eob=eob.dt.normalize())
+
+        for symbol, group in data.groupby('symbol'):
+            series = group.set_index('eob')[self.field].astype(float)
+            old = self._data.get(symbol)
+            if old is not None:
+                series = pd.concat([old, series])
+                series = series[~series.index.duplicated(keep='last')]
+            self._data[symbol] = series.sort_index()
+        return True
@@ -0,0 +1,1144 @@
+# -*- coding: utf-8 -*-
+"""
+本地事件驱动回测
+
+不连接掘金终端，用本地日线缓存（data.bar_store 的合并存储）和全市场元数据快照
+（data.universe）重放回测。引擎实现本目录策略用到的掘金接口
+（schedule / subscribe / history / history_n / get_previous_n_trading_dates /
+stk_get_index_constituents / get_symbols / stk_get_daily_mktvalue_pt / get_position /
+order_target_percent 等），以 gm.api 模块的形式注入，策略文件无需修改即可运行。
+
+与掘金回测的差异:
+    - 只支持日线频率；价格为缓存中的价格（缓存时的前复权），忽略 adjust 参数
+    - 日线在当天 15:00 之后才可见，盘中调用 history 只返回到上一交易日
+    - 指数成分、ST、上市/退市日期来自最近的元数据快照，存在幸存者偏差；
+      成分股权重按总市值近似，历史总市值按 快照市值 × 当日收盘价 / 快照日收盘价 近似
+    - 市价单按 backtest_match_mode 以当天收盘价(1)或下一交易日开盘价(0)成交（0 时开盘后的委托排队，
+      在下一交易日开盘撮合，资金和持仓在成交日变动），限价单在当天价格区间内以委托价成交；
+      买入按 100 股取整，T+1，现金不足时减量
+
+用法（在项目根目录下运行，缓存目录相对于项目根目录）:
+    python Efinance_Strategy/local_backtest.py Efinance_Strategy/ml_strategy.py
+    python Efinance_Strategy/local_backtest.py Efinance_Strategy/small_cap_strategy.py --start 2024-01-01 --end 2025-12-31
+    python Efinance_Strategy/local_backtest.py Efinance_Strategy/ml_strategy.py --set fast_path=True --set refit_days=5
+"""
+from __future__ import print_function, absolute_import, unicode_literals
+
+import argparse
+import ast
+import datetime
+import os
+import runpy
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+
+def _api_module(functions):
+    """构造 gm / gm.api 模块：未实现的接口在调用时报错"""
+    api = types.ModuleType('gm.api')
+    for name, value in functions.items():
+        setattr(api, name, value)
+    api.__all__ = list(functions)
+
+    def missing(name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def unsupported(*args, **kwargs):
+            raise NotImplementedError('本地回测未实现掘金接口: {}'.format(name))
+        return unsupported
+    api.__getattr__ = missing
+
+    gm = types.ModuleType('gm')
+    gm.api = api
+    gm.__path__ = []
+    return gm, api
+
+
+# 数据层在注入 gm.api 之前导入，保持其对真实掘金 SDK 的绑定；
+# 未安装 SDK 时先放入占位模块，数据层的掘金数据源调用时报错并回退到其他数据源
+try:
+    import gm.api
+except ImportError:
+    sys.modules['gm'], sys.modules['gm.api'] = _api_module({})
+
+from data import BarStore, Universe, DataResilient
+
+TZ = 'Asia/Shanghai'
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(15, 0)
+# 夏普比率的无风险利率（与 backtest_analyzer 一致）
+RISK_FREE_RATE = 0.03
+# 上市日期未知的股票按此日期处理（不被次新股条件剔除）
+UNKNOWN_LISTED_DATE = '1990-01-01'
+# 未退市股票的退市日期（与掘金一致）
+NOT_DELISTED_DATE = '2038-01-01'
+
+# ========== 掘金常量 ==========
+
+MODE_LIVE = 1
+MODE_BACKTEST = 2
+ADJUST_NONE = 0
+ADJUST_PREV = 1
+ADJUST_POST = 2
+OrderType_Limit = 1
+OrderType_Market = 2
+OrderSide_Buy = 1
+OrderSide_Sell = 2
+PositionSide_Long = 1
+PositionSide_Short = 2
+PositionEffect_Open = 1
+PositionEffect_Close = 2
+PositionEffect_CloseToday = 3
+PositionEffect_CloseYesterday = 4
+OrderStatus_New = 1
+OrderStatus_Filled = 3
+OrderStatus_Canceled = 5
+OrderStatus_Rejected = 8
+
+GM_CONSTANTS = {name: value for name, value in list(globals().items())
+                if name.startswith(('MODE_', 'ADJUST_', 'OrderType_', 'OrderSide_',
+                                    'PositionSide_', 'PositionEffect_', 'OrderStatus_'))}
+
+# history 可返回的字段
+BAR_FIELDS = ['symbol', 'frequency', 'open', 'high', 'low', 'close', 'volume', 'pre_close', 'bob', 'eob']
+
+
+class Record(dict):
+    """同时支持 record['key'] 和 record.key 访问（策略中两种写法都有）"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class Context(object):
+    """策略上下文"""
+
+    def __init__(self, engine, pinned):
+        object.__setattr__(self, '_engine', engine)
+        object.__setattr__(self, '_pinned', dict(pinned))
+        for name, value in pinned.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        # 命令行 --set 指定的参数保持不变，init 中的赋值不覆盖
+        if name in self._pinned:
+            return
+        object.__setattr__(self, name, value)
+
+    @property
+    def symbols(self):
+        return set(self._engine.subscribed)
+
+    def account(self, account_id=None):
+        return Account(self._engine)
+
+    def data(self, symbol, frequency, count, fields=None):
+        """订阅数据滑窗（截至当前时间已收盘的最近 count 根日线）"""
+        return self._engine.history_n(symbol=symbol, frequency=frequency, count=count, fields=fields, df=True)
+
+
+class Account(object):
+    """账户（持仓与资金）"""
+
+    def __init__(self, engine):
+        self._engine = engine
+
+    def positions(self, symbol='', side=None):
+        positions = self._engine.get_position()
+        return [p for p in positions if not symbol or p['symbol'] == symbol]
+
+    def position(self, symbol, side=PositionSide_Long):
+        positions = self.positions(symbol)
+        return positions[0] if positions else None
+
+    @property
+    def cash(self):
+        return self._engine.get_cash()
+
+
+class Ledger(object):
+    """
+    持仓/资金账本
+    每个标的占一个槽位，持仓量、持仓成本、今日买入量、最新价按槽位存放在数组中，
+    市值和净值按数组整体计算
+    """
+
+    def __init__(self, cash, capacity=64):
+        self.cash = float(cash)
+        self.slots = {}
+        self.symbols = []
+        self.volume = np.zeros(capacity)
+        self.cost = np.zeros(capacity)
+        self.today = np.zeros(capacity)
+        self.price = np.full(capacity, np.nan)
+
+    def slot(self, symbol):
+        index = self.slots.get(symbol)
+        if index is not None:
+            return index
+
+        index = len(self.symbols)
+        if index == len(self.volume):
+            # 容量不足时翻倍
+            grow = len(self.volume)
+            self.volume = np.concatenate([self.volume, np.zeros(grow)])
+            self.cost = np.concatenate([self.cost, np.zeros(grow)])
+            self.today = np.concatenate([self.today, np.zeros(grow)])
+            self.price = np.concatenate([self.price, np.full(grow, np.nan)])
+        self.slots[symbol] = index
+        self.symbols.append(symbol)
+        return index
+
+    def held(self):
+        """有持仓的槽位"""
+        return np.flatnonzero(self.volume[:len(self.symbols)] > 0)
+
+    def holding(self, symbol):
+        index = self.slots.get(symbol)
+        return 0.0 if index is None else float(self.volume[index])
+
+    def available(self, symbol):
+        """可卖数量（T+1，今日买入的不可卖）"""
+        index = self.slots.get(symbol)
+        return 0.0 if index is None else float(self.volume[index] - self.today[index])
+
+    def market_value(self):
+        n = len(self.symbols)
+        return float(np.nansum(self.volume[:n] * self.price[:n]))
+
+    def nav(self):
+        return self.cash + self.market_value()
+
+    def buy(self, symbol, volume, price, commission):
+        index = self.slot(symbol)
+        amount = volume * price
+        self.cash -= amount + commission
+        self.volume[index] += volume
+        self.cost[index] += amount + commission
+        self.today[index] += volume
+        self.price[index] = price
+
+    def sell(self, symbol, volume, price, commission):
+        """卖出，返回已实现盈亏（按持仓均价计算，含卖出手续费）"""
+        index = self.slot(symbol)
+        average = self.cost[index] / self.volume[index]
+        self.cash += volume * price - commission
+        self.volume[index] -= volume
+        self.cost[index] = self.cost[index] - average * volume if self.volume[index] > 0 else 0.0
+        self.price[index] = price
+        return volume * (price - average) - commission
+
+    def settle(self):
+        """收盘结算：今日买入转为可卖"""
+        self.today[:] = 0
+
+
+class LocalBacktest(object):
+    """
+    本地回测引擎（一次回测一个实例）
+
+    run() 注入 gm.api 后以 __main__ 方式运行策略文件，策略中的 run(...) 调用
+    转到本引擎：依次执行 init、每个交易日的定时任务和 on_bar、on_backtest_finished
+    """
+
+    def __init__(self, strategy_path, start=None, end=None, cash=None, overrides=None, fetch=False):
+        """
+        参数:
+            strategy_path: 策略文件路径
+            start: 回测开始日期，默认使用策略 run() 中的 backtest_start_time
+            end: 回测结束日期，默认使用策略 run() 中的 backtest_end_time
+            cash: 初始资金，默认使用策略 run() 中的 backtest_initial_cash
+            overrides: 覆盖 context 属性的参数 {名称: 值}（init 中的赋值不生效）
+            fetch: 本地缓存中没有的股票是否从数据源获取（默认只用缓存）
+        """
+        self.strategy_path = os.path.abspath(strategy_path)
+        self.start = start
+        self.end = end
+        self.cash = cash
+        self.overrides = dict(overrides or {})
+        self.fetch = fetch
+
+        self.context = None
+        self.ledger = None
+        self.indicator = None
+        self.params = {}
+        self.schedules = []
+        self.subscribed = []
+        self.orders = []
+        self.trades = []
+        self.nav = pd.Series(dtype=float)
+
+        self._packed = None
+        self._bar_cache = {}
+        self._calendar = np.array([], dtype='datetime64[D]')
+        self._namespace = {}
+        self._today = None
+        self._order_id = 0
+        self._pending = []
+        self._warned = set()
+
+    # ========== 运行 ==========
+
+    def run(self):
+        """运行策略文件，返回回测指标"""
+        started = datetime.datetime.now()
+        self._load_bars()
+
+        saved_modules = {name: sys.modules.get(name) for name in ('gm', 'gm.api')}
+        saved_argv, saved_path = sys.argv, list(sys.path)
+        strategy_dir = os.path.dirname(self.strategy_path)
+        # 清除已导入的策略辅助模块（如 factor_panel），使其重新绑定到注入的 gm.api
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, '__file__', None) or ''
+            if module_file and os.path.dirname(os.path.abspath(module_file)) == strategy_dir:
+                del sys.modules[name]
+
+        self._install_api()
+        sys.argv = [self.strategy_path]
+        sys.path.insert(0, strategy_dir)
+        try:
+            namespace = runpy.run_path(self.strategy_path, run_name='__main__')
+            if self.indicator is None and self.context is None:
+                # 策略文件没有调用 run()
+                self._execute(namespace, {})
+        finally:
+            sys.argv = saved_argv
+            sys.path[:] = saved_path
+            for name, module in saved_modules.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+
+        print('本地回测耗时 {:.1f} 秒'.format((datetime.datetime.now() - started).total_seconds()))
+        return self.indicator
+
+    def _install_api(self):
+        """注入 gm / gm.api 模块"""
+        functions = {
+            'run': self._gm_run,
+            'set_token': lambda *args, **kwargs: None,
+            'set_serv_addr': lambda *args, **kwargs: None,
+            'log': lambda level='info', msg='', source='', **kwargs: print('[{}] {}'.format(level, msg)),
+            'schedule': self.schedule,
+            'subscribe': self.subscribe,
+            'unsubscribe': self.unsubscribe,
+            'history': self.history,
+            'history_n': self.history_n,
+            'current': self.current,
+            'get_trading_dates': self.get_trading_dates,
+            'get_previous_n_trading_dates': self.get_previous_n_trading_dates,
+            'get_next_n_trading_dates': self.get_next_n_trading_dates,
+            'get_symbols': self.get_symbols,
+            'stk_get_index_constituents': self.stk_get_index_constituents,
+            'stk_get_daily_mktvalue_pt': self.stk_get_daily_mktvalue_pt,
+            'get_position': self.get_position,
+            'get_cash': self.get_cash,
+            'order_volume': self.order_volume,
+            'order_value': self.order_value,
+            'order_percent': self.order_percent,
+            'order_target_volume': self.order_target_volume,
+            'order_target_value': self.order_target_value,
+            'order_target_percent': self.order_target_percent,
+            'order_close_all': self.order_close_all,
+            'order_cancel_all': self.order_cancel_all,
+        }
+        functions.update(GM_CONSTANTS)
+        gm, api = _api_module(functions)
+        sys.modules['gm'] = gm
+        sys.modules['gm.api'] = api
+
+    def _gm_run(self, **kwargs):
+        """策略中的 run(...)：用调用方模块的全局变量（init、algo 等）执行回测"""
+        namespace = sys._getframe(1).f_globals
+        self._execute(namespace, kwargs)
+
+    def _execute(self, namespace, params):
+        params = dict(params)
+        if self.start:
+            params['backtest_start_time'] = '{} 09:00:00'.format(self._to_day(self.start))
+        if self.end:
+            params['backtest_end_time'] = '{} 15:00:00'.format(self._to_day(self.end))
+        if self.cash:
+            params['backtest_initial_cash'] = self.cash
+        self.params = params
+
+        start_day = self._to_day(params.get('backtest_start_time') or self._calendar[0])
+        end_day = self._to_day(params.get('backtest_end_time') or self._calendar[-1])
+        self.commission_ratio = float(params.get('backtest_commission_ratio', 0) or 0)
+        self.slippage_ratio = float(params.get('backtest_slippage_ratio', 0) or 0)
+        self.match_mode = int(params.get('backtest_match_mode', 1))
+        self.initial_cash = float(params.get('backtest_initial_cash', 1000000))
+
+        days = self._calendar[(self._calendar >= start_day) & (self._calendar <= end_day)]
+        if len(days) == 0:
+            print('本地缓存中没有 {} ~ {} 的交易日（缓存覆盖 {} ~ {}）'.format(
+                start_day, end_day,
+                self._calendar[0] if len(self._calendar) else '-', self._calendar[-1] if len(self._calendar) else '-'))
+            return
+        if days[-1] < end_day:
+            print('本地缓存只覆盖到 {}，回测在该日结束'.format(days[-1]))
+
+        self._namespace = namespace
+        self.ledger = Ledger(self.initial_cash)
+        self._pending = []
+        self.context = Context(self, self.overrides)
+        self.context.mode = params.get('mode', MODE_BACKTEST)
+        self.context.strategy_id = params.get('strategy_id', '')
+        self.context.backtest_start_time = '{} 09:00:00'.format(start_day)
+        self.context.backtest_end_time = '{} 15:00:00'.format(end_day)
+        self._set_now(days[0], datetime.time(9, 0))
+
+        print('本地回测: {}  {} ~ {}，{} 个交易日，初始资金 {:.0f}'.format(
+            os.path.basename(self.strategy_path), days[0], days[-1], len(days), self.initial_cash))
+
+        init = namespace.get('init')
+        if init is not None:
+            init(self.context)
+
+        on_bar = namespace.get('on_bar')
+        nav = np.empty(len(days))
+        for i, day in enumerate(days):
+            if self._pending:
+                # 上一交易日排队的市价单以今天开盘价成交（先于今天的定时任务）
+                self._set_now(day, MARKET_OPEN)
+                self._fill_pending()
+
+            events = [(time_rule, func) for func, date_rule, time_rule in self.schedules
+                      if self._on_schedule(day, date_rule)]
+            if on_bar is not None and self.subscribed:
+                events.append((MARKET_CLOSE, None))
+            # 同一时刻的事件按注册顺序执行
+            events.sort(key=lambda event: event[0])
+
+            for time_rule, func in events:
+                self._set_now(day, time_rule)
+                if func is None:
+                    bars = self._bars_on(day)
+                    if bars:
+                        on_bar(self.context, bars)
+                else:
+                    func(self.context)
+
+            self._set_now(day, MARKET_CLOSE)
+            self._mark(day)
+            nav[i] = self.ledger.nav()
+            self.ledger.settle()
+
+        for order, _ in self._pending:
+            order.update(status=OrderStatus_Rejected, ord_rej_reason_detail='回测结束，没有下一交易日',
+                         updated_at=self.context.now)
+            self._notify(order)
+        self._pending = []
+
+        self.nav = pd.Series(nav, index=pd.DatetimeIndex(days.astype('datetime64[ns]'), name='date'))
+        self.indicator = self._indicators()
+
+        on_finished = namespace.get('on_backtest_finished')
+        if on_finished is not None:
+            on_finished(self.context, self.indicator)
+        self.summary()
+
+    # ========== 行情 ==========
+
+    def _load_bars(self):
+        """打开合并存储（增量重建），交易日历为缓存中全部日线日期的并集"""
+        self._packed = BarStore.pack()
+        if self._packed is None or len(self._packed) == 0:
+            print('本地日线缓存为空（{}），{}'.format(
+                BarStore.STORE_DIR, '将从数据源获取' if self.fetch else '请先预热缓存或使用 --fetch'))
+            return
+
+        self._calendar = np.unique(np.concatenate(
+            [self._packed.bars(symbol)['date'] for symbol in self._packed.symbols]))
+        print('本地日线缓存: {} 只股票，{} ~ {}'.format(len(self._packed), self._calendar[0], self._calendar[-1]))
+
+    def _bars(self, symbol):
+        """标的的全部缓存日线（结构化数组），没有数据时返回 None"""
+        code = Universe.to_code(symbol)
+        if code in self._bar_cache:
+            return self._bar_cache[code]
+
+        bars = None
+        if self._packed is not None and code in self._packed:
+            bars = self._packed.bars(code)
+        elif self.fetch and len(self._calendar):
+            df = DataResilient.fetch_stock_data(
+                code, str(self._calendar[0]).replace('-', ''), str(self._calendar[-1]).replace('-', ''))
+            if df is not None and not df.empty:
+                bars = BarStore.to_bars(df)
+        if bars is None:
+            self._warn('bars:' + code, '本地缓存中没有 {} 的日线'.format(symbol))
+
+        self._bar_cache[code] = bars
+        return bars
+
+    def _close_asof(self, symbol, day):
+        """day 当天或之前最近一根日线的收盘价"""
+        bars = self._bars(symbol)
+        if bars is None:
+            return np.nan
+        i = np.searchsorted(bars['date'], day, side='right') - 1
+        return float(bars['close'][i]) if i >= 0 else np.nan
+
+    def _bar_at(self, symbol, day):
+        """day 当天的日线（停牌或无数据时返回 None）"""
+        bars = self._bars(symbol)
+        if bars is None:
+            return None
+        i = np.searchsorted(bars['date'], day)
+        if i < len(bars) and bars['date'][i] == day:
+            return bars[i]
+        return None
+
+    def _quote(self, symbol):
+        """当前时刻的价格：开盘前为昨收，盘中为今开，收盘后为今收"""
+        now = self.context.now.time()
+        if now >= MARKET_OPEN:
+            bar = self._bar_at(symbol, self._today)
+            if bar is not None:
+                return float(bar['close'] if now >= MARKET_CLOSE else bar['open'])
+        return self._close_asof(symbol, self._today - np.timedelta64(1, 'D'))
+
+    def _visible_day(self, end_time=None):
+        """history 的截止日：不晚于 end_time，也不晚于当前已收盘的最后一天（不读取未收盘的日线）"""
+        limit = self._today if self.context.now.time() >= MARKET_CLOSE else self._today - np.timedelta64(1, 'D')
+        if end_time is None or end_time == '':
+            return limit
+        return min(self._to_day(end_time), limit)
+
+    def _bars_on(self, day):
+        """订阅标的当天的日线（on_bar 的 bars 参数）"""
+        bars = []
+        for symbol in self.subscribed:
+            frame = self.history(symbol, '1d', day, day, df=True)
+            bars.extend(Record(row) for row in frame.to_dict('records'))
+        return bars
+
+    def history(self, symbol, frequency, start_time, end_time, fields=None, skip_suspended=True,
+                fill_missing=None, adjust=ADJUST_PREV, adjust_end_time='', df=False):
+        """
+        查询历史日线（多个标的用逗号分隔或传入列表）
+
+        返回:
+            DataFrame（df=True）或字典列表，字段见 BAR_FIELDS
+        """
+        self._check_frequency(frequency)
+        start_day = self._to_day(start_time)
+        end_day = self._visible_day(end_time)
+
+        pieces = []
+        for sym in self._split(symbol):
+            bars = self._bars(sym)
+            if bars is None:
+                continue
+            lo = np.searchsorted(bars['date'], start_day, side='left')
+            hi = np.searchsorted(bars['date'], end_day, side='right')
+            days = None
+            if not skip_suspended:
+                days = self._calendar[(self._calendar >= start_day) & (self._calendar <= end_day)]
+            pieces.append((sym, bars, lo, hi, days))
+        return self._output(pieces, fields, fill_missing, df)
+
+    def history_n(self, symbol, frequency, count, end_time=None, fields=None, skip_suspended=True,
+                  fill_missing=None, adjust=ADJUST_PREV, adjust_end_time='', df=False):
+        """查询截至 end_time（默认当前时间）的最近 count 根日线（单个标的）"""
+        self._check_frequency(frequency)
+        end_day = self._visible_day(end_time)
+
+        pieces = []
+        bars = self._bars(symbol)
+        if bars is not None:
+            hi = np.searchsorted(bars['date'], end_day, side='right')
+            days = None
+            if not skip_suspended:
+                days = self._calendar[self._calendar <= end_day][-count:]
+                lo = np.searchsorted(bars['date'], days[0], side='left') if len(days) else hi
+            else:
+                lo = max(hi - int(count), 0)
+            pieces.append((symbol, bars, lo, hi, days))
+        return self._output(pieces, fields, fill_missing, df)
+
+    def _output(self, pieces, fields, fill_missing, df):
+        """拼接各标的的日线切片为一张表（一次构建 DataFrame）"""
+        fields = self._parse_fields(fields)
+        frames = []
+        plain = [p for p in pieces if p[4] is None]
+        if plain:
+            frames.append(self._frame(plain))
+        for piece in pieces:
+            if piece[4] is not None:
+                frames.append(self._fill_suspended(piece, fill_missing))
+
+        if frames:
+            data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        else:
+            data = pd.DataFrame(columns=BAR_FIELDS)
+        data = data[fields]
+        if df:
+            return data
+        return [Record(row) for row in data.to_dict('records')]
+
+    @staticmethod
+    def _frame(pieces):
+        symbols, slices, pre_close = [], [], []
+        for symbol, bars, lo, hi, _ in pieces:
+            if hi <= lo:
+                continue
+            symbols.append(np.full(hi - lo, symbol, dtype=object))
+            slices.append(bars[lo:hi])
+            # 前收盘价取整段缓存的上一根，首根没有前收时为 NaN
+            previous = bars['close'][max(lo - 1, 0):hi - 1]
+            pre_close.append(previous if lo > 0 else np.concatenate([[np.nan], previous]))
+        if not slices:
+            return pd.DataFrame(columns=BAR_FIELDS)
+
+        bars = np.concatenate(slices)
+        eob = pd.DatetimeIndex(bars['date'].astype('datetime64[ns]')).tz_localize(TZ)
+        return pd.DataFrame({
+            'symbol': np.concatenate(symbols),
+            'frequency': '1d',
+            'open': bars['open'], 'high': bars['high'], 'low': bars['low'], 'close': bars['close'],
+            'volume': bars['volume'],
+            'pre_close': np.concatenate(pre_close),
+            'bob': eob, 'eob': eob,
+        })
+
+    def _fill_suspended(self, piece, fill_missing):
+        """skip_suspended=False：按交易日历补齐停牌日（Last 用前收盘价填充，成交量为 0）"""
+        symbol, bars, lo, hi, days = piece
+        data = self._frame([piece]).set_index('eob')
+        index = pd.DatetimeIndex(days.astype('datetime64[ns]')).tz_localize(TZ)
+        data = data.reindex(index)
+        if fill_missing == 'Last':
+            close = data['close'].ffill()
+            missing = data['close'].isna()
+            for column in ('open', 'high', 'low', 'close', 'pre_close'):
+                data[column] = data[column].fillna(close)
+            data.loc[missing, 'volume'] = 0
+        data['symbol'] = symbol
+        data['frequency'] = '1d'
+        data['bob'] = index
+        return data.rename_axis('eob').reset_index()
+
+    @staticmethod
+    def _parse_fields(fields):
+        if not fields:
+            return list(BAR_FIELDS)
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        fields = [field.strip() for field in fields if field.strip()]
+        unknown = [field for field in fields if field not in BAR_FIELDS]
+        if unknown:
+            raise ValueError('本地回测不支持的字段: {}，可选: {}'.format(unknown, BAR_FIELDS))
+        return fields
+
+    def current(self, symbols, fields=''):
+        """当前价格（开盘前为昨收，盘中为今开，收盘后为今收）"""
+        return [Record(symbol=symbol, price=self._quote(symbol), created_at=self.context.now)
+                for symbol in self._split(symbols)]
+
+    def subscribe(self, symbols, frequency='1d', count=1, wait_group=False, wait_group_timeout='10s',
+                  unsubscribe_previous=False, **kwargs):
+        if frequency != '1d':
+            self._warn('frequency:' + str(frequency), '本地回测只支持日线订阅，忽略 {} 频率'.format(frequency))
+            return
+        if unsubscribe_previous:
+            self.subscribed = []
+        for symbol in self._split(symbols):
+            if symbol not in self.subscribed:
+                self.subscribed.append(symbol)
+
+    def unsubscribe(self, symbols, frequency='1d'):
+        removed = set(self._split(symbols))
+        self.subscribed = [s for s in self.subscribed if s not in removed]
+
+    def schedule(self, schedule_func, date_rule, time_rule):
+        """定时任务：date_rule 为 1d（每个交易日）/ 1w（每周首个交易日）/ 1m（每月首个交易日）"""
+        if date_rule not in ('1d', '1w', '1m'):
+            raise ValueError('本地回测不支持的 date_rule: {}'.format(date_rule))
+        time_rule = datetime.datetime.strptime(time_rule, '%H:%M:%S').time()
+        self.schedules.append((schedule_func, date_rule, time_rule))
+
+    def _on_schedule(self, day, date_rule):
+        if date_rule == '1d':
+            return True
+        i = np.searchsorted(self._calendar, day)
+        if i == 0:
+            return True
+        previous = pd.Timestamp(self._calendar[i - 1])
+        current = pd.Timestamp(day)
+        if date_rule == '1w':
+            return previous.isocalendar()[:2] != current.isocalendar()[:2]
+        return (previous.year, previous.month) != (current.year, current.month)
+
+    # ========== 交易日历 ==========
+
+    def get_trading_dates(self, exchange, start_date, end_date):
+        start_day, end_day = self._to_day(start_date), self._to_day(end_date)
+        days = self._calendar[(self._calendar >= start_day) & (self._calendar <= end_day)]
+        return [str(day) for day in days]
+
+    def get_previous_n_trading_dates(self, exchange, date, n=1):
+        """date 之前（不含）的 n 个交易日，YYYY-MM-DD"""
+        i = np.searchsorted(self._calendar, self._to_day(date), side='left')
+        return [str(day) for day in self._calendar[max(i - n, 0):i]]
+
+    def get_next_n_trading_dates(self, exchange, date, n=1):
+        """date 之后（不含）的 n 个交易日，YYYY-MM-DD"""
+        i = np.searchsorted(self._calendar, self._to_day(date), side='right')
+        return [str(day) for day in self._calendar[i:i + n]]
+
+    # ========== 证券信息 ==========
+
+    def _snapshot(self, trade_date):
+        day = self._to_day(trade_date) if trade_date else self._today
+        key, table = Universe.nearest(str(day))
+        if key is None:
+            self._warn('snapshot', '没有全市场元数据快照（{}），请先运行一次 Universe.get()'.format(Universe.STORE_DIR))
+        elif key > str(day).replace('-', ''):
+            self._warn('snapshot:' + key, '{} 早于最早的元数据快照 {}，成分股、ST 等按该快照近似'.format(day, key))
+        return day, key, table
+
+    def _market_caps(self, table, day, key):
+        """按快照日与 day 的收盘价之比调整快照总市值（元）"""
+        snapshot_day = self._to_day(key)
+        ratios = np.array([self._close_asof(symbol, day) / self._close_asof(symbol, snapshot_day)
+                           for symbol in table['symbol']])
+        return table['tot_mv'].to_numpy(dtype=float) * 1e8 * ratios
+
+    def get_symbols(self, sec_type1, sec_type2=None, exchanges=None, symbols=None, skip_suspended=True,
+                    skip_st=True, trade_date=None, df=False, **kwargs):
+        """
+        证券信息（只支持股票 sec_type1=1010）
+
+        停牌按当天是否有缓存日线判断；ST、上市/退市日期来自元数据快照
+        """
+        columns = ['symbol', 'sec_id', 'sec_name', 'exchange', 'sec_type1', 'sec_type2', 'board',
+                   'listed_date', 'delisted_date', 'is_st', 'is_suspended', 'trade_date']
+        if sec_type1 != 1010:
+            self._warn('sec_type1:{}'.format(sec_type1), '本地回测 get_symbols 只支持股票(1010)')
+            return pd.DataFrame(columns=columns) if df else []
+
+        day, key, table = self._snapshot(trade_date)
+        if symbols:
+            codes = pd.Index([Universe.to_code(s) for s in self._split(symbols)])
+            table = table.loc[codes[codes.isin(table.index)]]
+        if exchanges:
+            table = table[table['exchange'].isin(self._split(exchanges))]
+
+        timestamp = pd.Timestamp(day)
+        listed = table['listed_date'].fillna(pd.Timestamp(UNKNOWN_LISTED_DATE))
+        delisted = table['delisted_date'].fillna(pd.Timestamp(NOT_DELISTED_DATE))
+        table = table[((listed <= timestamp) & (delisted > timestamp)).to_numpy()]
+        listed, delisted = listed.loc[table.index], delisted.loc[table.index]
+
+        suspended = np.array([self._bar_at(symbol, day) is None for symbol in table['symbol']], dtype=bool)
+        data = pd.DataFrame({
+            'symbol': table['symbol'].to_numpy(),
+            'sec_id': table.index.to_numpy(),
+            'sec_name': table['name'].to_numpy(),
+            'exchange': table['exchange'].to_numpy(),
+            'sec_type1': 1010,
+            'sec_type2': 101001,
+            'board': table['board'].to_numpy(),
+            'listed_date': pd.DatetimeIndex(listed).tz_localize(TZ),
+            'delisted_date': pd.DatetimeIndex(delisted).tz_localize(TZ),
+            'is_st': table['is_st'].to_numpy(dtype=bool),
+            'is_suspended': suspended,
+            'trade_date': str(day),
+        })
+        if skip_suspended:
+            data = data[~data['is_suspended']]
+        if skip_st:
+            data = data[~data['is_st']]
+        data = data.reset_index(drop=True)
+        if df:
+            return data
+        return [Record(row) for row in data.to_dict('records')]
+
+    def stk_get_index_constituents(self, index, trade_date=None):
+        """指数成分股（元数据快照中的成分，权重和市值按总市值近似，单位亿元）"""
+        columns = ['index', 'symbol', 'weight', 'trade_date', 'market_value_total', 'market_value_circ']
+        day, key, table = self._snapshot(trade_date)
+        column = 'in_{}'.format(Universe.to_code(index))
+        if key is None or column not in table.columns:
+            self._warn('index:' + index, '元数据快照中没有 {} 的成分股'.format(index))
+            return pd.DataFrame(columns=columns)
+
+        members = table[table[column].to_numpy(dtype=bool)]
+        market_value = self._market_caps(members, day, key) / 1e8
+        return pd.DataFrame({
+            'index': index,
+            'symbol': members['symbol'].to_numpy(),
+            'weight': market_value / np.nansum(market_value) * 100,
+            'trade_date': str(day),
+            'market_value_total': market_value,
+            'market_value_circ': market_value,
+        })
+
+    def stk_get_daily_mktvalue_pt(self, symbols, fields='tot_mv', trade_date=None, df=False):
+        """每日总市值（元），按快照市值 × 收盘价比例近似；其他字段不支持"""
+        requested = [f.strip() for f in str(fields).split(',') if f.strip()]
+        if [f for f in requested if f != 'tot_mv']:
+            self._warn('mktvalue_fields', '本地回测 stk_get_daily_mktvalue_pt 只支持 tot_mv 字段')
+
+        day, key, table = self._snapshot(trade_date)
+        codes = pd.Index([Universe.to_code(s) for s in self._split(symbols)])
+        table = table.loc[codes[codes.isin(table.index)]]
+        data = pd.DataFrame({
+            'symbol': table['symbol'].to_numpy(),
+            'trade_date': str(day),
+            'tot_mv': self._market_caps(table, day, key) if key is not None else np.nan,
+        }).dropna(subset=['tot_mv']).reset_index(drop=True)
+        if df:
+            return data
+        return [Record(row) for row in data.to_dict('records')]
+
+    # ========== 账户 ==========
+
+    def _mark(self, day):
+        """收盘后按当天（停牌取最近）收盘价更新持仓价格"""
+        held = self.ledger.held()
+        if len(held):
+            self.ledger.price[held] = [self._close_asof(self.ledger.symbols[i], day) for i in held]
+
+    def _nav_now(self):
+        """按当前价格计算的净值（下单计算目标仓位用）"""
+        held = self.ledger.held()
+        if len(held):
+            prices = np.array([self._quote(self.ledger.symbols[i]) for i in held])
+            valid = ~np.isnan(prices)
+            self.ledger.price[held[valid]] = prices[valid]
+        return self.ledger.nav()
+
+    def get_position(self, account_id=None):
+        ledger = self.ledger
+        positions = []
+        for i in ledger.held():
+            symbol = ledger.symbols[i]
+            volume, vwap = float(ledger.volume[i]), float(ledger.cost[i] / ledger.volume[i])
+            price = self._quote(symbol)
+            if np.isnan(price):
+                price = float(ledger.price[i])
+            positions.append(Record(
+                symbol=symbol, side=PositionSide_Long, volume=volume, volume_today=float(ledger.today[i]),
+                available=volume - float(ledger.today[i]), available_today=0.0,
+                vwap=vwap, price=price, amount=volume * vwap, cost=float(ledger.cost[i]),
+                market_value=volume * price, fpnl=volume * (price - vwap)))
+        return positions
+
+    def get_cash(self, account_id=None):
+        nav = self._nav_now()
+        return Record(nav=nav, available=self.ledger.cash, market_value=nav - self.ledger.cash,
+                      frozen=0.0, order_frozen=0.0, pnl=nav - self.initial_cash,
+                      fpnl=float(sum(p['fpnl'] for p in self.get_position())))
+
+    # ========== 下单 ==========
+
+    def order_volume(self, symbol, volume, side, order_type, position_effect=None, price=0, **kwargs):
+        return [self._order(symbol, order_type, price, side=side, volume=volume, position_effect=position_effect)]
+
+    def order_value(self, symbol, value, side, order_type, position_effect=None, price=0, **kwargs):
+        return [self._order(symbol, order_type, price, side=side, value=value, position_effect=position_effect)]
+
+    def order_percent(self, symbol, percent, side, order_type, position_effect=None, price=0, **kwargs):
+        return [self._order(symbol, order_type, price, side=side, value=percent * self._nav_now(),
+                            position_effect=position_effect)]
+
+    def order_target_volume(self, symbol, volume, position_side=PositionSide_Long, order_type=OrderType_Market,
+                            price=0, **kwargs):
+        return [self._order(symbol, order_type, price, target_volume=volume)]
+
+    def order_target_value(self, symbol, value, position_side=PositionSide_Long, order_type=OrderType_Market,
+                           price=0, **kwargs):
+        return [self._order(symbol, order_type, price, target_value=value)]
+
+    def order_target_percent(self, symbol, percent, position_side=PositionSide_Long, order_type=OrderType_Market,
+                             price=0, **kwargs):
+        return [self._order(symbol, order_type, price, target_value=percent * self._nav_now(),
+                            target_percent=percent)]
+
+    def order_close_all(self, **kwargs):
+        return [self._order(self.ledger.symbols[i], OrderType_Market, 0, target_volume=0)
+                for i in self.ledger.held()]
+
+    def order_cancel_all(self, **kwargs):
+        """撤销排队中的委托（match_mode=0 时等待下一交易日开盘撮合的市价单）"""
+        pending, self._pending = self._pending, []
+        for order, _ in pending:
+            order.update(status=OrderStatus_Canceled, updated_at=self.context.now)
+            self._notify(order)
+        return None
+
+    def _match(self, symbol, order_type, price):
+        """
+        撮合价格（未计滑点）与当天日线
+
+        返回:
+            (价格, 日线, 拒单原因)
+        """
+        if order_type == OrderType_Limit:
+            if not price or price <= 0:
+                return None, None, '限价单价格无效'
+            bar = self._bar_at(symbol, self._today)
+            if bar is None:
+                return None, None, '停牌或没有行情'
+            return float(price), bar, ''
+
+        bar = self._bar_at(symbol, self._today)
+        if bar is None:
+            return None, None, '停牌或没有行情'
+        return float(bar['open'] if self.match_mode == 0 else bar['close']), bar, ''
+
+    def _target_side(self, symbol, target_volume=None, target_value=None):
+        """目标仓位委托的买卖方向（没有撮合价时按当前价格估计持仓市值）"""
+        holding = self.ledger.holding(symbol)
+        if target_volume is not None:
+            return OrderSide_Buy if target_volume > holding else OrderSide_Sell
+        value = holding * self._quote(symbol) if holding else 0.0
+        return OrderSide_Buy if target_value > value else OrderSide_Sell
+
+    def _order(self, symbol, order_type, price, side=None, volume=None, value=None, target_volume=None,
+               target_value=None, target_percent=0, position_effect=None):
+        """
+        下单，委托结果通过 on_order_status 回调
+
+        match_mode=0 时开盘后的市价单在下一交易日开盘撮合：委托先排队（状态为已报），
+        资金和持仓在成交日才变动；其余委托立即撮合
+        """
+        if side is None and (target_volume is not None or target_value is not None):
+            side = self._target_side(symbol, target_volume, target_value)
+
+        self._order_id += 1
+        order = Record(
+            cl_ord_id=str(self._order_id), symbol=symbol, side=side,
+            position_side=PositionSide_Long,
+            position_effect=position_effect or (PositionEffect_Open if side == OrderSide_Buy
+                                                else PositionEffect_CloseYesterday),
+            order_type=order_type, price=float(price or 0),
+            volume=int(volume or 0), target_percent=target_percent, target_volume=target_volume or 0,
+            status=OrderStatus_New, ord_rej_reason_detail='',
+            filled_volume=0, filled_vwap=0.0, filled_amount=0.0, filled_commission=0.0,
+            created_at=self.context.now, updated_at=self.context.now)
+        self.orders.append(order)
+
+        request = dict(price=price, side=side, volume=volume, value=value, target_volume=target_volume,
+                       target_value=target_value, position_effect=position_effect)
+        if order_type == OrderType_Market and self.match_mode == 0 and self.context.now.time() >= MARKET_OPEN:
+            self._pending.append((order, request))
+            self._notify(order)
+        else:
+            self._fill(order, **request)
+        return order
+
+    def _fill_pending(self):
+        """按委托顺序撮合排队中的委托（交易日开盘、当天的定时任务之前调用）"""
+        pending, self._pending = self._pending, []
+        for order, request in pending:
+            self._fill(order, **request)
+
+    def _fill(self, order, price, side, volume, value, target_volume, target_value, position_effect):
+        """按当天日线撮合委托，更新账本和委托状态"""
+        ledger = self.ledger
+        symbol, order_type = order['symbol'], order['order_type']
+        reference, bar, reason = self._match(symbol, order_type, price)
+
+        if not reason:
+            if value is not None:
+                volume = value / reference
+            if target_value is not None:
+                target_volume = max(target_value, 0) / reference // 100 * 100
+            if target_volume is not None:
+                delta = target_volume - ledger.holding(symbol)
+                side = OrderSide_Buy if delta > 0 else OrderSide_Sell
+                volume = abs(delta)
+            volume = float(volume or 0)
+
+        if side == OrderSide_Buy:
+            fill = reference if order_type == OrderType_Limit else reference * (1 + self.slippage_ratio) \
+                if reference else None
+            if not reason and order_type == OrderType_Limit and price < bar['low']:
+                reason = '限价低于当日最低价，未成交'
+            if not reason:
+                # 按 100 股取整，现金不足时减量
+                affordable = ledger.cash / (fill * (1 + self.commission_ratio))
+                volume = min(volume, affordable) // 100 * 100
+                if volume <= 0:
+                    reason = '资金不足或委托数量不足一手'
+        else:
+            side = OrderSide_Sell
+            fill = reference if order_type == OrderType_Limit else reference * (1 - self.slippage_ratio) \
+                if reference else None
+            if not reason and order_type == OrderType_Limit and price > bar['high']:
+                reason = '限价高于当日最高价，未成交'
+            if not reason:
+                available = ledger.available(symbol)
+                # 卖出全部可卖数量时允许零股
+                volume = available if volume >= available else volume // 100 * 100
+                if volume <= 0:
+                    reason = '没有可卖持仓（T+1）'
+
+        order.update(
+            side=side,
+            position_effect=position_effect or (PositionEffect_Open if side == OrderSide_Buy
+                                                else PositionEffect_CloseYesterday),
+            price=round(fill, 4) if fill else float(price or 0), volume=int(volume or 0),
+            target_volume=target_volume or 0,
+            status=OrderStatus_Rejected if reason else OrderStatus_Filled, ord_rej_reason_detail=reason,
+            updated_at=self.context.now)
+
+        if not reason:
+            amount = volume * fill
+            commission = amount * self.commission_ratio
+            if side == OrderSide_Buy:
+                ledger.buy(symbol, volume, fill, commission)
+                pnl = None
+            else:
+                pnl = ledger.sell(symbol, volume, fill, commission)
+            order.update(filled_volume=int(volume), filled_vwap=fill, filled_amount=amount,
+                         filled_commission=commission)
+            self.trades.append(dict(date=str(self._today), symbol=symbol, side=side, volume=volume,
+                                    price=fill, commission=commission, pnl=pnl))
+        self._notify(order)
+
+    def _notify(self, order):
+        """委托状态回调；成交时同时回调 on_execution_report"""
+        on_order_status = self._namespace.get('on_order_status')
+        if on_order_status is not None:
+            on_order_status(self.context, order)
+        on_execution_report = self._namespace.get('on_execution_report')
+        if on_execution_report is not None and order['status'] == OrderStatus_Filled:
+            on_execution_report(self.context, order)
+
+    # ========== 结果 ==========
+
+    def _indicators(self):
+        """回测指标（字段与掘金 on_backtest_finished 的 indicator 一致，比例均为小数）"""
+        nav = self.nav
+        returns = nav.pct_change().fillna(nav.iloc[0] / self.initial_cash - 1)
+        pnl_ratio = nav.iloc[-1] / self.initial_cash - 1
+        years = len(nav) / 252.0
+        annual = (1 + pnl_ratio) ** (1 / years) - 1 if pnl_ratio > -1 else -1.0
+        volatility = returns.std() * np.sqrt(252) if len(returns) > 1 else 0.0
+        drawdown = 1 - nav / np.maximum(nav.cummax(), self.initial_cash)
+        max_drawdown = float(drawdown.max())
+
+        closes = [t['pnl'] for t in self.trades if t['pnl'] is not None]
+        win_count = sum(1 for pnl in closes if pnl > 0)
+        return Record(
+            account_id='local',
+            pnl_ratio=float(pnl_ratio),
+            pnl_ratio_annual=float(annual),
+            sharp_ratio=float((annual - RISK_FREE_RATE) / volatility) if volatility > 0 else 0.0,
+            max_drawdown=max_drawdown,
+            calmar_ratio=float(annual / max_drawdown) if max_drawdown > 0 else 0.0,
+            open_count=sum(1 for t in self.trades if t['side'] == OrderSide_Buy),
+            close_count=len(closes),
+            win_count=win_count,
+            lose_count=len(closes) - win_count,
+            win_ratio=win_count / len(closes) if closes else 0.0,
+            nav=float(nav.iloc[-1]),
+            created_at=self.nav.index[0], updated_at=self.nav.index[-1])
+
+    def summary(self):
+        """打印回测结果"""
+        indicator = self.indicator
+        if indicator is None:
+            return
+        print('=' * 60)
+        print('本地回测结果: {} ~ {}'.format(self.nav.index[0].date(), self.nav.index[-1].date()))
+        print('  期末净值:   {:.2f}'.format(indicator['nav']))
+        print('  累计收益率: {:.2%}'.format(indicator['pnl_ratio']))
+        print('  年化收益率: {:.2%}'.format(indicator['pnl_ratio_annual']))
+        print('  最大回撤:   {:.2%}'.format(indicator['max_drawdown']))
+        print('  夏普比率:   {:.2f}'.format(indicator['sharp_ratio']))
+        print('  开仓 {} 次，平仓 {} 次，胜率 {:.2%}'.format(
+            indicator['open_count'], indicator['close_count'], indicator['win_ratio']))
+        rejected = sum(1 for order in self.orders if order['status'] == OrderStatus_Rejected)
+        if rejected:
+            print('  拒单 {} 笔'.format(rejected))
+        print('=' * 60)
+
+    # ========== 工具 ==========
+
+    def _set_now(self, day, time_rule):
+        self._today = np.datetime64(day, 'D')
+        now = pd.Timestamp(datetime.datetime.combine(pd.Timestamp(day).date(), time_rule)).tz_localize(TZ)
+        self.context.now = now.to_pydatetime()
+
+    @staticmethod
+    def _to_day(value):
+        """日期/时间 -> datetime64[D]（带时区的按北京时间取日期）"""
+        day = pd.Timestamp(value)
+        if day.tzinfo is not None:
+            day = day.tz_convert(TZ).tz_localize(None)
+        return np.datetime64(day.normalize().date(), 'D')
+
+    @staticmethod
+    def _split(symbols):
+        if isinstance(symbols, str):
+            return [s.strip() for s in symbols.split(',') if s.strip()]
+        return list(symbols)
+
+    @staticmethod
+    def _check_frequency(frequency):
+        if frequency != '1d':
+            raise ValueError('本地回测只支持日线(1d)，不支持 {}'.format(frequency))
+
+    def _warn(self, key, message):
+        """同一提示只打印一次"""
+        if key not in self._warned:
+            self._warned.add(key)
+            print(message)
+
+
+def _parse_overrides(items):
+    """--set key=value，值按 Python 字面量解析，解析失败时作为字符串"""
+    overrides = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        try:
+            overrides[name.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[name.strip()] = value
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用本地日线缓存回测掘金策略（无需掘金终端）')
+    parser.add_argument('strategy', help='策略文件路径，如 Efinance_Strategy/ml_strategy.py')
+    parser.add_argument('--start', help='回测开始日期（默认使用策略中的设置）')
+    parser.add_argument('--end', help='回测结束日期（默认使用策略中的设置）')
+    parser.add_argument('--cash', type=float, help='初始资金（默认使用策略中的设置）')
+    parser.add_argument('--set', action='append', dest='overrides', metavar='KEY=VALUE',
+                        help='覆盖 context 参数，可重复，如 --set refit_days=5')
+    parser.add_argument('--fetch', action='store_true', help='缓存中没有的股票从数据源获取')
+    parser.add_argument('--output', help='保存每日净值的 CSV 路径')
+    args = parser.parse_args()
+
+    strategy = os.path.abspath(args.strategy)
+    # 缓存目录相对于项目根目录
+    os.chdir(PROJECT_ROOT)
+    engine = LocalBacktest(strategy, start=args.start, end=args.end, cash=args.cash,
+                           overrides=_parse_overrides(args.overrides), fetch=args.fetch)
+    engine.run()
+    if args.output and len(engine.nav):
+        engine.nav.rename('nav').to_csv(args.output)
+        print('每日净值已保存: {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+SVM 策略的滚动窗口特征矩阵
+
+训练样本的每一行都是以某个交易日结尾的固定长度窗口上的特征。
+逐行切片 .loc 窗口再重新计算均值、标准差、RSI，是 N 次 Python 循环、每次 O(W)；
+这里用 sliding_window_view 一次得到全部窗口（只读视图，不复制数据），
+所有特征按行向量化计算，结果与逐窗口计算的旧实现逐位一致。
+
+约定: 特征矩阵第 r 行对应以第 r + window - 1 根 K 线结尾的窗口，
+最后一行即为最新一期（待预测）的特征。
+
+用法:
+    features = basic_features(data, context.history_len + 1)
+    labels = forward_labels(data['close'].values, context.forecast_len)
+"""
+from __future__ import print_function, absolute_import, unicode_literals
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_windows(values, window):
+    """
+    全部长度为 window 的滑动窗口
+
+    参数:
+        values: 一维数组（长度 N）
+        window: 窗口长度
+
+    返回:
+        形状为 (N - window + 1, window) 的只读视图，N < window 时为空
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < window:
+        return np.empty((0, window))
+    return sliding_window_view(values, window)
+
+
+def rolling_rsi(windows, period=14):
+    """
+    每个窗口末端的 RSI（窗口内最近 period 个涨跌幅的平均涨幅/平均跌幅）
+
+    窗口长度不足 period + 1 时为 50，平均跌幅为 0 时为 100
+    """
+    if windows.shape[1] < period + 1:
+        return np.full(len(windows), 50.0)
+    deltas = np.diff(windows[:, -period - 1:], axis=1)
+    avg_gain = np.mean(np.where(deltas > 0, deltas, 0), axis=1)
+    avg_loss = np.mean(np.where(deltas < 0, -deltas, 0), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    return np.where(avg_loss == 0, 100, rsi)
+
+
+def rolling_macd(windows, fast=12, slow=26, signal=9):
+    """
+    每个窗口末端的 MACD、信号线、柱状图
+    EMA 在每个窗口内从窗口起点重新计算（与逐窗口 pandas ewm(adjust=False) 一致），
+    只在窗口长度上循环，所有窗口同时递推
+    """
+    alpha_fast = 2.0 / (fast + 1.0)
+    alpha_slow = 2.0 / (slow + 1.0)
+    alpha_signal = 2.0 / (signal + 1.0)
+    ema_fast = windows[:, 0].copy()
+    ema_slow = windows[:, 0].copy()
+    macd = ema_fast - ema_slow
+    signal_line = macd.copy()
+    for k in range(1, windows.shape[1]):
+        # 递推及归一化方式与 pandas adjust=False 保持一致
+        price = windows[:, k]
+        ema_fast = ((1.0 - alpha_fast) * ema_fast + alpha_fast * price) / ((1.0 - alpha_fast) + alpha_fast)
+        ema_slow = ((1.0 - alpha_slow) * ema_slow + alpha_slow * price) / ((1.0 - alpha_slow) + alpha_slow)
+        macd = ema_fast - ema_slow
+        signal_line = (((1.0 - alpha_signal) * signal_line + alpha_signal * macd)
+                       / ((1.0 - alpha_signal) + alpha_signal))
+    return macd, signal_line, macd - signal_line
+
+
+def forward_labels(close, forecast_len, threshold=1.0):
+    """
+    前瞻涨跌标签：第 i 行为 close[i + forecast_len] > close[i + 1] * threshold
+
+    参数:
+        close: 收盘价数组（长度 N）
+        forecast_len: 预测窗口长度
+        threshold: 上涨阈值（1.01 表示至少上涨 1%）
+
+    返回:
+        长度为 N - forecast_len 的 0/1 数组（之后的行没有完整的未来数据）
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close) - forecast_len
+    if n <= 0:
+        return np.empty(0, dtype=int)
+    return (close[forecast_len:forecast_len + n] > close[1:1 + n] * threshold).astype(int)
+
+
+def basic_features(data, window):
+    """
+    基础 SVM 特征（ml_strategy）
+
+    特征: 收盘价/均值、现量/均量、最高价/均价、最低价/均价、现量、区间收益率、区间标准差
+
+    参数:
+        data: 含 close/high/low/volume 列的日线 DataFrame
+        window: 窗口长度
+
+    返回:
+        形状为 (N - window + 1, 7) 的特征矩阵
+    """
+    close = rolling_windows(data['close'].values, window)
+    high = rolling_windows(data['high'].values, window)
+    low = rolling_windows(data['low'].values, window)
+    volume = rolling_windows(data['volume'].values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.column_stack([
+            close[:, -1] / np.mean(close, axis=1),      # 收盘价/均值
+            volume[:, -1] / np.mean(volume, axis=1),    # 现量/均量
+            high[:, -1] / np.mean(high, axis=1),        # 最高价/均价
+            low[:, -1] / np.mean(low, axis=1),          # 最低价/均价
+            volume[:, -1],                              # 现量
+            close[:, -1] / close[:, 0],                 # 区间收益率
+            np.std(close, axis=1)                       # 区间标准差
+        ])
+
+
+def enhanced_features(data, window, bb_period=20, bb_std=2):
+    """
+    增强 SVM 特征（ml_strategy_enhanced）
+
+    在基础特征之后追加 MACD、信号线、柱状图、RSI、布林带位置、5日动量、年化波动率
+
+    返回:
+        形状为 (N - window + 1, 14) 的特征矩阵
+    """
+    close = rolling_windows(data['close'].values, window)
+    high = rolling_windows(data['high'].values, window)
+    low = rolling_windows(data['low'].values, window)
+    volume = rolling_windows(data['volume'].values, window)
+    last = close[:, -1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_mean = np.mean(volume, axis=1)
+        macd, signal_line, histogram = rolling_macd(close)
+
+        bb_mid = np.mean(close[:, -bb_period:], axis=1)
+        bb_width = np.std(close[:, -bb_period:], axis=1)
+        bb_upper = bb_mid + bb_std * bb_width
+        bb_lower = bb_mid - bb_std * bb_width
+        bb_position = np.where(bb_upper > bb_lower, (last - bb_lower) / (bb_upper - bb_lower), 0.5)
+
+        if window >= 5:
+            momentum = (last - close[:, -5]) / close[:, -5]
+        else:
+            momentum = np.zeros(len(close))
+        if window > 1:
+            volatility = np.std(np.diff(close, axis=1) / close[:, :-1], axis=1) * np.sqrt(252)
+        else:
+            volatility = np.zeros(len(close))
+
+        return np.column_stack([
+            last / np.mean(close, axis=1),
+            np.where(volume_mean > 0, volume[:, -1] / volume_mean, 1),
+            high[:, -1] / np.mean(high, axis=1),
+            low[:, -1] / np.mean(low, axis=1),
+            volume[:, -1],
+            last / close[:, 0],
+            np.std(close, axis=1),
+            macd, signal_line, histogram,
+            rolling_rsi(close),
+            bb_position,
+            momentum,
+            volatility
+        ])
+
+
+def trend_features(windows):
+    """
+    收盘价趋势特征（style_ml_enhanced，指数训练样本与个股预测共用）
+
+    特征: 收盘价/均值、区间收益率、变异系数、RSI、5日动量、10日动量、MA5/MA20 趋势
+
+    参数:
+        windows: 形状为 (样本数, 窗口长度) 的收盘价窗口
+
+    返回:
+        形状为 (样本数, 7) 的特征矩阵
+    """
+    last = windows[:, -1]
+    zeros = np.zeros(len(windows))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.mean(windows, axis=1)
+        momentum_5 = (last - windows[:, -5]) / windows[:, -5] if windows.shape[1] >= 5 else zeros
+        momentum_10 = (last - windows[:, -10]) / windows[:, -10] if windows.shape[1] >= 10 else zeros
+        ma_short = np.mean(windows[:, -5:], axis=1)
+        ma_long = np.mean(windows[:, -20:], axis=1)
+        return np.column_stack([
+            last / mean,
+            (last - windows[:, 0]) / windows[:, 0],
+            np.where(mean > 0, np.std(windows, axis=1) / mean, 0),
+            rolling_rsi(windows),
+            momentum_5,
+            momentum_10,
+            np.where(ma_long > 0, (ma_short - ma_long) / ma_long, 0)
+        ])
@@ -9,6 +9,9 @@ import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from ml_features import basic_features, forward_labels
+from model_store import ModelStore
+
 # 加载.env文件
 load_dotenv()
 
@@ -63,6 +66,12 @@ def init(context):
     context.earn_rate = 0.10
     # 最小涨幅卖出幅度
     context.sell_rate = 0.02
+    # 模型重新训练间隔（交易日）。默认 1：每个调度日都重新训练，与不缓存时的预测一致；
+    # 设为 20 等更大的值时未到期复用上次训练的模型（回测更快，但买卖信号会变化）
+    context.refit_days = 1
+    # 是否使用热启动的SGD逻辑回归代替SVM（快速路径）
+    context.fast_path = False
+    context.model_store = ModelStore(refit_days=context.refit_days, fast_path=context.fast_path)
     # 每日09:31执行策略
     schedule(schedule_func=algo, date_rule='1d', time_rule='09:31:00')
 
@@ -106,54 +115,23 @@ def clf_fit(context, end_date):
     """
     # 获取目标股票的daily历史行情 - 使用history_n避免180天时间范围限制
     recent_data = history_n(symbol=context.symbol, frequency='1d', count=context.training_len, end_time=end_date, fill_missing='Last', adjust=ADJUST_PREV, df=True).set_index('eob')
-    days = list(recent_data['bob'])
-
-    x_train = []
-    y_train = []
-    # 整理训练数据
-    for index in range(context.history_len, len(recent_data)):
-        ## 自变量 X
-        # 回溯N个交易日相关数据
-        start_date = recent_data.index[index-context.history_len]
-        end_date = recent_data.index[index]
-        data = recent_data.loc[start_date:end_date,:]
-        # 准备训练数据
-        close = data['close'].values
-        max_x = data['high'].values
-        min_n = data['low'].values
-        volume = data['volume'].values
-        close_mean = close[-1] / np.mean(close)  # 收盘价/均值
-        volume_mean = volume[-1] / np.mean(volume)  # 现量/均量
-        max_mean = max_x[-1] / np.mean(max_x)  # 最高价/均价
-        min_mean = min_n[-1] / np.mean(min_n)  # 最低价/均价
-        vol = volume[-1]  # 现量
-        return_now = close[-1] / close[0]  # 区间收益率
-        std = np.std(np.array(close), axis=0)  # 区间标准差
-        # 将计算出的指标添加到训练集X
-        x_train.append([close_mean, volume_mean, max_mean, min_mean, vol, return_now, std])
-        
-        ## 因变量 Y
-        if index<len(recent_data)-context.forecast_len:
-            y_start_date = recent_data.index[index+1]
-            y_end_date = recent_data.index[index+context.forecast_len]
-            y_data = recent_data.loc[y_start_date:y_end_date,'close']
-            if y_data.iloc[-1] > y_data.iloc[0]:
-                label = 1
-            else:
-                label = 0
-            y_train.append(label)
-        
-        # 最新一期的数据(返回该数据，作为待预测的数据)
-        if index==len(recent_data)-1:
-            new_x_traain = [close_mean, volume_mean, max_mean, min_mean, vol, return_now, std]
-    else:
-        # 剔除最后context.forecast_len期的数据
-        x_train = x_train[:-context.forecast_len]
-
-    # 训练SVM
-    context.clf = svm.SVC(C=1.0, kernel='rbf', degree=3, gamma='auto', coef0=0.0, shrinking=True, probability=False,
-                          tol=0.001, cache_size=200, verbose=False, max_iter=-1,decision_function_shape='ovr', random_state=None)
-    context.clf.fit(x_train, y_train)
+
+    # 整理训练数据：以第 i 根K线结尾、回溯N个交易日的窗口（共 history_len + 1 根）
+    features = basic_features(recent_data, context.history_len + 1)
+    # 因变量 Y：未来第1日到第M日收盘价是否上涨
+    labels = forward_labels(recent_data['close'].values, context.forecast_len)
+    # 剔除最后context.forecast_len期的数据（没有完整的未来数据）
+    x_train = features[:-context.forecast_len]
+    y_train = labels[context.history_len:]
+    # 最新一期的数据(返回该数据，作为待预测的数据)
+    new_x_traain = features[-1]
+
+    # 训练SVM（训练窗口距上次训练不足 refit_days 个交易日时复用缓存的模型）
+    model_key = (context.symbol, 'basic', context.history_len, context.forecast_len, context.training_len)
+    context.clf = context.model_store.fit(
+        model_key, end_date, x_train, y_train,
+        factory=lambda: svm.SVC(C=1.0, kernel='rbf', degree=3, gamma='auto', coef0=0.0, shrinking=True, probability=False,
+                                tol=0.001, cache_size=200, verbose=False, max_iter=-1,decision_function_shape='ovr', random_state=None))
 
     # 返回最新数据
     return new_x_traain
@@ -194,6 +172,7 @@ def on_order_status(context, order):
 
 def on_backtest_finished(context, indicator):
     print('*'*50)
+    context.model_store.summary()
     print('回测已完成，请通过右上角“回测历史”功能查询详情。')
 
 
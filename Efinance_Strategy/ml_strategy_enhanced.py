@@ -9,6 +9,9 @@ import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from ml_features import enhanced_features, forward_labels
+from model_store import ModelStore
+
 # 加载.env文件
 load_dotenv()
 
@@ -67,6 +70,12 @@ def init(context):
     context.stop_loss_rate = 0.05
     # 预测概率阈值（只使用高置信度预测）
     context.prob_threshold = 0.65
+    # 模型重新训练间隔（交易日）。默认 1：每个调度日都重新训练，与不缓存时的预测一致；
+    # 设为 20 等更大的值时未到期复用上次训练的模型与标准化器（回测更快，但买卖信号会变化）
+    context.refit_days = 1
+    # 是否使用热启动的SGD逻辑回归代替SVM（快速路径）
+    context.fast_path = False
+    context.model_store = ModelStore(refit_days=context.refit_days, fast_path=context.fast_path)
     # 每日09:31执行策略
     schedule(schedule_func=algo, date_rule='1d', time_rule='09:31:00')
 
@@ -199,26 +208,6 @@ def check_technical_indicators(data):
     return sum(conditions) >= 3  # 至少满足3个条件
 
 
-def calculate_macd(prices, fast=12, slow=26, signal=9):
-    """计算MACD指标"""
-    prices = pd.Series(prices)
-    exp1 = prices.ewm(span=fast, adjust=False).mean()
-    exp2 = prices.ewm(span=slow, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    histogram = macd - signal_line
-    return macd.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1]
-
-
-def calculate_bollinger_bands(prices, period=20, std_dev=2):
-    """计算布林带"""
-    ma = np.mean(prices[-period:])
-    std = np.std(prices[-period:])
-    upper = ma + std_dev * std
-    lower = ma - std_dev * std
-    return ma, upper, lower
-
-
 def clf_fit(context, end_date):
     """训练支持向量机模型（优化版）"""
     # 获取更多历史数据
@@ -229,110 +218,42 @@ def clf_fit(context, end_date):
     if len(recent_data) < context.history_len + 50:
         return None
 
-    x_train = []
-    y_train = []
-
-    # 整理训练数据
-    for index in range(context.history_len + 20, len(recent_data)):
-        data = recent_data.iloc[index-context.history_len-20:index]
-        close = data['close'].values
-        high = data['high'].values
-        low = data['low'].values
-        volume = data['volume'].values
-
-        # ===== 原始特征 =====
-        close_mean = close[-1] / np.mean(close)
-        volume_mean = volume[-1] / np.mean(volume) if np.mean(volume) > 0 else 1
-        max_mean = high[-1] / np.mean(high)
-        min_mean = low[-1] / np.mean(low)
-        vol = volume[-1]
-        return_now = close[-1] / close[0]
-        std = np.std(close)
-
-        # ===== 新增技术指标特征 =====
-        # MACD
-        macd, signal, hist = calculate_macd(close)
-        # RSI
-        rsi = calculate_rsi(close)
-        # 布林带位置
-        bb_mid, bb_upper, bb_lower = calculate_bollinger_bands(close)
-        bb_position = (close[-1] - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else 0.5
-        # 动量
-        momentum = (close[-1] - close[-5]) / close[-5] if len(close) >= 5 else 0
-        # 波动率
-        volatility = np.std(np.diff(close) / close[:-1]) * np.sqrt(252) if len(close) > 1 else 0
-
-        # 组合特征
-        features = [close_mean, volume_mean, max_mean, min_mean, vol,
-                   return_now, std, macd, signal, hist, rsi, bb_position,
-                   momentum, volatility]
-
-        x_train.append(features)
-
-        # 标签：未来5天是否上涨
-        if index < len(recent_data) - context.forecast_len:
-            future_close = recent_data['close'].iloc[index+1:index+context.forecast_len+1].values
-            if future_close[-1] > future_close[0] * 1.01:  # 至少上涨1%
-                label = 1
-            else:
-                label = 0
-            y_train.append(label)
-
-    # 剔除最后forecast_len期
+    # 整理训练数据：第 r 行为以第 r + window - 1 根K线结尾的窗口，最后一行用于预测
+    window = context.history_len + 20
+    features = enhanced_features(recent_data, window)
+    # 标签：未来5天是否上涨（至少上涨1%）
+    labels = forward_labels(recent_data['close'].values, context.forecast_len, 1.01)
+
+    # 第 index 个样本使用 index 之前的窗口，剔除最后forecast_len期
+    x_train = features[:-1]
     x_train = x_train[:-context.forecast_len] if len(x_train) > context.forecast_len else x_train
+    y_train = labels[window:]
 
     if len(x_train) < 20 or len(y_train) < 20:
         return None
 
-    # 特征标准化
-    scaler = StandardScaler()
-    x_train_scaled = scaler.fit_transform(x_train)
-
-    # 训练优化的SVM
-    context.scaler = scaler
-    context.clf = svm.SVC(
-        C=10.0,                    # 增大正则化参数
-        kernel='rbf',
-        gamma=0.1,                 # 显式指定gamma
-        probability=True,          # 启用概率预测
-        class_weight='balanced',   # 处理样本不平衡
-        cache_size=500,
-        random_state=42
-    )
-    context.clf.fit(x_train_scaled, y_train)
-
-    # 准备预测数据
-    data = recent_data.iloc[-context.history_len-20:]
-    close = data['close'].values
-    high = data['high'].values
-    low = data['low'].values
-    volume = data['volume'].values
-
-    close_mean = close[-1] / np.mean(close)
-    volume_mean = volume[-1] / np.mean(volume) if np.mean(volume) > 0 else 1
-    max_mean = high[-1] / np.mean(high)
-    min_mean = low[-1] / np.mean(low)
-    vol = volume[-1]
-    return_now = close[-1] / close[0]
-    std = np.std(close)
-
-    macd, signal, hist = calculate_macd(close)
-    rsi = calculate_rsi(close)
-    bb_mid, bb_upper, bb_lower = calculate_bollinger_bands(close)
-    bb_position = (close[-1] - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else 0.5
-    momentum = (close[-1] - close[-5]) / close[-5] if len(close) >= 5 else 0
-    volatility = np.std(np.diff(close) / close[:-1]) * np.sqrt(252) if len(close) > 1 else 0
-
-    new_x = [close_mean, volume_mean, max_mean, min_mean, vol,
-            return_now, std, macd, signal, hist, rsi, bb_position,
-            momentum, volatility]
-
-    # 标准化预测数据
-    new_x_scaled = scaler.transform([new_x])
+    # 特征标准化 + 训练优化的SVM（训练窗口距上次训练不足 refit_days 个交易日时复用缓存）
+    model_key = (context.symbol, 'enhanced', context.history_len, context.forecast_len, context.training_len)
+    context.clf = context.model_store.fit(
+        model_key, end_date, x_train, y_train,
+        factory=lambda: svm.SVC(
+            C=10.0,                    # 增大正则化参数
+            kernel='rbf',
+            gamma=0.1,                 # 显式指定gamma
+            probability=True,          # 启用概率预测
+            class_weight='balanced',   # 处理样本不平衡
+            cache_size=500,
+            random_state=42
+        ),
+        scale=True)
+    context.scaler = context.clf.scaler
+
+    # 准备预测数据（按训练时的标准化器转换）
+    new_x = features[-1]
 
     # 获取预测和概率
-    prediction = context.clf.predict(new_x_scaled)[0]
-    probability = context.clf.predict_proba(new_x_scaled)[0, 1]  # 上涨概率
+    prediction = context.clf.predict([new_x])[0]
+    probability = context.clf.predict_proba([new_x])[0, 1]  # 上涨概率
 
     return prediction, probability
 
@@ -363,6 +284,7 @@ def on_order_status(context, order):
 def on_backtest_finished(context, indicator):
     print('*'*50)
     print('回测已完成，请通过右上角"回测历史"功能查询详情。')
+    context.model_store.summary()
     print('【回测结果摘要】')
     for key, value in indicator.items():
         print(f'{key}: {value}')
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+回测内的模型缓存
+
+ML 策略在每个调度日都用滑动训练窗口重新训练模型，相邻两次的训练窗口只差几行，
+而 SVC(probability=True) 每次训练还要做一轮内部 5 折交叉验证。
+ModelStore 按 (标的, 特征配置) 缓存已训练的模型和标准化器：
+训练窗口末端距上次训练不足 refit_days 个交易日时直接复用，否则重新训练。
+
+快速路径（fast_path=True）改用 SGD 逻辑回归，每次到期时在当前窗口上
+partial_fit 一轮，从上一次的系数继续训练（热启动），不做内部交叉验证，
+耗时随样本数线性增长，适合每日重新训练。
+
+用法:
+    context.model_store = ModelStore(refit_days=context.refit_days)  # init 中创建
+    model = context.model_store.fit(key, end_date, x_train, y_train,
+                                    factory=lambda: svm.SVC(probability=True), scale=True)
+    probability = model.predict_proba([new_x])[0, 1]
+"""
+from __future__ import print_function, absolute_import, unicode_literals
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class FittedModel(object):
+    """已训练的模型（预测时按训练时的标准化器转换特征）"""
+
+    def __init__(self, model, scaler, end_day, rows):
+        self.model = model
+        self.scaler = scaler
+        self.end_day = end_day
+        self.rows = rows
+        self.fit_count = 0
+        self.fit_seconds = 0.0
+
+    def transform(self, x):
+        x = np.asarray(x, dtype=float)
+        return self.scaler.transform(x) if self.scaler is not None else x
+
+    def predict(self, x):
+        return self.model.predict(self.transform(x))
+
+    def predict_proba(self, x):
+        return self.model.predict_proba(self.transform(x))
+
+
+class ModelStore(object):
+    """
+    模型缓存（一个回测一个实例）
+
+    key 由调用方给出，应包含标的与特征配置（窗口长度、预测周期等），
+    配置不同的模型互不复用
+    """
+
+    def __init__(self, refit_days=1, fast_path=False, sgd_params=None):
+        """
+        参数:
+            refit_days: 重新训练的间隔（交易日）。1 表示训练窗口末端变化就重新训练，
+                        与不使用缓存的结果一致
+            fast_path: 是否使用热启动的 SGD 逻辑回归代替调用方的模型
+            sgd_params: 快速路径 SGDClassifier 的额外参数
+        """
+        self.refit_days = max(1, int(refit_days))
+        self.fast_path = fast_path
+        self.sgd_params = dict(sgd_params or {})
+
+        # {key: FittedModel}
+        self._models = {}
+        self.fit_count = 0
+        self.reuse_count = 0
+        self.fit_seconds = 0.0
+
+    def fit(self, key, end_time, x_train, y_train, factory=None, scale=False):
+        """
+        获取截至 end_time 的模型：缓存未过期时复用，否则重新训练
+
+        参数:
+            key: 缓存键，如 (symbol, 'basic', history_len, forecast_len, training_len)
+            end_time: 训练窗口末端（'YYYY-MM-DD' 或 datetime）
+            x_train: 训练特征
+            y_train: 训练标签
+            factory: 返回未训练模型的函数（快速路径下不使用）
+            scale: 是否先对特征标准化（快速路径总是标准化，SGD 对特征尺度敏感）
+
+        返回:
+            FittedModel
+        """
+        end_day = self._to_day(end_time)
+        cached = self._models.get(key)
+        if cached is not None and not self.needs_refit(cached, end_day):
+            self.reuse_count += 1
+            return cached
+
+        started = time.perf_counter()
+        x_train = np.asarray(x_train, dtype=float)
+        y_train = np.asarray(y_train)
+        if self.fast_path:
+            fitted = self._fit_sgd(cached, end_day, x_train, y_train)
+        else:
+            fitted = self._fit_full(end_day, x_train, y_train, factory, scale)
+        elapsed = time.perf_counter() - started
+
+        fitted.fit_count = (cached.fit_count if cached is not None else 0) + 1
+        fitted.fit_seconds = (cached.fit_seconds if cached is not None else 0.0) + elapsed
+        self._models[key] = fitted
+        self.fit_count += 1
+        self.fit_seconds += elapsed
+        return fitted
+
+    def needs_refit(self, fitted, end_day):
+        """训练窗口末端是否已前移 refit_days 个交易日及以上（或回退）"""
+        if end_day < fitted.end_day:
+            return True
+        return self._trading_days_between(fitted.end_day, end_day) >= self.refit_days
+
+    def clear(self):
+        """清除全部缓存模型"""
+        self._models.clear()
+
+    def summary(self):
+        """打印训练/复用次数与训练耗时"""
+        total = self.fit_count + self.reuse_count
+        print('模型缓存: 训练 {} 次，复用 {} 次（复用率 {:.1%}），训练耗时 {:.2f} 秒'.format(
+            self.fit_count, self.reuse_count, self.reuse_count / total if total else 0, self.fit_seconds))
+        for key, fitted in self._models.items():
+            print('  {}: 训练 {} 次，耗时 {:.2f} 秒，最近训练至 {}（{} 个样本）'.format(
+                key, fitted.fit_count, fitted.fit_seconds, fitted.end_day.strftime('%Y-%m-%d'), fitted.rows))
+
+    @staticmethod
+    def _fit_full(end_day, x_train, y_train, factory, scale):
+        """在当前训练窗口上重新训练调用方的模型"""
+        scaler = None
+        if scale:
+            from sklearn.preprocessing import StandardScaler
+            scaler = StandardScaler()
+            x_train = scaler.fit_transform(x_train)
+        model = factory()
+        model.fit(x_train, y_train)
+        return FittedModel(model, scaler, end_day, len(x_train))
+
+    def _fit_sgd(self, cached, end_day, x_train, y_train):
+        """SGD 逻辑回归：在当前训练窗口上 partial_fit 一轮，从上次的系数继续"""
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.utils.class_weight import compute_sample_weight
+
+        if cached is not None and isinstance(cached.model, SGDClassifier):
+            model, scaler = cached.model, cached.scaler
+        else:
+            # 较强的 L2 正则，避免单轮 partial_fit 后概率集中在 0/1 附近
+            params = dict(loss='log_loss', alpha=0.01, random_state=42)
+            params.update(self.sgd_params)
+            model, scaler = SGDClassifier(**params), StandardScaler()
+
+        # 标准化器按所有见过的窗口累计更新；partial_fit 不支持 class_weight='balanced'，改用样本权重
+        scaler.partial_fit(x_train)
+        model.partial_fit(scaler.transform(x_train), y_train, classes=np.array([0, 1]),
+                          sample_weight=compute_sample_weight('balanced', y_train))
+        return FittedModel(model, scaler, end_day, len(x_train))
+
+    @staticmethod
+    def _trading_days_between(start_day, end_day):
+        """两个日期之间的工作日数（近似交易日数）"""
+        return int(np.busday_count(start_day.date(), end_day.date()))
+
+    @staticmethod
+    def _to_day(value):
+        """转换为不带时区的日期"""
+        day = pd.Timestamp(value)
+        if day.tzinfo is not None:
+            day = day.tz_localize(None)
+        return day.normalize()
@@ -8,6 +8,8 @@ import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from factor_panel import FactorPanel
+
 # 加载.env文件
 load_dotenv()
 
@@ -59,6 +61,9 @@ def init(context):
     # 记录买入日期（用于最少持有期检查）
     context.buy_dates = {}  # {symbol: buy_date}
 
+    # 股票池收盘价面板（回测期间缓存，调仓时只补取新交易日）
+    context.factor_panel = FactorPanel()
+
     # 每个交易日执行
     schedule(schedule_func=algo, date_rule='1d', time_rule='09:30:00')
 
@@ -121,143 +126,88 @@ def check_market_trend(context, trade_date):
         return 'neutral'
 
 
-def calculate_quality_score(symbol, context, trade_date):
+def calculate_quality_score(window, context):
     """
     计算质量得分 - 衡量公司长期表现稳定性
     使用: 长期趋势、波动率、相对强度
+    window: 股票池收盘价窗口（PriceWindow），按列向量化计算，返回每只股票的得分
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.ma_vlong + 10, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
+    closes_now = window.last()
 
-        if len(hist) < context.ma_vlong:
-            return 0
+    # 1. 长期趋势得分 (MA120向上)
+    ma120_first = window.mean(-context.ma_long - 60, -context.ma_long)
+    ma120_last = window.ma(context.ma_long)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_trend = np.where(ma120_first > 0, (ma120_last - ma120_first) / ma120_first, 0)
 
-        closes = hist['close'].values
+    # 2. 波动率得分 (低波动=稳定)
+    volatility = window.volatility()
+    volatility_score = np.maximum(0, 1 - volatility / 0.5)  # 波动率50%以上得0分
 
-        # 1. 长期趋势得分 (MA120向上)
-        ma120_first = np.mean(closes[-context.ma_long-60:-context.ma_long])
-        ma120_last = np.mean(closes[-context.ma_long:])
-        long_trend = (ma120_last - ma120_first) / ma120_first if ma120_first > 0 else 0
+    # 3. 250日收益表现 (长期正收益)
+    close_250 = window.last(context.ma_vlong)
+    return_250d = (closes_now - close_250) / close_250
+    return_score = np.clip(return_250d * 2, 0, 1)  # 50%收益得满分
 
-        # 2. 波动率得分 (低波动=稳定)
-        returns = np.diff(closes) / closes[:-1]
-        volatility = np.std(returns) * np.sqrt(252)
-        volatility_score = max(0, 1 - volatility / 0.5)  # 波动率50%以上得0分
+    # 综合质量得分
+    quality_score = (np.maximum(0, long_trend * 5) * 0.3 +  # 长期趋势
+                     volatility_score * 0.3 +               # 低波动
+                     return_score * 0.4)                    # 长期收益
 
-        # 3. 250日收益表现 (长期正收益)
-        return_250d = (closes[-1] - closes[-context.ma_vlong]) / closes[-context.ma_vlong]
-        return_score = np.clip(return_250d * 2, 0, 1)  # 50%收益得满分
+    return np.where(window.has(context.ma_vlong), np.nan_to_num(quality_score), 0)
 
-        # 综合质量得分
-        quality_score = (max(0, long_trend * 5) * 0.3 +  # 长期趋势
-                        volatility_score * 0.3 +          # 低波动
-                        return_score * 0.4)               # 长期收益
 
-        return quality_score
-    except:
-        return 0
-
-
-def calculate_value_score(symbol, context, trade_date):
+def calculate_value_score(window, context):
     """
     计算估值得分 - 价格相对于长期均线的位置
     价格越低于长期均线，估值越低，得分越高
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.ma_vlong + 10, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
+    # 计算各期均线
+    ma60 = window.ma(context.ma_medium)
+    ma120 = window.ma(context.ma_long)
+    ma250 = window.ma(context.ma_vlong)
+    current_price = window.last()
 
-        if len(hist) < context.ma_vlong:
-            return 0
+    # 计算价格相对均线的位置
+    ratio_to_ma60 = current_price / ma60
+    ratio_to_ma120 = current_price / ma120
+    ratio_to_ma250 = current_price / ma250
 
-        closes = hist['close'].values
+    # 估值得分: 价格低于长期均线时得分高
+    # 相对MA250: 低于20%得满分，高于20%得0分
+    value_score = np.where(ratio_to_ma250 < 0.8, 0.5,
+                           np.where(ratio_to_ma250 < 1.2, 0.5 * (1.2 - ratio_to_ma250) / 0.4, 0))
 
-        # 计算各期均线
-        ma60 = np.mean(closes[-context.ma_medium:])
-        ma120 = np.mean(closes[-context.ma_long:])
-        ma250 = np.mean(closes[-context.ma_vlong:])
-        current_price = closes[-1]
+    # 相对MA120: 低于10%得满分，高于30%得0分
+    value_score += np.where(ratio_to_ma120 < 0.9, 0.3,
+                            np.where(ratio_to_ma120 < 1.3, 0.3 * (1.3 - ratio_to_ma120) / 0.4, 0))
 
-        # 计算价格相对均线的位置
-        ratio_to_ma60 = current_price / ma60
-        ratio_to_ma120 = current_price / ma120
-        ratio_to_ma250 = current_price / ma250
-
-        # 估值得分: 价格低于长期均线时得分高
-        value_score = 0
-
-        # 相对MA250: 低于20%得满分，高于20%得0分
-        if ratio_to_ma250 < 0.8:
-            value_score += 0.5
-        elif ratio_to_ma250 < 1.2:
-            value_score += 0.5 * (1.2 - ratio_to_ma250) / 0.4
-
-        # 相对MA120: 低于10%得满分，高于30%得0分
-        if ratio_to_ma120 < 0.9:
-            value_score += 0.3
-        elif ratio_to_ma120 < 1.3:
-            value_score += 0.3 * (1.3 - ratio_to_ma120) / 0.4
-
-        # 相对MA60: 避免短期过热
-        if ratio_to_ma60 < 1.1:
-            value_score += 0.2
-        elif ratio_to_ma60 > 1.3:
-            value_score -= 0.2  # 短期过热扣分
-
-        return max(0, min(1, value_score))
-    except:
-        return 0
+    # 相对MA60: 避免短期过热（过热扣分）
+    value_score += np.where(ratio_to_ma60 < 1.1, 0.2, np.where(ratio_to_ma60 > 1.3, -0.2, 0))
 
+    return np.where(window.has(context.ma_vlong), np.clip(np.nan_to_num(value_score), 0, 1), 0)
 
-def calculate_trend_confirmation_score(symbol, context, trade_date):
+
+def calculate_trend_confirmation_score(window, context):
     """
     计算趋势确认得分 - 确保长期趋势向上但不过热
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.ma_vlong + 10, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
+    ma20 = window.ma(context.ma_short)
+    ma60 = window.ma(context.ma_medium)
+    ma120 = window.ma(context.ma_long)
+    ma250 = window.ma(context.ma_vlong)
+    current_price = window.last()
 
-        if len(hist) < context.ma_vlong:
-            return 0
+    # 1. 长期趋势向上 (MA60 > MA120 > MA250)
+    trend_score = (ma60 > ma120) * 0.3 + (ma120 > ma250) * 0.3
 
-        closes = hist['close'].values
+    # 2. 价格在长期均线上方
+    trend_score += (current_price > ma120) * 0.2 + (current_price > ma250) * 0.2
 
-        ma20 = np.mean(closes[-context.ma_short:])
-        ma60 = np.mean(closes[-context.ma_medium:])
-        ma120 = np.mean(closes[-context.ma_long:])
-        ma250 = np.mean(closes[-context.ma_vlong:])
-        current_price = closes[-1]
-
-        trend_score = 0
-
-        # 1. 长期趋势向上 (MA60 > MA120 > MA250)
-        if ma60 > ma120:
-            trend_score += 0.3
-        if ma120 > ma250:
-            trend_score += 0.3
+    # 3. 避免短期过热 (价格不应远高于MA20的15%，过热扣分)
+    trend_score += np.where(current_price / ma20 < 1.15, 0.1, -0.2)
 
-        # 2. 价格在长期均线上方
-        if current_price > ma120:
-            trend_score += 0.2
-        if current_price > ma250:
-            trend_score += 0.2
-
-        # 3. 避免短期过热 (价格不应远高于MA20)
-        if current_price / ma20 < 1.15:  # 不超过MA20的15%
-            trend_score += 0.1
-        else:
-            trend_score -= 0.2  # 短期过热扣分
-
-        return max(0, min(1, trend_score))
-    except:
-        return 0
+    return np.where(window.has(context.ma_vlong), np.clip(trend_score, 0, 1), 0)
 
 
 def calculate_volatility_score(symbol, context, trade_date):
@@ -301,34 +251,26 @@ def rebalance(context, now, last_day):
 
     print('{}: 可选股票池数量: {}'.format(now, len(stock_pool)))
 
-    # 计算因子得分
-    scores = []
-    for symbol in stock_pool:
-        quality_score = calculate_quality_score(symbol, context, last_day)
-        value_score = calculate_value_score(symbol, context, last_day)
-        trend_score = calculate_trend_confirmation_score(symbol, context, last_day)
-
-        # 综合得分: 质量40% + 估值35% + 趋势25%
-        total_score = quality_score * 0.4 + value_score * 0.35 + trend_score * 0.25
+    # 计算因子得分（整个股票池一次获取收盘价面板，按列计算）
+    window = context.factor_panel.window(stock_pool, last_day, context.ma_vlong + 10)
+    scores_df = pd.DataFrame({
+        'symbol': window.symbols,
+        'quality': calculate_quality_score(window, context),
+        'value': calculate_value_score(window, context),
+        'trend': calculate_trend_confirmation_score(window, context)
+    })
 
-        # 最低质量门槛: 质量得分必须>0.3
-        if quality_score < 0.3:
-            continue
+    # 综合得分: 质量40% + 估值35% + 趋势25%
+    scores_df['total'] = scores_df['quality'] * 0.4 + scores_df['value'] * 0.35 + scores_df['trend'] * 0.25
 
-        scores.append({
-            'symbol': symbol,
-            'quality': quality_score,
-            'value': value_score,
-            'trend': trend_score,
-            'total': total_score
-        })
+    # 最低质量门槛: 质量得分必须>0.3
+    scores_df = scores_df[scores_df['quality'] >= 0.3]
 
     # 排序选股
-    if not scores:
+    if scores_df.empty:
         print('{}: 没有符合质量条件的股票，保持空仓'.format(now))
         return
 
-    scores_df = pd.DataFrame(scores)
     scores_df = scores_df.sort_values('total', ascending=False)
 
     # 选择得分最高的股票
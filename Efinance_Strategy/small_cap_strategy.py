@@ -31,6 +31,8 @@ import pandas as pd
 import numpy as np
 from dotenv import load_dotenv
 
+from factor_panel import FactorPanel
+
 # 加载.env文件
 load_dotenv()
 
@@ -60,6 +62,9 @@ def init(context):
     # 记录调仓信息
     context.rebalance_count = 0  # 调仓次数统计
 
+    # 下单价格面板（回测期间缓存，调仓时只补取新交易日）
+    context.factor_panel = FactorPanel(adjust_end_time=context.backtest_end_time)
+
     # 每个交易日执行
     schedule(schedule_func=algo, date_rule='1d', time_rule='15:00:00')
 
@@ -202,20 +207,17 @@ def rebalance(context, now, now_str, last_day):
     positions = get_position()
     current_positions = {p['symbol']: p for p in positions}
 
+    # 调仓涉及股票的最新价格一次获取
+    prices = context.factor_panel.latest(list(current_positions) + list(to_buy), now_str)
+
     # 4. 卖出不在新池中的股票
     sell_count = 0
     for symbol in list(current_positions.keys()):
         if symbol not in to_buy:
-            new_price = history_n(
-                symbol=symbol,
-                frequency='1d',
-                count=1,
-                end_time=now_str,
-                fields='close',
-                adjust=ADJUST_PREV,
-                adjust_end_time=context.backtest_end_time,
-                df=False
-            )[0]['close']
+            new_price = prices.get(symbol)
+            if new_price is None:
+                print('{}: 未获取到价格，跳过卖出'.format(symbol))
+                continue
 
             order_target_percent(
                 symbol=symbol,
@@ -240,16 +242,10 @@ def rebalance(context, now, now_str, last_day):
         if symbol in current_positions:
             continue
 
-        new_price = history_n(
-            symbol=symbol,
-            frequency='1d',
-            count=1,
-            end_time=now_str,
-            fields='close',
-            adjust=ADJUST_PREV,
-            adjust_end_time=context.backtest_end_time,
-            df=False
-        )[0]['close']
+        new_price = prices.get(symbol)
+        if new_price is None:
+            print('{}: 未获取到价格，跳过买入'.format(symbol))
+            continue
 
         order_target_percent(
             symbol=symbol,
@@ -9,6 +9,10 @@ import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from factor_panel import FactorPanel
+from ml_features import rolling_windows, trend_features, forward_labels
+from model_store import ModelStore
+
 load_dotenv()
 token = os.getenv('DIGGOLD_TOKEN')
 LOG_FILE = os.path.join(os.path.dirname(__file__), 'backtest_log_style_ml_enhanced.txt')
@@ -92,6 +96,14 @@ def init(context):
     context.ml_history_len = 20
     context.ml_prob_threshold = 0.55  # ML概率阈值，只买入预测概率>=55%的股票
     context.ml_enabled = True  # 是否启用ML过滤
+    # 模型重新训练间隔（交易日）。默认 1：每个调度日都重新训练，与不缓存时的预测一致；
+    # 设为 20 等更大的值时未到期复用上次训练的模型（回测更快，但买卖信号会变化）
+    context.ml_refit_days = 1
+    context.ml_fast_path = False  # 是否使用热启动的SGD逻辑回归代替SVM
+    context.model_store = ModelStore(refit_days=context.ml_refit_days, fast_path=context.ml_fast_path)
+
+    # 股票池收盘价面板（回测期间缓存，调仓时只补取新交易日）
+    context.factor_panel = FactorPanel()
 
     schedule(schedule_func=algo, date_rule='1d', time_rule='09:31:00')
 
@@ -160,18 +172,11 @@ def predict_stock_probs(context, symbols, end_date):
     ml_scores = {}
     scaler = StandardScaler()
 
-    # 批量获取所有股票的历史数据
-    all_features = []
-    valid_symbols = []
-
-    for symbol in symbols:
-        try:
-            features = extract_stock_features(symbol, context, end_date)
-            if features is not None:
-                all_features.append(features)
-                valid_symbols.append(symbol)
-        except:
-            ml_scores[symbol] = 0.5
+    # 整个股票池一次获取收盘价面板，按列计算特征
+    features = extract_stock_features(
+        context.factor_panel.window(symbols, end_date, context.ml_history_len + 20), context)
+    all_features = features.values.tolist()
+    valid_symbols = list(features.index)
 
     if len(all_features) < 10:
         return {s: 0.5 for s in symbols}
@@ -201,10 +206,12 @@ def predict_stock_probs(context, symbols, end_date):
 
         x_train_scaled = scaler.fit_transform(x_train)
 
-        # 训练SVM
-        clf = svm.SVC(C=5.0, kernel='rbf', gamma='scale', probability=True,
-                      class_weight='balanced', random_state=42)
-        clf.fit(x_train_scaled, y_train)
+        # 训练SVM（训练窗口距上次训练不足 ml_refit_days 个交易日时复用缓存的模型）
+        model_key = (context.market_index, 'trend', context.ml_history_len, context.ml_training_len)
+        clf = context.model_store.fit(
+            model_key, end_date, x_train_scaled, y_train,
+            factory=lambda: svm.SVC(C=5.0, kernel='rbf', gamma='scale', probability=True,
+                                    class_weight='balanced', random_state=42))
 
         # 预测每只股票
         probs = clf.predict_proba(all_features_scaled)[:, 1]
@@ -224,96 +231,41 @@ def predict_stock_probs(context, symbols, end_date):
     return ml_scores
 
 
-def extract_stock_features(symbol, context, end_date):
-    """提取单只股票的特征"""
-    data = history_n(symbol=symbol, frequency='1d', count=context.ml_history_len + 20,
-                     end_time=end_date, fields='close,high,low,volume',
-                     fill_missing='Last', adjust=ADJUST_PREV, df=True)
-
-    if len(data) < context.ml_history_len:
-        return None
-
-    close = data['close'].values[-context.ml_history_len:]
-    high = data['high'].values[-context.ml_history_len:]
-    low = data['low'].values[-context.ml_history_len:]
-    volume = data['volume'].values[-context.ml_history_len:]
-
-    # 基础特征
-    close_mean = close[-1] / np.mean(close)
-    return_rate = (close[-1] - close[0]) / close[0]
-    volatility = np.std(close) / np.mean(close) if np.mean(close) > 0 else 0
-
-    # 技术指标
-    rsi = calculate_rsi(close)
-
-    # 价格动量
-    momentum_5 = (close[-1] - close[-5]) / close[-5] if len(close) >= 5 else 0
-    momentum_10 = (close[-1] - close[-10]) / close[-10] if len(close) >= 10 else 0
-
-    # 趋势特征
-    ma_short = np.mean(close[-5:])
-    ma_long = np.mean(close[-20:])
-    trend = (ma_short - ma_long) / ma_long if ma_long > 0 else 0
-
-    # 返回7个特征（与训练数据一致）
-    return [close_mean, return_rate, volatility, rsi, momentum_5, momentum_10, trend]
+def extract_stock_features(window, context):
+    """
+    按股票提取特征（与训练数据的7个特征一致）
+    window: 收盘价窗口（PriceWindow），有效数据不足 ml_history_len 的股票不包含在结果中
+    返回: DataFrame(index=symbol)
+    """
+    valid = window.has(context.ml_history_len)
+    closes = window.tail(context.ml_history_len).values.T[valid]
+    symbols = [s for s, ok in zip(window.symbols, valid) if ok]
+    return pd.DataFrame(trend_features(closes), index=symbols, columns=[
+        'close_mean', 'return_rate', 'volatility', 'rsi', 'momentum_5', 'momentum_10', 'trend'])
 
 
 def prepare_training_data(index_data, context):
-    """准备训练数据"""
+    """准备训练数据（第 i 个样本为第 i 根K线之前 ml_history_len 根的窗口）"""
     # 检查是否有eob列，如果没有则使用行索引
     if 'eob' in index_data.columns:
         data = index_data.set_index('eob')
     else:
         data = index_data.copy()
 
-    x_train = []
-    y_train = []
     close_values = data['close'].values
+    start = context.ml_history_len + 10
+    stop = len(close_values) - 5
 
-    for i in range(context.ml_history_len + 10, len(close_values) - 5):
-        close = close_values[i - context.ml_history_len:i]
-
-        if len(close) < context.ml_history_len:
-            continue
-
-        close_mean = close[-1] / np.mean(close)
-        return_rate = (close[-1] - close[0]) / close[0]
-        volatility = np.std(close) / np.mean(close) if np.mean(close) > 0 else 0
+    # 特征矩阵第 r 行对应以第 r + ml_history_len - 1 根结尾的窗口
+    features = trend_features(rolling_windows(close_values, context.ml_history_len))
+    x_train = features[start - context.ml_history_len:max(stop - context.ml_history_len, 0)]
 
-        rsi = calculate_rsi(close)
-        momentum_5 = (close[-1] - close[-5]) / close[-5] if len(close) >= 5 else 0
-        momentum_10 = (close[-1] - close[-10]) / close[-10] if len(close) >= 10 else 0
-
-        ma_short = np.mean(close[-5:])
-        ma_long = np.mean(close[-20:])
-        trend = (ma_short - ma_long) / ma_long if ma_long > 0 else 0
-
-        x_train.append([close_mean, return_rate, volatility, rsi, momentum_5, momentum_10, trend])
-
-        # 标签：未来5天是否上涨
-        future_close = close_values[i+1:i+6]
-        label = 1 if future_close[-1] > future_close[0] * 1.005 else 0
-        y_train.append(label)
+    # 标签：未来5天是否上涨
+    y_train = forward_labels(close_values, 5, 1.005)[start:stop]
 
     return x_train, y_train
 
 
-def calculate_rsi(prices, period=14):
-    """计算RSI"""
-    if len(prices) < period + 1:
-        return 50
-    deltas = np.diff(prices)
-    gain = np.where(deltas > 0, deltas, 0)
-    loss = np.where(deltas < 0, -deltas, 0)
-    avg_gain = np.mean(gain[-period:])
-    avg_loss = np.mean(loss[-period:])
-    if avg_loss == 0:
-        return 100
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-
 # ========== ML增强选股 ==========
 def score_and_select_stocks_ml(context, symbols, trade_date, now_str, ml_scores):
     """
@@ -323,14 +275,22 @@ def score_and_select_stocks_ml(context, symbols, trade_date, now_str, ml_scores)
     scores = []
     hot_sectors = get_hot_sectors(context, trade_date)
 
+    # 整个股票池一次获取收盘价面板，各因子按列计算
+    window = context.factor_panel.window(symbols, trade_date, context.ma_vlong + 10)
+    factors = pd.DataFrame({
+        'quality': calculate_quality_score(window.tail(context.ma_long + 20), context),
+        'value': calculate_value_score(window, context),
+        'momentum': calculate_momentum_score(window.tail(context.momentum_days + 10), context)
+    }, index=window.symbols)
+
     for symbol in symbols:
         try:
-            quality = calculate_quality_score(symbol, context, trade_date)
+            quality = factors.at[symbol, 'quality']
             if quality < context.min_quality_score:
                 continue
 
-            value = calculate_value_score(symbol, context, trade_date)
-            momentum = calculate_momentum_score(symbol, context, trade_date)
+            value = factors.at[symbol, 'value']
+            momentum = factors.at[symbol, 'momentum']
             sector = calculate_sector_score(symbol, context, trade_date, hot_sectors)
 
             # 获取ML预测概率
@@ -459,48 +419,36 @@ def get_hot_sectors(context, trade_date):
     """获取热门板块"""
     return []
 
-def calculate_quality_score(symbol, context, trade_date):
-    try:
-        hist = history_n(symbol=symbol, frequency='1d', count=context.ma_long + 20, end_time=trade_date, fields='close', skip_suspended=True, fill_missing='Last', adjust=ADJUST_PREV, df=True)
-        if len(hist) < context.ma_long:
-            return 0
-        closes = hist['close'].values
-        ma60_first = np.mean(closes[-context.ma_long-20:-context.ma_long+40]) if len(closes) >= context.ma_long + 20 else np.mean(closes[:-context.ma_long])
-        ma60_last = np.mean(closes[-context.ma_long:])
-        trend_score = max(0, min(1, ((ma60_last - ma60_first) / ma60_first if ma60_first > 0 else 0) * 5))
-        volatility_score = max(0, 1 - (np.std(np.diff(closes) / closes[:-1]) * np.sqrt(252)) / 0.5)
-        return trend_score * 0.3 + volatility_score * 0.3 + max(0, min(1, ((closes[-1] - closes[-context.ma_long]) / closes[-context.ma_long]) * 2)) * 0.4
-    except:
-        return 0
-
-def calculate_value_score(symbol, context, trade_date):
-    try:
-        hist = history_n(symbol=symbol, frequency='1d', count=context.ma_vlong + 10, end_time=trade_date, fields='close', skip_suspended=True, fill_missing='Last', adjust=ADJUST_PREV, df=True)
-        if len(hist) < context.ma_vlong:
-            return 0
-        price = hist['close'].values[-1]
-        r60 = price / np.mean(hist['close'].values[-60:])
-        r120 = price / np.mean(hist['close'].values[-120:])
-        r250 = price / np.mean(hist['close'].values[-250:])
-        score = (0.5 if r250 < 0.85 else 0.5 * (1.35 - r250) / 0.5 if r250 < 1.35 else 0) + (0.3 if r120 < 0.9 else 0.3 * (1.25 - r120) / 0.35 if r120 < 1.25 else 0) + (0.2 if r60 < 1.15 else -0.2 if r60 > 1.3 else 0)
-        return max(0, min(1, score))
-    except:
-        return 0
-
-def calculate_momentum_score(symbol, context, trade_date):
-    try:
-        hist = history_n(symbol=symbol, frequency='1d', count=context.momentum_days + 10, end_time=trade_date, fields='close', skip_suspended=True, fill_missing='Last', adjust=ADJUST_PREV, df=True)
-        if len(hist) < context.momentum_days + 5:
-            return 0
-        mom = (hist['close'].values[-1] - hist['close'].values[-context.momentum_days-1]) / hist['close'].values[-context.momentum_days-1]
-        if -0.15 <= mom <= 0.3:
-            return 0.6 + mom * 1.5
-        elif mom > 0.3:
-            return max(0, 1 - (mom - 0.3))
-        else:
-            return max(0, 0.6 + mom * 2)
-    except:
-        return 0
+def calculate_quality_score(window, context):
+    """质量得分（window: 最近 ma_long + 20 根收盘价窗口，按列计算）"""
+    full = window.has(context.ma_long + 20)
+    ma60_first = np.where(full, window.mean(-context.ma_long-20, -context.ma_long+40), window.mean(None, -context.ma_long))
+    ma60_last = window.ma(context.ma_long)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_score = np.clip(np.where(ma60_first > 0, (ma60_last - ma60_first) / ma60_first, 0) * 5, 0, 1)
+    volatility_score = np.maximum(0, 1 - window.volatility() / 0.5)
+    close_120 = window.last(context.ma_long)
+    score = trend_score * 0.3 + volatility_score * 0.3 + np.clip((window.last() - close_120) / close_120 * 2, 0, 1) * 0.4
+    return np.where(window.has(context.ma_long), np.nan_to_num(score), 0)
+
+def calculate_value_score(window, context):
+    """估值得分（window: 最近 ma_vlong + 10 根收盘价窗口，按列计算）"""
+    price = window.last()
+    r60 = price / window.ma(60)
+    r120 = price / window.ma(120)
+    r250 = price / window.ma(250)
+    score = (np.where(r250 < 0.85, 0.5, np.where(r250 < 1.35, 0.5 * (1.35 - r250) / 0.5, 0))
+             + np.where(r120 < 0.9, 0.3, np.where(r120 < 1.25, 0.3 * (1.25 - r120) / 0.35, 0))
+             + np.where(r60 < 1.15, 0.2, np.where(r60 > 1.3, -0.2, 0)))
+    return np.where(window.has(context.ma_vlong), np.clip(np.nan_to_num(score), 0, 1), 0)
+
+def calculate_momentum_score(window, context):
+    """动量得分（window: 最近 momentum_days + 10 根收盘价窗口，按列计算）"""
+    base = window.last(context.momentum_days + 1)
+    mom = (window.last() - base) / base
+    score = np.where((mom >= -0.15) & (mom <= 0.3), 0.6 + mom * 1.5,
+                     np.where(mom > 0.3, np.maximum(0, 1 - (mom - 0.3)), np.maximum(0, 0.6 + mom * 2)))
+    return np.where(window.has(context.momentum_days + 5), np.nan_to_num(score), 0)
 
 def calculate_sector_score(symbol, context, trade_date, hot_sectors):
     return min(1, 0.7 if hot_sectors else 0.5)
@@ -601,6 +549,7 @@ def on_order_status(context, order):
 
 def on_backtest_finished(context, indicator):
     print('*'*50 + '\n回测已完成！\n' + '='*50 + '\n【回测结果摘要】')
+    context.model_store.summary()
     for key, value in indicator.items():
         print(f'{key}: {value}')
 
@@ -9,6 +9,8 @@ import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from factor_panel import FactorPanel
+
 # 加载.env文件
 load_dotenv()
 
@@ -91,6 +93,9 @@ def init(context):
     # ========== 回测参数 ==========
     context.backtest_end_time = context.backtest_end_time
 
+    # 股票池收盘价面板（回测期间缓存，调仓时只补取新交易日）
+    context.factor_panel = FactorPanel()
+
     # 每日定时任务
     schedule(schedule_func=algo, date_rule='1d', time_rule='09:30:00')
 
@@ -277,40 +282,31 @@ def score_and_select_stocks(context, symbols, trade_date, now_str):
     """
     综合评分选股
     质量因子40% + 估值因子30% + 动量因子30%
+    整个股票池一次获取收盘价面板，各因子按列向量化计算
     """
-    scores = []
-
-    for symbol in symbols:
-        try:
-            # 计算各项得分
-            quality_score = calculate_quality_score(symbol, context, trade_date)
-            value_score = calculate_value_score(symbol, context, trade_date)
-            momentum_score = calculate_momentum_score(symbol, context, trade_date)
-
-            # 最低质量门槛
-            if quality_score < context.min_quality_score:
-                continue
-
-            # 综合得分
-            total_score = (quality_score * 0.4 +
-                          value_score * 0.3 +
-                          momentum_score * 0.3)
-
-            scores.append({
-                'symbol': symbol,
-                'quality': quality_score,
-                'value': value_score,
-                'momentum': momentum_score,
-                'total': total_score
-            })
-        except Exception as e:
-            continue
+    if not symbols:
+        return []
+
+    window = context.factor_panel.window(symbols, trade_date, context.ma_vlong + 10)
 
-    if not scores:
+    scores_df = pd.DataFrame({
+        'symbol': window.symbols,
+        'quality': calculate_quality_score(window.tail(context.ma_long + 20), context),
+        'value': calculate_value_score(window, context),
+        'momentum': calculate_momentum_score(window.tail(context.momentum_days + 10), context)
+    })
+
+    # 最低质量门槛
+    scores_df = scores_df[scores_df['quality'] >= context.min_quality_score]
+    if scores_df.empty:
         return []
 
+    # 综合得分
+    scores_df['total'] = (scores_df['quality'] * 0.4 +
+                          scores_df['value'] * 0.3 +
+                          scores_df['momentum'] * 0.3)
+
     # 排序选股
-    scores_df = pd.DataFrame(scores)
     scores_df = scores_df.sort_values('total', ascending=False)
 
     # 选择得分最高的股票
@@ -318,130 +314,81 @@ def score_and_select_stocks(context, symbols, trade_date, now_str):
     return selected.to_dict('records')
 
 
-def calculate_quality_score(symbol, context, trade_date):
+def calculate_quality_score(window, context):
     """
     计算质量得分 - 衡量公司长期表现稳定性
+    window: 最近 ma_long + 20 根收盘价窗口（PriceWindow），返回每只股票的得分
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.ma_long + 20, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
-
-        if len(hist) < context.ma_long:
-            return 0
+    closes_now = window.last()
 
-        closes = hist['close'].values
+    # 1. 长期趋势得分 (MA60向上)
+    ma60_first = window.mean(-context.ma_long - 20, -context.ma_long + 40)
+    ma60_last = window.ma(context.ma_long)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_trend = np.where(ma60_first > 0, (ma60_last - ma60_first) / ma60_first, 0)
+    trend_score = np.clip(long_trend * 5, 0, 1)  # 归一化到0-1
 
-        # 1. 长期趋势得分 (MA60向上)
-        ma60_first = np.mean(closes[-context.ma_long-20:-context.ma_long+40])
-        ma60_last = np.mean(closes[-context.ma_long:])
-        long_trend = (ma60_last - ma60_first) / ma60_first if ma60_first > 0 else 0
-        trend_score = max(0, min(1, long_trend * 5))  # 归一化到0-1
+    # 2. 波动率得分 (低波动=稳定)
+    volatility = window.volatility()
+    volatility_score = np.maximum(0, 1 - volatility / 0.5)
 
-        # 2. 波动率得分 (低波动=稳定)
-        returns = np.diff(closes) / closes[:-1]
-        volatility = np.std(returns) * np.sqrt(252)
-        volatility_score = max(0, 1 - volatility / 0.5)
+    # 3. 120日收益表现
+    close_120 = window.last(context.ma_long)
+    return_120d = (closes_now - close_120) / close_120
+    return_score = np.clip(return_120d * 2, 0, 1)
 
-        # 3. 120日收益表现
-        return_120d = (closes[-1] - closes[-context.ma_long]) / closes[-context.ma_long]
-        return_score = max(0, min(1, return_120d * 2))
+    # 综合质量得分
+    quality_score = (trend_score * 0.3 +
+                     volatility_score * 0.3 +
+                     return_score * 0.4)
 
-        # 综合质量得分
-        quality_score = (trend_score * 0.3 +
-                        volatility_score * 0.3 +
-                        return_score * 0.4)
+    return np.where(window.has(context.ma_long), np.nan_to_num(quality_score), 0)
 
-        return quality_score
-    except:
-        return 0
 
-
-def calculate_value_score(symbol, context, trade_date):
+def calculate_value_score(window, context):
     """
     计算估值得分 - 价格相对位置
     价格低于长期均线时得分高（低估）
+    window: 最近 ma_vlong + 10 根收盘价窗口
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.ma_vlong + 10, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
+    current_price = window.last()
 
-        if len(hist) < context.ma_vlong:
-            return 0
+    # 计算价格相对均线的位置
+    ratio_to_ma60 = current_price / window.ma(context.ma_medium)
+    ratio_to_ma120 = current_price / window.ma(context.ma_long)
+    ratio_to_ma250 = current_price / window.ma(context.ma_vlong)
 
-        closes = hist['close'].values
-        current_price = closes[-1]
-
-        # 计算各期均线
-        ma60 = np.mean(closes[-context.ma_medium:])
-        ma120 = np.mean(closes[-context.ma_long:])
-        ma250 = np.mean(closes[-context.ma_vlong:])
-
-        # 计算价格相对均线的位置
-        ratio_to_ma60 = current_price / ma60
-        ratio_to_ma120 = current_price / ma120
-        ratio_to_ma250 = current_price / ma250
-
-        # 估值得分: 价格低于长期均线时得分高
-        value_score = 0
-
-        # 相对MA250: 低于15%得满分，高于30%得0分
-        if ratio_to_ma250 < 0.85:
-            value_score += 0.5
-        elif ratio_to_ma250 < 1.3:
-            value_score += 0.5 * (1.3 - ratio_to_ma250) / 0.45
+    # 估值得分: 价格低于长期均线时得分高
+    # 相对MA250: 低于15%得满分，高于30%得0分
+    value_score = np.where(ratio_to_ma250 < 0.85, 0.5,
+                           np.where(ratio_to_ma250 < 1.3, 0.5 * (1.3 - ratio_to_ma250) / 0.45, 0))
 
-        # 相对MA120: 低于10%得满分，高于20%得0分
-        if ratio_to_ma120 < 0.9:
-            value_score += 0.3
-        elif ratio_to_ma120 < 1.2:
-            value_score += 0.3 * (1.2 - ratio_to_ma120) / 0.3
+    # 相对MA120: 低于10%得满分，高于20%得0分
+    value_score += np.where(ratio_to_ma120 < 0.9, 0.3,
+                            np.where(ratio_to_ma120 < 1.2, 0.3 * (1.2 - ratio_to_ma120) / 0.3, 0))
 
-        # 相对MA60: 避免短期过热
-        if ratio_to_ma60 < 1.1:
-            value_score += 0.2
-        elif ratio_to_ma60 > 1.25:
-            value_score -= 0.2
+    # 相对MA60: 避免短期过热
+    value_score += np.where(ratio_to_ma60 < 1.1, 0.2, np.where(ratio_to_ma60 > 1.25, -0.2, 0))
 
-        return max(0, min(1, value_score))
-    except:
-        return 0
+    return np.where(window.has(context.ma_vlong), np.clip(np.nan_to_num(value_score), 0, 1), 0)
 
 
-def calculate_momentum_score(symbol, context, trade_date):
+def calculate_momentum_score(window, context):
     """
     计算动量得分 - 但避免追高
+    window: 最近 momentum_days + 10 根收盘价窗口
     """
-    try:
-        hist = history_n(symbol=symbol, frequency='1d',
-                        count=context.momentum_days + 10, end_time=trade_date,
-                        fields='close', skip_suspended=True,
-                        fill_missing='Last', adjust=ADJUST_PREV, df=True)
-
-        if len(hist) < context.momentum_days + 5:
-            return 0
+    # 20天收益率
+    base = window.last(context.momentum_days + 1)
+    momentum = (window.last() - base) / base
 
-        closes = hist['close'].values
-
-        # 20天收益率
-        momentum = (closes[-1] - closes[-context.momentum_days-1]) / closes[-context.momentum_days-1]
-
-        # 动量得分：适度动量得分高，过高追高扣分
-        if -0.1 <= momentum <= 0.2:
-            momentum_score = 0.5 + momentum * 2  # -10%到20%之间，线性打分
-        elif momentum > 0.2:
-            # 涨太多，可能是追高
-            momentum_score = max(0, 1 - (momentum - 0.2) * 2)
-        else:
-            # 下跌太多
-            momentum_score = max(0, 0.5 + momentum * 3)
+    # 动量得分：-10%到20%之间线性打分；涨太多可能是追高；下跌太多
+    momentum_score = np.where(
+        (momentum >= -0.1) & (momentum <= 0.2), 0.5 + momentum * 2,
+        np.where(momentum > 0.2, np.maximum(0, 1 - (momentum - 0.2) * 2),
+                 np.maximum(0, 0.5 + momentum * 3)))
 
-        return max(0, min(1, momentum_score))
-    except:
-        return 0
+    return np.where(window.has(context.momentum_days + 5), np.clip(np.nan_to_num(momentum_score), 0, 1), 0)
 
 
 def execute_rebalance(context, now_str, last_day, symbols_pool):
@@ -1,6 +1,10 @@
 """数据获取模块"""
 from .cache_manager import CacheManager
+from .bar_store import BarStore, PackedBars
+from .baostock_session import BaostockSession
+from .universe import Universe
+from .source_router import SourceRouter
 from .data_resilient import DataResilient
 from .diggold_data import DiggoldDataSource
 
-__all__ = ['CacheManager', 'DataResilient', 'DiggoldDataSource']
+__all__ = ['CacheManager', 'BarStore', 'PackedBars', 'BaostockSession', 'Universe', 'SourceRouter', 'DataResilient', 'DiggoldDataSource']
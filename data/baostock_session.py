@@ -0,0 +1,172 @@
+"""
+Baostock 会话管理
+进程内共享一个 baostock 登录会话，所有查询串行执行（baostock 使用全局连接，不支持并发），
+会话失效时自动重新登录，避免每次查询都 login/logout
+"""
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+
+class BaostockSession:
+    """进程级 baostock 会话（登录一次，跨请求、跨线程复用）"""
+
+    # 空闲超过该时间（秒）视为服务端已断开，下次查询前重新登录
+    IDLE_TIMEOUT = 600
+
+    # 会话失效相关的错误码：未登录 / 网络连接断开 / 接收数据失败
+    SESSION_ERROR_CODES = {'10001001', '10002001', '10002002', '10002007'}
+
+    _lock = threading.RLock()
+    _logged_in = False
+    _last_used = 0.0
+    _atexit_registered = False
+    _stats = {
+        'logins': 0,
+        'relogins': 0,
+        'queries': 0,
+        'failures': 0,
+        'login_time': 0.0,
+        'session_started_at': None
+    }
+
+    @classmethod
+    def _login(cls):
+        """登录（调用方需持有锁）"""
+        import baostock as bs
+
+        if cls._logged_in:
+            try:
+                bs.logout()
+            except Exception:
+                pass
+            cls._logged_in = False
+
+        started = time.perf_counter()
+        lg = bs.login()
+        cls._stats['login_time'] += time.perf_counter() - started
+
+        if lg.error_code != '0':
+            raise Exception(f"Baostock登录失败: {lg.error_msg}")
+
+        cls._logged_in = True
+        cls._last_used = time.monotonic()
+        cls._stats['logins'] += 1
+        cls._stats['session_started_at'] = datetime.now().isoformat()
+
+        if not cls._atexit_registered:
+            atexit.register(cls.logout)
+            cls._atexit_registered = True
+
+    @classmethod
+    def _ensure_login(cls):
+        """会话不存在或空闲过久时登录（调用方需持有锁）"""
+        if not cls._logged_in:
+            cls._login()
+        elif time.monotonic() - cls._last_used > cls.IDLE_TIMEOUT:
+            cls._stats['relogins'] += 1
+            cls._login()
+
+    @classmethod
+    def query_history_k_data(cls, code: str, fields: str, start_date: str, end_date: str,
+                             frequency: str = 'd', adjustflag: str = '3') -> Tuple[List[str], List[list]]:
+        """
+        查询K线数据（复用会话，失效时重新登录并重试一次）
+
+        Args:
+            code: baostock 代码，如 sh.600519
+            fields: 字段列表，逗号分隔
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            frequency: K线周期
+            adjustflag: 复权类型 (1: 后复权, 2: 前复权, 3: 不复权)
+
+        Returns:
+            (字段列表, 数据行列表)
+        """
+        return cls.query(
+            'query_history_k_data_plus',
+            code,
+            fields,
+            start_date=start_date,
+            end_date=end_date,
+            frequency=frequency,
+            adjustflag=adjustflag
+        )
+
+    @classmethod
+    def query(cls, method: str, *args, **kwargs) -> Tuple[List[str], List[list]]:
+        """
+        调用任意 baostock 查询接口（复用会话，失效时重新登录并重试一次）
+
+        Args:
+            method: baostock 接口名，如 query_stock_basic
+            *args, **kwargs: 接口参数
+
+        Returns:
+            (字段列表, 数据行列表)
+        """
+        import baostock as bs
+
+        with cls._lock:
+            for attempt in range(2):
+                cls._ensure_login()
+                cls._stats['queries'] += 1
+
+                try:
+                    rs = getattr(bs, method)(*args, **kwargs)
+
+                    # 分页数据通过同一连接读取，需在锁内取完
+                    rows = []
+                    while (rs.error_code == '0') & rs.next():
+                        rows.append(rs.get_row_data())
+                except (OSError, ConnectionError) as e:
+                    cls._logged_in = False
+                    if attempt == 0:
+                        cls._stats['relogins'] += 1
+                        continue
+                    cls._stats['failures'] += 1
+                    raise Exception(f"Baostock连接失败: {e}")
+
+                if rs.error_code in cls.SESSION_ERROR_CODES and attempt == 0:
+                    # 会话过期，重新登录后重试
+                    cls._logged_in = False
+                    cls._stats['relogins'] += 1
+                    continue
+
+                cls._last_used = time.monotonic()
+
+                if rs.error_code != '0':
+                    cls._stats['failures'] += 1
+                    raise Exception(f"Baostock查询失败: {rs.error_msg}")
+
+                return rs.fields, rows
+
+            cls._stats['failures'] += 1
+            raise Exception("Baostock会话重连失败")
+
+    @classmethod
+    def logout(cls):
+        """登出并释放会话"""
+        with cls._lock:
+            if not cls._logged_in:
+                return
+            try:
+                import baostock as bs
+                bs.logout()
+            except Exception:
+                pass
+            cls._logged_in = False
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """会话复用统计"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['logged_in'] = cls._logged_in
+            stats['queries_per_login'] = round(stats['queries'] / stats['logins'], 2) if stats['logins'] else 0.0
+            stats['reuse_rate'] = round(1 - stats['logins'] / stats['queries'], 4) if stats['queries'] else 0.0
+            stats['login_time'] = round(stats['login_time'], 3)
+            return stats
@@ -0,0 +1,618 @@
+"""
+日线列式存储
+每只股票一个按日期排序的 NumPy 结构化数组文件，任意日期区间都可直接切片读取，
+替代按 (symbol, start_date, end_date) 重复保存的 pickle 缓存
+
+全市场扫描时再把全部股票（含旧版 pickle 缓存）合并为一个文件 + 清单，
+只需打开一个文件，按清单中的偏移量切片读取每只股票的最近 N 根K线
+"""
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache_manager import CacheManager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f):
+    """阻塞直到取得锁文件的独占锁"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK 重试约 10 秒后放弃，继续等待
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BarStore:
+    """按股票代码存储的日线仓库（追加写入，内存映射读取）"""
+
+    STORE_DIR = CacheManager.BAR_CACHE_DIR
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    DTYPE = np.dtype([('date', 'datetime64[D]')] + [(col, 'f8') for col in COLUMNS])
+
+    # 收盘后数据才算完整，早于该时间当天不计入已覆盖区间
+    MARKET_CLOSE = (15, 30)
+
+    # 合并存储（文件名以 _ 开头，不会与股票代码冲突）
+    PACK_PREFIX = '_pack'
+    LEGACY_CACHE_DIR = CacheManager.STOCK_CACHE_DIR
+
+    _lock = threading.RLock()
+    _lock_depth = 0  # 当前线程持有写锁的嵌套层数（受 _lock 保护）
+    _packed = None  # (清单 mtime, PackedBars)
+
+    @classmethod
+    def initialize(cls):
+        cls.STORE_DIR.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def get_data_path(cls, symbol: str) -> Path:
+        return cls.STORE_DIR / f"{symbol}.npy"
+
+    @classmethod
+    def get_meta_path(cls, symbol: str) -> Path:
+        return cls.STORE_DIR / f"{symbol}.json"
+
+    @staticmethod
+    def _to_day(date_str: str) -> np.datetime64:
+        """YYYYMMDD / YYYY-MM-DD -> datetime64[D]"""
+        date_str = str(date_str).replace('-', '')[:8]
+        return np.datetime64(f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}", 'D')
+
+    @staticmethod
+    def _to_str(day: np.datetime64) -> str:
+        return str(np.datetime64(day, 'D')).replace('-', '')
+
+    @classmethod
+    def settled_date(cls) -> str:
+        """已收盘的最近日期（YYYYMMDD），盘中只认可到昨天的数据"""
+        now = datetime.now()
+        if (now.hour, now.minute) < cls.MARKET_CLOSE:
+            now = now - timedelta(days=1)
+        return now.strftime('%Y%m%d')
+
+    # ========== 元数据 ==========
+
+    @classmethod
+    def load_meta(cls, symbol: str) -> Optional[dict]:
+        meta_path = cls.get_meta_path(symbol)
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"加载存储元数据失败 {meta_path}: {str(e)}")
+            return None
+
+    @classmethod
+    def get_coverage(cls, symbol: str) -> Optional[Tuple[str, str]]:
+        """已获取过的日期区间 (start, end)，YYYYMMDD 格式"""
+        meta = cls.load_meta(symbol)
+        if not meta:
+            return None
+        return meta['start'], meta['end']
+
+    @classmethod
+    def covers(cls, symbol: str, start_date: str, end_date: str) -> bool:
+        """请求区间是否已完整存储"""
+        coverage = cls.get_coverage(symbol)
+        if coverage is None:
+            return False
+
+        end_date = min(str(end_date).replace('-', ''), cls.settled_date())
+        start_date = str(start_date).replace('-', '')
+        return coverage[0] <= start_date and end_date <= coverage[1]
+
+    # ========== 读取 ==========
+
+    @classmethod
+    def _load_array(cls, symbol: str, mmap: bool = True) -> Optional[np.ndarray]:
+        data_path = cls.get_data_path(symbol)
+        if not data_path.exists():
+            return None
+
+        try:
+            return np.load(data_path, mmap_mode='r' if mmap else None)
+        except Exception as e:
+            print(f"加载日线存储失败 {data_path}: {str(e)}")
+            return None
+
+    @classmethod
+    def _to_frame(cls, bars: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(
+            {col: np.array(bars[col]) for col in cls.COLUMNS},
+            index=pd.DatetimeIndex(np.array(bars['date']).astype('datetime64[ns]'), name='date')
+        )
+        return df
+
+    @classmethod
+    def read(cls, symbol: str, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        读取日期区间内的日线（含首尾），不存在时返回 None
+
+        文件以内存映射打开，只拷贝命中区间的数据
+        """
+        bars = cls._load_array(symbol)
+        if bars is None:
+            return None
+
+        dates = bars['date']
+        lo = 0 if start_date is None else np.searchsorted(dates, cls._to_day(start_date), side='left')
+        hi = len(dates) if end_date is None else np.searchsorted(dates, cls._to_day(end_date), side='right')
+
+        df = cls._to_frame(bars[lo:hi])
+        del bars
+        return df
+
+    @classmethod
+    def read_tail(cls, symbol: str, n: int) -> Optional[pd.DataFrame]:
+        """读取最近 n 根日线"""
+        bars = cls._load_array(symbol)
+        if bars is None:
+            return None
+
+        df = cls._to_frame(bars[max(len(bars) - n, 0):])
+        del bars
+        return df
+
+    @classmethod
+    def last_date(cls, symbol: str) -> Optional[str]:
+        """已存储的最后一根日线日期（YYYYMMDD）"""
+        bars = cls._load_array(symbol)
+        if bars is None or len(bars) == 0:
+            return None
+        return cls._to_str(bars['date'][-1])
+
+    @classmethod
+    def list_symbols(cls) -> List[str]:
+        if not cls.STORE_DIR.exists():
+            return []
+        return sorted(p.stem for p in cls.STORE_DIR.glob("*.npy") if not p.stem.startswith('_'))
+
+    @classmethod
+    def read_cached(cls, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        读取单只股票的全部已缓存日线：日线存储优先，其次合并存储（含旧版 pickle 缓存）
+
+        合并存储不存在时先构建一次，之后不再逐只扫描 pickle 缓存目录
+        """
+        df = cls.read(symbol)
+        if df is not None and not df.empty:
+            return df
+
+        packed = cls.open_pack() or cls.pack()
+        if packed is None or symbol not in packed:
+            return None
+        return packed.read(symbol)
+
+    # ========== 写入 ==========
+
+    @classmethod
+    def to_bars(cls, df: pd.DataFrame) -> np.ndarray:
+        """DataFrame（日期索引）-> 按日期排序、去重后的结构化数组"""
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_convert('Asia/Shanghai').tz_localize(None)
+
+        bars = np.empty(len(df), dtype=cls.DTYPE)
+        bars['date'] = index.normalize().values.astype('datetime64[D]')
+        for col in cls.COLUMNS:
+            if col in df.columns:
+                bars[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='f8')
+            else:
+                bars[col] = np.nan
+
+        # 同一日期保留最后一条
+        order = np.argsort(bars['date'], kind='stable')
+        bars = bars[order]
+        keep = np.ones(len(bars), dtype=bool)
+        keep[:-1] = bars['date'][1:] != bars['date'][:-1]
+        return bars[keep]
+
+    @classmethod
+    @contextmanager
+    def _write_lock(cls):
+        """
+        写锁：进程内各线程用 RLock 串行，进程间用存储目录下的锁文件串行
+        （每日筛选 DAG 的各阶段是独立进程，会同时合并同一只股票）
+        """
+        with cls._lock:
+            if cls._lock_depth:
+                cls._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    cls._lock_depth -= 1
+                return
+
+            cls.initialize()
+            with open(cls.STORE_DIR / f"{cls.PACK_PREFIX}_write.lock", 'a+b') as f:
+                _lock_file(f)
+                cls._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    cls._lock_depth = 0
+                    _unlock_file(f)
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        """每个写入方独立的临时文件名"""
+        return path.with_name(f"{path.name}.{os.getpid()}_{uuid.uuid4().hex[:8]}.tmp")
+
+    @classmethod
+    def _write(cls, symbol: str, bars: np.ndarray, meta: dict):
+        """先写临时文件再替换，读取方不会看到写了一半的文件"""
+        data_path = cls.get_data_path(symbol)
+        meta_path = cls.get_meta_path(symbol)
+        tmp_data = cls._tmp_path(data_path)
+        tmp_meta = cls._tmp_path(meta_path)
+
+        try:
+            with open(tmp_data, 'wb') as f:
+                np.save(f, bars)
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+        finally:
+            for tmp_path in (tmp_data, tmp_meta):
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+    @classmethod
+    def merge(cls, symbol: str, df: pd.DataFrame, start_date: str, end_date: str,
+              replace: bool = False) -> bool:
+        """
+        合并新获取的日线并扩展已覆盖区间
+
+        Args:
+            symbol: 股票代码
+            df: 新数据（日期索引，OHLCV 列）
+            start_date: 本次请求的开始日期
+            end_date: 本次请求的结束日期
+            replace: 是否丢弃已存储数据（全量刷新）
+
+        Returns:
+            是否写入成功
+        """
+        start_date = str(start_date).replace('-', '')
+        end_date = min(str(end_date).replace('-', ''), cls.settled_date())
+
+        try:
+            with cls._write_lock():
+                new_bars = cls.to_bars(df)
+                old_bars = None if replace else cls._load_array(symbol, mmap=False)
+                coverage = None if replace else cls.get_coverage(symbol)
+
+                if old_bars is not None and len(old_bars) > 0:
+                    # 新数据覆盖重叠日期
+                    mask = ~np.isin(old_bars['date'], new_bars['date'])
+                    bars = np.concatenate([old_bars[mask], new_bars])
+                    bars = bars[np.argsort(bars['date'], kind='stable')]
+                else:
+                    bars = new_bars
+
+                # 区间相交或相邻则合并，否则以本次请求区间为准
+                if coverage is not None:
+                    next_day = cls._to_str(cls._to_day(coverage[1]) + 1)
+                    prev_day = cls._to_str(cls._to_day(coverage[0]) - 1)
+                    if start_date <= next_day and end_date >= prev_day:
+                        start_date = min(start_date, coverage[0])
+                        end_date = max(end_date, coverage[1])
+
+                meta = {
+                    'start': start_date,
+                    'end': end_date,
+                    'rows': int(len(bars)),
+                    'updated_at': datetime.now().isoformat(timespec='seconds')
+                }
+                cls._write(symbol, bars, meta)
+            return True
+        except Exception as e:
+            print(f"保存日线存储失败 {symbol}: {str(e)}")
+            return False
+
+    # ========== 合并存储 ==========
+
+    @classmethod
+    def get_manifest_path(cls) -> Path:
+        return cls.STORE_DIR / f"{cls.PACK_PREFIX}.json"
+
+    @classmethod
+    def open_pack(cls) -> Optional['PackedBars']:
+        """打开已有的合并存储（按清单修改时间缓存，清单不变时不重复加载），不存在时返回 None"""
+        manifest_path = cls.get_manifest_path()
+        try:
+            mtime = manifest_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+        with cls._lock:
+            if cls._packed is not None and cls._packed[0] == mtime:
+                return cls._packed[1]
+
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                bars = np.load(cls.STORE_DIR / manifest['file'], mmap_mode='r')
+            except Exception as e:
+                print(f"加载合并存储失败 {manifest_path}: {str(e)}")
+                return None
+
+            packed = PackedBars(bars, manifest['symbols'])
+            cls._packed = (mtime, packed)
+            return packed
+
+    @classmethod
+    def pack(cls) -> Optional['PackedBars']:
+        """
+        把日线存储和旧版 pickle 缓存合并为一个文件 + 清单
+
+        增量构建：修改时间未变的股票直接从上一版合并存储切片复制，只重新读取有变化的文件；
+        全部未变化时不重写。先写新文件再替换清单，正在读取旧版本的进程不受影响
+
+        Returns:
+            PackedBars，没有任何缓存数据时返回 None
+        """
+        started = time.perf_counter()
+        with cls._write_lock():
+            sources = cls._scan_sources()
+            old = cls.open_pack()
+            if old is not None and old.sources() == {s: src[1] for s, src in sources.items()}:
+                return old
+
+            parts = []
+            entries = {}
+            offset = 0
+            reloaded = 0
+            for symbol in sorted(sources):
+                path, mtime, coverage = sources[symbol]
+                if old is not None and old.source_mtime(symbol) == mtime:
+                    bars = old.bars(symbol)
+                    coverage = old.coverage(symbol)
+                else:
+                    bars, coverage = cls._load_source(symbol, path, coverage)
+                    reloaded += 1
+                    if bars is None or len(bars) == 0:
+                        continue
+                parts.append(bars)
+                entries[symbol] = [offset, int(len(bars)), coverage[0], coverage[1], mtime]
+                offset += len(bars)
+
+            if not parts:
+                return None
+
+            cls.initialize()
+            data_name = f"{cls.PACK_PREFIX}_{time.time_ns():x}.npy"
+            data_path = cls.STORE_DIR / data_name
+            manifest_path = cls.get_manifest_path()
+            tmp_data = cls._tmp_path(data_path)
+            tmp_manifest = cls._tmp_path(manifest_path)
+
+            try:
+                with open(tmp_data, 'wb') as f:
+                    np.save(f, np.concatenate(parts))
+                del parts
+                with open(tmp_manifest, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'file': data_name,
+                        'rows': offset,
+                        'built_at': datetime.now().isoformat(timespec='seconds'),
+                        'symbols': entries
+                    }, f)
+                os.replace(tmp_data, data_path)
+                os.replace(tmp_manifest, manifest_path)
+            except Exception as e:
+                print(f"保存合并存储失败: {str(e)}")
+                for tmp_path in (tmp_data, tmp_manifest):
+                    if tmp_path.exists():
+                        tmp_path.unlink()
+                return old
+
+            packed = cls.open_pack()
+
+            # 删除清单不再引用的旧版本（已打开的内存映射仍可读取，Windows 下删除失败则留到下次）
+            current = data_name if packed is None else os.path.basename(packed.filename)
+            for stale in cls.STORE_DIR.glob(f"{cls.PACK_PREFIX}_*.npy"):
+                if stale.name != current:
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        pass
+
+            print(f"合并存储: {len(entries)} 只股票，{offset} 根K线（重新读取 {reloaded} 只，"
+                  f"耗时 {time.perf_counter() - started:.2f}秒）")
+            return packed
+
+    @classmethod
+    def _scan_sources(cls) -> Dict[str, Tuple[Path, int, Optional[Tuple[str, str]]]]:
+        """
+        扫描日线存储和旧版 pickle 缓存目录（每个目录一次 scandir，不读取文件内容）
+
+        Returns:
+            {symbol: (文件路径, 修改时间ns, 旧版缓存文件名中的区间)}，
+            日线存储中已有的股票不再使用旧版缓存；旧版缓存取结束日期最新的文件
+        """
+        sources = {}
+        if cls.STORE_DIR.exists():
+            with os.scandir(cls.STORE_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.npy') and not entry.name.startswith('_'):
+                        sources[entry.name[:-4]] = (Path(entry.path), entry.stat().st_mtime_ns, None)
+
+        legacy = {}
+        if cls.LEGACY_CACHE_DIR.exists():
+            with os.scandir(cls.LEGACY_CACHE_DIR) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.pkl'):
+                        continue
+                    parts = entry.name[:-4].split('_')
+                    if len(parts) < 3 or parts[0] in sources:
+                        continue
+                    mtime = entry.stat().st_mtime_ns
+                    key = (parts[2], mtime)
+                    if parts[0] not in legacy or key > legacy[parts[0]][0]:
+                        legacy[parts[0]] = (key, (Path(entry.path), mtime, (parts[1], parts[2])))
+
+        sources.update({symbol: source for symbol, (_, source) in legacy.items()})
+        return sources
+
+    @classmethod
+    def _load_source(cls, symbol: str, path: Path,
+                     coverage: Optional[Tuple[str, str]]) -> Tuple[Optional[np.ndarray], Optional[Tuple[str, str]]]:
+        """读取单个源文件，返回 (结构化数组, 已覆盖区间)"""
+        try:
+            if path.suffix == '.npy':
+                bars = np.load(path)
+                coverage = cls.get_coverage(symbol)
+                if coverage is None and len(bars):
+                    coverage = (cls._to_str(bars['date'][0]), cls._to_str(bars['date'][-1]))
+                return bars, coverage
+
+            with open(path, 'rb') as f:
+                df = pickle.load(f)
+            if df is None or len(df) == 0:
+                return None, None
+            df = df.rename(columns=str.lower)
+            if not isinstance(df.index, pd.DatetimeIndex) and 'date' in df.columns:
+                df = df.set_index(pd.to_datetime(df['date']))
+            return cls.to_bars(df), coverage
+        except Exception as e:
+            print(f"读取缓存文件失败 {path}: {str(e)}")
+            return None, None
+
+    # ========== 维护 ==========
+
+    @classmethod
+    def clear(cls, symbol: Optional[str] = None):
+        """删除单只股票或全部存储"""
+        if not cls.STORE_DIR.exists():
+            return
+
+        pattern = f"{symbol}.*" if symbol else "*"
+        with cls._write_lock():
+            for store_file in cls.STORE_DIR.glob(pattern):
+                if store_file.suffix == '.lock':
+                    continue
+                try:
+                    store_file.unlink()
+                except Exception as e:
+                    print(f"删除日线存储失败 {store_file}: {str(e)}")
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = {
+            'symbol_count': 0,
+            'total_rows': 0,
+            'total_size_mb': 0
+        }
+
+        if not cls.STORE_DIR.exists():
+            return stats
+
+        total_size = 0
+        for store_file in cls.STORE_DIR.glob("*.npy"):
+            if store_file.stem.startswith('_'):
+                continue
+            stats['symbol_count'] += 1
+            total_size += store_file.stat().st_size
+            meta = cls.load_meta(store_file.stem)
+            if meta:
+                stats['total_rows'] += meta.get('rows', 0)
+
+        stats['total_size_mb'] = round(total_size / (1024 * 1024), 2)
+
+        return stats
+
+
+class PackedBars:
+    """
+    合并存储的只读视图：全部股票的日线拼接在一个内存映射数组中，
+    清单记录每只股票的 [偏移量, 行数, 覆盖开始, 覆盖结束, 源文件修改时间]
+    """
+
+    def __init__(self, data: np.ndarray, entries: Dict[str, list]):
+        self._data = data
+        self._entries = entries
+        self.filename = getattr(data, 'filename', None) or ''
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._entries)
+
+    def bars(self, symbol: str, n: Optional[int] = None) -> np.ndarray:
+        """最近 n 根（默认全部）日线，返回内存映射上的切片（不复制）"""
+        offset, rows = self._entries[symbol][:2]
+        start = offset if n is None else offset + max(rows - n, 0)
+        return self._data[start:offset + rows]
+
+    def coverage(self, symbol: str) -> Tuple[str, str]:
+        """已覆盖的日期区间 (start, end)，YYYYMMDD 格式"""
+        return tuple(self._entries[symbol][2:4])
+
+    def source_mtime(self, symbol: str) -> Optional[int]:
+        entry = self._entries.get(symbol)
+        return entry[4] if entry is not None else None
+
+    def sources(self) -> Dict[str, int]:
+        return {symbol: entry[4] for symbol, entry in self._entries.items()}
+
+    def read(self, symbol: str, n: Optional[int] = None) -> pd.DataFrame:
+        """最近 n 根（默认全部）日线的 DataFrame"""
+        return BarStore._to_frame(self.bars(symbol, n))
+
+    def tail_frames(self, n: int, symbols: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        批量读取最近 n 根日线
+
+        Args:
+            n: K线数
+            symbols: 股票代码列表，默认为全部（按代码排序）
+
+        Returns:
+            {symbol: DataFrame}，不在合并存储中的股票不包含在内
+        """
+        if symbols is None:
+            symbols = self.symbols
+        return {symbol: self.read(symbol, n) for symbol in symbols
+                if symbol in self._entries and self._entries[symbol][1] > 0}
@@ -8,12 +8,14 @@ class CacheManager:
     CACHE_DIR = Path("cache")
     STOCK_CACHE_DIR = CACHE_DIR / "stock"
     MACRO_CACHE_DIR = CACHE_DIR / "macro"
+    BAR_CACHE_DIR = CACHE_DIR / "bars"
     CACHE_EXPIRE_HOURS = 24
     
     @classmethod
     def initialize(cls):
         cls.STOCK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
         cls.MACRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cls.BAR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
     
     @classmethod
     def get_cache_key(cls, symbol: str, start_date: str, end_date: str) -> str:
@@ -113,6 +115,13 @@ class CacheManager:
                         cache_file.unlink()
                     except Exception as e:
                         print(f"删除缓存失败 {cache_file}: {str(e)}")
+
+        if cls.BAR_CACHE_DIR.exists():
+            for store_file in cls.BAR_CACHE_DIR.glob("*"):
+                try:
+                    store_file.unlink()
+                except Exception as e:
+                    print(f"删除缓存失败 {store_file}: {str(e)}")
         
         print("已清空所有缓存")
     
@@ -121,6 +130,7 @@ class CacheManager:
         stats = {
             'stock_cache_count': 0,
             'macro_cache_count': 0,
+            'bar_symbol_count': 0,
             'total_size_mb': 0
         }
         
@@ -129,12 +139,19 @@ class CacheManager:
         
         if cls.MACRO_CACHE_DIR.exists():
             stats['macro_cache_count'] = len(list(cls.MACRO_CACHE_DIR.glob("*.pkl")))
+
+        if cls.BAR_CACHE_DIR.exists():
+            stats['bar_symbol_count'] = len([p for p in cls.BAR_CACHE_DIR.glob("*.npy") if not p.stem.startswith('_')])
         
         total_size = 0
         for cache_dir in [cls.STOCK_CACHE_DIR, cls.MACRO_CACHE_DIR]:
             if cache_dir.exists():
                 for cache_file in cache_dir.glob("*.pkl"):
                     total_size += cache_file.stat().st_size
+
+        if cls.BAR_CACHE_DIR.exists():
+            for store_file in cls.BAR_CACHE_DIR.glob("*.npy"):
+                total_size += store_file.stat().st_size
         
         stats['total_size_mb'] = round(total_size / (1024 * 1024), 2)
         
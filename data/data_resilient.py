@@ -7,8 +7,15 @@ import akshare as ak
 import time
 import random
 import os
+import threading
 from datetime import datetime
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .cache_manager import CacheManager
+from .bar_store import BarStore
+from .baostock_session import BaostockSession
+from .universe import Universe
+from .source_router import SourceRouter, EmptyDataError
 from .config_data_source import DATA_SOURCE_CONFIG, get_enabled_sources
 
 # 强制禁用所有代理（解决 Connection aborted 问题）
@@ -35,7 +42,7 @@ DIGGOLD_AVAILABLE = False
 DIGGOLD_TOKEN = None
 
 try:
-    from gm.api import set_token, history, history_n, get_instruments
+    from gm.api import set_token, history, history_n
     DIGGOLD_AVAILABLE = True
     DIGGOLD_TOKEN = DATA_SOURCE_CONFIG['sources']['diggold']['token']
     # 初始化掘金SDK
@@ -47,9 +54,46 @@ except Exception as e:
     print(f"[数据源] 东财掘金SDK初始化失败: {e}")
 
 
+class _SourceRateLimiter:
+    """按数据源限制请求频率（线程安全），配置为每秒最多请求次数"""
+
+    def __init__(self, rate_limits: dict):
+        self._intervals = {source_id: 1.0 / rate for source_id, rate in rate_limits.items() if rate}
+        self._next_time = {}
+        self._lock = threading.Lock()
+
+    def wait(self, source_id: str):
+        interval = self._intervals.get(source_id)
+        if not interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_time.get(source_id, now))
+            self._next_time[source_id] = scheduled + interval
+
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+_rate_limiter = _SourceRateLimiter(DATA_SOURCE_CONFIG.get('rate_limits', {}))
+
+# 数据源健康度与熔断状态（进程内所有线程共享）
+_source_router = SourceRouter.from_config(DATA_SOURCE_CONFIG.get('circuit_breaker'))
+
+
 class DataResilient:
     """数据获取类 - 掘金SDK优先"""
 
+    # 重叠日线价格相对偏差超过该值视为复权因子变化
+    # 小额分红对前复权价格的调整可能远小于 0.1%，只容许浮点误差；
+    # 数据源切换导致的小数位差异会触发一次全量刷新（宁可多刷新，不拼接复权口径不同的日线）
+    ADJUST_TOLERANCE = 1e-6
+
+    # 掘金 history 单次请求的股票数量上限与返回行数上限
+    BATCH_SIZE = 50
+    MAX_BATCH_ROWS = 30000
+
     @staticmethod
     def _is_index(symbol: str) -> bool:
         """判断是否为指数代码"""
@@ -63,25 +107,308 @@ class DataResilient:
         获取股票历史数据
 
         优先使用掘金SDK，失败时根据配置决定是否使用备用数据源
+        已存储区间直接从日线列式存储切片返回，不再按请求区间重复缓存；
+        只缺尾部时仅增量获取最后一根已存储日线之后的数据
         """
-        # 1. 尝试从缓存加载
-        if use_cache:
-            cached_data = CacheManager.load_stock_cache(symbol, start_date, end_date)
+        # 1. 尝试从日线存储读取
+        if use_cache and BarStore.covers(symbol, start_date, end_date):
+            cached_data = BarStore.read(symbol, start_date, end_date)
             if cached_data is not None:
                 return cached_data
 
-        # 2. 从数据源获取（区分指数和股票）
-        if DataResilient._is_index(symbol):
-            df = DataResilient._fetch_index_data(symbol, start_date, end_date)
-        else:
-            df = DataResilient._fetch_with_multi_source(symbol, start_date, end_date)
+        # 2. 只缺尾部时增量获取
+        if use_cache and DATA_SOURCE_CONFIG.get('incremental_update', True):
+            coverage = BarStore.get_coverage(symbol)
+            if coverage is not None and coverage[0] <= start_date <= coverage[1]:
+                df = DataResilient._fetch_missing_tail(symbol, start_date, end_date, coverage)
+                if df is not None:
+                    return df
+
+        # 3. 从数据源获取（区分指数和股票）
+        df = DataResilient._fetch_from_source(symbol, start_date, end_date)
 
-        # 3. 保存到缓存
+        # 4. 合并到日线存储，返回统一格式的切片
         if use_cache and df is not None and not df.empty:
-            CacheManager.save_stock_cache(symbol, start_date, end_date, df)
+            if BarStore.merge(symbol, df, start_date, end_date):
+                stored = BarStore.read(symbol, start_date, end_date)
+                if stored is not None and not stored.empty:
+                    return stored
 
         return df
 
+    @staticmethod
+    def fetch_many(symbols: List[str], start_date: str, end_date: str,
+                   use_cache: bool = True, max_workers: int = None) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的历史数据
+
+        1. 日线存储已覆盖的股票直接切片读取
+        2. 其余股票按请求起始日期分组，通过掘金 history 的多代码请求批量获取
+        3. 批量未取到的股票（及指数）进入有界线程池逐只获取，按数据源限速
+
+        Args:
+            symbols: 股票代码列表（6位数字）
+            start_date: 开始日期 (YYYYMMDD)
+            end_date: 结束日期 (YYYYMMDD)
+            use_cache: 是否使用日线存储
+            max_workers: 逐只获取的并发线程数，默认读取配置 max_workers
+
+        Returns:
+            {股票代码: DataFrame}，获取失败的股票不包含在内
+        """
+        results = {}
+        pending = []
+
+        for symbol in dict.fromkeys(symbols):
+            if use_cache and BarStore.covers(symbol, start_date, end_date):
+                cached_data = BarStore.read(symbol, start_date, end_date)
+                if cached_data is not None:
+                    results[symbol] = cached_data
+                    continue
+            pending.append(symbol)
+
+        cache_hits = len(results)
+
+        # 批量获取（掘金SDK）
+        batch_symbols = [s for s in pending if not DataResilient._is_index(s)]
+        if batch_symbols and DataResilient._batch_source_available():
+            batch_results = DataResilient._fetch_batch(batch_symbols, start_date, end_date, use_cache)
+            results.update(batch_results)
+            pending = [s for s in pending if s not in batch_results]
+
+        batch_count = len(results) - cache_hits
+
+        # 逐只获取（有界线程池）
+        if pending:
+            if max_workers is None:
+                max_workers = DATA_SOURCE_CONFIG.get('max_workers', 4)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(DataResilient.fetch_stock_data, symbol, start_date, end_date, use_cache): symbol
+                    for symbol in pending
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        print(f"  {symbol} 获取失败: {str(e)[:40]}")
+                        continue
+                    if df is not None and not df.empty:
+                        results[symbol] = df
+
+        print(f"批量获取完成: 存储命中 {cache_hits}, 批量获取 {batch_count}, "
+              f"逐只获取 {len(results) - cache_hits - batch_count}, 失败 {len(dict.fromkeys(symbols)) - len(results)}")
+        if any(status['trips'] for status in _source_router.snapshot().values()):
+            DataResilient.print_source_status()
+
+        return results
+
+    @staticmethod
+    def get_source_status() -> Dict[str, dict]:
+        """各数据源的健康度与熔断状态（成功率、平均耗时、熔断次数等）"""
+        return _source_router.snapshot()
+
+    @staticmethod
+    def print_source_status():
+        """打印各数据源的健康度与熔断状态"""
+        names = {source_id: config['name'] for source_id, config in DATA_SOURCE_CONFIG['sources'].items()}
+        _source_router.print_status(names)
+
+    @staticmethod
+    def _batch_source_available() -> bool:
+        """掘金SDK可用且已启用时才走批量请求"""
+        return (DIGGOLD_AVAILABLE and _source_router.is_available('diggold')
+                and any(source_id == 'diggold' for source_id, _ in get_enabled_sources()))
+
+    @staticmethod
+    def _fetch_batch(symbols: List[str], start_date: str, end_date: str,
+                     use_cache: bool = True) -> Dict[str, pd.DataFrame]:
+        """
+        按请求起始日期分组批量获取
+
+        已存储的股票只请求缺失的尾部（与 fetch_stock_data 的增量逻辑一致），
+        复权因子变化或批量结果缺失的股票不返回，由调用方逐只获取
+        """
+        groups = {}
+        coverages = {}
+        incremental = use_cache and DATA_SOURCE_CONFIG.get('incremental_update', True)
+
+        for symbol in symbols:
+            fetch_start = start_date
+            if incremental:
+                coverage = BarStore.get_coverage(symbol)
+                if coverage is not None and coverage[0] <= start_date <= coverage[1]:
+                    coverages[symbol] = coverage
+                    fetch_start = min(BarStore.last_date(symbol) or coverage[1], coverage[1])
+            groups.setdefault(fetch_start, []).append(symbol)
+
+        results = {}
+
+        for fetch_start, group in groups.items():
+            # 按日期跨度估算行数，控制单次请求规模
+            span_days = (pd.Timestamp(end_date) - pd.Timestamp(fetch_start)).days + 1
+            batch_size = max(1, min(DataResilient.BATCH_SIZE, DataResilient.MAX_BATCH_ROWS // max(span_days, 1)))
+
+            for i in range(0, len(group), batch_size):
+                batch = group[i:i + batch_size]
+                # 掘金熔断后不再批量请求，剩余股票由调用方逐只获取（走其他数据源）
+                if not _source_router.allow('diggold'):
+                    print("  掘金SDK已熔断，剩余股票改为逐只获取")
+                    return results
+                _rate_limiter.wait('diggold')
+                try:
+                    frames = DataResilient._fetch_batch_from_diggold(batch, fetch_start, end_date)
+                except Exception as e:
+                    _source_router.record('diggold', False, error=str(e))
+                    print(f"  掘金SDK批量获取失败 ({len(batch)} 只): {str(e)[:40]}")
+                    continue
+                _source_router.record('diggold', True)
+
+                for symbol, df in frames.items():
+                    df = DataResilient._standardize_dataframe(df)
+                    if not use_cache:
+                        results[symbol] = df
+                    elif symbol in coverages:
+                        merged = DataResilient._apply_tail(symbol, start_date, end_date,
+                                                           coverages[symbol], fetch_start, df)
+                        if merged is not None:
+                            results[symbol] = merged
+                    elif BarStore.merge(symbol, df, start_date, end_date):
+                        results[symbol] = BarStore.read(symbol, start_date, end_date)
+                    else:
+                        results[symbol] = df
+
+        return results
+
+    @staticmethod
+    def _fetch_batch_from_diggold(symbols: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """使用掘金SDK的多代码 history 请求批量获取日线"""
+        if not DIGGOLD_AVAILABLE:
+            raise ValueError("掘金SDK未安装或未初始化")
+
+        start_date_diggold = f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:]}"
+        end_date_diggold = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}"
+
+        symbol_map = {DataResilient._to_diggold_symbol(s): s for s in symbols}
+
+        data = history(
+            symbol=','.join(symbol_map.keys()),
+            frequency='1d',
+            start_time=start_date_diggold,
+            end_time=end_date_diggold,
+            adjust=1,  # 前复权
+            df=True
+        )
+
+        if data is None or data.empty or 'symbol' not in data.columns:
+            return {}
+
+        if 'eob' in data.columns:
+            data['date'] = pd.to_datetime(data['eob'])
+        elif 'bob' in data.columns:
+            data['date'] = pd.to_datetime(data['bob'])
+        else:
+            return {}
+
+        required_cols = ['open', 'high', 'low', 'close', 'volume']
+        available_cols = [col for col in required_cols if col in data.columns]
+
+        frames = {}
+        for diggold_symbol, group in data.groupby('symbol'):
+            symbol = symbol_map.get(diggold_symbol)
+            if symbol is None or group.empty:
+                continue
+            frames[symbol] = group.set_index('date')[available_cols].sort_index()
+
+        return frames
+
+    @staticmethod
+    def _to_diggold_symbol(symbol: str) -> str:
+        """转换股票代码: 600519 -> SHSE.600519, 000001 -> SZSE.000001"""
+        if symbol.startswith('6') or symbol.startswith('5'):
+            return f"SHSE.{symbol}"
+        return f"SZSE.{symbol}"
+
+    @staticmethod
+    def _fetch_from_source(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """从数据源获取（区分指数和股票）"""
+        if DataResilient._is_index(symbol):
+            return DataResilient._fetch_index_data(symbol, start_date, end_date)
+        return DataResilient._fetch_with_multi_source(symbol, start_date, end_date)
+
+    @staticmethod
+    def _fetch_missing_tail(symbol: str, start_date: str, end_date: str, coverage: tuple) -> pd.DataFrame:
+        """
+        增量获取已存储区间之后的日线
+
+        从最后一根已存储日线开始请求，用这根重叠日线的收盘价校验复权因子：
+        前复权价格发生变化（除权除息）时，全量刷新该股票的存储
+
+        Returns:
+            请求区间的数据，增量获取失败时返回None（由调用方全量获取）
+        """
+        last_date = BarStore.last_date(symbol) or coverage[1]
+        tail_start = min(last_date, coverage[1])
+
+        try:
+            tail = DataResilient._fetch_from_source(symbol, tail_start, end_date)
+        except Exception as e:
+            print(f"  {symbol} 增量获取失败: {str(e)[:40]}")
+            return None
+
+        if tail is None or tail.empty:
+            return None
+
+        return DataResilient._apply_tail(symbol, start_date, end_date, coverage, tail_start, tail)
+
+    @staticmethod
+    def _apply_tail(symbol: str, start_date: str, end_date: str, coverage: tuple,
+                    tail_start: str, tail: pd.DataFrame) -> pd.DataFrame:
+        """校验复权因子并合并增量数据，返回请求区间的数据（失败返回None）"""
+        tail_bars = BarStore.to_bars(tail)
+        stored = BarStore.read(symbol, tail_start, tail_start)
+
+        if DataResilient._adjust_factor_changed(stored, tail_bars):
+            # 复权因子变化，重新获取已存储区间与请求区间的并集
+            refresh_start = min(start_date, coverage[0])
+            print(f"  {symbol} 复权因子变化，全量刷新 {refresh_start} ~ {end_date}")
+            try:
+                df = DataResilient._fetch_from_source(symbol, refresh_start, end_date)
+            except Exception as e:
+                print(f"  {symbol} 全量刷新失败: {str(e)[:40]}")
+                return None
+            if df is None or df.empty or not BarStore.merge(symbol, df, refresh_start, end_date, replace=True):
+                return None
+        elif not BarStore.merge(symbol, tail, tail_start, end_date):
+            return None
+
+        return BarStore.read(symbol, start_date, end_date)
+
+    @staticmethod
+    def _adjust_factor_changed(stored: pd.DataFrame, tail_bars) -> bool:
+        """比较重叠日线的开高低收，判断前复权价格是否被整体调整"""
+        if stored is None or stored.empty:
+            return False
+
+        overlap_day = stored.index[-1].to_datetime64().astype('datetime64[D]')
+        matched = tail_bars[tail_bars['date'] == overlap_day]
+        if len(matched) == 0:
+            return False
+
+        for col in ('open', 'high', 'low', 'close'):
+            if col not in stored.columns:
+                continue
+            old_price = float(stored[col].iloc[-1])
+            new_price = float(matched[col][0])
+            if not old_price or pd.isna(old_price) or pd.isna(new_price):
+                continue
+            if abs(new_price - old_price) / abs(old_price) > DataResilient.ADJUST_TOLERANCE:
+                return True
+
+        return False
+
     @staticmethod
     def _fetch_with_multi_source(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """多数据源容错机制 - 根据配置文件决定使用哪些数据源"""
@@ -112,10 +439,8 @@ class DataResilient:
         retry_delay = DATA_SOURCE_CONFIG.get('retry_delay', (0.5, 1.5))
         auto_fallback = DATA_SOURCE_CONFIG.get('auto_fallback', True)
 
-        # 按优先级尝试每个数据源
+        source_configs = {}
         for source_id, source_config in enabled_sources:
-            source_name = source_config['name']
-
             # 检查数据源是否可用
             if source_id == 'diggold' and not DIGGOLD_AVAILABLE:
                 continue
@@ -131,24 +456,43 @@ class DataResilient:
                     import efinance as ef
                 except ImportError:
                     continue
+            source_configs[source_id] = source_config
 
-            # 尝试获取数据
+        # 按健康度排序（熔断冷却中的数据源直接跳过）
+        for source_id in _source_router.order(source_configs):
+            source_name = source_configs[source_id]['name']
+
+            # 尝试获取数据：只在数据源未熔断时重试
             for attempt in range(max_retries + 1):
+                if not _source_router.allow(source_id):
+                    print(f"  {source_name} 已熔断，跳过")
+                    break
+
+                print(f"尝试使用 {source_name} 获取 {symbol} 数据...")
+                _rate_limiter.wait(source_id)
+                started = time.perf_counter()
                 try:
-                    print(f"尝试使用 {source_name} 获取 {symbol} 数据...")
                     df = source_functions[source_id]()
 
                     if df is None or df.empty:
-                        raise ValueError(f"获取数据为空: {symbol}")
+                        raise EmptyDataError(f"获取数据为空: {symbol}")
 
                     # 标准化数据格式
                     df = DataResilient._standardize_dataframe(df)
+                    _source_router.record(source_id, True, time.perf_counter() - started)
                     print(f"成功使用 {source_name} 获取 {len(df)} 条数据")
 
                     return df
 
+                except EmptyDataError as e:
+                    # 数据源正常响应但没有数据，不重试，换下一个数据源
+                    _source_router.record(source_id, True, time.perf_counter() - started)
+                    print(f"  {source_name} 无数据 ({str(e)[:40]})")
+                    break
+
                 except Exception as e:
-                    if attempt < max_retries:
+                    _source_router.record(source_id, False, time.perf_counter() - started, str(e))
+                    if attempt < max_retries and _source_router.is_available(source_id):
                         delay = random.uniform(retry_delay[0], retry_delay[1])
                         print(f"  {source_name} 失败，重试中... ({str(e)[:40]})")
                         time.sleep(delay)
@@ -260,7 +604,7 @@ class DataResilient:
         )
 
         if data.empty:
-            raise ValueError(f"掘金SDK返回空数据: {symbol}")
+            raise EmptyDataError(f"掘金SDK返回空数据: {symbol}")
 
         # 处理日期列
         if 'eob' in data.columns:
@@ -290,10 +634,7 @@ class DataResilient:
         end_date_diggold = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}"
 
         # 转换股票代码: 600519 -> SHSE.600519, 000001 -> SZSE.000001
-        if symbol.startswith('6') or symbol.startswith('5'):
-            diggold_symbol = f"SHSE.{symbol}"
-        else:
-            diggold_symbol = f"SZSE.{symbol}"
+        diggold_symbol = DataResilient._to_diggold_symbol(symbol)
 
         # 获取数据
         data = history(
@@ -306,7 +647,7 @@ class DataResilient:
         )
 
         if data.empty:
-            raise ValueError(f"掘金SDK返回空数据: {symbol}")
+            raise EmptyDataError(f"掘金SDK返回空数据: {symbol}")
 
         # 处理日期列 - 掘金返回 eob/bob 列
         if 'eob' in data.columns:
@@ -329,8 +670,6 @@ class DataResilient:
     @staticmethod
     def _fetch_from_baostock(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """使用 Baostock 获取数据（备用数据源）"""
-        import baostock as bs
-
         # 转换日期格式
         start_date_baostock = f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:]}"
         end_date_baostock = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}"
@@ -338,8 +677,8 @@ class DataResilient:
         # 判断市场
         market = 'sh' if symbol.startswith('6') else 'sz'
 
-        bs.login()
-        rs = bs.query_history_k_data_plus(
+        # 复用进程内的 baostock 会话（查询串行执行）
+        fields, data_list = BaostockSession.query_history_k_data(
             f"{market}.{symbol}",
             "date,open,high,low,close,volume,amount",
             start_date=start_date_baostock,
@@ -348,17 +687,11 @@ class DataResilient:
             adjustflag="2"  # 前复权
         )
 
-        data_list = []
-        while (rs.error_code == '0') & rs.next():
-            data_list.append(rs.get_row_data())
-
-        bs.logout()
-
         if not data_list:
-            raise ValueError(f"Baostock 返回空数据: {symbol}")
+            raise EmptyDataError(f"Baostock 返回空数据: {symbol}")
 
         df = pd.DataFrame(data_list)
-        df.columns = rs.fields
+        df.columns = fields
 
         # 转换数据类型
         df['date'] = pd.to_datetime(df['date'])
@@ -384,7 +717,7 @@ class DataResilient:
         )
 
         if df is None or df.empty:
-            raise ValueError(f"Efinance 返回空数据: {symbol}")
+            raise EmptyDataError(f"Efinance 返回空数据: {symbol}")
 
         # efinance 返回的列名需要映射
         column_mapping = {
@@ -436,6 +769,13 @@ class DataResilient:
             df['date'] = pd.to_datetime(df['date'])
             df.set_index('date', inplace=True)
 
+        # 掘金返回带时区的收盘时间（eob），统一为不带时区的交易日期（与 BarStore 读出的格式一致）
+        if isinstance(df.index, pd.DatetimeIndex):
+            index = df.index
+            if index.tz is not None:
+                index = index.tz_convert('Asia/Shanghai').tz_localize(None)
+            df.index = index.normalize().as_unit('ns').rename('date')
+
         # 确保数值列为正确类型
         for col in ['open', 'close', 'high', 'low', 'volume']:
             if col in df.columns:
@@ -491,60 +831,15 @@ class DataResilient:
 
     @staticmethod
     def get_stock_info(use_cache: bool = True) -> pd.DataFrame:
-        """获取股票信息"""
-        cache_key = 'stock_info'
-
-        if use_cache:
-            cached_data = CacheManager.load_macro_cache(cache_key)
-            if cached_data is not None:
-                return cached_data
-
-        try:
-            # 优先使用掘金SDK
-            if DIGGOLD_AVAILABLE:
-                df = get_instruments(sec_types=1, df=True)
-                if not df.empty and 'symbol' in df.columns and 'sec_name' in df.columns:
-                    # 转换为标准格式
-                    result = pd.DataFrame({
-                        'code': df['symbol'].apply(lambda x: x.split('.')[-1]),
-                        'name': df['sec_name']
-                    })
-                    if use_cache:
-                        CacheManager.save_macro_cache(cache_key, result)
-                    return result
-
-            # 降级使用AkShare
-            df = ak.stock_info_a_code_name()
-
-            if use_cache and df is not None and not df.empty:
-                CacheManager.save_macro_cache(cache_key, df)
-
-            return df
-        except Exception as e:
-            print(f"获取股票信息失败: {str(e)}")
-            return pd.DataFrame()
+        """获取股票信息（代码、名称），来自当日全市场元数据"""
+        table = Universe.get(refresh=not use_cache)
+        if table.empty:
+            return pd.DataFrame(columns=['code', 'name'])
+        return pd.DataFrame({'code': table.index, 'name': table['name'].values})
 
     @staticmethod
     def get_hs300_symbols(use_cache: bool = True) -> list:
-        """获取沪深300成分股"""
-        cache_key = 'hs300_symbols'
-
-        if use_cache:
-            cached_data = CacheManager.load_macro_cache(cache_key)
-            if cached_data is not None:
-                return cached_data
-
-        try:
-            hs300 = ak.index_stock_cons(symbol="000300")
-            hs300 = hs300.drop_duplicates(subset=['品种代码'], keep='first')
-            hs300['symbol'] = hs300['品种代码'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(6)
-            hs300['symbol'] = hs300['symbol'].apply(lambda x: f"{x}.SZ" if x.startswith(('0','3')) else f"{x}.SH")
-            symbols = hs300['symbol'].drop_duplicates().tolist()
-
-            if use_cache:
-                CacheManager.save_macro_cache(cache_key, symbols)
-
-            return symbols
-        except Exception as e:
-            print(f"获取沪深300成分股失败: {str(e)}")
-            return []
+        """获取沪深300成分股（600519.SH 格式）"""
+        if not use_cache:
+            Universe.get(refresh=True)
+        return Universe.symbols(fmt='suffix', index='000300')
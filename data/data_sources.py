@@ -8,7 +8,8 @@ import requests
 from datetime import datetime, timedelta
 from typing import Optional, List
 import time
-import random
+
+from .source_router import SourceRouter, EmptyDataError
 
 
 class DataSourceBase:
@@ -75,7 +76,7 @@ class SinaDataSource(DataSourceBase):
             data = json.loads(response.text)
 
             if not data:
-                raise Exception("返回数据为空")
+                raise EmptyDataError("返回数据为空")
 
             # 转换为DataFrame
             df = pd.DataFrame(data)
@@ -99,7 +100,7 @@ class SinaDataSource(DataSourceBase):
             df = df[(df['date'] >= start) & (df['date'] <= end)]
 
             if df.empty:
-                raise Exception("筛选后数据为空")
+                raise EmptyDataError("筛选后数据为空")
 
             # 去除空值
             df = df.dropna()
@@ -111,6 +112,8 @@ class SinaDataSource(DataSourceBase):
 
             return df
 
+        except EmptyDataError:
+            raise
         except Exception as e:
             raise Exception(f"新浪数据源获取失败: {str(e)}")
 
@@ -152,7 +155,7 @@ class EfinanceDataSource(DataSourceBase):
             )
 
             if df is None or df.empty:
-                raise Exception("efinance返回数据为空")
+                raise EmptyDataError("efinance返回数据为空")
 
             # 重命名列
             column_mapping = {
@@ -200,6 +203,8 @@ class EfinanceDataSource(DataSourceBase):
 
         except ImportError:
             raise Exception("efinance库未安装，请使用: pip install efinance")
+        except EmptyDataError:
+            raise
         except Exception as e:
             raise Exception(f"Efinance数据源获取失败: {str(e)}")
 
@@ -216,12 +221,8 @@ class BaostockDataSource(DataSourceBase):
     def fetch_stock_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """使用baostock获取股票数据"""
         try:
-            import baostock as bs
-
-            # 登录系统
-            lg = bs.login()
-            if lg.error_code != '0':
-                raise Exception(f"Baostock登录失败: {lg.error_msg}")
+            import baostock  # noqa: F401  检查是否已安装
+            from .baostock_session import BaostockSession
 
             # 转换代码格式: 000001.SZ -> sz.000001
             code = symbol.split('.')[0]
@@ -234,31 +235,20 @@ class BaostockDataSource(DataSourceBase):
             start = start_date.replace('-', '')[:8]
             end = end_date.replace('-', '')[:8]
 
-            # 获取历史数据
-            rs = bs.query_history_k_data_plus(
+            # 获取历史数据（复用进程内的 baostock 会话）
+            fields, data_list = BaostockSession.query_history_k_data(
                 stock_code,
+                "date,open,high,low,close,volume,amount",
                 start_date=start,
                 end_date=end,
                 frequency="d",  # 日线
-                adjustflag="2",  # 2: 不复权
-                fields="date,open,high,low,close,volume,amount"
+                adjustflag="2"  # 2: 不复权
             )
 
-            # 登出系统
-            bs.logout()
-
-            if rs.error_code != '0':
-                raise Exception(f"Baostock查询失败: {rs.error_msg}")
-
-            # 转换为DataFrame
-            data_list = []
-            while (rs.error_code == '0') & rs.next():
-                data_list.append(rs.get_row_data())
-
             if not data_list:
-                raise Exception("Baostock返回数据为空")
+                raise EmptyDataError("Baostock返回数据为空")
 
-            df = pd.DataFrame(data_list, columns=rs.fields)
+            df = pd.DataFrame(data_list, columns=fields)
 
             # 重命名列
             df.rename(columns={
@@ -280,7 +270,7 @@ class BaostockDataSource(DataSourceBase):
             df = df.dropna()
 
             if df.empty:
-                raise Exception("处理后数据为空")
+                raise EmptyDataError("处理后数据为空")
 
             df.set_index('date', inplace=True)
 
@@ -291,6 +281,8 @@ class BaostockDataSource(DataSourceBase):
 
         except ImportError:
             raise Exception("baostock库未安装，请使用: pip install baostock")
+        except EmptyDataError:
+            raise
         except Exception as e:
             raise Exception(f"Baostock数据源获取失败: {str(e)}")
 
@@ -389,15 +381,25 @@ class AkshareBackupSource(DataSourceBase):
             raise Exception(f"Akshare备用数据源获取失败: {str(e)}")
 
 
+# 数据源健康度与熔断状态（进程内所有获取器、所有线程共享）
+_shared_router = SourceRouter()
+
+
 class MultiSourceDataFetcher:
     """
     多数据源获取器
-    自动在多个数据源之间切换，提高可用性
+    自动在多个数据源之间切换，提高可用性；
+    按最近成功率与耗时排序数据源，连续失败的数据源熔断跳过
     """
 
-    def __init__(self, sources: Optional[List[DataSourceBase]] = None):
+    def __init__(self, sources: Optional[List[DataSourceBase]] = None,
+                 router: Optional[SourceRouter] = None):
         """
         初始化数据源列表
+
+        Args:
+            sources: 数据源列表（按优先级排序）
+            router: 数据源路由，默认使用进程内共享的路由
         """
         if sources is None:
             # 默认数据源列表（按优先级排序）
@@ -410,6 +412,7 @@ class MultiSourceDataFetcher:
         else:
             self.sources = sources
 
+        self.router = router or _shared_router
         self.source_status = {source.get_name(): {'success': 0, 'failure': 0} for source in self.sources}
         self.last_success_source = None
 
@@ -426,34 +429,43 @@ class MultiSourceDataFetcher:
         Returns:
             DataFrame or None
         """
-        # 如果上次成功的源优先尝试
-        sources_to_try = self.sources.copy()
+        # 按健康度排序（熔断冷却中的数据源直接跳过）
+        sources = {source.get_name(): source for source in self.sources}
 
-        # 打乱顺序，避免总是访问同一个源
-        random.shuffle(sources_to_try)
+        for name in self.router.order(sources):
+            source = sources[name]
+            if not self.router.allow(name):
+                continue
 
-        for source in sources_to_try:
-            try:
-                if verbose:
-                    print(f"  尝试 {source.get_name()}...")
+            if verbose:
+                print(f"  尝试 {name}...")
 
+            started = time.perf_counter()
+            try:
                 df = source.fetch_stock_data(symbol, start_date, end_date)
-
-                if df is not None and not df.empty:
-                    self.source_status[source.get_name()]['success'] += 1
-                    self.last_success_source = source.get_name()
-
-                    if verbose:
-                        print(f"  [OK] {source.get_name()} 成功获取 {len(df)} 条数据")
-
-                    return df
-
+            except EmptyDataError as e:
+                self.router.record(name, True, time.perf_counter() - started)
+                if verbose:
+                    print(f"  [FAIL] {name} 无数据: {str(e)}")
+                continue
             except Exception as e:
-                self.source_status[source.get_name()]['failure'] += 1
+                self.router.record(name, False, time.perf_counter() - started, str(e))
+                self.source_status[name]['failure'] += 1
                 if verbose:
-                    print(f"  [FAIL] {source.get_name()} 失败: {str(e)}")
+                    print(f"  [FAIL] {name} 失败: {str(e)}")
                 continue
 
+            # 正常响应（包括空数据）都说明数据源可用
+            self.router.record(name, True, time.perf_counter() - started)
+            if df is not None and not df.empty:
+                self.source_status[name]['success'] += 1
+                self.last_success_source = name
+
+                if verbose:
+                    print(f"  [OK] {name} 成功获取 {len(df)} 条数据")
+
+                return df
+
         if verbose:
             print(f"  [FAIL] 所有数据源均失败")
         return None
@@ -474,6 +486,7 @@ class MultiSourceDataFetcher:
                 success_rate = 0
             print(f"{name:12} | 成功: {status['success']:3} | 失败: {status['failure']:3} | 成功率: {success_rate:.1f}%")
         print("-" * 60)
+        self.router.print_status()
 
 
 # 便捷函数
@@ -0,0 +1,246 @@
+"""
+数据源路由
+按数据源统计最近请求的成功率与耗时，连续失败达到阈值时熔断：
+熔断期间直接跳过该数据源，冷却时间到后只放行一次试探请求（半开），
+试探成功恢复，失败则冷却时间加倍重新熔断。
+排序保持配置的优先级，成功率偏低或明显偏慢的数据源降到后面；
+状态在进程内跨线程共享（线程安全）
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class EmptyDataError(ValueError):
+    """数据源正常响应但没有数据（停牌、退市、日期区间内无交易），不计入数据源失败"""
+
+
+class _SourceHealth:
+    """单个数据源的统计与熔断状态（由 SourceRouter 的锁保护）"""
+
+    def __init__(self, window: int):
+        self.outcomes = deque(maxlen=window)   # 最近请求是否成功
+        self.latency = None                    # 请求耗时的指数移动平均（秒）
+        self.consecutive_failures = 0
+        self.state = SourceRouter.CLOSED
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.probe_started = None              # 半开试探开始时间
+        self.trips = 0                         # 累计熔断次数
+        self.skipped = 0                       # 熔断期间跳过的请求数
+        self.last_error = ''
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        if not self.outcomes:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+
+class SourceRouter:
+    """数据源健康度路由与熔断器"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    # 耗时的指数移动平均系数
+    LATENCY_ALPHA = 0.2
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0, max_cooldown: float = 600.0,
+                 window: int = 100, min_success_rate: float = 0.8, min_samples: int = 10,
+                 slow_factor: float = 3.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 首次熔断的冷却时间（秒），试探失败后加倍
+            max_cooldown: 冷却时间上限（秒）
+            window: 成功率统计的最近请求数
+            min_success_rate: 成功率低于该值（样本数不少于 min_samples）时降低排序
+            min_samples: 参与健康度排序的最少样本数
+            slow_factor: 平均耗时超过最快健康数据源的该倍数时降低排序
+            clock: 时钟函数
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.window = window
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.slow_factor = slow_factor
+        self._clock = clock
+        self._health: Dict[str, _SourceHealth] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'SourceRouter':
+        """从配置字典创建（未配置的项使用默认值）"""
+        config = config or {}
+        keys = ('failure_threshold', 'cooldown', 'max_cooldown', 'window',
+                'min_success_rate', 'min_samples', 'slow_factor')
+        return cls(**{key: config[key] for key in keys if key in config})
+
+    def _get(self, source_id: str) -> _SourceHealth:
+        health = self._health.get(source_id)
+        if health is None:
+            health = self._health[source_id] = _SourceHealth(self.window)
+        return health
+
+    def _probe_due(self, health: _SourceHealth, now: float) -> bool:
+        """熔断中的数据源是否可以试探（冷却结束且没有进行中的试探，试探超时视为结束）"""
+        if health.state == self.OPEN:
+            return now - health.opened_at >= health.cooldown
+        if health.state == self.HALF_OPEN:
+            return health.probe_started is None or now - health.probe_started >= health.cooldown
+        return False
+
+    def order(self, source_ids: Iterable[str]) -> List[str]:
+        """
+        按健康度排序可用的数据源
+
+        1. 冷却结束、等待试探的数据源排在最前（只请求一次，尽快恢复主数据源）
+        2. 正常数据源按配置顺序，成功率偏低、明显偏慢的依次排后
+        3. 熔断冷却中的数据源不返回
+
+        Args:
+            source_ids: 按配置优先级排列的数据源
+
+        Returns:
+            排序后的数据源列表
+        """
+        source_ids = list(source_ids)
+        with self._lock:
+            now = self._clock()
+            probes = []
+            closed = []
+            for index, source_id in enumerate(source_ids):
+                health = self._get(source_id)
+                if health.state == self.CLOSED:
+                    closed.append((index, source_id, health))
+                elif self._probe_due(health, now):
+                    probes.append(source_id)
+
+            def unhealthy(health):
+                rate = health.success_rate
+                return (len(health.outcomes) >= self.min_samples and rate is not None
+                        and rate < self.min_success_rate)
+
+            healthy_latencies = [h.latency for _, _, h in closed
+                                 if h.latency is not None and not unhealthy(h)
+                                 and len(h.outcomes) >= self.min_samples]
+            fastest = min(healthy_latencies) if healthy_latencies else None
+
+            def sort_key(item):
+                index, _, health = item
+                bad = unhealthy(health)
+                slow = (fastest is not None and health.latency is not None
+                        and len(health.outcomes) >= self.min_samples
+                        and health.latency > fastest * self.slow_factor)
+                return (bad, slow, -(health.success_rate or 0) if bad else 0, index)
+
+            closed.sort(key=sort_key)
+            return probes + [source_id for _, source_id, _ in closed]
+
+    def allow(self, source_id: str) -> bool:
+        """
+        请求前检查：正常状态放行；熔断状态冷却结束时放行一次试探（其他线程继续跳过）
+
+        Returns:
+            是否可以请求该数据源
+        """
+        with self._lock:
+            health = self._get(source_id)
+            if health.state == self.CLOSED:
+                return True
+            now = self._clock()
+            if self._probe_due(health, now):
+                health.state = self.HALF_OPEN
+                health.probe_started = now
+                return True
+            health.skipped += 1
+            return False
+
+    def record(self, source_id: str, success: bool, latency: Optional[float] = None, error: str = ''):
+        """
+        记录一次请求结果
+
+        Args:
+            source_id: 数据源
+            success: 是否成功（没有数据的正常响应视为成功）
+            latency: 请求耗时（秒）
+            error: 失败原因
+        """
+        with self._lock:
+            health = self._get(source_id)
+            health.outcomes.append(bool(success))
+            if latency is not None:
+                health.latency = latency if health.latency is None else \
+                    health.latency + self.LATENCY_ALPHA * (latency - health.latency)
+
+            if success:
+                health.consecutive_failures = 0
+                health.state = self.CLOSED
+                health.cooldown = 0.0
+                health.probe_started = None
+                return
+
+            health.consecutive_failures += 1
+            health.last_error = error[:80]
+            if health.state == self.HALF_OPEN:
+                # 试探失败：冷却时间加倍
+                self._trip(health, min(max(health.cooldown, self.base_cooldown) * 2, self.max_cooldown))
+            elif health.state == self.CLOSED and health.consecutive_failures >= self.failure_threshold:
+                self._trip(health, self.base_cooldown)
+
+    def _trip(self, health: _SourceHealth, cooldown: float):
+        health.state = self.OPEN
+        health.opened_at = self._clock()
+        health.cooldown = cooldown
+        health.probe_started = None
+        health.trips += 1
+
+    def is_available(self, source_id: str) -> bool:
+        """数据源当前是否可以请求（不占用试探名额）"""
+        with self._lock:
+            health = self._get(source_id)
+            return health.state == self.CLOSED or self._probe_due(health, self._clock())
+
+    def reset(self, source_id: Optional[str] = None):
+        """清空统计与熔断状态"""
+        with self._lock:
+            if source_id is None:
+                self._health.clear()
+            else:
+                self._health.pop(source_id, None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """各数据源的状态快照"""
+        with self._lock:
+            return {
+                source_id: {
+                    'state': health.state,
+                    'requests': len(health.outcomes),
+                    'success_rate': health.success_rate,
+                    'latency': health.latency,
+                    'consecutive_failures': health.consecutive_failures,
+                    'cooldown': health.cooldown,
+                    'trips': health.trips,
+                    'skipped': health.skipped,
+                    'last_error': health.last_error,
+                }
+                for source_id, health in self._health.items()
+            }
+
+    def print_status(self, names: Optional[Dict[str, str]] = None):
+        """打印数据源状态"""
+        states = {self.CLOSED: '正常', self.OPEN: '熔断', self.HALF_OPEN: '试探'}
+        print("\n数据源健康度:")
+        print("-" * 80)
+        for source_id, status in self.snapshot().items():
+            name = (names or {}).get(source_id, source_id)
+            rate = f"{status['success_rate']:.0%}" if status['success_rate'] is not None else '-'
+            latency = f"{status['latency']:.2f}s" if status['latency'] is not None else '-'
+            print(f"{name:16} | {states[status['state']]} | 最近{status['requests']:3}次成功率: {rate:>4} | "
+                  f"平均耗时: {latency:>6} | 熔断: {status['trips']}次 | 跳过: {status['skipped']}")
+        print("-" * 80)
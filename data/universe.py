@@ -0,0 +1,454 @@
+"""
+全市场证券元数据
+每个交易日加载一次全A股的代码、名称、交易所、板块、上市/退市日期、ST/停牌标记、
+总市值和主要指数成分，保存为按代码索引的内存表并持久化到缓存目录，
+同一天内各策略、各进程的股票池筛选、名称查询都直接读取这张表
+"""
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache_manager import CacheManager
+from .baostock_session import BaostockSession
+
+try:
+    from gm.api import get_symbols, stk_get_daily_mktvalue_pt, stk_get_index_constituents
+    DIGGOLD_AVAILABLE = True
+except ImportError:
+    DIGGOLD_AVAILABLE = False
+
+
+class Universe:
+    """全市场元数据表（按交易日缓存，向量化筛选）"""
+
+    STORE_DIR = CacheManager.MACRO_CACHE_DIR
+    # 保留最近的快照文件数
+    KEEP_SNAPSHOTS = 10
+
+    # 成分股标记的指数（列名 in_<指数代码>）
+    INDEXES = {
+        '000300': ('SHSE.000300', '沪深300'),
+        '000905': ('SHSE.000905', '中证500'),
+        '000852': ('SHSE.000852', '中证1000'),
+        '000016': ('SHSE.000016', '上证50'),
+    }
+
+    # 板块按代码前缀划分
+    BOARD_PREFIXES = {
+        'main': ('600', '601', '603', '605', '000', '001', '003'),
+        'sme': ('002',),
+        'chinext': ('300', '301', '302'),
+        'star': ('688', '689'),
+        'bse': ('4', '8', '92'),
+    }
+
+    COLUMNS = ['symbol', 'name', 'exchange', 'board', 'listed_date', 'delisted_date',
+               'is_st', 'is_delisting', 'is_suspended', 'tot_mv']
+
+    _tables: Dict[str, pd.DataFrame] = {}
+    _lock = threading.RLock()
+
+    # ========== 加载 ==========
+
+    @classmethod
+    def get(cls, trade_date: Optional[str] = None, refresh: bool = False) -> pd.DataFrame:
+        """
+        获取某个交易日的元数据表（内存 -> 本地快照 -> 数据源）
+
+        Args:
+            trade_date: 交易日期 (YYYY-MM-DD / YYYYMMDD)，默认为今天（数据源的最新交易日）
+            refresh: 忽略内存和本地快照，重新从数据源加载
+
+        Returns:
+            以6位代码为索引的 DataFrame，列见 COLUMNS 及 in_<指数代码>
+        """
+        key = cls._to_key(trade_date)
+
+        with cls._lock:
+            if not refresh:
+                table = cls._tables.get(key)
+                if table is not None:
+                    return table
+
+                table = cls._load_snapshot(key)
+                if table is not None:
+                    cls._tables[key] = table
+                    return table
+
+            # 当天的表按数据源的最新交易日加载（非交易日也能取到）
+            table = cls._build(None if key == cls._to_key(None) else trade_date, key)
+            if not table.empty:
+                cls._tables[key] = table
+                cls._save_snapshot(key, table)
+            return table
+
+    @classmethod
+    def nearest(cls, trade_date: Optional[str] = None) -> Tuple[Optional[str], pd.DataFrame]:
+        """
+        只读本地快照：不晚于 trade_date 的最近一个快照，没有则取最早的快照，不访问数据源
+
+        供离线回测使用。快照是保存当天的证券列表，之后退市的股票不在其中，
+        回测较早的日期时存在幸存者偏差
+
+        Args:
+            trade_date: 交易日期，默认为最新的快照
+
+        Returns:
+            (快照日期 YYYYMMDD, 元数据表)，没有任何快照时为 (None, 空表)
+        """
+        keys = sorted(p.stem[len('universe_'):] for p in cls.STORE_DIR.glob("universe_*.pkl"))
+        if not keys:
+            return None, pd.DataFrame(columns=cls.COLUMNS)
+
+        key = keys[-1] if trade_date is None else cls._to_key(trade_date)
+        earlier = [k for k in keys if k <= key]
+        key = earlier[-1] if earlier else keys[0]
+
+        with cls._lock:
+            table = cls._tables.get(key)
+            if table is None:
+                table = cls._load_snapshot(key)
+                if table is None:
+                    return None, pd.DataFrame(columns=cls.COLUMNS)
+                cls._tables[key] = table
+        return key, table
+
+    @classmethod
+    def clear(cls):
+        """清空内存中的元数据表（本地快照保留）"""
+        with cls._lock:
+            cls._tables.clear()
+
+    # ========== 查询 ==========
+
+    @classmethod
+    def filter(cls, trade_date: Optional[str] = None, boards: Optional[Iterable[str]] = None,
+               exclude_st: bool = False, exclude_delisting: bool = False,
+               exclude_suspended: bool = False, min_listing_days: int = 0,
+               index: Optional[str] = None, min_mv: Optional[float] = None,
+               max_mv: Optional[float] = None) -> pd.DataFrame:
+        """
+        按条件筛选股票（所有条件向量化组合，未退市为固定条件）
+
+        Args:
+            trade_date: 交易日期，同时作为上市天数的参照日
+            boards: 保留的板块 (main/sme/chinext/star/bse)
+            exclude_st: 剔除ST股票
+            exclude_delisting: 剔除名称带"退"/"暂停"的股票
+            exclude_suspended: 剔除当日停牌股票
+            min_listing_days: 最少上市天数（自然日），上市日期未知的股票不剔除
+            index: 只保留该指数的成分股（指数代码，如 000300）
+            min_mv: 最小总市值（亿元），市值未知的股票剔除
+            max_mv: 最大总市值（亿元），市值未知的股票剔除
+
+        Returns:
+            满足条件的元数据子表
+        """
+        table = cls.get(trade_date)
+        if table.empty:
+            return table
+
+        day = pd.Timestamp(cls._to_key(trade_date))
+        mask = ~(table['delisted_date'] <= day).to_numpy()
+
+        if boards is not None:
+            mask &= table['board'].isin(list(boards)).to_numpy()
+        if exclude_st:
+            mask &= ~table['is_st'].to_numpy()
+        if exclude_delisting:
+            mask &= ~table['is_delisting'].to_numpy()
+        if exclude_suspended:
+            mask &= ~table['is_suspended'].to_numpy()
+        if min_listing_days:
+            cutoff = day - pd.Timedelta(days=min_listing_days)
+            mask &= ~(table['listed_date'] > cutoff).to_numpy()
+        if index is not None:
+            column = f"in_{index}"
+            if column not in table.columns:
+                raise ValueError(f"不支持的指数: {index}，可选: {list(cls.INDEXES.keys())}")
+            mask &= table[column].to_numpy()
+        if min_mv is not None:
+            mask &= (table['tot_mv'] >= min_mv).to_numpy()
+        if max_mv is not None:
+            mask &= (table['tot_mv'] <= max_mv).to_numpy()
+
+        return table[mask]
+
+    @classmethod
+    def symbols(cls, fmt: str = 'gm', trade_date: Optional[str] = None, **filters) -> List[str]:
+        """
+        筛选后的股票代码列表
+
+        Args:
+            fmt: 代码格式 code (600519) / gm (SHSE.600519) / suffix (600519.SH)
+            trade_date: 交易日期
+            **filters: filter() 的筛选条件
+
+        Returns:
+            股票代码列表
+        """
+        return cls._format(cls.filter(trade_date, **filters), fmt)
+
+    @classmethod
+    def names(cls, fmt: str = 'code', trade_date: Optional[str] = None) -> Dict[str, str]:
+        """代码-名称映射，代码格式同 symbols()"""
+        table = cls.get(trade_date)
+        return dict(zip(cls._format(table, fmt), table['name']))
+
+    @classmethod
+    def name(cls, symbol: str, trade_date: Optional[str] = None) -> str:
+        """单只股票名称（任意代码格式），不存在时返回空字符串"""
+        table = cls.get(trade_date)
+        code = cls.to_code(symbol)
+        if code in table.index:
+            return table.at[code, 'name']
+        return ""
+
+    @classmethod
+    def lookup(cls, symbols: Iterable[str], trade_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        按代码批量查询元数据（任意代码格式）
+
+        Returns:
+            元数据子表，索引为6位代码，表中不存在的代码不包含在内
+        """
+        table = cls.get(trade_date)
+        codes = pd.Index([cls.to_code(s) for s in symbols])
+        return table.loc[codes[codes.isin(table.index)]]
+
+    @staticmethod
+    def to_code(symbol: str) -> str:
+        """SHSE.600519 / 600519.SH / sh.600519 / 600519 -> 600519"""
+        for part in str(symbol).split('.'):
+            if part.isdigit():
+                return part
+        return str(symbol)
+
+    @classmethod
+    def _format(cls, table: pd.DataFrame, fmt: str) -> List[str]:
+        if fmt == 'code':
+            return table.index.tolist()
+        if fmt == 'gm':
+            return table['symbol'].tolist()
+        if fmt == 'suffix':
+            return (table.index + '.' + table['exchange'].str[:2]).tolist()
+        raise ValueError(f"不支持的代码格式: {fmt}")
+
+    # ========== 构建 ==========
+
+    @classmethod
+    def _build(cls, trade_date: Optional[str], key: str) -> pd.DataFrame:
+        """从数据源构建元数据表：证券列表 -> 市值 -> 指数成分"""
+        print(f"加载全市场元数据（{key}）...")
+
+        table = pd.DataFrame()
+        for source, loader in (('掘金', cls._load_diggold), ('AkShare', cls._load_akshare),
+                               ('Baostock', cls._load_baostock)):
+            if source == '掘金' and not DIGGOLD_AVAILABLE:
+                continue
+            try:
+                table = loader(trade_date, key)
+            except Exception as e:
+                print(f"{source}获取证券列表失败: {e}")
+                continue
+            if not table.empty:
+                break
+
+        if table.empty:
+            print("未获取到证券列表")
+            return table
+
+        table = cls._normalize(table)
+        table['tot_mv'] = cls._load_market_caps(table, trade_date, key)
+        for index_code in cls.INDEXES:
+            table[f"in_{index_code}"] = table.index.isin(cls._load_index_members(index_code, trade_date))
+
+        print(f"全市场元数据: {len(table)} 只股票，市值 {table['tot_mv'].notna().sum()} 只，"
+              + "，".join(f"{name} {table[f'in_{code}'].sum()}" for code, (_, name) in cls.INDEXES.items()))
+        return table
+
+    @classmethod
+    def _normalize(cls, table: pd.DataFrame) -> pd.DataFrame:
+        """补齐派生列（交易所、板块、ST/退市标记），以6位代码为索引"""
+        table = table.copy()
+        table['code'] = table['code'].astype(str).str.zfill(6)
+        table = table.drop_duplicates(subset=['code'], keep='first').set_index('code')
+        table.index.name = 'code'
+
+        codes = table.index.to_series()
+        if 'exchange' not in table.columns:
+            table['exchange'] = np.select(
+                [codes.str.startswith('6'), codes.str.startswith(cls.BOARD_PREFIXES['bse'])],
+                ['SHSE', 'BJSE'], default='SZSE')
+        table['symbol'] = table['exchange'] + '.' + table.index
+        table['board'] = np.select(
+            [codes.str.startswith(prefixes) for prefixes in cls.BOARD_PREFIXES.values()],
+            list(cls.BOARD_PREFIXES.keys()), default='other')
+        table.loc[table['exchange'] == 'BJSE', 'board'] = 'bse'
+
+        table['name'] = table['name'].fillna('').astype(str)
+        for column in ('listed_date', 'delisted_date'):
+            dates = pd.to_datetime(table[column], errors='coerce') if column in table.columns \
+                else pd.Series(pd.NaT, index=table.index)
+            if getattr(dates.dt, 'tz', None) is not None:
+                dates = dates.dt.tz_localize(None)
+            table[column] = dates.dt.normalize()
+
+        st_flag = table['is_st'].fillna(False).astype(bool) if 'is_st' in table.columns else False
+        table['is_st'] = st_flag | table['name'].str.contains('ST', case=False, na=False)
+        table['is_delisting'] = table['name'].str.contains('退|暂停', na=False)
+        table['is_suspended'] = table['is_suspended'].fillna(False).astype(bool) \
+            if 'is_suspended' in table.columns else False
+
+        return table[[c for c in cls.COLUMNS if c != 'tot_mv']]
+
+    @staticmethod
+    def _load_diggold(trade_date: Optional[str], key: str) -> pd.DataFrame:
+        """掘金：指定交易日的A股列表（含上市/退市日期、ST、停牌），默认最新交易日"""
+        params = dict(sec_type1=1010, sec_type2=101001, df=True)
+        if trade_date is not None:
+            params['trade_date'] = f"{key[:4]}-{key[4:6]}-{key[6:]}"
+        data = get_symbols(**params)
+        if data is None or data.empty:
+            return pd.DataFrame()
+
+        return pd.DataFrame({
+            'code': data['symbol'].str.split('.').str[-1],
+            'exchange': data['symbol'].str.split('.').str[0],
+            'name': data['sec_name'],
+            'listed_date': data.get('listed_date'),
+            'delisted_date': data.get('delisted_date'),
+            'is_st': data.get('is_st'),
+            'is_suspended': data.get('is_suspended'),
+        })
+
+    @staticmethod
+    def _load_akshare(trade_date: Optional[str], key: str) -> pd.DataFrame:
+        """AkShare：当前A股代码和名称（无上市日期、停牌信息）"""
+        import akshare as ak
+        data = ak.stock_info_a_code_name()
+        if data is None or data.empty:
+            return pd.DataFrame()
+        return pd.DataFrame({'code': data['code'], 'name': data['name']})
+
+    @staticmethod
+    def _load_baostock(trade_date: Optional[str], key: str) -> pd.DataFrame:
+        """Baostock：全部证券基本资料，只保留上市状态的股票"""
+        fields, rows = BaostockSession.query('query_stock_basic')
+        data = pd.DataFrame(rows, columns=fields)
+        if data.empty:
+            return pd.DataFrame()
+
+        data = data[(data['type'] == '1') & (data['status'] == '1')]
+        return pd.DataFrame({
+            'code': data['code'].str.split('.').str[-1],
+            'name': data['code_name'],
+            'listed_date': data['ipoDate'],
+            'delisted_date': data['outDate'],
+        })
+
+    @classmethod
+    def _load_market_caps(cls, table: pd.DataFrame, trade_date: Optional[str], key: str) -> pd.Series:
+        """总市值（亿元），获取失败的股票为 NaN"""
+        if DIGGOLD_AVAILABLE:
+            try:
+                params = dict(symbols=table['symbol'].tolist(), fields='tot_mv', df=True)
+                if trade_date is not None:
+                    params['trade_date'] = f"{key[:4]}-{key[4:6]}-{key[6:]}"
+                data = stk_get_daily_mktvalue_pt(**params)
+                if data is not None and not data.empty:
+                    # 掘金返回的市值单位是"元"
+                    caps = data.set_index(data['symbol'].str.split('.').str[-1])['tot_mv'] / 1e8
+                    return caps[~caps.index.duplicated()].reindex(table.index)
+            except Exception as e:
+                print(f"掘金获取市值数据失败: {e}")
+
+        # 行情快照只有最新市值，不能用于历史交易日
+        if key == cls._to_key(None):
+            try:
+                import akshare as ak
+                data = ak.stock_zh_a_spot_em()
+                caps = data.set_index(data['代码'].astype(str).str.zfill(6))['总市值'] / 1e8
+                return caps[~caps.index.duplicated()].reindex(table.index)
+            except Exception as e:
+                print(f"AkShare获取市值数据失败: {e}")
+
+        return pd.Series(np.nan, index=table.index)
+
+    @classmethod
+    def _load_index_members(cls, index_code: str, trade_date: Optional[str]) -> List[str]:
+        """指数成分股6位代码列表"""
+        gm_index, index_name = cls.INDEXES[index_code]
+        if DIGGOLD_AVAILABLE:
+            try:
+                params = dict(index=gm_index)
+                if trade_date is not None:
+                    key = cls._to_key(trade_date)
+                    params['trade_date'] = f"{key[:4]}-{key[4:6]}-{key[6:]}"
+                data = stk_get_index_constituents(**params)
+                if data is not None and not data.empty:
+                    return data['symbol'].str.split('.').str[-1].tolist()
+            except Exception as e:
+                print(f"掘金获取{index_name}成分股失败: {e}")
+
+        try:
+            import akshare as ak
+            data = ak.index_stock_cons(symbol=index_code)
+            return data['品种代码'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(6).tolist()
+        except Exception as e:
+            print(f"获取{index_name}成分股失败: {e}")
+            return []
+
+    # ========== 快照 ==========
+
+    @staticmethod
+    def _to_key(trade_date: Optional[str]) -> str:
+        """交易日期 -> YYYYMMDD，默认为今天"""
+        if trade_date is None:
+            return datetime.now().strftime('%Y%m%d')
+        return pd.Timestamp(str(trade_date)).strftime('%Y%m%d')
+
+    @classmethod
+    def get_snapshot_path(cls, key: str) -> Path:
+        return cls.STORE_DIR / f"universe_{key}.pkl"
+
+    @classmethod
+    def _load_snapshot(cls, key: str) -> Optional[pd.DataFrame]:
+        path = cls.get_snapshot_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"加载元数据快照失败 {path}: {str(e)}")
+            return None
+
+    @classmethod
+    def _save_snapshot(cls, key: str, table: pd.DataFrame):
+        cls.STORE_DIR.mkdir(parents=True, exist_ok=True)
+        path = cls.get_snapshot_path(key)
+
+        try:
+            # 先写临时文件再替换，避免并发进程读到写了一半的快照
+            # 临时文件按进程区分，多个进程同时保存时互不覆盖
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+            table.to_pickle(tmp_path)
+            tmp_path.replace(path)
+        except Exception as e:
+            print(f"保存元数据快照失败 {path}: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+
+        snapshots = sorted(cls.STORE_DIR.glob("universe_*.pkl"))
+        for old_path in snapshots[:-cls.KEEP_SNAPSHOTS]:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass
@@ -6,13 +6,17 @@
 """
 
 from .indicator_engine import IndicatorEngine
+from .indicator_state import IndicatorState
 from .signal_alert import SignalAlert
 from .monitor_config import MonitorConfig, StockConfig, load_watchlist
+from .async_engine import AsyncMonitorEngine
 
 __all__ = [
     'IndicatorEngine',
+    'IndicatorState',
     'SignalAlert',
     'MonitorConfig',
     'StockConfig',
-    'load_watchlist'
+    'load_watchlist',
+    'AsyncMonitorEngine'
 ]
@@ -0,0 +1,187 @@
+"""
+异步监控引擎
+
+按批次把自选股拆成协程任务，周期按墙钟截止时间调度：
+- 第 k 轮的截止时间 = 启动时间 + (k+1) × 间隔，某个批次变慢不会推迟后续周期
+- 阻塞的 SDK 调用在有界线程池中执行；超过截止时间仍未返回的请求被放弃
+  （尚未开始的直接取消，已在执行的丢弃结果）
+- 背压：上一轮请求仍未返回的批次本轮跳过，线程池中不会堆积过期请求
+- 记录每轮端到端延迟、超时、跳过次数
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class AsyncMonitorEngine:
+    """异步监控引擎（每个批次一个协程任务，按截止时间调度）"""
+
+    # 保留最近多少轮的延迟用于统计
+    STATS_WINDOW = 500
+
+    def __init__(self, symbols: List[str], fetch: Callable[[List[str]], Any],
+                 handle: Optional[Callable[[List[str], Any], None]] = None,
+                 interval_seconds: float = 30, batch_size: int = 200, max_workers: int = 4,
+                 timeout: Optional[float] = None,
+                 is_active: Optional[Callable[[datetime], bool]] = None):
+        """
+        初始化
+
+        参数:
+            symbols: 股票代码列表
+            fetch: 阻塞的批量获取函数 fetch(batch) -> 结果，在线程池中执行
+            handle: 结果处理函数 handle(batch, 结果)，在事件循环中执行（应为轻量计算）
+            interval_seconds: 刷新间隔（秒）
+            batch_size: 每个任务的股票数
+            max_workers: 线程池大小（同时进行的 SDK 请求数上限）
+            timeout: 单个请求的超时（秒），默认不超过本轮截止时间
+            is_active: 判断当前是否需要刷新（如交易时间），返回 False 时本轮空转
+        """
+        self.batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), max(1, batch_size))]
+        self.fetch = fetch
+        self.handle = handle
+        self.interval_seconds = interval_seconds
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.is_active = is_active
+
+        self._stopping = False
+        self._latencies = deque(maxlen=self.STATS_WINDOW)
+        self._stats = {
+            'cycles': 0,
+            'idle_cycles': 0,
+            'missed_cycles': 0,
+            'batches': 0,
+            'timeouts': 0,
+            'skipped': 0,
+            'errors': 0
+        }
+
+    def run(self, max_cycles: Optional[int] = None):
+        """
+        运行监控（阻塞直到达到 max_cycles 或调用 stop）
+
+        参数:
+            max_cycles: 最大周期数，非交易时间的空转周期也计入（与同步轮询的更新次数一致）
+        """
+        asyncio.run(self.run_async(max_cycles))
+
+    def stop(self):
+        """在当前周期结束后停止"""
+        self._stopping = True
+
+    async def run_async(self, max_cycles: Optional[int] = None):
+        """在已有事件循环中运行监控"""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='monitor')
+        # 每个批次正在线程池中执行的请求（用于背压）
+        in_flight: Dict[int, Any] = {}
+        self._stopping = False
+
+        started = loop.time()
+        cycle = 0
+        try:
+            while not self._stopping and (max_cycles is None or self.total_cycles < max_cycles):
+                deadline = started + (cycle + 1) * self.interval_seconds
+
+                if self.is_active is not None and not self.is_active(datetime.now()):
+                    self._stats['idle_cycles'] += 1
+                    print(f"⏸️ {datetime.now().strftime('%H:%M:%S')} - 非交易时间，休眠中...")
+                else:
+                    await self._run_cycle(loop, executor, in_flight, deadline)
+
+                # 按墙钟截止时间调度：超时的周期直接跳到下一个未过期的截止时间
+                now = loop.time()
+                if now < deadline:
+                    await asyncio.sleep(deadline - now)
+                    cycle += 1
+                else:
+                    next_cycle = math.floor((now - started) / self.interval_seconds)
+                    self._stats['missed_cycles'] += max(0, next_cycle - cycle - 1)
+                    cycle = max(cycle + 1, next_cycle)
+        finally:
+            for future in in_flight.values():
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_cycle(self, loop, executor: ThreadPoolExecutor, in_flight: Dict[int, Any], deadline: float):
+        """执行一轮：每个批次一个任务，等待全部完成或到达截止时间"""
+        cycle_started = time.perf_counter()
+
+        tasks = []
+        skipped = 0
+        for index, batch in enumerate(self.batches):
+            previous = in_flight.get(index)
+            if previous is not None and not previous.done():
+                skipped += 1
+                continue
+            tasks.append(self._run_batch(loop, executor, in_flight, index, batch, deadline))
+
+        outcomes = await asyncio.gather(*tasks)
+
+        latency = time.perf_counter() - cycle_started
+        self._latencies.append(latency)
+        self._stats['cycles'] += 1
+        self._stats['batches'] += len(tasks)
+        self._stats['skipped'] += skipped
+        timeouts = outcomes.count('timeout')
+        errors = outcomes.count('error')
+        self._stats['timeouts'] += timeouts
+        self._stats['errors'] += errors
+
+        print(f"⏱️ 第 {self._stats['cycles']} 轮: {latency:.2f}s, "
+              f"{len(tasks)} 批完成 {outcomes.count('ok')}, 超时 {timeouts}, 跳过 {skipped}, 失败 {errors}")
+
+    async def _run_batch(self, loop, executor: ThreadPoolExecutor, in_flight: Dict[int, Any],
+                         index: int, batch: List[str], deadline: float) -> str:
+        """在线程池中获取一个批次，截止时间前未返回则放弃"""
+        future = executor.submit(self.fetch, batch)
+        in_flight[index] = future
+        # 放弃的请求稍后返回时取走异常，避免未处理异常告警
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        timeout = deadline - loop.time()
+        if self.timeout is not None:
+            timeout = min(timeout, self.timeout)
+
+        wrapped = asyncio.wrap_future(future, loop=loop)
+        done, _ = await asyncio.wait({wrapped}, timeout=max(timeout, 0))
+        if not done:
+            # 尚未开始执行的请求直接取消；已在执行的保留在 in_flight 中，下轮跳过该批次
+            future.cancel()
+            return 'timeout'
+
+        try:
+            result = wrapped.result()
+        except Exception as e:
+            print(f"⚠️ 批次 {index} 获取失败: {e}")
+            return 'error'
+
+        if self.handle is not None:
+            try:
+                self.handle(batch, result)
+            except Exception as e:
+                print(f"⚠️ 批次 {index} 处理失败: {e}")
+                return 'error'
+        return 'ok'
+
+    @property
+    def total_cycles(self) -> int:
+        """已执行的周期数（含空转周期）"""
+        return self._stats['cycles'] + self._stats['idle_cycles']
+
+    def get_stats(self) -> Dict[str, float]:
+        """每轮延迟统计（最近 STATS_WINDOW 轮）"""
+        stats = dict(self._stats)
+        latencies = sorted(self._latencies)
+        if latencies:
+            stats['latency_mean'] = round(sum(latencies) / len(latencies), 4)
+            stats['latency_p50'] = round(latencies[len(latencies) // 2], 4)
+            stats['latency_p95'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4)
+            stats['latency_max'] = round(latencies[-1], 4)
+        return stats
@@ -0,0 +1,543 @@
+"""
+增量指标状态
+
+为实时监控维护每只股票的指标状态：用历史K线预热一次后，每根新K线或每个tick
+只做 O(1) 更新，不再每次轮询都重新下载历史数据、重算全部指标。
+
+计算口径与 IndicatorEngine.calculate_all（TA-Lib）一致：
+- 均线/布林带：滑动窗口累计和，布林带为总体标准差
+- MACD：EMA 以 SMA 为初值，快线与慢线在同一根K线起算
+- RSI/ATR/ADX：Wilder 平滑
+- KDJ：STOCH(9, 3, 3) 的 slowk/slowd
+"""
+
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 与 TA-Lib 的 TA_IS_ZERO 一致
+_EPSILON = 1e-14
+
+_BAR_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _is_zero(value: float) -> bool:
+    return -_EPSILON < value < _EPSILON
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    greatest = high - low
+    value = abs(prev_close - high)
+    if value > greatest:
+        greatest = value
+    value = abs(prev_close - low)
+    if value > greatest:
+        greatest = value
+    return greatest
+
+
+def _clone(obj):
+    """复制累加器（窗口为定长 deque，复制开销与历史长度无关）"""
+    new = object.__new__(type(obj))
+    for name in obj.__slots__:
+        value = getattr(obj, name)
+        if isinstance(value, deque):
+            value = value.copy()
+        elif hasattr(value, '__slots__'):
+            value = _clone(value)
+        setattr(new, name, value)
+    return new
+
+
+class _Window:
+    """定长滑动窗口，维护累计和与平方和"""
+    __slots__ = ('size', 'values', 'total', 'total_sq')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x: float) -> float:
+        """加入新值，窗口满时返回均值，否则返回 NaN"""
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        return self.mean
+
+    @property
+    def mean(self) -> float:
+        if len(self.values) < self.size:
+            return np.nan
+        return self.total / self.size
+
+    @property
+    def std(self) -> float:
+        """总体标准差（TA-Lib BBANDS 口径）"""
+        if len(self.values) < self.size:
+            return np.nan
+        mean = self.total / self.size
+        variance = self.total_sq / self.size - mean * mean
+        return np.sqrt(variance) if variance >= _EPSILON else 0.0
+
+
+class _Ema:
+    """EMA（TA-Lib 口径）：第 seed_at 个输入时以最近 period 个值的均值为初值"""
+    __slots__ = ('period', 'k', 'seed_at', 'count', 'pending', 'value')
+
+    def __init__(self, period: int, seed_at: Optional[int] = None):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed_at = seed_at or period
+        self.count = 0
+        self.pending = deque(maxlen=period)
+        self.value = np.nan
+
+    def push(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.seed_at:
+            self.pending.append(x)
+        elif self.count == self.seed_at:
+            self.pending.append(x)
+            total = 0.0
+            for value in self.pending:
+                total += value
+            self.value = total / self.period
+            self.pending.clear()
+        else:
+            self.value = ((x - self.value) * self.k) + self.value
+        return self.value
+
+
+class _Rsi:
+    """Wilder RSI"""
+    __slots__ = ('period', 'count', 'prev', 'gain', 'loss', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.prev = None
+        self.gain = 0.0
+        self.loss = 0.0
+        self.value = np.nan
+
+    def push(self, x: float) -> float:
+        if self.prev is None:
+            self.prev = x
+            return self.value
+
+        diff = x - self.prev
+        self.prev = x
+        self.count += 1
+
+        if self.count > self.period:
+            self.gain *= self.period - 1
+            self.loss *= self.period - 1
+
+        if diff < 0:
+            self.loss -= diff
+        else:
+            self.gain += diff
+
+        if self.count >= self.period:
+            self.gain /= self.period
+            self.loss /= self.period
+            total = self.gain + self.loss
+            self.value = 100.0 * (self.gain / total) if not _is_zero(total) else 0.0
+        return self.value
+
+
+class _Atr:
+    """Wilder ATR：首值为前 period 个真实波幅的均值"""
+    __slots__ = ('period', 'count', 'prev_close', 'total', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.prev_close = None
+        self.total = 0.0
+        self.value = np.nan
+
+    def push(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+        self.count += 1
+
+        if self.count < self.period:
+            self.total += tr
+        elif self.count == self.period:
+            self.total += tr
+            self.value = self.total / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+
+class _Adx:
+    """Wilder ADX（TA-Lib 口径）：前 period-1 根累加 DM/TR，随后 period 根的 DX 均值为首值"""
+    __slots__ = ('period', 'count', 'prev_high', 'prev_low', 'prev_close',
+                 'plus_dm', 'minus_dm', 'tr', 'sum_dx', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.value = np.nan
+
+    def push(self, high: float, low: float, close: float) -> float:
+        if self.prev_high is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return self.value
+
+        period = self.period
+        self.count += 1
+
+        diff_plus = high - self.prev_high
+        diff_minus = self.prev_low - low
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        if self.count >= period:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self.minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self.plus_dm += diff_plus
+
+        if self.count < period:
+            self.tr += tr
+            return self.value
+
+        self.tr = self.tr - (self.tr / period) + tr
+        dx = self._dx()
+
+        if self.count < 2 * period - 1:
+            if dx is not None:
+                self.sum_dx += dx
+        elif self.count == 2 * period - 1:
+            if dx is not None:
+                self.sum_dx += dx
+            self.value = self.sum_dx / period
+        elif dx is not None:
+            self.value = ((self.value * (period - 1)) + dx) / period
+        return self.value
+
+    def _dx(self) -> Optional[float]:
+        if _is_zero(self.tr):
+            return None
+        minus_di = 100.0 * (self.minus_dm / self.tr)
+        plus_di = 100.0 * (self.plus_dm / self.tr)
+        total = minus_di + plus_di
+        if _is_zero(total):
+            return None
+        return 100.0 * (abs(minus_di - plus_di) / total)
+
+
+class _Stoch:
+    """STOCH 慢速随机指标：fastk 窗口取极值，slowk/slowd 为 SMA"""
+    __slots__ = ('highs', 'lows', 'slowk', 'slowd')
+
+    def __init__(self, fastk_period: int = 9, slowk_period: int = 3, slowd_period: int = 3):
+        self.highs = deque(maxlen=fastk_period)
+        self.lows = deque(maxlen=fastk_period)
+        self.slowk = _Window(slowk_period)
+        self.slowd = _Window(slowd_period)
+
+    def push(self, high: float, low: float, close: float):
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.highs.maxlen:
+            return np.nan, np.nan
+
+        highest = max(self.highs)
+        lowest = min(self.lows)
+        diff = (highest - lowest) / 100.0
+        fastk = (close - lowest) / diff if diff != 0.0 else 0.0
+
+        slowk = self.slowk.push(fastk)
+        if np.isnan(slowk):
+            return np.nan, np.nan
+        slowd = self.slowd.push(slowk)
+        if np.isnan(slowd):
+            # TA-Lib 在 slowd 可用前 slowk 也输出 NaN
+            return np.nan, np.nan
+        return slowk, slowd
+
+
+class _Accumulators:
+    """全部指标的累加器（推进一根K线）"""
+    __slots__ = ('count', 'ma5', 'ma10', 'ma20', 'ma60', 'volume_ma5',
+                 'ema_fast', 'ema_slow', 'ema_signal', 'rsi', 'rsi_6',
+                 'stoch', 'atr', 'adx', 'values')
+
+    def __init__(self):
+        self.count = 0
+        self.ma5 = _Window(5)
+        self.ma10 = _Window(10)
+        self.ma20 = _Window(20)
+        self.ma60 = _Window(60)
+        self.volume_ma5 = _Window(5)
+        # TA-Lib MACD 的快线与慢线在同一根K线（第26根）起算
+        self.ema_fast = _Ema(12, seed_at=26)
+        self.ema_slow = _Ema(26)
+        self.ema_signal = _Ema(9)
+        self.rsi = _Rsi(14)
+        self.rsi_6 = _Rsi(6)
+        self.stoch = _Stoch(9, 3, 3)
+        self.atr = _Atr(14)
+        self.adx = _Adx(14)
+        self.values = {}
+
+    def push(self, bar: Dict[str, float]):
+        self.count += 1
+        close, high, low, volume = bar['close'], bar['high'], bar['low'], bar['volume']
+
+        values = dict(bar)
+        values['ma5'] = self.ma5.push(close)
+        values['ma10'] = self.ma10.push(close)
+        values['ma20'] = self.ma20.push(close)
+        values['ma60'] = self.ma60.push(close)
+
+        # MACD
+        fast = self.ema_fast.push(close)
+        slow = self.ema_slow.push(close)
+        macd = macd_signal = np.nan
+        if not np.isnan(slow):
+            signal = self.ema_signal.push(fast - slow)
+            if not np.isnan(signal):
+                macd, macd_signal = fast - slow, signal
+        values['macd'] = macd
+        values['macd_signal'] = macd_signal
+        values['macd_hist'] = macd - macd_signal
+
+        # RSI
+        values['rsi'] = self.rsi.push(close)
+        values['rsi_6'] = self.rsi_6.push(close)
+
+        # KDJ
+        slowk, slowd = self.stoch.push(high, low, close)
+        values['kdj_k'] = slowk
+        values['kdj_d'] = slowd
+        values['kdj_j'] = 3 * slowk - 2 * slowd
+
+        # 布林带（与 ma20 共用窗口）
+        mid = values['ma20']
+        band = 2 * self.ma20.std
+        values['boll_upper'] = mid + band
+        values['boll_mid'] = mid
+        values['boll_lower'] = mid - band
+
+        values['atr'] = self.atr.push(high, low, close)
+
+        # 成交量
+        volume_ma5 = self.volume_ma5.push(volume)
+        values['volume_ma5'] = volume_ma5
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values['volume_ratio'] = float(np.float64(volume) / volume_ma5)
+
+        values['adx'] = self.adx.push(high, low, close)
+
+        self.values = values
+
+
+class IndicatorState:
+    """
+    单只股票的增量指标状态
+
+    - extend(df): 用历史K线预热 / 追加增量下载的K线
+    - update(bar): 追加一根已收盘K线
+    - update_live(bar) / update_tick(price): 更新正在形成的K线（基于已收盘状态重算，不累积）
+    - latest() / to_frame(): 最新一根K线的指标，字段与 IndicatorEngine.calculate_all 相同
+    """
+
+    # 与 IndicatorEngine.calculate_all 的最少数据量一致
+    MIN_BARS = 20
+
+    def __init__(self):
+        self._closed = _Accumulators()
+        self._live = None
+        self._live_bar = None
+        self.last_time = None
+        self.live_time = None
+        # 当日已收盘K线的累计成交量（用于由tick累计成交量推算当前K线成交量）
+        self._day = None
+        self._day_volume = 0.0
+
+    @property
+    def count(self) -> int:
+        """已收盘K线数量"""
+        return self._closed.count
+
+    @property
+    def ready(self) -> bool:
+        """数据量是否足够（与 calculate_all 的要求一致）"""
+        current = self._live if self._live is not None else self._closed
+        return current.count >= self.MIN_BARS
+
+    def extend(self, df: pd.DataFrame, time_column: Optional[str] = None) -> 'IndicatorState':
+        """
+        追加多根已收盘K线（首次调用即为预热），时间不晚于 last_time 的K线会被跳过，
+        因此可直接传入与上次有重叠的增量下载结果
+
+        参数:
+            df: 包含 OHLCV 的 DataFrame（按时间升序）
+            time_column: K线时间列，默认使用索引
+        """
+        if df is None or df.empty:
+            return self
+
+        columns = {field: pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=float)
+                   for field in _BAR_FIELDS if field in df.columns}
+        if 'open' not in columns:
+            columns['open'] = columns['close']
+        times = df[time_column] if time_column else df.index
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = [None] * len(df)
+        else:
+            times = [self._to_timestamp(time) for time in times]
+
+        for i in range(len(df)):
+            if times[i] is not None and self.last_time is not None and times[i] <= self.last_time:
+                continue
+            bar = {field: columns[field][i] for field in _BAR_FIELDS}
+            self.update(bar, times[i])
+        return self
+
+    def update(self, bar: Mapping, time=None) -> Dict[str, float]:
+        """
+        追加一根已收盘K线（丢弃正在形成的K线）
+
+        参数:
+            bar: 包含 open/high/low/close/volume 的字典或 Series
+            time: K线时间
+
+        返回:
+            最新指标
+        """
+        bar = self._normalize(bar)
+        self._closed.push(bar)
+        self._live = None
+        self._live_bar = None
+        self.live_time = None
+
+        time = self._to_timestamp(time)
+        if time is not None:
+            if self._day != time.date():
+                self._day = time.date()
+                self._day_volume = 0.0
+            self.last_time = time
+        self._day_volume += bar['volume'] if not np.isnan(bar['volume']) else 0.0
+        return self._closed.values
+
+    def update_live(self, bar: Mapping, time=None) -> Dict[str, float]:
+        """
+        更新正在形成的K线（每次都基于已收盘状态计算，可反复调用）
+
+        参数:
+            bar: 当前K线的 open/high/low/close/volume
+            time: 当前时间
+        """
+        bar = self._normalize(bar)
+        live = _clone(self._closed)
+        live.push(bar)
+        self._live = live
+        self.live_time = self._to_timestamp(time)
+        return live.values
+
+    def update_tick(self, price: float, cum_volume: Optional[float] = None, time=None) -> Dict[str, float]:
+        """
+        用最新成交价更新正在形成的K线
+
+        参数:
+            price: 最新价
+            cum_volume: 当日累计成交量，提供时当前K线成交量 = 累计成交量 - 当日已收盘K线成交量
+            time: tick 时间，不晚于最后一根收盘K线时忽略
+        """
+        tick_time = self._to_timestamp(time)
+        if tick_time is not None and self.last_time is not None and tick_time <= self.last_time:
+            # 已包含在最后一根收盘K线中
+            return self.latest()
+
+        price = float(price)
+        bar = self._live_bar
+        if bar is None:
+            bar = {'open': price, 'high': price, 'low': price, 'close': price, 'volume': 0.0}
+            self._live_bar = bar
+        else:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+
+        if cum_volume is not None:
+            same_day = tick_time is None or self._day is None or tick_time.date() == self._day
+            closed_volume = self._day_volume if same_day else 0.0
+            bar['volume'] = max(float(cum_volume) - closed_volume, 0.0)
+
+        return self.update_live(bar, tick_time)
+
+    def is_stale(self, time, bar_seconds: int) -> bool:
+        """
+        time 时刻最后一根收盘K线之后是否已有新K线收盘（需要下载新K线）
+
+        参数:
+            time: 当前时间（通常为最新tick时间）
+            bar_seconds: K线周期（秒）
+        """
+        time = self._to_timestamp(time)
+        if time is None or self.last_time is None:
+            return True
+        return time >= self.last_time + pd.Timedelta(seconds=bar_seconds)
+
+    def latest(self) -> Dict[str, float]:
+        """最新一根K线（含正在形成的K线）的行情与指标"""
+        current = self._live if self._live is not None else self._closed
+        return dict(current.values)
+
+    def to_frame(self) -> pd.DataFrame:
+        """最新指标转为单行 DataFrame，可直接传给 IndicatorEngine.generate_signal"""
+        time = self.live_time if self._live is not None else self.last_time
+        return pd.DataFrame([self.latest()], index=[time])
+
+    @staticmethod
+    def _normalize(bar: Mapping) -> Dict[str, float]:
+        values = {}
+        for field in _BAR_FIELDS:
+            value = bar.get(field, np.nan) if hasattr(bar, 'get') else bar[field]
+            values[field] = float(value) if value is not None else np.nan
+        if np.isnan(values['open']):
+            values['open'] = values['close']
+        return values
+
+    @staticmethod
+    def _to_timestamp(time) -> Optional[pd.Timestamp]:
+        if time is None:
+            return None
+        try:
+            time = pd.Timestamp(time)
+        except (TypeError, ValueError):
+            return None
+        if pd.isna(time):
+            return None
+        if time.tzinfo is not None:
+            time = time.tz_localize(None)
+        return time
@@ -36,6 +36,7 @@ class MonitorConfig:
     interval_seconds: int = 30
     max_updates_per_stock: Optional[int] = None
     max_workers: int = 8
+    batch_size: int = 200  # 异步引擎每个任务的股票数
 
     @classmethod
     def from_yaml(cls, config_path: str) -> 'MonitorConfig':
@@ -67,7 +68,8 @@ class MonitorConfig:
             stocks=stocks,
             interval_seconds=data.get('interval_seconds', 30),
             max_updates_per_stock=data.get('max_updates_per_stock'),
-            max_workers=data.get('max_workers', 8)
+            max_workers=data.get('max_workers', 8),
+            batch_size=data.get('batch_size', 200)
         )
 
     def get_enabled_stocks(self) -> List[StockConfig]:
@@ -80,7 +82,8 @@ class MonitorConfig:
             'stocks': [s.to_dict() for s in self.stocks],
             'interval_seconds': self.interval_seconds,
             'max_updates_per_stock': self.max_updates_per_stock,
-            'max_workers': self.max_workers
+            'max_workers': self.max_workers,
+            'batch_size': self.batch_size
         }
 
 
@@ -116,7 +119,8 @@ def create_default_watchlist(path: str = 'strategies/watchlist.yaml'):
         ],
         'interval_seconds': 30,
         'max_updates_per_stock': None,
-        'max_workers': 8
+        'max_workers': 8,
+        'batch_size': 200
     }
 
     # 确保目录存在
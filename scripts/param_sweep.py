@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+选股策略参数网格扫描
+
+面板与指标只加载、计算一次，每组阈值参数只做一次向量化条件运算，
+得到历史上每根K线的入选股票，再统计入选后 N 根K线的前向收益，按指定指标排序输出。
+几百组参数的耗时与一次全市场扫描相当。
+
+支持的策略与可扫描参数:
+    low_volume_breakout  低位放量突破: low_threshold, volume_ratio, max_volatility_20d,
+                         min_turnover_rate, buy_threshold, require_trend_filter, require_volume_progressive
+    stockpre             成分股筛选: min_conditions, rsi_oversold, rsi_overbought, volume_surge
+
+注意:
+    - 日线来自本地合并存储（data.bar_store），--fetch 时缓存中没有的股票从数据源获取
+    - 股票池与市值来自当日的全市场元数据，历史上的入选结果存在幸存者偏差
+    - 均线、均量等周期参数改变的是指标本身，不在扫描范围内
+
+用法（在项目根目录下运行）:
+    python scripts/param_sweep.py low_volume_breakout
+    python scripts/param_sweep.py low_volume_breakout --grid low_threshold=0.3,0.4,0.5 --grid buy_threshold=40,50 --top-n 50
+    python scripts/param_sweep.py stockpre --pool zz500 --grid min_conditions=1,2,3 --rank-by win_rate_10d
+    python scripts/param_sweep.py stockpre --horizons 5,10,20 --step 5 --workers 4 --output sweep.csv
+"""
+import sys
+import os
+import argparse
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 设置项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from data.bar_store import BarStore
+from data.data_resilient import DataResilient
+from data.universe import Universe
+from utils.panel_indicators import PricePanel
+from utils.param_sweep import expand_grid, parse_grid, run_sweep
+
+# 默认参数网格
+DEFAULT_GRIDS = {
+    'low_volume_breakout': {
+        'low_threshold': [0.3, 0.4, 0.5, 0.6],
+        'volume_ratio': [1.5, 2.0, 2.5],
+        'max_volatility_20d': [0.2, 0.3, 0.4],
+        'buy_threshold': [40.0, 50.0, 60.0],
+    },
+    'stockpre': {
+        'min_conditions': [1, 2, 3, 4],
+        'rsi_oversold': [25, 30, 35],
+        'volume_surge': [0.1, 0.2, 0.3],
+    },
+}
+
+# 可扫描的参数（只影响条件判断，不影响指标）
+SWEEPABLE = {
+    'low_volume_breakout': ('low_threshold', 'volume_ratio', 'max_volatility_20d', 'min_turnover_rate',
+                            'buy_threshold', 'require_trend_filter', 'require_volume_progressive'),
+    'stockpre': ('min_conditions', 'rsi_oversold', 'rsi_overbought', 'volume_surge'),
+}
+
+# stockPre 默认统计的K线数（约一年半）
+STOCKPRE_BARS = 400
+
+
+# ========== 条件函数（进程池以 pickle 传递引用，需定义在模块顶层）==========
+def evaluate_low_volume_breakout(ind, params):
+    """低位放量突破：替换配置中的阈值后做面板版基本条件与评分"""
+    from strategies.low_volume_breakout.config import StrategyConfig
+    from strategies.low_volume_breakout.signals import SignalGenerator
+
+    config = replace(StrategyConfig(), **params)
+    return SignalGenerator(config).panel_signals(ind, ind.get('market_cap'))
+
+
+def evaluate_stockpre(ind, params):
+    """成分股筛选：买入信号（满足条件数且未触发卖出条件）"""
+    from strategies.stockPre import panel_signals
+
+    signal, _ = panel_signals(ind, **params)
+    return signal == 1, None
+
+
+# ========== 数据加载 ==========
+def load_frames(codes, bars, fetch=False):
+    """
+    从合并存储读取最近 bars 根日线，缺失的股票按需从数据源获取
+
+    Args:
+        codes: 6位股票代码列表
+        bars: K线数
+        fetch: 缓存中没有的股票是否从数据源获取
+
+    Returns:
+        {代码: DataFrame}
+    """
+    packed = BarStore.pack()
+    frames = packed.tail_frames(bars, codes) if packed is not None else {}
+
+    missing = [code for code in codes if code not in frames]
+    if missing and fetch:
+        end_date = datetime.now().strftime('%Y%m%d')
+        # 交易日约为自然日的 2/3
+        start_date = (datetime.now() - timedelta(days=int(bars * 1.5) + 30)).strftime('%Y%m%d')
+        fetched = DataResilient.fetch_many(missing, start_date, end_date)
+        frames.update({code: df.tail(bars) for code, df in fetched.items()})
+
+    print(f"日线加载: {len(frames)}/{len(codes)} 只（最近 {bars} 根K线）")
+    return {code: frames[code] for code in codes if code in frames}
+
+
+def bar_valid(panel, min_bars):
+    """(T, N) 掩码：该位置之前（含）至少有 min_bars 根K线"""
+    t = len(panel.dates)
+    first = t - panel.lengths + max(min_bars, 1) - 1
+    return np.arange(t)[:, None] >= first[None, :]
+
+
+def prepare_low_volume_breakout(args):
+    """低位放量突破：股票池、面板指标、有效位置"""
+    from strategies.low_volume_breakout.config import StrategyConfig
+    from strategies.low_volume_breakout.indicators import IndicatorCalculator
+    from strategies.low_volume_breakout.stock_pool import StockPoolManager
+
+    config = StrategyConfig()
+    manager = StockPoolManager(config)
+    symbols = manager.get_stock_pool()
+    codes = {Universe.to_code(symbol): symbol for symbol in symbols}
+
+    bars = args.bars or config.min_data_points + 250
+    frames = load_frames(list(codes), bars, args.fetch)
+    frames = {code: df for code, df in frames.items() if len(df) >= config.min_data_points}
+    panel = PricePanel.from_frames(frames)
+
+    ind = IndicatorCalculator(config).calculate_panel_indicators(panel)
+    ind['market_cap'] = np.array([manager.get_market_cap(codes[code]) or np.nan for code in panel.symbols],
+                                 dtype=float)
+    return panel, ind, bar_valid(panel, config.min_data_points)
+
+
+def prepare_stockpre(args):
+    """成分股筛选：股票池、面板指标、有效位置"""
+    from strategies.stockPre import get_stock_pool_symbols, calculate_panel_indicators
+
+    codes = [symbol.split('.')[0] for symbol in get_stock_pool_symbols(args.pool)]
+    frames = load_frames(codes, args.bars or STOCKPRE_BARS, args.fetch)
+    panel = PricePanel.from_frames(frames)
+    return panel, calculate_panel_indicators(panel), bar_valid(panel, 1)
+
+
+STRATEGIES = {
+    'low_volume_breakout': (prepare_low_volume_breakout, evaluate_low_volume_breakout),
+    'stockpre': (prepare_stockpre, evaluate_stockpre),
+}
+
+
+def format_table(table, horizons, limit):
+    """控制台输出前 limit 行"""
+    display = table.head(limit).copy()
+    for column in display.columns:
+        if column.startswith(('win_rate_', 'avg_return_', 'median_return_')):
+            display[column] = display[column].map(lambda v: f"{v:.2%}" if pd.notna(v) else '-')
+    trade_columns = [f'trades_{h}d' for h in horizons[:-1]]
+    return display.drop(columns=trade_columns).to_string(index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='选股策略参数网格扫描（指标只计算一次，按前向收益排序）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('strategy', choices=list(STRATEGIES), help='策略')
+    parser.add_argument('--grid', action='append', metavar='KEY=V1,V2',
+                        help='参数候选值，可重复；未指定的参数使用默认网格，指定任意一项则只扫描指定的参数')
+    parser.add_argument('--pool', default='hs300', help='stockpre 的股票池 (hs300/zz500/zz1000/zx50)')
+    parser.add_argument('--bars', type=int, default=None, help='加载的K线数')
+    parser.add_argument('--horizons', default='5,10,20', help='前向收益的持有K线数，逗号分隔')
+    parser.add_argument('--step', type=int, default=1, help='每隔 N 根K线统计一次入选（5 约为每周）')
+    parser.add_argument('--lookback', type=int, default=None, help='只统计最近 N 根K线的入选')
+    parser.add_argument('--top-n', type=int, default=None, help='每个入场日只取得分最高的 N 只（low_volume_breakout）')
+    parser.add_argument('--rank-by', default=None, help='排序指标，默认为最长持有期的平均收益')
+    parser.add_argument('--min-trades', type=int, default=30, help='交易数不足的组合排在最后')
+    parser.add_argument('--workers', type=int, default=1, help='进程数（默认主进程串行，0 为 CPU 核数）')
+    parser.add_argument('--fetch', action='store_true', help='缓存中没有的股票从数据源获取')
+    parser.add_argument('--show', type=int, default=20, help='控制台显示的行数')
+    parser.add_argument('--output', help='结果 CSV 路径（默认 outputs/param_sweep/ 下按时间命名）')
+    args = parser.parse_args()
+
+    # 缓存目录相对于项目根目录
+    os.chdir(PROJECT_ROOT)
+
+    grid = parse_grid(args.grid) or DEFAULT_GRIDS[args.strategy]
+    unknown = [name for name in grid if name not in SWEEPABLE[args.strategy]]
+    if unknown:
+        parser.error(f"不可扫描的参数: {unknown}，可选: {list(SWEEPABLE[args.strategy])}")
+    horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+    combos = expand_grid(grid)
+
+    prepare, evaluate = STRATEGIES[args.strategy]
+
+    print("=" * 60)
+    print(f"参数扫描: {args.strategy}  组合数: {len(combos)}  持有期: {horizons}")
+    for name, values in grid.items():
+        print(f"  {name}: {values}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    panel, ind, valid = prepare(args)
+    if not len(panel):
+        print("没有可用的日线数据")
+        return
+    prepared = time.perf_counter()
+    print(f"面板与指标: {len(panel)} 只 × {len(panel.dates)} 根K线，耗时 {prepared - start:.1f}s")
+
+    table = run_sweep(evaluate, ind, combos, close=ind['close'], valid=valid,
+                      horizons=horizons, step=args.step, lookback=args.lookback, top_n=args.top_n,
+                      rank_by=args.rank_by, min_trades=args.min_trades,
+                      max_workers=args.workers or None)
+    print(f"网格评估: {len(combos)} 组，耗时 {time.perf_counter() - prepared:.1f}s\n")
+
+    if table.empty:
+        print("没有扫描结果")
+        return
+
+    print(format_table(table, horizons, args.show))
+
+    output = Path(args.output) if args.output else \
+        Path('outputs/param_sweep') / f"{args.strategy}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"\n✓ 结果已保存: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,41 @@
 # -*- coding: utf-8 -*-
 """
 每日策略自动执行脚本
-在每个交易日晚上9点开始依次执行六个策略：
-1. 21:00 - 沪深300筛选（生成缓存）
-2. 21:10 - 中证500筛选（生成缓存）
-3. 21:20 - 趋势股筛选（扫描全A股）
-4. 21:30 - 低位放量突破（机构策略）
-5. 21:45 - 快速选股（基于缓存）
-6. 22:00 - 多维评分分析（深度分析）
+每个交易日晚上9点启动，按依赖关系（DAG）并发执行：
+
+    预热数据层 ──┬── 沪深300筛选 ──┐
+                ├── 中证500筛选 ──┤
+                ├── 趋势股筛选 ───┼── 快速选股（基于缓存）
+                └── 多维评分分析  │
+    低位放量突破（掘金直连）───────┘
+
+1. 预热数据层作为第一个子进程执行一次（与其他阶段一样受 STAGE_TIMEOUT 限制）：
+   股票名称映射写入宏观缓存，全A股日线写入日线存储，之后的各筛选子进程直接命中缓存，
+   不再各自冷启动获取；预热超时或失败时依赖它的筛选照常启动，自行获取数据
+2. 依赖全部结束（无论成败，与原先依次执行的行为一致）的阶段才会启动，
+   同时运行的阶段受全局 CPU / 网络预算限制；子进程的计算进程数通过
+   SCREEN_MAX_WORKERS 按分配的 CPU 份额设置
+3. 子进程输出逐行写入日志，不再整体缓冲
+4. 每个阶段记录开始/结束时间与耗时，汇总写入 logs/daily_screen_YYYYMMDD_timings.json
+
+用法:
+    python scripts/run_daily_screens.py                  # 按默认预算执行
+    python scripts/run_daily_screens.py --cpu 8 --net 2  # 指定 CPU / 网络预算
+    python scripts/run_daily_screens.py --sequential     # 依次执行（排查问题时使用）
+    python scripts/run_daily_screens.py --dry-run        # 只打印执行计划
+    python scripts/run_daily_screens.py --warm-only      # 只预热数据层（预热阶段的子进程入口）
 """
 import sys
 import os
+import json
+import time
+import argparse
+import threading
 import subprocess
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # 设置项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -25,6 +46,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 LOG_DIR = PROJECT_ROOT / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / f"daily_screen_{datetime.now().strftime('%Y%m%d')}.log"
+TIMINGS_FILE = LOG_DIR / f"daily_screen_{datetime.now().strftime('%Y%m%d')}_timings.json"
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,16 +58,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 单个阶段超时时间（秒）
+STAGE_TIMEOUT = 1800
+
+# 预热数据层的日线回溯天数（覆盖各筛选脚本中最长的 DataResilient 请求区间）
+WARM_LOOKBACK_DAYS = 365
+
+# 默认网络预算：同时运行的联网阶段数（各子进程内部仍按数据源限速）
+DEFAULT_NET_SLOTS = 2
+
 
 # ========== 策略配置 ==========
+# depends_on: 依赖的阶段（type），依赖全部结束后才启动
+# cpu: 期望的计算进程数（受全局 CPU 预算限制）
+# network: 是否占用网络预算
 STRATEGIES = [
+    {
+        'name': '预热数据层',
+        'type': 'warm_data',
+        'script': 'scripts/run_daily_screens.py',
+        'args': ['--warm-only'],
+        'description': '全市场元数据 + 全A股日线预取',
+        'depends_on': [],
+        'cpu': 1,
+        'network': True
+    },
     {
         'name': '沪深300筛选',
         'type': 'hs300_screen',
         'script': 'strategies/stockPre.py',
         'args': ['--pool', 'hs300', '--days', '365'],
         'description': '沪深300成分股筛选（生成缓存）',
-        'schedule_time': '21:00'
+        'depends_on': ['warm_data'],
+        'cpu': 2,
+        'network': True
     },
     {
         'name': '中证500筛选',
@@ -53,7 +99,9 @@ STRATEGIES = [
         'script': 'strategies/stockPre.py',
         'args': ['--pool', 'zz500', '--days', '365'],
         'description': '中证500成分股筛选（生成缓存）',
-        'schedule_time': '21:10'
+        'depends_on': ['warm_data'],
+        'cpu': 2,
+        'network': True
     },
     {
         'name': '趋势股筛选',
@@ -61,7 +109,9 @@ STRATEGIES = [
         'script': 'strategies/trend_stocks.py',
         'args': ['--days', '60', '--min-strength', '0.6'],
         'description': '趋势股筛选（扫描全A股）',
-        'schedule_time': '21:20'
+        'depends_on': ['warm_data'],
+        'cpu': 4,
+        'network': True
     },
     {
         'name': '低位放量突破',
@@ -81,7 +131,9 @@ STRATEGIES = [
             '--include-chinext'
         ],
         'description': '机构级低位放量突破策略',
-        'schedule_time': '21:30'
+        'depends_on': [],
+        'cpu': 2,
+        'network': True
     },
     {
         'name': '快速选股',
@@ -89,7 +141,9 @@ STRATEGIES = [
         'script': 'strategies/quick_select.py',
         'args': ['--use-cache'],
         'description': '快速选股（基于缓存）',
-        'schedule_time': '21:45'
+        'depends_on': ['hs300_screen', 'zz500_screen', 'trend_stocks', 'low_volume_breakout'],
+        'cpu': 4,
+        'network': False
     },
     {
         'name': '多维评分分析',
@@ -97,17 +151,55 @@ STRATEGIES = [
         'script': 'strategies/stockRanking.py',
         'args': [],
         'description': '多维评分深度分析',
-        'schedule_time': '22:00'
+        'depends_on': ['warm_data'],
+        'cpu': 2,
+        'network': True
     }
 ]
 
 
-def run_strategy(strategy_config: dict) -> bool:
+def warm_data_layer() -> bool:
+    """
+    预热共享数据层（由 --warm-only 子进程执行一次）
+
+    1. 加载当日全市场元数据并保存快照（各筛选脚本的股票池、名称映射都读取该快照）
+    2. 全A股最近 WARM_LOOKBACK_DAYS 天日线通过批量请求写入日线存储，
+       之后各子进程的 DataResilient 请求直接从日线存储切片读取
+    3. 日线存储合并为单文件，供全市场扫描的脚本按清单切片读取
+
+    Returns:
+        执行是否成功
+    """
+    from data.bar_store import BarStore
+    from data.data_resilient import DataResilient
+    from data.universe import Universe
+
+    universe = Universe.get()
+    if universe.empty:
+        logger.error("全市场元数据获取失败")
+        return False
+    logger.info(f"全市场元数据: {len(universe)} 只")
+
+    end_date = datetime.now().strftime("%Y%m%d")
+    start_date = (datetime.now() - timedelta(days=WARM_LOOKBACK_DAYS)).strftime("%Y%m%d")
+    symbols = Universe.symbols(fmt='code')
+    frames = DataResilient.fetch_many(symbols, start_date, end_date)
+    logger.info(f"日线预取: {len(frames)}/{len(symbols)} 只 ({start_date} ~ {end_date})")
+
+    # 合并存储，之后的全市场扫描只需打开一个文件
+    packed = BarStore.pack()
+    if packed is not None:
+        logger.info(f"合并存储: {len(packed)} 只")
+    return len(frames) > 0
+
+
+def run_strategy(strategy_config: dict, cpu_workers: int = None) -> bool:
     """
-    执行单个策略
+    执行单个策略（子进程，输出逐行写入日志）
 
     Args:
         strategy_config: 策略配置字典
+        cpu_workers: 分配给该策略的计算进程数（通过 SCREEN_MAX_WORKERS 传给子进程）
 
     Returns:
         执行是否成功
@@ -128,74 +220,225 @@ def run_strategy(strategy_config: dict) -> bool:
         logger.error(f"脚本不存在: {script_path}")
         return False
 
-    try:
-        # 构建命令
-        cmd = [sys.executable, str(script_path)] + args
+    # 构建命令与环境（子进程不缓冲输出，按分配的 CPU 份额限制计算进程数）
+    cmd = [sys.executable, str(script_path)] + args
+    env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+    if cpu_workers:
+        env['SCREEN_MAX_WORKERS'] = str(cpu_workers)
 
-        # 执行命令
-        result = subprocess.run(
+    timed_out = threading.Event()
+    try:
+        process = subprocess.Popen(
             cmd,
             cwd=str(PROJECT_ROOT),
-            capture_output=True,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             encoding='utf-8',
-            timeout=1800  # 30分钟超时
+            errors='replace',
+            bufsize=1
         )
-
-        # 记录输出
-        if result.stdout:
-            logger.info(f"STDOUT:\n{result.stdout}")
-        if result.stderr:
-            logger.warning(f"STDERR:\n{result.stderr}")
-
-        if result.returncode == 0:
-            logger.info(f"✅ {name} 执行成功")
-            return True
-        else:
-            logger.error(f"❌ {name} 执行失败 (返回码: {result.returncode})")
-            return False
-
-    except subprocess.TimeoutExpired:
-        logger.error(f"❌ {name} 执行超时 (30分钟)")
-        return False
     except Exception as e:
         logger.error(f"❌ {name} 执行异常: {e}")
         return False
 
+    def kill_on_timeout():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(STAGE_TIMEOUT, kill_on_timeout)
+    timer.daemon = True
+    timer.start()
+    try:
+        # 逐行记录输出
+        for line in process.stdout:
+            line = line.rstrip()
+            if line:
+                logger.info(f"[{name}] {line}")
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        process.stdout.close()
+
+    if timed_out.is_set():
+        logger.error(f"❌ {name} 执行超时 ({STAGE_TIMEOUT // 60}分钟)")
+        return False
+    if returncode == 0:
+        logger.info(f"✅ {name} 执行成功")
+        return True
+    logger.error(f"❌ {name} 执行失败 (返回码: {returncode})")
+    return False
+
+
+def run_stage(strategy_config: dict, cpu_workers: int) -> dict:
+    """执行一个阶段并记录耗时"""
+    started = time.time()
+    try:
+        success = run_strategy(strategy_config, cpu_workers)
+    except Exception as e:
+        logger.error(f"❌ {strategy_config['name']} 执行异常: {e}")
+        success = False
+    finished = time.time()
+    return {
+        'type': strategy_config['type'],
+        'name': strategy_config['name'],
+        'success': bool(success),
+        'cpu_workers': cpu_workers,
+        'start': datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M:%S'),
+        'end': datetime.fromtimestamp(finished).strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': round(finished - started, 1)
+    }
+
+
+def validate_dag(strategies: list) -> list:
+    """
+    检查依赖关系并返回拓扑序
+
+    Raises:
+        ValueError: 依赖不存在或存在环
+    """
+    by_type = {s['type']: s for s in strategies}
+    for strategy in strategies:
+        for dep in strategy.get('depends_on', []):
+            if dep not in by_type:
+                raise ValueError(f"{strategy['type']} 依赖的阶段不存在: {dep}")
+
+    order, done = [], set()
+    remaining = list(strategies)
+    while remaining:
+        ready = [s for s in remaining if all(dep in done for dep in s.get('depends_on', []))]
+        if not ready:
+            raise ValueError(f"依赖关系存在环: {[s['type'] for s in remaining]}")
+        for strategy in ready:
+            order.append(strategy)
+            done.add(strategy['type'])
+            remaining.remove(strategy)
+    return order
+
+
+def critical_path(strategies: list, timings: dict) -> tuple:
+    """按实际耗时计算最长依赖链，返回 (阶段列表, 总耗时秒)"""
+    longest = {}
+    for strategy in validate_dag(strategies):
+        duration = timings.get(strategy['type'], {}).get('duration', 0)
+        best = max((longest[dep] for dep in strategy.get('depends_on', [])),
+                   key=lambda item: item[1], default=([], 0))
+        longest[strategy['type']] = (best[0] + [strategy['type']], best[1] + duration)
+    return max(longest.values(), key=lambda item: item[1], default=([], 0))
+
+
+def run_dag(strategies: list, cpu_budget: int, net_budget: int) -> dict:
+    """
+    按依赖关系并发执行所有阶段
+
+    依赖全部结束的阶段在 CPU / 网络预算允许时启动（单个阶段的 CPU 需求
+    不超过全局预算，因此没有阶段运行时总能启动下一个）
+
+    Args:
+        strategies: 阶段配置列表
+        cpu_budget: 全局 CPU 预算（计算进程总数）
+        net_budget: 网络预算（同时运行的联网阶段数）
+
+    Returns:
+        {type: 阶段执行记录}
+    """
+    validate_dag(strategies)
+    pending = list(strategies)
+    finished = {}
+    running = {}  # {future: (strategy, cpu)}
+    free_cpu, free_net = cpu_budget, net_budget
+
+    with ThreadPoolExecutor(max_workers=len(strategies)) as executor:
+        while pending or running:
+            for strategy in list(pending):
+                if not all(dep in finished for dep in strategy.get('depends_on', [])):
+                    continue
+                needs_net = 1 if strategy.get('network') else 0
+                cpu = min(strategy.get('cpu', 1), cpu_budget)
+                if cpu > free_cpu or needs_net > free_net:
+                    continue
+
+                logger.info(f"▶ 启动: {strategy['name']} (CPU {cpu}, 网络 {needs_net}, "
+                            f"剩余 CPU {free_cpu - cpu}, 剩余网络 {free_net - needs_net})")
+                future = executor.submit(run_stage, strategy, cpu)
+                running[future] = (strategy, cpu)
+                pending.remove(strategy)
+                free_cpu -= cpu
+                free_net -= needs_net
+
+            if not running:
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                strategy, cpu = running.pop(future)
+                record = future.result()
+                finished[strategy['type']] = record
+                free_cpu += cpu
+                free_net += 1 if strategy.get('network') else 0
+                status = '成功' if record['success'] else '失败'
+                logger.info(f"■ 结束: {strategy['name']} ({status}, 耗时 {record['duration'] / 60:.1f} 分钟)")
+
+    return finished
+
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='每日策略自动执行（按依赖关系并发）')
+    parser.add_argument('--cpu', type=int, default=os.cpu_count() or 1, help='全局 CPU 预算（计算进程总数）')
+    parser.add_argument('--net', type=int, default=DEFAULT_NET_SLOTS, help='网络预算（同时运行的联网阶段数）')
+    parser.add_argument('--sequential', action='store_true', help='依次执行所有阶段')
+    parser.add_argument('--dry-run', action='store_true', help='只打印执行计划')
+    parser.add_argument('--warm-only', action='store_true', help='只预热数据层（预热阶段的子进程入口）')
+    args = parser.parse_args()
+
+    if args.warm_only:
+        # 子进程的输出由父进程逐行写入日志文件，这里只写标准输出，避免重复记录
+        root_logger = logging.getLogger()
+        for handler in [h for h in root_logger.handlers if isinstance(h, logging.FileHandler)]:
+            root_logger.removeHandler(handler)
+            handler.close()
+        return 0 if warm_data_layer() else 1
+
+    cpu_budget = max(1, args.cpu)
+    net_budget = 1 if args.sequential else max(1, args.net)
+    strategies = STRATEGIES
+    if args.sequential:
+        # 按拓扑序串联：每个阶段依赖上一个阶段，并独占全部 CPU
+        strategies, previous = [], None
+        for strategy in validate_dag(STRATEGIES):
+            strategies.append(dict(strategy, depends_on=[previous] if previous else [], cpu=cpu_budget))
+            previous = strategy['type']
+
     start_time = datetime.now()
     logger.info("")
     logger.info("=" * 60)
     logger.info("每日策略自动执行开始")
     logger.info(f"执行时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"待执行策略数量: {len(STRATEGIES)}")
+    logger.info(f"待执行阶段数量: {len(strategies)}")
+    logger.info(f"CPU 预算: {cpu_budget}, 网络预算: {net_budget}")
+    for strategy in validate_dag(strategies):
+        deps = ', '.join(strategy.get('depends_on', [])) or '无'
+        logger.info(f"  {strategy['type']:<22} 依赖: {deps}")
     logger.info("=" * 60)
     logger.info("")
 
+    if args.dry_run:
+        return 0
+
+    timings = run_dag(strategies, cpu_budget, net_budget)
+
     # 执行结果统计
     results = {
-        'success': [],
-        'failed': []
+        'success': [t for t, r in timings.items() if r['success']],
+        'failed': [t for t, r in timings.items() if not r['success']]
     }
 
-    # 依次执行每个策略
-    for idx, strategy in enumerate(STRATEGIES, 1):
-        logger.info(f"\n[{idx}/{len(STRATEGIES)}] 执行策略: {strategy['name']}")
-
-        success = run_strategy(strategy)
-
-        if success:
-            results['success'].append(strategy['type'])
-        else:
-            results['failed'].append(strategy['type'])
-
-        logger.info("")
-
     # 输出汇总
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
+    path, path_seconds = critical_path(strategies, timings)
 
     logger.info("=" * 60)
     logger.info("执行完成汇总")
@@ -203,6 +446,12 @@ def main():
     logger.info(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info(f"结束时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info(f"总耗时: {duration/60:.1f} 分钟")
+    logger.info(f"各阶段耗时合计: {sum(r['duration'] for r in timings.values())/60:.1f} 分钟")
+    logger.info(f"最长依赖链: {' → '.join(path)} ({path_seconds/60:.1f} 分钟)")
+    for record in sorted(timings.values(), key=lambda r: r['start']):
+        status = '✅' if record['success'] else '❌'
+        logger.info(f"  {status} {record['name']:<10} {record['start'][11:]} ~ {record['end'][11:]} "
+                    f"{record['duration']/60:>6.1f} 分钟")
     logger.info(f"成功: {len(results['success'])} 个")
     logger.info(f"失败: {len(results['failed'])} 个")
 
@@ -214,6 +463,22 @@ def main():
 
     logger.info("=" * 60)
 
+    # 保存各阶段耗时
+    try:
+        with open(TIMINGS_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'start': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'end': end_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'duration': round(duration, 1),
+                'cpu_budget': cpu_budget,
+                'net_budget': net_budget,
+                'critical_path': path,
+                'stages': timings
+            }, f, ensure_ascii=False, indent=2)
+        logger.info(f"阶段耗时已保存: {TIMINGS_FILE}")
+    except Exception as e:
+        logger.warning(f"阶段耗时保存失败: {e}")
+
     # 返回退出码（有失败时返回非0）
     return 0 if not results['failed'] else 1
 
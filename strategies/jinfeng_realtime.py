@@ -38,8 +38,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from realtime_monitor.indicator_engine import IndicatorEngine
+from realtime_monitor.indicator_state import IndicatorState
 from realtime_monitor.signal_alert import SignalAlert
 from realtime_monitor.monitor_config import MonitorConfig
+from realtime_monitor.async_engine import AsyncMonitorEngine
 
 # 技术指标库
 import talib
@@ -48,6 +50,15 @@ import talib
 class JinFengRealtimeAnalyzer:
     """掘金实时分析器 - 完全实时模式"""
 
+    # K线周期（秒）
+    FREQUENCY_SECONDS = {'60s': 60, '300s': 300, '900s': 900, '1800s': 1800, '1d': 86400}
+
+    # 单次 current() 快照请求的股票数
+    TICK_BATCH_SIZE = 500
+
+    # 多代码 history 请求单次返回的最大行数（掘金单次查询上限约33000行）
+    HISTORY_BATCH_ROWS = 30000
+
     def __init__(self, token=None, use_cache=False):
         """
         初始化分析器
@@ -61,6 +72,8 @@ class JinFengRealtimeAnalyzer:
         self.use_cache = use_cache  # 默认禁用缓存
         self.last_update_time = None
         self.cached_data = None
+        # 多股票监控的增量指标状态 {symbol: IndicatorState}
+        self.indicator_states = {}
 
     def init(self):
         """初始化掘金SDK"""
@@ -138,6 +151,191 @@ class JinFengRealtimeAnalyzer:
             traceback.print_exc()
             return None
 
+    def get_streaming_state(self, symbol, frequency='60s'):
+        """
+        获取增量指标状态（多股票监控使用）
+
+        首次调用时下载最近3天分钟线预热，之后每次只下载上次之后新收盘的K线逐根更新，
+        最新tick用于更新正在形成的K线
+
+        参数:
+            symbol: 股票代码
+            frequency: 分钟线频率
+        """
+        try:
+            diggold_symbol = DiggoldDataSource.convert_symbol_to_diggold(symbol)
+            state = self.indicator_states.get(symbol)
+            now = datetime.now()
+
+            if state is None or state.last_time is None:
+                start_time = (now - timedelta(days=3)).strftime('%Y-%m-%d 09:30:00')
+            else:
+                start_time = state.last_time.strftime('%Y-%m-%d %H:%M:%S')
+
+            df = history(
+                symbol=diggold_symbol,
+                frequency=frequency,
+                start_time=start_time,
+                end_time=now.strftime('%Y-%m-%d %H:%M:%S'),
+                adjust=DiggoldDataSource.ADJUST_PREV,
+                df=True
+            )
+
+            if state is None:
+                if df is None or df.empty:
+                    print(f"❌ {symbol} 未获取到数据")
+                    return None
+                state = IndicatorState()
+                self.indicator_states[symbol] = state
+
+            # 首次为预热；之后只有新收盘的K线会被追加
+            state.extend(df, time_column='eob')
+
+            current_tick = self._get_latest_tick(diggold_symbol)
+            if current_tick and current_tick.get('price'):
+                state.update_tick(
+                    current_tick['price'],
+                    cum_volume=current_tick.get('cum_volume'),
+                    time=current_tick.get('created_at')
+                )
+
+            self.last_update_time = now
+            return state
+
+        except Exception as e:
+            print(f"❌ 更新 {symbol} 指标状态失败: {e}")
+            return None
+
+    def get_ticks_batch(self, diggold_symbols):
+        """
+        批量获取最新行情快照（每 TICK_BATCH_SIZE 只一次 current() 请求）
+
+        返回:
+            {掘金代码: tick}
+        """
+        ticks = {}
+        for i in range(0, len(diggold_symbols), self.TICK_BATCH_SIZE):
+            batch = diggold_symbols[i:i + self.TICK_BATCH_SIZE]
+            try:
+                tick_data = current(symbols=batch)
+            except Exception as e:
+                print(f"⚠️ 获取行情快照失败 ({len(batch)} 只): {e}")
+                continue
+            for tick in tick_data or []:
+                if tick.get('symbol'):
+                    ticks[tick['symbol']] = tick
+        return ticks
+
+    def _get_bars_batch(self, diggold_symbols, start_time, end_time, frequency):
+        """一次多代码 history() 请求获取分钟线，按股票拆分"""
+        df = history(
+            symbol=','.join(diggold_symbols),
+            frequency=frequency,
+            start_time=start_time,
+            end_time=end_time,
+            adjust=DiggoldDataSource.ADJUST_PREV,
+            df=True
+        )
+        if df is None or df.empty:
+            return {}
+        return {symbol: group.sort_values('eob') for symbol, group in df.groupby('symbol', sort=False)}
+
+    def _extend_states_batch(self, symbols, diggold_map, start_time, end_time, frequency, bars_per_symbol):
+        """按行数上限分批下载分钟线并追加到各股票的指标状态，返回请求次数"""
+        batch_size = max(1, self.HISTORY_BATCH_ROWS // max(bars_per_symbol, 1))
+        calls = 0
+        for i in range(0, len(symbols), batch_size):
+            batch = symbols[i:i + batch_size]
+            try:
+                calls += 1
+                frames = self._get_bars_batch([diggold_map[s] for s in batch], start_time, end_time, frequency)
+            except Exception as e:
+                print(f"⚠️ 批量获取分钟线失败 ({len(batch)} 只): {e}")
+                continue
+
+            for symbol in batch:
+                df = frames.get(diggold_map[symbol])
+                if df is None:
+                    continue
+                state = self.indicator_states.get(symbol)
+                if state is None:
+                    state = IndicatorState()
+                    self.indicator_states[symbol] = state
+                state.extend(df, time_column='eob')
+        return calls
+
+    def refresh_streaming_states(self, symbols, frequency='60s'):
+        """
+        批量刷新多只股票的增量指标状态（多股票监控每轮调用一次）
+
+        1. 一次 current() 请求获取全部股票的最新快照
+        2. 只对未预热、或最后一根K线之后已有新K线收盘（换线）的股票批量请求分钟线
+        3. 把快照并入各股票正在形成的K线
+
+        参数:
+            symbols: 股票代码列表
+            frequency: 分钟线频率
+
+        返回:
+            {symbol: IndicatorState}
+        """
+        now = datetime.now()
+        end_time = now.strftime('%Y-%m-%d %H:%M:%S')
+        bar_seconds = self.FREQUENCY_SECONDS.get(frequency, 60)
+        diggold_map = {symbol: DiggoldDataSource.convert_symbol_to_diggold(symbol) for symbol in symbols}
+
+        ticks = self.get_ticks_batch(list(diggold_map.values()))
+        tick_calls = -(-len(symbols) // self.TICK_BATCH_SIZE)
+        history_calls = 0
+
+        # 未预热的股票：下载最近3天分钟线（每天4小时交易）
+        new_symbols = [s for s in symbols if s not in self.indicator_states]
+        if new_symbols:
+            start_time = (now - timedelta(days=3)).strftime('%Y-%m-%d 09:30:00')
+            history_calls += self._extend_states_batch(
+                new_symbols, diggold_map, start_time, end_time, frequency,
+                bars_per_symbol=3 * 4 * 3600 // bar_seconds
+            )
+
+        # 换线的股票：从最早的最后收盘时间起批量补齐（已有的K线由 extend 跳过）
+        rolled = []
+        for symbol in symbols:
+            state = self.indicator_states.get(symbol)
+            if state is None or symbol in new_symbols:
+                continue
+            tick = ticks.get(diggold_map[symbol])
+            tick_time = tick.get('created_at') if tick else None
+            if state.is_stale(tick_time or now, bar_seconds):
+                rolled.append(symbol)
+
+        if rolled:
+            start = min(self.indicator_states[s].last_time or now for s in rolled)
+            elapsed_bars = int((now - start).total_seconds() // bar_seconds) + 1
+            history_calls += self._extend_states_batch(
+                rolled, diggold_map, start.strftime('%Y-%m-%d %H:%M:%S'), end_time, frequency,
+                bars_per_symbol=elapsed_bars
+            )
+
+        # 快照并入正在形成的K线
+        states = {}
+        for symbol in symbols:
+            state = self.indicator_states.get(symbol)
+            if state is None:
+                continue
+            tick = ticks.get(diggold_map[symbol])
+            if tick and tick.get('price'):
+                state.update_tick(
+                    tick['price'],
+                    cum_volume=tick.get('cum_volume'),
+                    time=tick.get('created_at')
+                )
+            states[symbol] = state
+
+        self.last_update_time = now
+        print(f"📡 {len(symbols)} 只股票: 快照请求 {tick_calls} 次, "
+              f"K线请求 {history_calls} 次 (新增 {len(new_symbols)} 只, 换线 {len(rolled)} 只)")
+        return states
+
     def _get_latest_tick(self, diggold_symbol):
         """获取最新tick数据"""
         try:
@@ -621,14 +819,7 @@ class JinFengRealtimeAnalyzer:
                 current_time = datetime.now()
 
                 # 判断是否在交易时间
-                hour, minute = current_time.hour, current_time.minute
-                is_trading_time = (
-                    (9 <= hour < 15) and
-                    not (hour == 11 and minute > 30) and
-                    not (hour == 12)
-                )
-
-                if not is_trading_time:
+                if not self._is_trading_time(current_time):
                     print(f"⏸️ {current_time.strftime('%H:%M:%S')} - 非交易时间，休眠中...")
                     time.sleep(interval_seconds)
                     continue
@@ -692,13 +883,12 @@ class JinFengRealtimeAnalyzer:
         """
         多股票持续监控
 
-        使用线程池并发处理多只股票
+        每轮一次 current() 批量快照更新全部股票正在形成的K线，
+        只对换线的股票批量请求分钟线，指标增量计算
 
         参数:
             config: MonitorConfig 配置对象
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
         enabled_stocks = config.get_enabled_stocks()
 
         if not enabled_stocks:
@@ -710,7 +900,6 @@ class JinFengRealtimeAnalyzer:
         print(f"{'='*80}")
         print(f"股票数量: {len(enabled_stocks)}")
         print(f"更新间隔: {config.interval_seconds}秒")
-        print(f"并发线程: {config.max_workers}")
         print(f"按 Ctrl+C 停止监控\n")
 
         # 创建信号提醒器
@@ -719,65 +908,33 @@ class JinFengRealtimeAnalyzer:
         # 记录每只股票的信号状态
         signal_states = {}
 
+        symbols = [stock.symbol for stock in enabled_stocks]
+        update_count = 0
+
         try:
-            with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
-                futures = {}
+            while True:
+                if config.max_updates_per_stock and update_count >= config.max_updates_per_stock:
+                    print(f"\n⏹️ 达到最大更新次数 ({config.max_updates_per_stock})，停止监控")
+                    break
 
-                for stock in enabled_stocks:
-                    future = executor.submit(
-                        self._monitor_single_stock_once,
-                        stock,
-                        config,
-                        signal_alert,
-                        signal_states
-                    )
-                    futures[future] = stock
-
-                # 持续监控循环
-                update_count = 0
-                while True:
-                    if config.max_updates_per_stock and update_count >= config.max_updates_per_stock:
-                        print(f"\n⏹️ 达到最大更新次数 ({config.max_updates_per_stock})，停止监控")
-                        break
-
-                    update_count += 1
-                    current_time = datetime.now()
-
-                    # 判断是否在交易时间
-                    hour, minute = current_time.hour, current_time.minute
-                    is_trading_time = (
-                        (9 <= hour < 15) and
-                        not (hour == 11 and minute > 30) and
-                        not (hour == 12)
-                    )
-
-                    if not is_trading_time:
-                        print(f"⏸️ {current_time.strftime('%H:%M:%S')} - 非交易时间，休眠中...")
-                        time.sleep(config.interval_seconds)
-                        continue
-
-                    # 重新提交所有股票的监控任务
-                    new_futures = {}
-                    for stock in enabled_stocks:
-                        future = executor.submit(
-                            self._monitor_single_stock_once,
-                            stock,
-                            config,
-                            signal_alert,
-                            signal_states
-                        )
-                        new_futures[future] = stock
-
-                    # 等待所有任务完成
-                    for future in as_completed(new_futures):
-                        stock = new_futures[future]
-                        try:
-                            future.result(timeout=10)
-                        except Exception as e:
-                            print(f"⚠️ 监控 {stock['symbol']} 失败: {e}")
-
-                    print(f"\n⏳ 等待 {config.interval_seconds} 秒后下次更新...")
+                update_count += 1
+                current_time = datetime.now()
+
+                # 判断是否在交易时间
+                if not self._is_trading_time(current_time):
+                    print(f"⏸️ {current_time.strftime('%H:%M:%S')} - 非交易时间，休眠中...")
                     time.sleep(config.interval_seconds)
+                    continue
+
+                states = self.refresh_streaming_states(symbols, frequency='60s')
+
+                for stock in enabled_stocks:
+                    state = states.get(stock.symbol)
+                    if state is not None:
+                        self._check_signal(stock, state, signal_alert, signal_states)
+
+                print(f"\n⏳ 等待 {config.interval_seconds} 秒后下次更新...")
+                time.sleep(config.interval_seconds)
 
         except KeyboardInterrupt:
             print(f"\n\n⏹️ 用户停止监控")
@@ -787,10 +944,80 @@ class JinFengRealtimeAnalyzer:
             print(f"总更新次数: {update_count}")
             print(f"{'='*80}\n")
 
+    @staticmethod
+    def _is_trading_time(now):
+        """判断是否在交易时间"""
+        hour, minute = now.hour, now.minute
+        return (
+            (9 <= hour < 15) and
+            not (hour == 11 and minute > 30) and
+            not (hour == 12)
+        )
+
+    def continuous_monitor_async(self, config: MonitorConfig):
+        """
+        多股票持续监控（异步引擎）
+
+        自选股按 config.batch_size 分批，每批一个协程任务，批量快照请求在有界线程池中执行；
+        周期按截止时间调度，慢批次超时放弃、下一轮跳过，刷新延迟不随自选股数量增长
+
+        参数:
+            config: MonitorConfig 配置对象
+        """
+        enabled_stocks = config.get_enabled_stocks()
+
+        if not enabled_stocks:
+            print("❌ 没有启用的股票，请检查配置文件")
+            return
+
+        stock_map = {stock.symbol: stock for stock in enabled_stocks}
+        signal_alert = SignalAlert()
+        signal_states = {}
+
+        def handle(batch, states):
+            for symbol in batch:
+                state = states.get(symbol)
+                if state is not None:
+                    self._check_signal(stock_map[symbol], state, signal_alert, signal_states)
+
+        engine = AsyncMonitorEngine(
+            symbols=list(stock_map),
+            fetch=lambda batch: self.refresh_streaming_states(batch, frequency='60s'),
+            handle=handle,
+            interval_seconds=config.interval_seconds,
+            batch_size=config.batch_size,
+            max_workers=config.max_workers,
+            is_active=self._is_trading_time
+        )
+
+        print(f"\n{'='*80}")
+        print(f"🔄 开启多股票持续监控模式 (异步引擎)")
+        print(f"{'='*80}")
+        print(f"股票数量: {len(enabled_stocks)} ({len(engine.batches)} 批)")
+        print(f"更新间隔: {config.interval_seconds}秒")
+        print(f"并发请求: {config.max_workers}")
+        print(f"按 Ctrl+C 停止监控\n")
+
+        try:
+            engine.run(max_cycles=config.max_updates_per_stock)
+        except KeyboardInterrupt:
+            print(f"\n\n⏹️ 用户停止监控")
+
+        stats = engine.get_stats()
+        print(f"{'='*80}")
+        print(f"📊 监控统计")
+        print(f"{'='*80}")
+        print(f"总更新次数: {stats['cycles']}")
+        if 'latency_mean' in stats:
+            print(f"每轮延迟: 平均 {stats['latency_mean']:.2f}s, P95 {stats['latency_p95']:.2f}s, "
+                  f"最大 {stats['latency_max']:.2f}s")
+        print(f"超时批次: {stats['timeouts']}, 跳过批次: {stats['skipped']}, 错过周期: {stats['missed_cycles']}")
+        print(f"{'='*80}\n")
+
     def _monitor_single_stock_once(self, stock, config: MonitorConfig,
                                     signal_alert: SignalAlert, signal_states: dict):
         """
-        单股票单次监控（用于多股票模式）
+        单股票单次监控（逐只请求行情）
 
         参数:
             stock: StockConfig 对象
@@ -798,16 +1025,26 @@ class JinFengRealtimeAnalyzer:
             signal_alert: SignalAlert 对象
             signal_states: 信号状态字典
         """
-        try:
-            # 获取实时数据
-            df = self.get_realtime_data(stock.symbol, frequency='60s', use_intraday=True)
-            if df is None or df.empty:
-                return
+        # 增量更新指标（只下载新收盘的K线）
+        state = self.get_streaming_state(stock.symbol, frequency='60s')
+        if state is not None:
+            self._check_signal(stock, state, signal_alert, signal_states)
 
-            # 使用新的指标引擎计算
-            df = IndicatorEngine.calculate_all(df)
-            if df is None:
+    def _check_signal(self, stock, state: IndicatorState,
+                      signal_alert: SignalAlert, signal_states: dict):
+        """
+        根据增量指标状态生成信号，信号变化时发送提醒
+
+        参数:
+            stock: StockConfig 对象
+            state: 该股票的 IndicatorState
+            signal_alert: SignalAlert 对象
+            signal_states: 信号状态字典
+        """
+        try:
+            if not state.ready:
                 return
+            df = state.to_frame()
 
             # 生成信号
             current_signal = IndicatorEngine.generate_signal(df)
@@ -862,6 +1099,8 @@ def main():
                         help='运行模式: single=单股票, multi=多股票 (默认: single)')
     parser.add_argument('--config', type=str, default='strategies/watchlist.yaml',
                         help='配置文件路径 (多股票模式)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='多股票模式使用异步引擎（按截止时间调度）')
 
     args = parser.parse_args()
 
@@ -893,7 +1132,10 @@ def main():
                 print(f"  - {stock.name} ({stock.symbol})")
 
             print(f"\n🔄 开始多股票监控...")
-            analyzer.continuous_monitor_multi(config)
+            if args.use_async:
+                analyzer.continuous_monitor_async(config)
+            else:
+                analyzer.continuous_monitor_multi(config)
             return
         except FileNotFoundError:
             print(f"❌ 配置文件不存在: {args.config}")
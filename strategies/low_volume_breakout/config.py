@@ -5,7 +5,7 @@
 定义策略的所有可配置参数
 """
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -58,6 +58,7 @@ class StrategyConfig:
 
         # 并发参数
         max_workers: 并发处理线程数
+        compute_workers: 指标计算进程数（None为CPU核数，1为单进程）
 
         # 输出参数
         output_dir: 输出目录
@@ -108,6 +109,7 @@ class StrategyConfig:
 
     # 并发参数
     max_workers: int = 8  # 并发处理线程数
+    compute_workers: Optional[int] = None  # 指标计算进程数（None为CPU核数）
 
     # 输出参数
     output_dir: str = "outputs/low_volume_breakout"  # 输出目录
@@ -159,6 +161,7 @@ class StrategyConfig:
             volume_ratio=kwargs.get('volume_ratio', cls.volume_ratio),
             data_period=kwargs.get('data_period', cls.data_period),
             max_workers=kwargs.get('max_workers', cls.max_workers),
+            compute_workers=kwargs.get('compute_workers', cls.compute_workers),
             top_n=kwargs.get('top_n', cls.top_n),
         )
 
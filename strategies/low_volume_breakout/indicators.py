@@ -20,6 +20,8 @@ try:
 except ImportError:
     from strategies.low_volume_breakout.config import StrategyConfig
 
+from utils.panel_indicators import PricePanel, PanelIndicators
+
 
 class IndicatorCalculator:
     """技术指标计算器"""
@@ -235,6 +237,58 @@ class IndicatorCalculator:
 
         return df
 
+    def calculate_panel_indicators(self, panel: PricePanel) -> Dict[str, np.ndarray]:
+        """
+        面板版 calculate_all_indicators：一次计算全部股票的指标
+
+        Args:
+            panel: 按K线对齐的 OHLCV 面板（股票数据均不少于 min_data_points）
+
+        Returns:
+            {列名: (T, N) 数组}，列名与 calculate_all_indicators 一致
+        """
+        cfg = self.config
+        close = panel['close']
+        high = panel['high']
+        low = panel['low']
+        volume = panel['volume']
+
+        ind = {field: panel[field] for field in panel.arrays}
+
+        for period in [cfg.ma_short, cfg.ma_mid, cfg.ma_long]:
+            ind[f'ma{period}'] = PanelIndicators.sma(close, period)
+        for period in [cfg.volume_ma_short, cfg.volume_ma_mid, cfg.volume_ma_long]:
+            ind[f'volume_ma{period}'] = PanelIndicators.sma(volume, period)
+
+        high_long = f'high_{cfg.high_period}'
+        low_long = f'low_{cfg.high_period}'
+        ind[high_long] = PanelIndicators.rolling_max(high, cfg.high_period)
+        ind[low_long] = PanelIndicators.rolling_min(low, cfg.high_period)
+        ind['high_120'] = PanelIndicators.rolling_max(high, 120)
+        ind['low_120'] = PanelIndicators.rolling_min(low, 120)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ind['price_position'] = close / ind[high_long]
+            ind['volume_expansion'] = ind[f'volume_ma{cfg.volume_ma_short}'] / ind[f'volume_ma{cfg.volume_ma_mid}']
+            ind['volume_trend'] = ind[f'volume_ma{cfg.volume_ma_mid}'] / ind[f'volume_ma{cfg.volume_ma_long}']
+            ind['trend_strength'] = close / ind[f'ma{cfg.ma_long}']
+            ind['amplitude_120'] = (ind['high_120'] - ind['low_120']) / ind['low_120']
+            ind['amplitude_730'] = (ind[high_long] - ind[low_long]) / ind[low_long]
+            ind['is_volume_expanding'] = (
+                (ind['volume_expansion'] >= cfg.volume_ratio) &
+                (ind['volume_trend'] >= 1.0)
+            )
+
+            ind['rsi'] = PanelIndicators.rsi(close, cfg.rsi_period)
+
+            boll = PanelIndicators.bollinger(close, cfg.boll_period, cfg.boll_std)
+            ind.update(boll)
+            ind['boll_width'] = (boll['boll_upper'] - boll['boll_lower']) / boll['boll_mid']
+
+        ind.update(PanelIndicators.macd(close, 12, 26, 9))
+
+        return ind
+
     def get_latest_signals(self, df: pd.DataFrame) -> Dict[str, float]:
         """
         获取最新的指标信号值
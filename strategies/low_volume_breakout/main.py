@@ -25,6 +25,7 @@ from data.data_resilient import DataResilient
 from data.cache_manager import CacheManager
 from data.diggold_data import DiggoldDataSource
 from utils.strategy_output import StrategyOutputManager, StrategyMetadata, StockData
+from utils.screen_runner import ScreenRunner
 from strategy_tracker.db.repository import get_repository
 
 # 处理相对导入和绝对导入
@@ -33,13 +34,13 @@ try:
     from .config import StrategyConfig
     from .stock_pool import StockPoolManager
     from .indicators import IndicatorCalculator
-    from .signals import SignalGenerator, SignalResult, SignalType
+    from .signals import SignalGenerator, SignalResult, SignalType, generate_signals_chunk
 except ImportError:
     # 回退到绝对导入（直接运行时）
     from strategies.low_volume_breakout.config import StrategyConfig
     from strategies.low_volume_breakout.stock_pool import StockPoolManager
     from strategies.low_volume_breakout.indicators import IndicatorCalculator
-    from strategies.low_volume_breakout.signals import SignalGenerator, SignalResult, SignalType
+    from strategies.low_volume_breakout.signals import SignalGenerator, SignalResult, SignalType, generate_signals_chunk
 
 
 class LowVolumeBreakoutStrategy:
@@ -188,6 +189,15 @@ class LowVolumeBreakoutStrategy:
 
         return result
 
+    def _fetch_for_analysis(self, symbol: str, start_date: str, end_date: str):
+        """获取单个股票的历史数据与市值，数据不足时返回 (None, None)"""
+        df = self.fetch_stock_data(symbol, start_date, end_date)
+
+        if df is None or df.empty or len(df) < self.config.min_data_points:
+            return None, None
+
+        return df, self.stock_pool_manager.get_market_cap(symbol)
+
     def analyze_stocks(self, stock_pool: List[str], end_date: str,
                       show_progress: bool = True) -> List[SignalResult]:
         """
@@ -208,10 +218,16 @@ class LowVolumeBreakoutStrategy:
 
         print(f"\n开始分析 {total} 只股票（并发数: {self.config.max_workers}）...")
 
+        # 1. 并发获取数据（I/O）
+        start_date = (pd.Timestamp(end_date) - pd.Timedelta(days=self.config.data_period)).strftime('%Y%m%d')
+        end_date_num = end_date.replace('-', '')
+        data_dict = {}
+        market_caps = {}
+
         with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
             # 提交任务
             futures = {
-                executor.submit(self.analyze_single_stock, symbol, end_date): symbol
+                executor.submit(self._fetch_for_analysis, symbol, start_date, end_date_num): symbol
                 for symbol in stock_pool
             }
 
@@ -222,23 +238,28 @@ class LowVolumeBreakoutStrategy:
                 completed += 1
 
                 try:
-                    result = future.result(timeout=30)
-                    if result is not None:
-                        results.append(result)
+                    df, market_cap = future.result(timeout=30)
+                    if df is not None:
+                        data_dict[symbol] = df
+                        market_caps[symbol] = market_cap
                     else:
                         no_data_count += 1
 
                     # 进度显示
                     if show_progress and completed % 50 == 0:
-                        buy_count = sum(1 for r in results if r.signal_type == SignalType.BUY)
-                        wait_count = sum(1 for r in results if r.signal_type == SignalType.WAIT)
-                        print(f"进度: {completed}/{total} ({completed/total*100:.1f}%) - "
-                              f"买入: {buy_count}, 观望: {wait_count}, 无数据: {no_data_count}")
+                        print(f"数据获取进度: {completed}/{total} ({completed/total*100:.1f}%) - "
+                              f"有效: {len(data_dict)}, 无数据: {no_data_count}")
 
                 except Exception as e:
                     failed += 1
                     if failed <= 5:  # 只打印前5个错误
-                        print(f"分析 {symbol} 失败: {e}")
+                        print(f"获取 {symbol} 失败: {e}")
+
+        # 2. 面板批量计算指标并生成信号（多进程分块）
+        runner = ScreenRunner(max_workers=self.config.compute_workers)
+        signals = runner.compute(data_dict, generate_signals_chunk, (self.config, market_caps))
+        results = list(signals.values())
+        failed += len(data_dict) - len(results)
 
         print(f"\n分析完成: 成功 {len(results)}, 失败 {failed}, 无数据: {no_data_count}")
 
@@ -590,6 +611,8 @@ def parse_arguments():
     # 并发参数（默认值None时使用config.py中的默认值）
     parser.add_argument('--max-workers', type=int, default=None,
                        help='并发处理线程数，默认8')
+    parser.add_argument('--compute-workers', type=int, default=None,
+                       help='指标计算进程数，默认CPU核数，1为单进程')
 
     # 输出参数（默认值None时使用config.py中的默认值）
     parser.add_argument('--top-n', type=int, default=None,
@@ -684,6 +707,8 @@ def main():
         config_kwargs['data_period'] = args.data_period
     if args.max_workers is not None:
         config_kwargs['max_workers'] = args.max_workers
+    if args.compute_workers is not None:
+        config_kwargs['compute_workers'] = args.compute_workers
     if args.top_n is not None:
         config_kwargs['top_n'] = args.top_n
 
@@ -25,6 +25,8 @@ except ImportError:
     from strategies.low_volume_breakout.config import StrategyConfig
     from strategies.low_volume_breakout.indicators import IndicatorCalculator
 
+from utils.panel_indicators import PricePanel, PanelIndicators
+
 
 class SignalType(Enum):
     """信号类型"""
@@ -294,6 +296,11 @@ class SignalGenerator:
         # 计算所有指标
         df = self.indicator_calc.calculate_all_indicators(df)
 
+        return self._evaluate(symbol, df, market_cap)
+
+    def _evaluate(self, symbol: str, df: pd.DataFrame,
+                  market_cap: Optional[float] = None) -> SignalResult:
+        """根据已计算指标的DataFrame生成信号"""
         if df.empty:
             return SignalResult(
                 symbol=symbol,
@@ -354,9 +361,18 @@ class SignalGenerator:
         """
         results = []
 
+        # 数据足够的股票对齐成面板一次计算指标，其余逐只计算
+        panel_frames = {symbol: df for symbol, df in data_dict.items()
+                        if df is not None and len(df) >= self.config.min_data_points}
+        panel = PricePanel.from_frames(panel_frames)
+        indicators = self.indicator_calc.calculate_panel_indicators(panel) if len(panel) else {}
+
         for symbol, df in data_dict.items():
             market_cap = market_cap_dict.get(symbol) if market_cap_dict else None
-            result = self.generate_signal(symbol, df, market_cap)
+            if symbol in panel_frames:
+                result = self._evaluate(symbol, panel.frame(symbol, indicators), market_cap)
+            else:
+                result = self.generate_signal(symbol, df, market_cap)
             results.append(result)
 
         # 按得分排序
@@ -364,6 +380,95 @@ class SignalGenerator:
 
         return results
 
+    def panel_signals(self, ind: Dict[str, np.ndarray],
+                      market_caps: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        面板版 check_basic_conditions + calculate_score：对面板上每一根K线判断买入信号
+
+        指标由 calculate_panel_indicators 计算，与阈值参数无关，参数扫描时所有组合共用同一份指标
+
+        Args:
+            ind: calculate_panel_indicators 返回的指标面板
+            market_caps: (N,) 市值（亿元），未知为 NaN
+
+        Returns:
+            (买入信号掩码, 综合得分)，均为 (T, N) 数组；未通过基本条件的位置得分为 0
+        """
+        cfg = self.config
+        close = ind['close']
+        passed = np.ones(close.shape, dtype=bool)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 与逐只判断一致：只有明确不满足的比较才淘汰（NaN 不淘汰）
+            if cfg.require_trend_filter:
+                ma_mid = ind[f'ma{cfg.ma_mid}']
+                ma_long = ind[f'ma{cfg.ma_long}']
+                passed &= ~((ma_mid <= 0) | (ma_long <= 0) | (ma_mid <= ma_long))
+
+            price_position = ind['price_position']
+            passed &= ~((price_position <= 0) | (price_position >= cfg.low_threshold))
+
+            if cfg.require_volume_progressive:
+                vol_short = ind[f'volume_ma{cfg.volume_ma_short}']
+                vol_mid = ind[f'volume_ma{cfg.volume_ma_mid}']
+                vol_long = ind[f'volume_ma{cfg.volume_ma_long}']
+                passed &= ~((vol_short <= 0) | (vol_mid <= 0) | (vol_long <= 0) |
+                               (vol_short <= vol_mid) | (vol_mid <= vol_long))
+
+            volume_expansion = ind['volume_expansion']
+            volume_trend = ind['volume_trend']
+            passed &= ~((volume_expansion <= 0) | (volume_trend <= 0) |
+                           (volume_expansion < cfg.volume_ratio) | (volume_trend < 1.0))
+
+            if cfg.min_turnover_rate > 0:
+                avg_volume_20d = ind.get('volume_ma20')
+                if avg_volume_20d is None:
+                    avg_volume_20d = PanelIndicators.sma(ind['volume'], 20)
+                turnover_rate = np.where(avg_volume_20d > 0, ind['volume'] / avg_volume_20d * 0.05, 0)
+                passed &= ~(turnover_rate < cfg.min_turnover_rate)
+
+            if cfg.max_volatility_20d < 1.0:
+                high_20d = ind.get('high_20')
+                low_20d = ind.get('low_20')
+                if high_20d is None or low_20d is None:
+                    high_20d = PanelIndicators.rolling_max(ind['high'], 20)
+                    low_20d = PanelIndicators.rolling_min(ind['low'], 20)
+                volatility_20d = np.where(low_20d > 0, (high_20d - low_20d) / low_20d, 0)
+                passed &= ~(volatility_20d > cfg.max_volatility_20d)
+
+            trend_strength = ind['trend_strength']
+            passed &= ~((trend_strength <= 0) | (trend_strength <= 1.0))
+
+            # 综合得分（与 calculate_score 相同的分段与上限）
+            position_score = np.clip(30 * (1 - price_position / cfg.low_threshold), 0, 30)
+            volume_score = np.clip(20 * np.minimum(2, volume_expansion / cfg.volume_ratio) +
+                                   20 * np.minimum(1.5, volume_trend), 0, 40)
+            trend_score = np.clip(20 * np.minimum(1.2, trend_strength - 0.8) / 0.4, 0, 20)
+            score = position_score + volume_score + trend_score
+
+        if market_caps is not None:
+            market_caps = np.asarray(market_caps, dtype=float)
+            score = score + np.where(market_caps < 50, 10, np.where(market_caps < 100, 5, 0))
+        score = np.where(passed, np.minimum(100, score), 0)
+
+        return passed & (score > cfg.buy_threshold), score
+
+
+def generate_signals_chunk(frames: Dict[str, pd.DataFrame], context) -> Dict[str, SignalResult]:
+    """
+    选股运行器的分块计算函数
+
+    Args:
+        frames: 股票代码到DataFrame的映射
+        context: (策略配置, 股票代码到市值的映射)
+
+    Returns:
+        股票代码到信号结果的映射
+    """
+    config, market_cap_dict = context
+    results = SignalGenerator(config).generate_signals_batch(frames, market_cap_dict)
+    return {result.symbol: result for result in results}
+
 
 # 便捷函数
 def generate_signal(symbol: str, df: pd.DataFrame,
@@ -15,12 +15,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-try:
-    from gm.api import get_symbols, stk_get_daily_mktvalue_pt
-    DIGGOLD_AVAILABLE = True
-except ImportError:
-    DIGGOLD_AVAILABLE = False
-    print("警告: 掘金SDK未安装，股票池获取功能受限")
+from data.universe import Universe
 
 # 处理相对导入和绝对导入
 try:
@@ -57,77 +52,40 @@ class StockPoolManager:
         if trade_date is None:
             trade_date = datetime.now().strftime('%Y-%m-%d')
 
-        trade_date_ts = pd.Timestamp(trade_date)
-
-        # 如果掘金SDK不可用，使用AkShare获取股票列表
-        if not DIGGOLD_AVAILABLE:
-            return self._get_all_a_stocks_akshare(trade_date, trade_date_ts)
-
-        try:
-            # 使用掘金SDK获取A股股票
-            stocks_info = get_symbols(
-                sec_type1=1010,  # 股票
-                sec_type2=101001,  # A股
-                skip_suspended=self.config.skip_suspended,
-                skip_st=self.config.skip_st,
-                trade_date=trade_date,
-                df=True
-            )
-
-            if stocks_info.empty:
-                print("未获取到股票列表")
-                return []
-
-            # 处理日期字段（处理时区信息）
-            if 'listed_date' in stocks_info.columns:
-                stocks_info['listed_date'] = stocks_info['listed_date'].apply(
-                    lambda x: x.replace(tzinfo=None) if hasattr(x, 'tzinfo') and x.tzinfo is not None else x
-                )
-            if 'delisted_date' in stocks_info.columns:
-                stocks_info['delisted_date'] = stocks_info['delisted_date'].apply(
-                    lambda x: x.replace(tzinfo=None) if hasattr(x, 'tzinfo') and x.tzinfo is not None else x
-                )
-
-            # 剔除次新股和退市股
-            cutoff_date = trade_date_ts - pd.Timedelta(days=self.config.min_listing_days)
-            valid_stocks = stocks_info[
-                (stocks_info['listed_date'] <= cutoff_date) &
-                (stocks_info['delisted_date'] > trade_date_ts)
-            ]
-
-            # 剔除创业板股票（代码以300开头，如SZSE.300xxx）
-            chinext_filtered = 0
-            if self.config.skip_chinext:
-                before_chinext_count = len(valid_stocks)
-                valid_stocks = valid_stocks[~valid_stocks['symbol'].str.contains(r'SZSE\.30\d{3}')]
-                chinext_filtered = before_chinext_count - len(valid_stocks)
-
-            all_stocks = list(valid_stocks['symbol'])
-
-            # 保存股票名称映射（使用symbol作为key，确保唯一性）
-            if 'sec_name' in valid_stocks.columns:
-                # 确保symbol列没有重复，避免映射错误
-                valid_stocks = valid_stocks.drop_duplicates(subset=['symbol'], keep='first')
-                self._stock_names = dict(zip(valid_stocks['symbol'], valid_stocks['sec_name']))
-            else:
-                self._stock_names = {}
-
-            filter_desc = f"(剔除次新股<{self.config.min_listing_days}天, 停牌={self.config.skip_suspended}, ST={self.config.skip_st}"
-            if self.config.skip_chinext:
-                filter_desc += f", 创业板={chinext_filtered}"
-            filter_desc += ")"
-
-            print(f"可选股票池数量: {len(all_stocks)} {filter_desc}")
-
-            self._stock_pool = all_stocks
-            return all_stocks
-
-        except Exception as e:
-            print(f"获取股票列表失败: {e}")
-            import traceback
-            traceback.print_exc()
+        # 剔除次新股和退市股
+        valid_stocks = Universe.filter(
+            trade_date=trade_date,
+            exclude_st=self.config.skip_st,
+            exclude_suspended=self.config.skip_suspended,
+            min_listing_days=self.config.min_listing_days
+        )
+
+        if valid_stocks.empty:
+            print("未获取到股票列表")
             return []
 
+        # 剔除创业板股票（代码以30开头，如SZSE.300xxx）
+        chinext_filtered = 0
+        if self.config.skip_chinext:
+            before_chinext_count = len(valid_stocks)
+            valid_stocks = valid_stocks[valid_stocks['board'] != 'chinext']
+            chinext_filtered = before_chinext_count - len(valid_stocks)
+
+        all_stocks = valid_stocks['symbol'].tolist()
+
+        # 保存股票名称映射（使用symbol作为key）
+        self._stock_names = dict(zip(valid_stocks['symbol'], valid_stocks['name']))
+
+        filter_desc = f"(剔除次新股<{self.config.min_listing_days}天, 停牌={self.config.skip_suspended}, ST={self.config.skip_st}"
+        if self.config.skip_chinext:
+            filter_desc += f", 创业板={chinext_filtered}"
+        filter_desc += ")"
+
+        print(f"可选股票池数量: {len(all_stocks)} {filter_desc}")
+
+        self._stock_pool = all_stocks
+        return all_stocks
+
     def get_market_cap_batch(self, symbols: List[str], trade_date: Optional[str] = None) -> pd.DataFrame:
         """
         批量获取股票市值数据
@@ -142,55 +100,30 @@ class StockPoolManager:
         if trade_date is None:
             trade_date = datetime.now().strftime('%Y-%m-%d')
 
-        # 如果掘金SDK不可用，使用AkShare获取市值数据
-        if not DIGGOLD_AVAILABLE:
-            return self._get_market_cap_akshare(symbols, trade_date)
-
-        try:
-            mkt_data = stk_get_daily_mktvalue_pt(
-                symbols=symbols,
-                fields='tot_mv',  # 总市值
-                trade_date=trade_date,
-                df=True
-            )
-
-            if mkt_data.empty:
-                print(f"未获取到市值数据")
-                return pd.DataFrame(columns=['symbol', 'tot_mv'])
-
-            # 重要：掘金SDK返回的市值单位是"元"，需要转换为"亿元"
-            # 先保存原始值（元）
-            mkt_data['tot_mv_original'] = mkt_data['tot_mv'].copy()
-            # 转换为亿元
-            mkt_data['tot_mv'] = mkt_data['tot_mv'] / 1e8  # 元 -> 亿元
-
-            # 调试：打印市值数据范围
-            print(f"市值数据样本: {len(mkt_data)} 只股票")
-            mv_values = mkt_data['tot_mv'].dropna()
-            if len(mv_values) > 0:
-                print(f"  市值范围: {mv_values.min():.2f} - {mv_values.max():.2f} 亿元")
-                print(f"  市值中位数: {mv_values.median():.2f} 亿元")
-            else:
-                print(f"  市值数据全部为空")
-
-            # 过滤市值范围（现在tot_mv已经是亿元单位）
-            filtered = mkt_data[
-                (mkt_data['tot_mv'] >= self.config.min_market_cap) &
-                (mkt_data['tot_mv'] <= self.config.max_market_cap)
-            ].copy()  # 使用copy避免SettingWithCopyWarning
-
-            print(f"市值筛选: {len(mkt_data)} -> {len(filtered)} "
-                  f"({self.config.min_market_cap}亿-{self.config.max_market_cap}亿)")
-
-            # 返回filtered中的symbol和tot_mv（亿元单位）
-            return filtered[['symbol', 'tot_mv']]
-
-        except Exception as e:
-            print(f"获取市值数据失败: {e}")
-            import traceback
-            traceback.print_exc()
+        # 全市场元数据中的市值单位为"亿元"
+        mkt_data = Universe.lookup(symbols, trade_date)[['symbol', 'tot_mv']]
+
+        # 调试：打印市值数据范围
+        print(f"市值数据样本: {len(mkt_data)} 只股票")
+        mv_values = mkt_data['tot_mv'].dropna()
+        if len(mv_values) > 0:
+            print(f"  市值范围: {mv_values.min():.2f} - {mv_values.max():.2f} 亿元")
+            print(f"  市值中位数: {mv_values.median():.2f} 亿元")
+        else:
+            print(f"  市值数据全部为空")
             return pd.DataFrame(columns=['symbol', 'tot_mv'])
 
+        # 过滤市值范围
+        filtered = mkt_data[
+            (mkt_data['tot_mv'] >= self.config.min_market_cap) &
+            (mkt_data['tot_mv'] <= self.config.max_market_cap)
+        ]
+
+        print(f"市值筛选: {len(mkt_data)} -> {len(filtered)} "
+              f"({self.config.min_market_cap}亿-{self.config.max_market_cap}亿)")
+
+        return filtered.reset_index(drop=True)
+
     def filter_by_market_cap(self, stock_pool: List[str], trade_date: Optional[str] = None) -> List[str]:
         """
         按市值范围筛选股票池
@@ -267,26 +200,13 @@ class StockPoolManager:
         Returns:
             股票名称，如果不存在返回空字符串
         """
-        # 先从缓存中查找
         name = self._stock_names.get(symbol, "")
 
-        # 如果缓存中没有，尝试从掘金SDK实时获取
-        if not name and DIGGOLD_AVAILABLE:
-            try:
-                info = get_symbols(
-                    sec_type1=1010,
-                    sec_type2=101001,
-                    df=True
-                )
-                if not info.empty:
-                    # 查找匹配的股票
-                    stock_info = info[info['symbol'] == symbol]
-                    if not stock_info.empty:
-                        name = stock_info.iloc[0]['sec_name']
-                        # 更新缓存
-                        self._stock_names[symbol] = name
-            except Exception as e:
-                pass  # 静默失败，返回空字符串
+        # 不在当前股票池中的股票从全市场元数据中查找
+        if not name:
+            name = Universe.name(symbol)
+            if name:
+                self._stock_names[symbol] = name
 
         return name
 
@@ -300,165 +220,12 @@ class StockPoolManager:
         Returns:
             包含股票信息的DataFrame
         """
-        if not DIGGOLD_AVAILABLE:
-            return pd.DataFrame()
-
-        try:
-            info = get_symbols(
-                sec_type1=1010,
-                sec_type2=101001,
-                df=True
-            )
-
-            if info.empty:
-                return pd.DataFrame()
-
-            # 筛选目标股票
-            filtered = info[info['symbol'].isin(symbols)]
-
-            return filtered[['symbol', 'sec_name', 'listed_date']]
-
-        except Exception as e:
-            print(f"获取股票信息失败: {e}")
-            return pd.DataFrame()
-
-    def _get_all_a_stocks_akshare(self, trade_date: str, trade_date_ts: pd.Timestamp) -> List[str]:
-        """使用AkShare获取A股股票列表（备用方案）"""
-        import akshare as ak
-        print(f"使用AkShare获取A股股票列表（日期: {trade_date}）...")
-
-        try:
-            stock_info = ak.stock_zh_a_spot_em()
-            if stock_info.empty:
-                return []
-
-            def to_diggold_symbol(code):
-                code_str = str(code).zfill(6)
-                if code_str.startswith('6') or code_str.startswith('5'):
-                    return f'SHSE.{code_str}'
-                else:
-                    return f'SZSE.{code_str}'
-
-            stock_info['symbol'] = stock_info['代码'].apply(to_diggold_symbol)
-            stock_info['sec_name'] = stock_info['名称']
-
-            if self.config.skip_st:
-                stock_info = stock_info[~stock_info['名称'].str.contains('ST', case=False, na=False)]
-
-            if self.config.skip_chinext:
-                stock_info = stock_info[~stock_info['代码'].str.startswith('30')]
-                stock_info = stock_info[~stock_info['代码'].str.startswith('688')]
-
-            all_stocks = list(stock_info['symbol'])
-            self._stock_names = dict(zip(stock_info['symbol'], stock_info['sec_name']))
-
-            print(f"AkShare获取股票池数量: {len(all_stocks)}")
-            self._stock_pool = all_stocks
-            return all_stocks
-
-        except Exception as e:
-            print(f"AkShare获取股票列表失败: {e}，尝试使用baostock...")
-            return self._get_all_a_stocks_baostock(trade_date, trade_date_ts)
-
-    def _get_all_a_stocks_baostock(self, trade_date: str, trade_date_ts: pd.Timestamp) -> List[str]:
-        """使用baostock获取A股股票列表（第三备用方案）"""
-        import baostock as bs
-        print(f"使用baostock获取A股股票列表（日期: {trade_date}）...")
-
-        try:
-            lg = bs.login()
-            if lg.error_code != '0':
-                print(f"baostock登录失败: {lg.error_msg}")
-                return []
-
-            stock_info = bs.query_all_stock(day=trade_date)
-            if stock_info.error_code != '0':
-                print(f"baostock获取股票列表失败: {stock_info.error_msg}")
-                bs.logout()
-                return []
-
-            data_list = []
-            while (stock_info.error_code == '0') & stock_info.next():
-                data_list.append(stock_info.get_row_data())
-
-            if not data_list:
-                print("未获取到股票列表")
-                bs.logout()
-                return []
-
-            df = pd.DataFrame(data_list, columns=stock_info.fields)
-
-            def to_diggold_symbol(code):
-                code_parts = code.split('.')
-                if len(code_parts) != 2:
-                    return None
-                market, code_num = code_parts
-                if market == 'sh':
-                    return f'SHSE.{code_num}'
-                elif market == 'sz':
-                    return f'SZSE.{code_num}'
-                return None
-
-            df['symbol'] = df['code'].apply(to_diggold_symbol)
-            df = df[df['symbol'].notna()]
-
-            if self.config.skip_st:
-                df = df[~df['code_name'].str.contains('ST', case=False, na=False)]
-
-            if self.config.skip_chinext:
-                df = df[~df['code'].str.startswith('sz.30')]
-                df = df[~df['code'].str.startswith('sh.688')]
-
-            all_stocks = list(df['symbol'])
-            self._stock_names = dict(zip(df['symbol'], df['code_name']))
-
-            bs.logout()
-
-            print(f"baostock获取股票池数量: {len(all_stocks)}")
-            self._stock_pool = all_stocks
-            return all_stocks
-
-        except Exception as e:
-            print(f"baostock获取股票列表失败: {e}")
-            return []
-
-    def _get_market_cap_akshare(self, symbols: List[str], trade_date: str) -> pd.DataFrame:
-        """使用AkShare获取市值数据（备用方案）"""
-        import akshare as ak
-        print(f"使用AkShare获取市值数据（{len(symbols)}只股票）...")
-
-        try:
-            stock_info = ak.stock_zh_a_spot_em()
-            if stock_info.empty:
-                return pd.DataFrame(columns=['symbol', 'tot_mv'])
-
-            def to_diggold_symbol(code):
-                code_str = str(code).zfill(6)
-                if code_str.startswith('6') or code_str.startswith('5'):
-                    return f'SHSE.{code_str}'
-                else:
-                    return f'SZSE.{code_str}'
-
-            stock_info['symbol'] = stock_info['代码'].apply(to_diggold_symbol)
-            stock_info['tot_mv'] = stock_info['总市值'] / 10000
-
-            filtered = stock_info[stock_info['symbol'].isin(symbols)].copy()
-            result = filtered[
-                (filtered['tot_mv'] >= self.config.min_market_cap) &
-                (filtered['tot_mv'] <= self.config.max_market_cap)
-            ].copy()
-
-            print(f"AkShare市值筛选: {len(filtered)} -> {len(result)}")
-            return result[['symbol', 'tot_mv']]
-
-        except Exception as e:
-            print(f"AkShare获取市值数据失败: {e}，尝试使用baostock...")
-            return self._get_market_cap_baostock(symbols, trade_date)
-
-    def _get_market_cap_baostock(self, symbols: List[str], trade_date: str) -> pd.DataFrame:
-        """使用baostock获取市值数据（第三备用方案）- baostock不支持市值数据"""
-        print(f"baostock不支持市值数据，跳过市值过滤")
-        return pd.DataFrame(columns=['symbol', 'tot_mv'])
+        info = Universe.lookup(symbols)
+        return pd.DataFrame({
+            'symbol': info['symbol'].values,
+            'sec_name': info['name'].values,
+            'listed_date': info['listed_date'].values
+        })
 
 
 # 便捷函数
@@ -4,9 +4,8 @@
 快速选股分析 - 使用缓存数据
 支持统一输出：TXT、CSV、SQLite
 """
-import pickle
+import numpy as np
 import pandas as pd
-from pathlib import Path
 from datetime import datetime
 import sys
 import os
@@ -15,6 +14,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.data_resilient import DataResilient
+from data.bar_store import BarStore
+from utils.panel_indicators import PricePanel, PanelIndicators
+from utils.screen_runner import ScreenRunner
 from utils.strategy_output import StrategyOutputManager, StrategyMetadata, StockData
 from strategy_tracker.db.repository import get_repository
 
@@ -77,9 +79,67 @@ def analyze_stock(df):
         'macd': latest['macd']
     }
 
-def main():
-    cache_dir = Path("cache/stock")
+def analyze_panel(panel):
+    """
+    面板版 analyze_stock：一次计算全部股票的指标，返回满足条件数 >= 2 的股票
+
+    返回:
+        {股票代码: analyze_stock 格式的分析结果}
+    """
+    close = panel['close']
+    volume = panel['volume']
+
+    ma5 = PanelIndicators.sma(close, 5)
+    ma20 = PanelIndicators.sma(close, 20)
+    macd = PanelIndicators.macd(close, 12, 26, 9, adjust=True)
+    rsi = PanelIndicators.rsi(close, 14)
+    boll = PanelIndicators.bollinger(close, 20, 2)
+
+    latest = panel.latest({
+        'price': close,
+        'rsi': rsi,
+        'ma5': ma5,
+        'ma20': ma20,
+        'macd': macd['macd'],
+        'macd_signal': macd['macd_signal'],
+        'boll_lower': boll['boll_lower'],
+        'volume_pct_change': PanelIndicators.pct_change(volume)
+    })
 
+    conditions = {
+        '均线金叉': (latest['ma5'] > latest['ma20']).to_numpy(),
+        'MACD金叉': (latest['macd'] > latest['macd_signal']).to_numpy(),
+        'RSI超卖': (latest['rsi'] < 30).to_numpy(),
+        'BOLL下轨': (latest['price'] < latest['boll_lower']).to_numpy(),
+        '放量20%': (latest['volume_pct_change'] > 0.2).to_numpy()
+    }
+    satisfied_counts = np.sum(list(conditions.values()), axis=0)
+    eligible = (panel.lengths >= 20) & (satisfied_counts >= 2)
+
+    results = {}
+    for j in np.flatnonzero(eligible):
+        row = latest.iloc[j]
+        satisfied = [name for name, cond in conditions.items() if cond[j]]
+        results[panel.symbols[j]] = {
+            'satisfied_count': len(satisfied),
+            'conditions': satisfied,
+            'price': row['price'],
+            'rsi': row['rsi'],
+            'ma5': row['ma5'],
+            'ma20': row['ma20'],
+            'macd': row['macd']
+        }
+
+    return results
+
+# 参与计算的最近K线数（EMA 截断误差在此长度下可忽略）
+ANALYZE_BARS = 250
+
+def analyze_chunk(frames, context=None):
+    """选股运行器的分块计算函数"""
+    return analyze_panel(PricePanel.from_frames(frames, fields=('close', 'volume')))
+
+def main():
     # 获取股票名称映射
     stock_info = DataResilient.get_stock_info(use_cache=True)
     name_map = dict(zip(stock_info['code'], stock_info['name'])) if not stock_info.empty else {}
@@ -89,48 +149,29 @@ def main():
     print(f"{'时间: ' + datetime.now().strftime('%Y-%m-%d %H:%M:%S'):^50}")
     print(f"{'='*70}\n")
 
-    # 先收集所有缓存文件，按股票分组
-    stock_files = {}  # {symbol: [(file, end_date), ...]}
-
-    for cache_file in cache_dir.glob("*.pkl"):
-        try:
-            parts = cache_file.stem.split('_')
-            if len(parts) >= 3:
-                symbol = parts[0]
-                start_date = parts[1]
-                end_date = parts[2]
+    results = []
 
-                if symbol not in stock_files:
-                    stock_files[symbol] = []
-                stock_files[symbol].append((cache_file, start_date, end_date))
-        except Exception:
-            continue
+    # 日线存储与旧版 pickle 缓存合并为一个内存映射文件，按清单切片读取每只股票的最近K线
+    packed = BarStore.pack()
+    if packed is None:
+        print("【缓存中没有日线数据】")
+        return
 
-    results = []
-    total_analyzed = 0
-
-    for symbol, files in stock_files.items():
-        total_analyzed += 1
-        # 按结束日期排序，取最新的
-        files.sort(key=lambda x: x[2], reverse=True)
-        latest_file, start_date, end_date = files[0]
-
-        try:
-            with open(latest_file, 'rb') as f:
-                df = pickle.load(f)
-
-            analysis = analyze_stock(df)
-
-            if analysis and analysis['satisfied_count'] >= 2:
-                results.append({
-                    'symbol': symbol,
-                    'name': name_map.get(symbol, '未知'),
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    **analysis
-                })
-        except Exception:
-            continue
+    frames = packed.tail_frames(ANALYZE_BARS)
+    total_analyzed = len(packed)
+
+    # 面板计算指标（多进程分块）
+    analyses = ScreenRunner(fields=('close', 'volume')).compute(frames, analyze_chunk)
+
+    for symbol, analysis in analyses.items():
+        start_date, end_date = packed.coverage(symbol)
+        results.append({
+            'symbol': symbol,
+            'name': name_map.get(symbol, '未知'),
+            'start_date': start_date,
+            'end_date': end_date,
+            **analysis
+        })
 
     # 按满足条件数量排序
     results.sort(key=lambda x: x['satisfied_count'], reverse=True)
@@ -12,6 +12,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.data_resilient import DataResilient
 from data.cache_manager import CacheManager
+from data.universe import Universe
+from utils.panel_indicators import PricePanel, PanelIndicators
+from utils.screen_runner import ScreenRunner
 
 
 # ========== 使用统一输出工具 ==========
@@ -58,29 +61,11 @@ def get_stock_pool_symbols(pool_id='zz500'):
 
     pool_info = STOCK_POOLS[pool_id]
 
-    # 从缓存或API获取指数成分股
-    cache_key = f'{pool_id}_symbols'
-    cached = CacheManager.load_macro_cache(cache_key)
-    if cached is not None:
-        return cached
-
-    try:
-        # 获取指数成分股
-        index_df = ak.index_stock_cons(symbol=pool_info['index_code'])
-        index_df = index_df.drop_duplicates(subset=['品种代码'], keep='first')
-
-        # 标准化代码格式
-        symbols = index_df['品种代码'].astype(str).str.replace(r'\D', '', regex=True).str.zfill(6).tolist()
-        symbols = [f"{s}.SZ" if s.startswith(('0', '3')) else f"{s}.SH" for s in symbols]
-        symbols = list(set(symbols))  # 去重
-
-        # 保存缓存
-        CacheManager.save_macro_cache(cache_key, symbols)
-
-        return symbols
-    except Exception as e:
-        print(f"获取{pool_info['name']}成分股失败: {e}")
-        return []
+    # 指数成分股来自当日全市场元数据
+    symbols = Universe.symbols(fmt='suffix', index=pool_info['index_code'])
+    if not symbols:
+        print(f"获取{pool_info['name']}成分股失败")
+    return symbols
 
 def fetch_stock_data(symbol, start_date, end_date):
     """获取股票历史数据（日线）- 带缓存和重试"""
@@ -122,6 +107,106 @@ def calculate_indicators(df):
 
     return df
 
+def calculate_panel_indicators(panel):
+    """
+    面板版 calculate_indicators：一次计算全部股票的指标（TA-Lib 口径）
+
+    返回:
+        {指标名: (T, N) 数组}
+    """
+    close = panel['close']
+    volume = panel['volume']
+
+    indicators = {
+        'close': close,
+        'ma5': PanelIndicators.sma(close, 5),
+        'ma20': PanelIndicators.sma(close, 20),
+        'rsi': PanelIndicators.rsi(close, 14, method='wilder'),
+    }
+    indicators.update(PanelIndicators.macd(close, 12, 26, 9, seed='sma'))
+    indicators.update(PanelIndicators.bollinger(close, 20, 2, ddof=0))
+
+    volume_ma3 = PanelIndicators.sma(volume, 3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indicators['volume_pct_change'] = volume / PanelIndicators.shift(volume_ma3) - 1
+
+    # K线中间有缺失值的股票：TA-Lib 的递推指标在缺失值之后的结果无法向量化复现，逐只用 calculate_indicators 重算
+    started = np.cumsum(~np.isnan(close), axis=0) > 0
+    for j in np.flatnonzero((started & np.isnan(close)).any(axis=0)):
+        first = int(np.argmax(started[:, j]))
+        df = calculate_indicators(pd.DataFrame({field: panel[field][first:, j]
+                                                for field in ('close', 'high', 'low', 'volume')}))
+        for name in indicators:
+            if name != 'close' and name in df.columns:
+                indicators[name][first:, j] = df[name].to_numpy()
+
+    return indicators
+
+
+def panel_signals(ind, min_conditions=2, rsi_oversold=30, rsi_overbought=70, volume_surge=0.2):
+    """
+    面板版 generate_signals：由指标面板生成每根K线的信号
+
+    指标与阈值无关，参数扫描时所有组合共用 calculate_panel_indicators 的结果
+
+    参数:
+        ind: calculate_panel_indicators 返回的指标面板
+        min_conditions: 买入至少需满足的条件数
+        rsi_oversold: RSI超卖阈值
+        rsi_overbought: RSI超买阈值（卖出条件）
+        volume_surge: 成交量较3日均量的放大比例
+
+    返回:
+        (信号面板: 1 买入 / -1 卖出 / 0 无信号, {买入条件名: 布尔面板})
+    """
+    with np.errstate(invalid='ignore'):
+        buy_conditions = {
+            '均线金叉': ind['ma5'] > ind['ma20'],
+            'MACD金叉': ind['macd'] > ind['macd_signal'],
+            'RSI超卖': ind['rsi'] < rsi_oversold,
+            'BOLL下轨': ind['close'] < ind['boll_lower'],
+            '放量20%': ind['volume_pct_change'] > volume_surge
+        }
+        satisfied_counts = sum(cond.astype(int) for cond in buy_conditions.values())
+        sell_condition = (
+            (ind['macd'] < ind['macd_signal']) |
+            (ind['rsi'] > rsi_overbought) |
+            (ind['close'] > ind['boll_upper'])
+        )
+
+    signal = np.where(sell_condition, -1, np.where(satisfied_counts >= min_conditions, 1, 0)).astype(float)
+    return signal, buy_conditions
+
+
+def screen_panel(panel):
+    """
+    面板版信号生成与回测，返回每只股票最新一根K线的信号、买入条件和累计收益
+
+    返回:
+        以股票代码为索引的 DataFrame
+    """
+    ind = calculate_panel_indicators(panel)
+    signal, buy_conditions = panel_signals(ind)
+
+    # 次日开盘执行，累计收益（与 backtest_strategy 相同，跳过缺失值）
+    position = PanelIndicators.shift(signal)
+    returns = PanelIndicators.pct_change(ind['close'])
+    strategy_returns = position * returns
+    cum_returns = np.nancumprod(1 + strategy_returns, axis=0)
+
+    latest = panel.latest({'close': ind['close'], 'signal': signal, 'cum_returns': cum_returns})
+    latest['date'] = panel.last_dates
+    latest['criteria'] = [
+        ' + '.join(name for name, cond in buy_conditions.items() if cond[-1, j])
+        for j in range(len(panel))
+    ]
+    return latest
+
+def screen_chunk(frames, context=None):
+    """选股运行器的分块计算函数：{代码: DataFrame} -> {代码: 最新信号}"""
+    latest = screen_panel(PricePanel.from_frames(frames))
+    return latest.to_dict('index')
+
 # ========== 信号生成模块 ==========
 def generate_signals(df):
     """根据策略生成买卖信号"""
@@ -189,6 +274,8 @@ def main():
                         help='股票池选择 (默认: hs300)')
     parser.add_argument('-d', '--days', type=int, default=365,
                         help='回测天数 (默认: 365)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='计算进程数 (默认: CPU核数，1为单进程)')
 
     args = parser.parse_args()
 
@@ -224,54 +311,32 @@ def main():
     code_name_dict = dict(zip(stock_code_name_df['code'], stock_code_name_df['name'])) if not stock_code_name_df.empty else {}
 
     results = []  # 存储所有股票结果
-    failed_count = 0
 
-    # 处理每只股票
-    for idx, symbol in enumerate(symbols, 1):
-        # 提取纯数字代码用于名称查询
+    # 批量获取成分股数据
+    stock_frames = DataResilient.fetch_many([s.split('.')[0] for s in symbols], start_date, end_date)
+
+    # 面板计算指标与信号（多进程分块）
+    latest = ScreenRunner(max_workers=args.workers).compute(stock_frames, screen_chunk)
+    failed_count = len(symbols) - len(latest)
+
+    for symbol in symbols:
         base_symbol = symbol.split('.')[0]
-        stock_name = code_name_dict.get(base_symbol, "")
-
-        # 进度显示
-        if idx % 50 == 0 or idx == len(symbols):
-            print(f"进度: {idx}/{len(symbols)} ({idx/len(symbols)*100:.1f}%)")
-
-        try:
-            df = fetch_stock_data(base_symbol, start_date, end_date)
-            if df is None or df.empty:
-                failed_count += 1
-                continue
-
-            df = calculate_indicators(df)
-            signals = generate_signals(df)
-            df = backtest_strategy(df, signals)
-
-            # 只记录有买入信号的
-            latest_signal = signals.iloc[-1]['signal']
-            if latest_signal == 1:
-                # 获取最新日期满足的买入条件
-                latest_date = df.index[-1]
-                satisfied_conditions = [
-                    "均线金叉" if (df.loc[latest_date, 'ma5'] > df.loc[latest_date, 'ma20']) else None,
-                    "MACD金叉" if (df.loc[latest_date, 'macd'] > df.loc[latest_date, 'macd_signal']) else None,
-                    "RSI超卖" if (df.loc[latest_date, 'rsi'] < 30) else None,
-                    "BOLL下轨" if (df.loc[latest_date, 'close'] < df.loc[latest_date, 'boll_lower']) else None,
-                    "放量20%" if (df.loc[latest_date, 'volume_pct_change'] > 0.2) else None
-                ]
-                satisfied_conditions = [x for x in satisfied_conditions if x is not None]
-
-                results.append({
-                    'symbol': symbol,
-                    'name': stock_name,
-                    'return': df['cum_returns'].iloc[-1],
-                    'latest_price': df['close'].iloc[-1],
-                    'date': df.index[-1].strftime('%Y-%m-%d'),
-                    'criteria': ' + '.join(satisfied_conditions)
-                })
-        except Exception as e:
-            failed_count += 1
+        if base_symbol not in latest:
             continue
 
+        row = latest[base_symbol]
+
+        # 只记录有买入信号的
+        if row['signal'] == 1:
+            results.append({
+                'symbol': symbol,
+                'name': code_name_dict.get(base_symbol, ""),
+                'return': row['cum_returns'],
+                'latest_price': row['close'],
+                'date': row['date'].strftime('%Y-%m-%d'),
+                'criteria': row['criteria']
+            })
+
     # 按累计收益率排序
     sorted_results = sorted(results, key=lambda x: x['return'], reverse=True)
 
@@ -3,11 +3,8 @@ import talib
 import akshare as ak
 import numpy as np
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 import os
-import traceback
-import threading
 import json
 from pathlib import Path
 
@@ -16,6 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 使用掘金SDK数据模块
 from data.data_resilient import DataResilient
+from utils.screen_runner import ScreenRunner
 
 # ========== 统一输出工具 ==========
 from utils.strategy_output import StrategyOutputManager, StrategyMetadata, StockData
@@ -268,8 +266,101 @@ class DataCache:
     macro_data = {}
     stock_names = {}
 
+# ========== 评分计算（选股运行器分块函数）==========
+def rank_symbol(symbol, df, context):
+    """计算单只股票的多维评分，返回 (结果, 输出内容)，失败返回 None"""
+    code_name_dict = context['names']
+    start_date = context['start_date']
+    end_date = context['end_date']
+
+    try:
+        stock_name = code_name_dict.get(symbol, "")
+        df = calculate_indicators(df)
+        signals = generate_signals(df)
+        df = backtest_strategy(df, signals)
+        
+        latest_signal = signals.iloc[-1]['signal']
+        latest_date = signals.index[-1].strftime('%Y-%m-%d')
+        latest_price = df['close'].iloc[-1]
+        
+        # 买卖建议
+        action = "持有"
+        if latest_signal == 1:
+            action = "★★★ 买入 ★★★"
+        elif latest_signal == -1:
+            action = "▼▼▼ 卖出 ▼▼▼"
+        
+        # 评分详情
+        latest_score = signals.iloc[-1]
+        
+        # 在生成信号后获取动态阈值
+        buy_threshold, sell_threshold = dynamic_threshold(df)
+        
+        # 构建输出内容（原所有print语句改为列表追加）
+        output = [
+            "\n" + "="*40,
+            f"股票名称: {stock_name}({symbol})",
+            f"数据期间: {start_date} 至 {end_date}",
+            f"\n【{latest_date} 操作建议】{action}",
+            f"当前价格: {latest_price:.2f}",
+             "\n【多维评分系统】",
+            f"买入评分: {latest_score['buy_score']:.2f}/1.00  (当前阈值: {buy_threshold:.2f})",
+            f"卖出压力: {latest_score['sell_pressure']:.2f}/1.00  (当前阈值: {sell_threshold:.2f})",
+            "\n买入评分构成：",
+            f"MACD动量(0.3): {latest_score['macd_momentum']:.2f}",
+            f"BOLL通道(0.2): {latest_score['boll_score']:.2f}",
+            f"RSI背离(0.15): {latest_score['rsi_divergence']:.2f}",
+            f"量价配合(0.2): {latest_score['volume_score']:.2f}",
+            f"宏观因子(0.15): {latest_score['macro_score']:.2f}",
+            "\n卖出压力构成：",
+            f"趋势衰减(0.1): {latest_score['trend_decay']:.2f}",
+            f"超买系数(0.1): {latest_score['overbought']:.2f}", 
+            f"资金流出(0.1): {latest_score['capital_outflow']:.2f}",
+            f"回撤压力(0.1): {latest_score['drawdown_pressure']:.2f}",
+            f"\n累计收益率: {df['cum_returns'].iloc[-1]:.2%}",
+            "="*40
+        ]
+        # 返回结果与输出内容（由主进程按顺序打印）
+        return {
+            'symbol': symbol,
+            'name': stock_name,
+            'date': latest_date,
+            'price': latest_price,
+            'action': action,
+            'buy_score': latest_score['buy_score'],
+            'sell_pressure': latest_score['sell_pressure'],
+            'buy_threshold': buy_threshold,
+            'sell_threshold': sell_threshold,
+            'macd_momentum': latest_score['macd_momentum'],
+            'boll_score': latest_score['boll_score'],
+            'rsi_divergence': latest_score['rsi_divergence'],
+            'volume_score': latest_score['volume_score'],
+            'macro_score': latest_score['macro_score'],
+            'trend_decay': latest_score['trend_decay'],
+            'overbought': latest_score['overbought'],
+            'capital_outflow': latest_score['capital_outflow'],
+            'drawdown_pressure': latest_score['drawdown_pressure'],
+            'cum_returns': df['cum_returns'].iloc[-1]
+        }, output
+        
+    except Exception as e:
+        print(f"处理{symbol}时发生错误: {str(e)}")
+        return None
+
+
+def rank_chunk(frames, context):
+    """选股运行器的分块计算函数：{代码: DataFrame} -> {代码: (结果, 输出内容)}"""
+    # 计算进程中使用主进程传入的宏观数据
+    DataCache.macro_data = context['macro_data']
+
+    results = {}
+    for symbol, df in frames.items():
+        ranked = rank_symbol(symbol, df, context)
+        if ranked is not None:
+            results[symbol] = ranked
+    return results
+
 # ========== 修改主程序循环 ==========
-from concurrent.futures import ThreadPoolExecutor
 
 if __name__ == "__main__":
     # 预先获取全局共享数据（使用DataResilient，掘金SDK优先）
@@ -316,9 +407,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"警告：CPI日期格式处理失败: {str(e)[:50]}")
     
-    # 创建全局打印锁
-    print_lock = threading.Lock()
-    
     # 修正后的GDP季度日期处理
     gdp_df = DataCache.macro_data['gdp']
     
@@ -389,101 +477,26 @@ if __name__ == "__main__":
     # 收集所有结果
     all_results = []
 
-    def process_symbol(symbol):
-        try:
-            stock_name = code_name_dict.get(symbol, "")
-            df = fetch_stock_data(symbol, start_date, end_date)
-            df = calculate_indicators(df)
-            signals = generate_signals(df)
-            df = backtest_strategy(df, signals)
-            
-            latest_signal = signals.iloc[-1]['signal']
-            latest_date = signals.index[-1].strftime('%Y-%m-%d')
-            latest_price = df['close'].iloc[-1]
-            
-            # 买卖建议
-            action = "持有"
-            if latest_signal == 1:
-                action = "★★★ 买入 ★★★"
-            elif latest_signal == -1:
-                action = "▼▼▼ 卖出 ▼▼▼"
-            
-            # 评分详情
-            latest_score = signals.iloc[-1]
-            
-            # 在生成信号后获取动态阈值
-            buy_threshold, sell_threshold = dynamic_threshold(df)
-            
-            # 构建输出内容（原所有print语句改为列表追加）
-            output = [
-                "\n" + "="*40,
-                f"股票名称: {stock_name}({symbol})",
-                f"数据期间: {start_date} 至 {end_date}",
-                f"\n【{latest_date} 操作建议】{action}",
-                f"当前价格: {latest_price:.2f}",
-                 "\n【多维评分系统】",
-                f"买入评分: {latest_score['buy_score']:.2f}/1.00  (当前阈值: {buy_threshold:.2f})",
-                f"卖出压力: {latest_score['sell_pressure']:.2f}/1.00  (当前阈值: {sell_threshold:.2f})",
-                "\n买入评分构成：",
-                f"MACD动量(0.3): {latest_score['macd_momentum']:.2f}",
-                f"BOLL通道(0.2): {latest_score['boll_score']:.2f}",
-                f"RSI背离(0.15): {latest_score['rsi_divergence']:.2f}",
-                f"量价配合(0.2): {latest_score['volume_score']:.2f}",
-                f"宏观因子(0.15): {latest_score['macro_score']:.2f}",
-                "\n卖出压力构成：",
-                f"趋势衰减(0.1): {latest_score['trend_decay']:.2f}",
-                f"超买系数(0.1): {latest_score['overbought']:.2f}", 
-                f"资金流出(0.1): {latest_score['capital_outflow']:.2f}",
-                f"回撤压力(0.1): {latest_score['drawdown_pressure']:.2f}",
-                f"\n累计收益率: {df['cum_returns'].iloc[-1]:.2%}",
-                "="*40
-            ]
-            # 原子化输出
-            with print_lock:
-                print('\n'.join(output))
-            
-            # 返回结果用于统一输出
-            return {
-                'symbol': symbol,
-                'name': stock_name,
-                'date': latest_date,
-                'price': latest_price,
-                'action': action,
-                'buy_score': latest_score['buy_score'],
-                'sell_pressure': latest_score['sell_pressure'],
-                'buy_threshold': buy_threshold,
-                'sell_threshold': sell_threshold,
-                'macd_momentum': latest_score['macd_momentum'],
-                'boll_score': latest_score['boll_score'],
-                'rsi_divergence': latest_score['rsi_divergence'],
-                'volume_score': latest_score['volume_score'],
-                'macro_score': latest_score['macro_score'],
-                'trend_decay': latest_score['trend_decay'],
-                'overbought': latest_score['overbought'],
-                'capital_outflow': latest_score['capital_outflow'],
-                'drawdown_pressure': latest_score['drawdown_pressure'],
-                'cum_returns': df['cum_returns'].iloc[-1]
-            }
-            
-        except Exception as e:
-            print(f"处理{symbol}时发生错误: {str(e)}")
-            return None
-
-    # 使用多线程加速（正确缩进）
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = [executor.submit(process_symbol, symbol) for symbol in symbols]
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                if result:
-                    all_results.append(result)
-            except KeyboardInterrupt:
-                print("用户手动中断，正在优雅关闭...")
-                sys.exit(1)
-            except Exception as e:
-                print(f"发生未知错误: {e}")
-                traceback.print_exc()
-    
+    # 1. I/O 阶段：并发获取数据；2. 计算阶段：多进程分块计算评分
+    runner = ScreenRunner(io_workers=8)
+    frames = runner.fetch(symbols, lambda symbol: fetch_stock_data(symbol, start_date, end_date))
+    context = {
+        'macro_data': DataCache.macro_data,
+        'names': code_name_dict,
+        'start_date': start_date,
+        'end_date': end_date
+    }
+
+    try:
+        ranked = runner.compute(frames, rank_chunk, context)
+    except KeyboardInterrupt:
+        print("用户手动中断，正在优雅关闭...")
+        sys.exit(1)
+
+    for result, output in ranked.values():
+        print('\n'.join(output))
+        all_results.append(result)
+
     # ========== 使用统一输出工具保存结果 ==========
     print("\n正在保存结果...")
     
@@ -7,10 +7,8 @@
 
 参考 quick_select.py，优先从缓存读取数据
 """
-import pickle
 import pandas as pd
 import numpy as np
-from pathlib import Path
 from datetime import datetime, timedelta
 import sys
 import os
@@ -21,6 +19,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.data_resilient import DataResilient
 from data.cache_manager import CacheManager
+from data.bar_store import BarStore
+from data.universe import Universe
+from utils.panel_indicators import PricePanel, PanelIndicators
+from utils.screen_runner import ScreenRunner
 
 
 # ========== 股票过滤配置 ==========
@@ -38,129 +40,36 @@ def normalize_symbol(symbol):
 
 def get_all_a_stocks():
     """
-    使用掘金SDK获取全A股列表，并过滤掉：
+    从全市场元数据获取全A股列表，并过滤掉：
     - 创业板（30xxxx）
     - 科创板（688xxx）
-    - ST股票
+    - 北交所
+    - ST、退市整理、暂停上市股票
     """
-    cache_key = 'all_a_stocks_filtered'
-
-    # 尝试从缓存加载
-    cached = CacheManager.load_macro_cache(cache_key)
-    if cached is not None:
-        # 标准化所有代码（兼容旧缓存格式）
-        normalized = [normalize_symbol(s) for s in cached]
-        print(f"✅ 从缓存加载 {len(normalized)} 只股票")
-        return normalized
-
-    try:
-        # 检查掘金SDK是否可用
-        try:
-            from gm.api import get_instruments
-        except ImportError:
-            raise ValueError("掘金SDK未安装，请先安装: pip install gm-python-sdk")
-
-        print("正在使用掘金SDK获取全A股列表...")
-
-        # 获取所有股票（sec_types=1 表示股票）
-        df = get_instruments(sec_types=1, df=True)
-
-        if df is None or df.empty:
-            raise ValueError("掘金SDK返回空数据")
-
-        # 确保列名存在
-        if 'symbol' not in df.columns:
-            raise ValueError("掘金SDK返回数据缺少symbol列")
-
-        # 提取股票代码（从 SHSE.600519 格式转换为 600519）
-        df['code'] = df['symbol'].apply(lambda x: x.split('.')[-1] if '.' in str(x) else str(x))
-
-        # 获取股票名称（如果有sec_name列）
-        if 'sec_name' in df.columns:
-            df['name'] = df['sec_name']
-        else:
-            df['name'] = ''
-
-        # 过滤条件
-        # 1. 过滤创业板（300xxx）和科创板（688xxx）
-        df = df[~df['code'].str.startswith('300')]
-        df = df[~df['code'].str.startswith('688')]
-        df = df[~df['code'].str.startswith('301')]  # 创业板注册制
-
-        # 2. 过滤ST股票（名称包含ST、*ST、S*ST等）
-        df = df[~df['name'].str.contains('ST|退|暂停', na=False)]
-
-        # 3. 只保留主板和中小板
-        # 上海主板：600xxx, 601xxx, 603xxx, 605xxx
-        # 深圳主板：000xxx, 001xxx
-        # 中小板：002xxx
-        valid_prefixes = ['600', '601', '603', '605', '000', '001', '002']
-        df = df[df['code'].str[:3].isin(valid_prefixes)]
-
-        # 返回纯代码列表（不带市场后缀，用于缓存文件匹配）
-        codes = df['code'].tolist()
-
-        # 保存代码-名称映射
-        code_name_dict = dict(zip(df['code'], df['name']))
-        CacheManager.save_macro_cache('stock_name_dict', code_name_dict)
+    # 只保留主板和中小板
+    codes = Universe.symbols(fmt='code', boards=('main', 'sme'), exclude_st=True, exclude_delisting=True)
 
+    if codes:
         print(f"✅ 获取到 {len(codes)} 只股票（已过滤创业板、科创板、ST股）")
+    else:
+        print("获取股票列表失败: 全市场元数据为空")
 
-        # 保存缓存
-        CacheManager.save_macro_cache(cache_key, codes)
-
-        return codes
-
-    except Exception as e:
-        print(f"获取股票列表失败: {e}")
-        return []
+    # 返回纯代码列表（不带市场后缀，用于缓存文件匹配）
+    return codes
 
 
 def get_stock_name_map():
     """获取股票代码-名称映射"""
-    cache_key = 'stock_name_dict'
-    cached = CacheManager.load_macro_cache(cache_key)
-    if cached is not None:
-        return cached
-    return {}
+    return Universe.names(fmt='code')
 
 
 def load_stock_from_cache(symbol):
     """
     从缓存加载股票数据
-    参考 quick_select.py 的实现方式
+    优先读取日线存储，其次读取合并存储（含旧版 pickle 缓存）
     """
-    cache_dir = Path("cache/stock")
-
     # 标准化代码（纯数字，用于缓存文件匹配）
-    code = normalize_symbol(symbol)
-
-    # 查找该股票的所有缓存文件
-    stock_files = []
-
-    for cache_file in cache_dir.glob(f"{code}_*.pkl"):
-        try:
-            parts = cache_file.stem.split('_')
-            if len(parts) >= 3:
-                start_date = parts[1]
-                end_date = parts[2]
-                stock_files.append((cache_file, start_date, end_date))
-        except Exception:
-            continue
-
-    if not stock_files:
-        return None
-
-    # 按结束日期排序，取最新的
-    stock_files.sort(key=lambda x: x[2], reverse=True)
-    latest_file, start_date, end_date = stock_files[0]
-
-    try:
-        with open(latest_file, 'rb') as f:
-            df = pickle.load(f)
-        return df
-    except Exception:
-        return None
+    return BarStore.read_cached(normalize_symbol(symbol))
 
 
 def fetch_stock_data_with_fallback(symbol, start_date, end_date):
@@ -207,7 +116,50 @@ def calculate_trend_indicators(df):
     return df
 
 
+def calculate_panel_trend_indicators(panel):
+    """面板版 calculate_trend_indicators：一次计算全部股票的均线与量比"""
+    close = panel['close']
+    volume = panel['volume']
+
+    indicators = {
+        'close': close,
+        'volume': volume,
+        'ma5': PanelIndicators.sma(close, 5),
+        'ma10': PanelIndicators.sma(close, 10),
+        'ma30': PanelIndicators.sma(close, 30),
+        'vol_ma5': PanelIndicators.sma(volume, 5),
+        'vol_ma10': PanelIndicators.sma(volume, 10),
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indicators['vol_ratio'] = volume / indicators['vol_ma5']
+
+    return indicators
+
+
+def screen_trend_chunk(frames, context=None):
+    """选股运行器的分块计算函数：{代码: DataFrame} -> {代码: 趋势判断结果}（只返回趋势股）"""
+    panel = PricePanel.from_frames(frames, fields=('close', 'volume'), max_bars=TREND_PANEL_BARS)
+    indicators = calculate_panel_trend_indicators(panel)
+    latest = panel.latest(indicators)
+    prev = panel.latest(indicators, offset=1)
+    close_5ago = panel.latest({'close': indicators['close']}, offset=4)['close']
+    latest_dates = panel.last_dates
+
+    results = {}
+    for j, symbol in enumerate(panel.symbols):
+        result = evaluate_trend(latest.iloc[j], prev.iloc[j], close_5ago.iloc[j])
+        if result['is_trend']:
+            result['latest_date'] = latest_dates[j].strftime('%Y-%m-%d')
+            results[symbol] = result
+    return results
+
+
 # ========== 趋势判断模块 ==========
+# 判断趋势至少需要的K线数；面板只保留最近 TREND_PANEL_BARS 根（均线最长30日）
+TREND_MIN_BARS = 35
+TREND_PANEL_BARS = 60
+
+
 def check_trend_stock(df):
     """
     判断是否为趋势股
@@ -222,12 +174,21 @@ def check_trend_stock(df):
         'details': dict
     }
     """
-    if df is None or len(df) < 35:
+    if df is None or len(df) < TREND_MIN_BARS:
         return {'is_trend': False, 'trend_score': 0, 'details': {'reason': '数据不足'}}
 
-    latest = df.iloc[-1]
-    prev = df.iloc[-2]
+    return evaluate_trend(df.iloc[-1], df.iloc[-2], df.iloc[-5]['close'])
+
 
+def evaluate_trend(latest, prev, close_5ago):
+    """
+    根据最新、前一根K线的指标值判断趋势股（check_trend_stock 与面板筛选共用）
+
+    参数:
+        latest: 最新一根K线的指标（Series）
+        prev: 前一根K线的指标（Series）
+        close_5ago: 倒数第5根K线的收盘价
+    """
     # 获取最新均线值
     ma5 = latest['ma5']
     ma10 = latest['ma10']
@@ -287,7 +248,7 @@ def check_trend_stock(df):
     ma_spread = (ma5 - ma30) / ma30 if ma30 > 0 else 0  # MA5与MA30的间距
 
     # 计算近期涨幅（5日）
-    recent_return = (price - df.iloc[-5]['close']) / df.iloc[-5]['close'] if len(df) >= 5 else 0
+    recent_return = (price - close_5ago) / close_5ago
 
     # 成交量得分（0-15分）
     # 量比越大，得分越高
@@ -334,12 +295,13 @@ def check_trend_stock(df):
 
 
 # ========== 处理单只股票 ==========
-def process_single_stock(symbol, name_map, start_date, end_date):
-    """处理单只股票"""
+def process_single_stock(symbol, name_map, start_date, end_date, df=None):
+    """处理单只股票（df 为预先批量获取的数据，未提供时逐只获取）"""
     stock_name = name_map.get(symbol, "")
 
     try:
-        df = fetch_stock_data_with_fallback(symbol, start_date, end_date)
+        if df is None:
+            df = fetch_stock_data_with_fallback(symbol, start_date, end_date)
         if df is None or df.empty:
             return None
 
@@ -382,17 +344,18 @@ def main():
                         help='回测天数 (默认: 90)')
     parser.add_argument('-r', '--refresh', action='store_true',
                         help='刷新股票列表缓存')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='计算进程数 (默认: CPU核数，1为单进程)')
 
     args = parser.parse_args()
 
     # 初始化缓存管理器
     CacheManager.initialize()
 
-    # 如果需要刷新缓存，先删除
+    # 如果需要刷新缓存，重新加载当日全市场元数据
     if args.refresh:
         print("正在刷新股票列表缓存...")
-        CacheManager.clear_macro_cache('all_a_stocks_filtered')
-        CacheManager.clear_macro_cache('stock_name_dict')
+        Universe.get(refresh=True)
 
     print("=" * 60)
     print("趋势股筛选系统")
@@ -417,22 +380,46 @@ def main():
 
     # 串行处理股票（避免过多并发请求）
     results = []
-    failed_count = 0
     total = len(symbols)
 
     print(f"开始分析 {total} 只股票...")
     print()
 
+    # 缓存中没有的股票先批量获取，其余从合并存储读取最近K线
+    packed = BarStore.pack()
+    cached_codes = set(packed.symbols) if packed is not None else set()
+    missing_codes = [normalize_symbol(s) for s in symbols if normalize_symbol(s) not in cached_codes]
+    prefetched = DataResilient.fetch_many(missing_codes, start_date, end_date) if missing_codes else {}
+
+    frames = {}
     for idx, symbol in enumerate(symbols, 1):
         # 进度显示
         if idx % 50 == 0 or idx == total:
-            print(f"进度: {idx}/{total} ({idx/total*100:.1f}%) - 找到趋势股: {len(results)} 只")
-
-        result = process_single_stock(symbol, name_map, start_date, end_date)
-        if result:
-            results.append(result)
-        else:
-            failed_count += 1
+            print(f"加载进度: {idx}/{total} ({idx/total*100:.1f}%)")
+
+        code = normalize_symbol(symbol)
+        df = prefetched.get(code)
+        if df is None and code in cached_codes:
+            df = packed.read(code, TREND_PANEL_BARS)
+        if df is None:
+            df = fetch_stock_data_with_fallback(symbol, start_date, end_date)
+        if df is not None and len(df) >= TREND_MIN_BARS:
+            frames[symbol] = df.iloc[-TREND_PANEL_BARS:]
+
+    # 面板计算指标（多进程分块）
+    trend_results = ScreenRunner(max_workers=args.workers, fields=('close', 'volume')).compute(
+        frames, screen_trend_chunk)
+
+    for symbol, result in trend_results.items():
+        results.append({
+            'symbol': symbol,
+            'name': name_map.get(symbol, ""),
+            'trend_score': result['trend_score'],
+            'details': result['details'],
+            'latest_date': result['latest_date']
+        })
+
+    failed_count = total - len(results)
 
     # 按趋势强度评分排序
     sorted_results = sorted(results, key=lambda x: x['trend_score'], reverse=True)
@@ -39,6 +39,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.data_resilient import DataResilient
 from data.cache_manager import CacheManager
+from data.universe import Universe
+from utils.panel_indicators import PricePanel, PanelIndicators
+from utils.exit_simulator import ForwardPanel, simulate_exits
+from utils.screen_runner import ScreenRunner
 from utils.strategy_output import StrategyOutputManager, StrategyMetadata, StockData
 from strategy_tracker.db.repository import get_repository
 from gm.api import *
@@ -94,51 +98,25 @@ def get_all_a_stocks(trade_date=None):
     if trade_date is None:
         trade_date = datetime.now().strftime('%Y-%m-%d')
 
-    trade_date_ts = pd.Timestamp(trade_date)
-
     print(f"获取全A股股票列表（日期: {trade_date}）...")
 
-    # 使用掘金SDK获取A股股票
-    try:
-        stocks_info = get_symbols(
-            sec_type1=1010,  # 股票
-            sec_type2=101001,  # A股
-            skip_suspended=True,  # 剔除停牌
-            skip_st=True,  # 剔除ST
-            trade_date=trade_date,
-            df=True
-        )
-
-        if stocks_info.empty:
-            print("未获取到股票列表")
-            return []
-
-        # 处理日期字段
-        stocks_info['listed_date'] = stocks_info['listed_date'].apply(
-            lambda x: x.replace(tzinfo=None) if hasattr(x, 'tzinfo') else x
-        )
-        stocks_info['delisted_date'] = stocks_info['delisted_date'].apply(
-            lambda x: x.replace(tzinfo=None) if hasattr(x, 'tzinfo') else x
-        )
-
-        # 剔除次新股和退市股
-        cutoff_date = trade_date_ts - pd.Timedelta(days=StrategyConfig.MIN_LISTING_DAYS)
-        stocks_info = stocks_info[
-            (stocks_info['listed_date'] <= cutoff_date) &
-            (stocks_info['delisted_date'] > trade_date_ts)
-        ]
-
-        all_stocks = list(stocks_info['symbol'])
-
-        print(f"可选股票池数量: {len(all_stocks)} "
-              f"(剔除次新股<{StrategyConfig.MIN_LISTING_DAYS}天, 停牌, ST)")
-
-        return all_stocks
+    all_stocks = Universe.symbols(
+        fmt='gm',
+        trade_date=trade_date,
+        exclude_st=True,  # 剔除ST
+        exclude_suspended=True,  # 剔除停牌
+        min_listing_days=StrategyConfig.MIN_LISTING_DAYS  # 剔除次新股和退市股
+    )
 
-    except Exception as e:
-        print(f"获取股票列表失败: {e}")
+    if not all_stocks:
+        print("未获取到股票列表")
         return []
 
+    print(f"可选股票池数量: {len(all_stocks)} "
+          f"(剔除次新股<{StrategyConfig.MIN_LISTING_DAYS}天, 停牌, ST)")
+
+    return all_stocks
+
 
 # ========== 因子计算模块 ==========
 class FactorCalculator:
@@ -196,6 +174,64 @@ class FactorCalculator:
 
         return df.dropna()
 
+    @staticmethod
+    def calculate_panel_factors(panel):
+        """
+        面板版 calculate_all_factors：一次计算全部股票的因子
+
+        与逐只计算后 dropna 的口径一致：取每只股票最后一个所有因子都有效的交易日，
+        数据不足 MA_PERIOD 或有效交易日少于2天的股票不返回
+
+        参数:
+            panel: PricePanel（含 OHLCV）
+
+        返回:
+            以股票代码为索引的最新因子 DataFrame（含 date 列）
+        """
+        close = panel['close']
+        high = panel['high']
+        low = panel['low']
+        volume = panel['volume']
+
+        # talib.SMA 在K线中间出现缺失值后全部为 NaN
+        talib_valid = PanelIndicators.talib_valid(close)
+        ma60 = np.where(talib_valid, PanelIndicators.sma(close, 60), np.nan)
+        volume_ma5 = PanelIndicators.sma(volume, 5)
+        volume_ma20 = PanelIndicators.sma(volume, 20)
+        volume_ma60 = PanelIndicators.sma(volume, 60)
+        high250 = PanelIndicators.rolling_max(high, 250)
+        high120 = PanelIndicators.rolling_max(high, 120)
+        low120 = PanelIndicators.rolling_min(low, 120)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = {
+                'close': close,
+                'amplitude120': (high120 - low120) / low120,
+                'price_position_factor': close / high250,
+                'volume_expansion_factor': volume_ma5 / (volume_ma20 * StrategyConfig.VOLUME_EXPANSION_RATIO),
+                'volume_trend_factor': volume_ma20 / (volume_ma60 * StrategyConfig.VOLUME_TREND_RATIO),
+                'trend_factor': close / ma60,
+            }
+
+        # dropna 口径：原始字段与所有中间指标都不为空的交易日
+        required = [panel['open'], high, low, volume, PanelIndicators.sma(close, 20),
+                    PanelIndicators.sma(close, 120), *factors.values()]
+        complete = np.logical_and.reduce([~np.isnan(arr) for arr in required]) & talib_valid
+
+        t = len(complete)
+        if t == 0:
+            return pd.DataFrame()
+
+        valid = (complete.sum(axis=0) >= 2) & (panel.lengths >= StrategyConfig.MA_PERIOD)
+        last_row = t - 1 - np.argmax(complete[::-1], axis=0)
+        columns = np.arange(len(panel))
+
+        latest = pd.DataFrame({name: arr[last_row, columns] for name, arr in factors.items()},
+                              index=pd.Index(panel.symbols, name='symbol'))
+        latest['date'] = pd.DatetimeIndex(panel.dates[last_row, columns])
+
+        return latest[valid]
+
     @staticmethod
     def calculate_stock_score(df, market_cap=None):
         """
@@ -211,8 +247,21 @@ class FactorCalculator:
         if df is None or len(df) < 2:
             return 0
 
-        latest = df.iloc[-1]
+        return FactorCalculator.score_latest(df.iloc[-1], market_cap)
+
+    @staticmethod
+    def score_latest(latest, market_cap=None):
+        """
+        根据最新一个交易日的因子计算综合得分
+
+        参数:
+            latest: 最新因子（Series，需含 price_position_factor / amplitude120 /
+                    volume_expansion_factor / volume_trend_factor / trend_factor）
+            market_cap: 总市值（亿元），可选
 
+        返回:
+            (得分, 原因)
+        """
         score = 0
         reasons = []
 
@@ -268,6 +317,25 @@ class FactorCalculator:
         return min(100, score), " + ".join(reasons)
 
 
+def score_factor_chunk(frames, context=None):
+    """选股运行器的分块计算函数：{代码: DataFrame} -> {代码: 因子得分}（不满足数据要求的股票不返回）"""
+    latest_factors = FactorCalculator.calculate_panel_factors(PricePanel.from_frames(frames))
+
+    results = {}
+    for code, latest in latest_factors.iterrows():
+        score, reason = FactorCalculator.score_latest(latest)
+        results[code] = {
+            'score': score,
+            'reason': reason,
+            'price': latest['close'],
+            'date': latest['date'].strftime('%Y-%m-%d'),
+            'volume_expansion': latest['volume_expansion_factor'],
+            'price_position': latest['price_position_factor'],
+            'trend_factor': latest['trend_factor']
+        }
+    return results
+
+
 # ========== 股票筛选模块 ==========
 def screen_volume_breakout_stocks(stock_pool, end_date=None):
     """
@@ -291,51 +359,26 @@ def screen_volume_breakout_stocks(stock_pool, end_date=None):
 
     print(f"\n开始筛选 {total} 只股票...")
 
-    for idx, symbol in enumerate(stock_pool, 1):
-        # 进度显示
-        if idx % 100 == 0 or idx == total:
-            print(f"进度: {idx}/{total} ({idx/total*100:.1f}%)")
-
-        try:
-            # 获取历史数据
-            df = DataResilient.fetch_stock_data(
-                symbol=symbol.replace('SHSE.', '').replace('SZSE.', ''),
-                start_date=start_date.replace('-', ''),
-                end_date=end_date.replace('-', ''),
-                use_cache=True
-            )
-
-            if df is None or df.empty or len(df) < StrategyConfig.MA_PERIOD:
-                failed_count += 1
-                continue
-
-            # 计算所有因子
-            df = FactorCalculator.calculate_all_factors(df)
-
-            if df is None or df.empty:
-                failed_count += 1
-                continue
-
-            # 计算得分
-            score, reason = FactorCalculator.calculate_stock_score(df)
-
-            if score > 0:
-                latest = df.iloc[-1]
-                results.append({
-                    'symbol': symbol,
-                    'score': score,
-                    'reason': reason,
-                    'price': latest['close'],
-                    'date': df.index[-1].strftime('%Y-%m-%d'),
-                    'volume_expansion': latest['volume_expansion_factor'],
-                    'price_position': latest['price_position_factor'],
-                    'trend_factor': latest['trend_factor']
-                })
-
-        except Exception as e:
+    # 批量获取历史数据
+    stock_frames = DataResilient.fetch_many(
+        [symbol.replace('SHSE.', '').replace('SZSE.', '') for symbol in stock_pool],
+        start_date=start_date.replace('-', ''),
+        end_date=end_date.replace('-', ''),
+        use_cache=True
+    )
+
+    # 面板计算因子与得分（多进程分块）
+    scored = ScreenRunner().compute(stock_frames, score_factor_chunk)
+
+    for symbol in stock_pool:
+        code = symbol.replace('SHSE.', '').replace('SZSE.', '')
+        if code not in scored:
             failed_count += 1
             continue
 
+        if scored[code]['score'] > 0:
+            results.append({'symbol': symbol, **scored[code]})
+
     print(f"\n筛选完成: 成功 {total - failed_count}, 失败 {failed_count}")
 
     # 按得分排序
@@ -365,83 +408,39 @@ def backtest_strategy(stock_list, end_date=None):
 
     print(f"\n开始回测 {len(stock_list)} 只股票...")
 
-    backtest_results = []
-
-    for stock in stock_list:
-        symbol = stock['symbol']
-        buy_price = stock['price']
-        buy_date = stock['date']
-
-        # 获取后续数据用于回测
-        start_date = (pd.Timestamp(buy_date) + pd.Timedelta(days=1)).strftime('%Y%m%d')
-        forecast_end = (pd.Timestamp(buy_date) + pd.Timedelta(days=StrategyConfig.HOLDING_DAYS)).strftime('%Y%m%d')
-
-        try:
-            future_df = DataResilient.fetch_stock_data(
-                symbol=symbol.replace('SHSE.', '').replace('SZSE.', ''),
-                start_date=start_date,
-                end_date=forecast_end,
-                use_cache=True
-            )
-
-            if future_df is None or future_df.empty:
-                continue
-
-            # 模拟持有期间的收益
-            max_price = buy_price
-            min_price = buy_price
-            final_price = buy_price
-            exit_days = StrategyConfig.HOLDING_DAYS
-            exit_reason = "到期"
-
-            for i, (idx, row) in enumerate(future_df.iterrows()):
-                current_price = row['close']
-
-                # 更新最高价和最低价
-                max_price = max(max_price, current_price)
-                min_price = min(min_price, current_price)
-
-                # 检查止盈
-                profit_pct = (current_price - buy_price) / buy_price
-                if profit_pct >= StrategyConfig.TAKE_PROFIT_PCT:
-                    final_price = current_price
-                    exit_days = i + 1
-                    exit_reason = "止盈"
-                    break
-
-                # 检查止损
-                if profit_pct <= StrategyConfig.STOP_LOSS_PCT:
-                    final_price = current_price
-                    exit_days = i + 1
-                    exit_reason = "止损"
-                    break
-
-                final_price = current_price
-
-            # 计算收益率
-            total_return = (final_price - buy_price) / buy_price
-
-            backtest_results.append({
-                'symbol': symbol,
-                'buy_price': buy_price,
-                'final_price': final_price,
-                'total_return': total_return,
-                'exit_days': exit_days,
-                'exit_reason': exit_reason,
-                'max_price': max_price,
-                'min_price': min_price,
-                'max_drawdown': (min_price - buy_price) / buy_price
-            })
-
-        except Exception as e:
-            continue
-
-    if not backtest_results:
+    # 所有入选股票的后续数据一次批量获取，再对齐成前向价格面板整体模拟离场
+    holding_days = StrategyConfig.HOLDING_DAYS
+    entries = [(stock['symbol'].replace('SHSE.', '').replace('SZSE.', ''), stock['date'], stock['price'])
+               for stock in stock_list]
+    buy_days = [pd.Timestamp(entry[1]) for entry in entries]
+    start_date = (min(buy_days) + pd.Timedelta(days=1)).strftime('%Y%m%d')
+    forecast_end = (max(buy_days) + pd.Timedelta(days=holding_days)).strftime('%Y%m%d')
+
+    frames = DataResilient.fetch_many([entry[0] for entry in entries], start_date, forecast_end, use_cache=True)
+    panel = ForwardPanel.from_frames(frames, entries, horizon=holding_days, max_calendar_days=holding_days)
+    exits = simulate_exits(panel,
+                           take_profit=StrategyConfig.TAKE_PROFIT_PCT,
+                           stop_loss=StrategyConfig.STOP_LOSS_PCT)
+
+    valid = exits['exit_price'].notna().to_numpy()
+    if not valid.any():
         print("回测失败：没有有效数据")
         return None
 
-    # 转换为 DataFrame
-    results_df = pd.DataFrame(backtest_results)
+    exits = exits[valid]
+    buy_prices = exits['entry_price'].to_numpy()
+    results_df = pd.DataFrame({
+        'symbol': [stock['symbol'] for stock, ok in zip(stock_list, valid) if ok],
+        'buy_price': buy_prices,
+        'final_price': exits['exit_price'].to_numpy(),
+        'total_return': exits['exit_return'].to_numpy(),
+        # 到期离场按完整持有期计
+        'exit_days': np.where(exits['exit_reason'] == '到期', holding_days, exits['exit_days']),
+        'exit_reason': exits['exit_reason'].to_numpy(),
+        'max_price': buy_prices * (1 + exits['mfe'].to_numpy()),
+        'min_price': buy_prices * (1 + exits['mae'].to_numpy()),
+        'max_drawdown': exits['mae'].to_numpy(),
+    })
 
     # 计算汇总指标
     total_trades = len(results_df)
@@ -518,7 +517,7 @@ def generate_report(screening_results, backtest_df=None):
 
         output_mgr.add_stock(StockData(
             stock_code=stock_code,
-            stock_name="",  # 这个策略没有获取股票名称
+            stock_name=Universe.name(stock['symbol']),
             screen_price=stock['price'],
             score=stock['score'],
             reason=stock['reason'],
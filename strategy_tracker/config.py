@@ -35,6 +35,39 @@ DB_CONFIG = {
     'charset': 'utf8mb4',
 }
 
+# SQLite 性能配置（通过连接事件对每个新连接执行 PRAGMA）
+# default: SQLite 默认设置；performance: WAL + synchronous=NORMAL + mmap + 大页缓存
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',       # 读写并发：筛选写入时跟踪程序仍可读取
+        'synchronous': 'NORMAL',     # WAL 模式下只在检查点时 fsync
+        'busy_timeout': 30000,       # 锁等待（毫秒）
+        'mmap_size': 268435456,      # 内存映射 256MB
+        'cache_size': -65536,        # 页缓存 64MB（负数单位为 KB）
+        'temp_store': 'MEMORY',      # 临时表/排序在内存中进行
+    },
+}
+
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'performance')
+
+# 批量写入超过该行数后执行 PRAGMA optimize（更新查询计划统计信息），0 表示不执行
+SQLITE_OPTIMIZE_MIN_ROWS = int(os.getenv('SQLITE_OPTIMIZE_MIN_ROWS', 1000))
+
+
+def get_sqlite_pragmas(profile: str = None) -> dict:
+    """获取 SQLite PRAGMA 配置（环境变量 SQLITE_<PRAGMA> 可覆盖单项）"""
+    profile = profile or SQLITE_PROFILE
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"不支持的 SQLite 配置: {profile}")
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES['performance']:
+        value = os.getenv(f'SQLITE_{name.upper()}')
+        if value:
+            pragmas[name] = value
+    return pragmas
+
 # 数据库连接URL构建
 def get_database_url():
     """获取SQLAlchemy数据库连接URL"""
@@ -81,9 +114,15 @@ STRATEGY_TYPES = {
 # 持仓周期（天）
 HOLDING_PERIODS = [5, 10, 20]
 
+# 检查日之后仍取不到收盘价的重试期限（交易日），超过后写入失败记录不再重试（停牌、退市等）
+PRICE_RETRY_DAYS = 5
+
 # 基准指数
 BENCHMARK_INDEX = '000300'  # 沪深300
 
+# 本地交易日历文件（基准数据与掘金SDK都不可用时使用，每行一个日期）
+TRADING_CALENDAR_FILE = Path(os.getenv('TRADING_CALENDAR_FILE', str(DATA_DIR / 'trading_calendar.txt')))
+
 # 日期格式
 DATE_FORMAT = '%Y-%m-%d'
 DATE_FORMAT_COMPACT = '%Y%m%d'
@@ -6,7 +6,8 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
 import pandas as pd
 
 # 添加项目根目录到Python路径
@@ -15,8 +16,11 @@ sys.path.insert(0, str(project_root))
 
 from strategy_tracker.db.repository import get_repository
 from strategy_tracker.db.models import StockPosition, ReturnRecord
-from strategy_tracker.data.collector import DataCollector, BenchmarkCollector
-from strategy_tracker.config import HOLDING_PERIODS
+from strategy_tracker.data.collector import (
+    DataCollector, BenchmarkCollector, load_stock_from_cache, normalize_symbol
+)
+from strategy_tracker.data.benchmark_series import get_benchmark_series
+from strategy_tracker.config import HOLDING_PERIODS, DATE_FORMAT_COMPACT, PRICE_RETRY_DAYS
 
 
 class ReturnCalculator:
@@ -138,9 +142,16 @@ class ReturnCalculator:
             holding_days: 持仓天数
 
         Returns:
-            检查日期
+            检查日期，尚未到达（晚于今天或超出日历范围）时返回None
         """
-        return self.data_collector.get_nth_trading_day(screen_date, holding_days)
+        calendar = self.data_collector.calendar
+        if calendar.empty:
+            return self.data_collector.get_nth_trading_day(screen_date, holding_days)
+
+        check_date = calendar.nth_after(screen_date, holding_days)
+        if check_date is None or check_date > datetime.now():
+            return None
+        return check_date
 
     def calculate_and_store(
         self,
@@ -204,8 +215,14 @@ class ReturnCalculator:
         if check_date is None:
             check_date = datetime.now()
 
+        # 有交易日历时走批量流程
+        if not self.data_collector.calendar.empty:
+            return self.calculate_batch([holding_days], check_date, force_update)[holding_days]
+
         # 获取需要更新的持仓
-        positions = self.repository.get_positions_need_update(holding_days, check_date)
+        positions = self.repository.get_positions_need_update(
+            holding_days, check_date, include_existing=force_update
+        )
 
         if not positions:
             print(f"没有需要计算 {holding_days} 天收益的持仓")
@@ -244,6 +261,9 @@ class ReturnCalculator:
         Returns:
             各持仓周期的统计信息
         """
+        if not self.data_collector.calendar.empty:
+            return self.calculate_batch(HOLDING_PERIODS, check_date, force_update)
+
         all_stats = {}
 
         for holding_days in HOLDING_PERIODS:
@@ -253,6 +273,229 @@ class ReturnCalculator:
 
         return all_stats
 
+    # ========== 批量计算 ==========
+
+    def calculate_batch(
+        self,
+        holding_periods: Optional[List[int]] = None,
+        check_date: Optional[datetime] = None,
+        force_update: bool = False,
+        page_size: Optional[int] = None
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        批量计算收益
+        1. 取出所有持仓周期的待计算持仓，按交易日历批量计算检查日期（第n个交易日），
+           检查日期晚于 check_date 的持仓尚未到期，跳过
+        2. 按股票分组，每只股票的价格序列只加载一次（缓存不足的股票批量下载）
+        3. 收盘价、收益率、基准收益率、超额收益均为数组运算
+        4. 收益记录在一个事务中批量 upsert
+
+        Args:
+            holding_periods: 持仓周期列表，默认 HOLDING_PERIODS
+            check_date: 截止日期，默认今天
+            force_update: 是否强制更新已存在的记录
+            page_size: 分页大小，指定时逐页读取、计算并写入（内存占用有界），默认一次处理全部
+
+        Returns:
+            各持仓周期的统计信息 {holding_days: {'total', 'success', 'failed', 'pending'}}
+        """
+        holding_periods = list(holding_periods or HOLDING_PERIODS)
+        if check_date is None:
+            check_date = datetime.now()
+
+        all_stats = {
+            holding_days: {'total': 0, 'success': 0, 'failed': 0, 'pending': 0}
+            for holding_days in holding_periods
+        }
+
+        if page_size:
+            pages = (
+                (holding_days, page)
+                for holding_days in holding_periods
+                for page in self.repository.iter_positions_need_update(
+                    holding_days, check_date, page_size, include_existing=force_update
+                )
+            )
+        else:
+            pages = (
+                (holding_days, self.repository.get_positions_need_update(
+                    holding_days, check_date, include_existing=force_update
+                ))
+                for holding_days in holding_periods
+            )
+
+        # 1. 待计算任务与检查日期
+        frames = []
+        for holding_days, positions in pages:
+            frame = self._build_tasks(positions, holding_days, check_date, all_stats[holding_days])
+            if page_size:
+                self._calculate_tasks(frame, check_date, all_stats)
+            else:
+                frames.append(frame)
+
+        if not page_size:
+            self._calculate_tasks(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(),
+                                  check_date, all_stats)
+
+        for holding_days, stats in all_stats.items():
+            print(f"{holding_days} 天: 成功 {stats['success']}, 失败 {stats['failed']}, 未到期 {stats['pending']}")
+
+        return all_stats
+
+    def _build_tasks(
+        self,
+        positions: List[Dict[str, Any]],
+        holding_days: int,
+        check_date: datetime,
+        stats: Dict[str, int]
+    ) -> pd.DataFrame:
+        """持仓转换为计算任务表（只保留已到期的），并累计 total / pending"""
+        stats['total'] += len(positions)
+        if not positions:
+            return pd.DataFrame()
+
+        frame = pd.DataFrame({
+            'position_id': [p['id'] for p in positions],
+            'stock_code': [p['stock_code'] for p in positions],
+            'screen_day': np.array([np.datetime64(p['screen_date'].date(), 'D') for p in positions]),
+            'screen_price': [p['screen_price'] if p['screen_price'] is not None else np.nan for p in positions],
+        })
+        frame['holding_days'] = holding_days
+        frame['check_day'] = self.data_collector.calendar.nth_after_many(frame['screen_day'].values, holding_days)
+
+        check_days = frame['check_day'].values
+        matured = ~np.isnat(check_days) & (check_days <= np.datetime64(check_date.date(), 'D'))
+        stats['pending'] += int((~matured).sum())
+        return frame[matured]
+
+    def _calculate_tasks(self, tasks: pd.DataFrame, check_date: datetime,
+                         all_stats: Dict[int, Dict[str, int]]):
+        """计算一批任务的收益并批量写入，累计 success / failed"""
+        if tasks.empty:
+            return
+
+        print(f"开始批量计算 {len(tasks)} 条收益 ({tasks['stock_code'].nunique()} 只股票)...")
+
+        screen_days = tasks['screen_day'].values.astype('datetime64[D]')
+        check_days = tasks['check_day'].values.astype('datetime64[D]')
+
+        # 2. 收盘价：每只股票加载一次
+        close_prices = self._lookup_close_prices(tasks['stock_code'].values, screen_days, check_days)
+
+        # 3. 收益率、基准收益率、超额收益
+        screen_prices = tasks['screen_price'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_rates = np.where(screen_prices > 0, (close_prices - screen_prices) / screen_prices * 100, np.nan)
+        benchmark_returns = get_benchmark_series().returns_between_many(screen_days, check_days)
+        excess_returns = return_rates - benchmark_returns
+
+        # 4. 批量写入（价格缺失的保持待计算，下次重试；检查日已过去 PRICE_RETRY_DAYS 个交易日的写入失败记录）
+        found = ~np.isnan(close_prices)
+        retry_until = self.data_collector.calendar.nth_after_many(check_days, PRICE_RETRY_DAYS)
+        expired = ~found & ~np.isnat(retry_until) & (retry_until <= np.datetime64(check_date.date(), 'D'))
+        records = []
+        for i in np.flatnonzero(found):
+            records.append({
+                'position_id': int(tasks['position_id'].iat[i]),
+                'holding_days': int(tasks['holding_days'].iat[i]),
+                'check_date': pd.Timestamp(check_days[i]).to_pydatetime(),
+                'close_price': float(close_prices[i]),
+                'return_rate': self._optional(return_rates[i]),
+                'benchmark_return': self._optional(benchmark_returns[i]),
+                'excess_return': self._optional(excess_returns[i]),
+                'is_trading_day': True,
+                'notes': None
+            })
+        for i in np.flatnonzero(expired):
+            records.append({
+                'position_id': int(tasks['position_id'].iat[i]),
+                'holding_days': int(tasks['holding_days'].iat[i]),
+                'check_date': pd.Timestamp(check_days[i]).to_pydatetime(),
+                'close_price': None,
+                'return_rate': None,
+                'benchmark_return': None,
+                'excess_return': None,
+                'is_trading_day': False,
+                'notes': '无法获取价格数据'
+            })
+
+        written = self.repository.bulk_upsert_return_records(records)
+
+        holding_column = tasks['holding_days'].values
+        for holding_days, stats in all_stats.items():
+            in_period = holding_column == holding_days
+            if written:
+                stats['success'] += int((found & in_period).sum())
+            stats['failed'] += int((~found & in_period).sum())
+
+    def _lookup_close_prices(
+        self,
+        codes: np.ndarray,
+        screen_days: np.ndarray,
+        check_days: np.ndarray
+    ) -> np.ndarray:
+        """
+        查找每个任务在 [筛选日, 检查日] 内最后一个交易日的收盘价
+        优先使用本地缓存（需覆盖到检查日），不足的股票通过 DataResilient 批量下载
+
+        Returns:
+            收盘价数组，找不到的为 NaN
+        """
+        prices = np.full(len(codes), np.nan)
+        groups = pd.Series(np.arange(len(codes))).groupby(codes).indices
+
+        missing = {}
+        for code, idx in groups.items():
+            series = self._price_series(load_stock_from_cache(code))
+            if series is not None:
+                prices[idx] = self._close_on(series, screen_days[idx], check_days[idx])
+            # 缓存未覆盖到检查日的重新下载（下载失败时保留缓存中的价格）
+            if series is None or series[0][-1] < check_days[idx].max() or np.isnan(prices[idx]).any():
+                missing[code] = idx
+
+        if missing:
+            start = min(screen_days[idx].min() for idx in missing.values())
+            end = max(check_days[idx].max() for idx in missing.values())
+            print(f"下载 {len(missing)} 只股票的价格数据...")
+            frames = self.data_collector.data_resilient.fetch_many(
+                [normalize_symbol(code) for code in missing],
+                pd.Timestamp(start).strftime(DATE_FORMAT_COMPACT),
+                pd.Timestamp(end).strftime(DATE_FORMAT_COMPACT)
+            )
+            for code, idx in missing.items():
+                series = self._price_series(frames.get(normalize_symbol(code)))
+                if series is not None:
+                    fetched = self._close_on(series, screen_days[idx], check_days[idx])
+                    prices[idx] = np.where(np.isnan(fetched), prices[idx], fetched)
+
+        return prices
+
+    def _price_series(self, df: Optional[pd.DataFrame]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """DataFrame 转换为 (日期 datetime64[D], 收盘价) 数组"""
+        if df is None or df.empty:
+            return None
+        df = self.data_collector._standardize_dataframe(df)
+        if 'close' not in df.columns or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+        df = df.sort_index()
+        return df.index.values.astype('datetime64[D]'), df['close'].to_numpy(dtype=float)
+
+    @staticmethod
+    def _close_on(
+        series: Tuple[np.ndarray, np.ndarray],
+        start_days: np.ndarray,
+        end_days: np.ndarray
+    ) -> np.ndarray:
+        """[start, end] 内最后一根K线的收盘价（不存在时为 NaN）"""
+        dates, closes = series
+        pos = np.searchsorted(dates, end_days, side='right') - 1
+        valid = (pos >= 0) & (dates[np.clip(pos, 0, None)] >= start_days)
+        return np.where(valid, closes[np.clip(pos, 0, None)], np.nan)
+
+    @staticmethod
+    def _optional(value: float) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
     def update_pending_returns(self, check_date: Optional[datetime] = None) -> Dict[str, Any]:
         """
         更新所有待计算的收益记录
@@ -272,12 +515,14 @@ class ReturnCalculator:
         print(f"检查日期: {check_date.strftime('%Y-%m-%d')}")
         print()
 
-        all_stats = {}
-
-        for holding_days in HOLDING_PERIODS:
-            print(f"\n--- {holding_days} 天持仓 ---")
-            stats = self.calculate_all_positions(holding_days, check_date, force_update=False)
-            all_stats[holding_days] = stats
+        if not self.data_collector.calendar.empty:
+            all_stats = self.calculate_batch(HOLDING_PERIODS, check_date, force_update=False)
+        else:
+            all_stats = {}
+            for holding_days in HOLDING_PERIODS:
+                print(f"\n--- {holding_days} 天持仓 ---")
+                stats = self.calculate_all_positions(holding_days, check_date, force_update=False)
+                all_stats[holding_days] = stats
 
         # 汇总统计
         total_success = sum(s['success'] for s in all_stats.values())
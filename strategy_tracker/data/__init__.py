@@ -12,6 +12,8 @@ from .parser import (
     get_strategy_from_filename
 )
 from .collector import DataCollector, BenchmarkCollector, DbDataSource
+from .trading_calendar import TradingCalendar, get_trading_calendar, reset_trading_calendar
+from .benchmark_series import BenchmarkSeries, get_benchmark_series, reset_benchmark_series
 
 __all__ = [
     'BaseParser',
@@ -25,4 +27,10 @@ __all__ = [
     'DataCollector',
     'BenchmarkCollector',
     'DbDataSource',
+    'TradingCalendar',
+    'get_trading_calendar',
+    'reset_trading_calendar',
+    'BenchmarkSeries',
+    'get_benchmark_series',
+    'reset_benchmark_series',
 ]
@@ -0,0 +1,201 @@
+"""
+基准指数收盘价序列
+一次性加载沪深300收盘价（基准指数缓存或基准数据表）到按日期排序的数组，
+并预先计算累计对数收益，任意区间的基准收益率只需一次二分查找和一次减法
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from strategy_tracker.config import BENCHMARK_INDEX
+from strategy_tracker.data.trading_calendar import DateLike, _to_day
+
+
+class BenchmarkSeries:
+    """基准收盘价序列 - 排序的 datetime64[D] 日期 + 累计对数收益"""
+
+    def __init__(self, dates: Iterable[DateLike] = (), closes: Iterable[float] = (), source: str = 'empty'):
+        """
+        初始化基准序列
+
+        Args:
+            dates: 交易日列表（无需排序，重复日期取最后一个）
+            closes: 对应的收盘价（缺失或非正的价格会被丢弃）
+            source: 数据来源描述
+        """
+        frame = pd.DataFrame({
+            'day': np.array([_to_day(d) for d in dates], dtype='datetime64[D]'),
+            'close': np.asarray(list(closes), dtype=float)
+        })
+        frame = frame[frame['close'] > 0]
+        frame = frame.drop_duplicates('day', keep='last').sort_values('day')
+
+        self._days = frame['day'].to_numpy(dtype='datetime64[D]')
+        self._closes = frame['close'].to_numpy(dtype=float)
+        # 累计对数收益：_log_cum[j] - _log_cum[i] = ln(close[j] / close[i])
+        self._log_cum = np.log(self._closes / self._closes[0]) if len(self._closes) else self._closes
+        self.source = source
+
+    # ========== 加载 ==========
+
+    @classmethod
+    def load(cls, repository=None) -> 'BenchmarkSeries':
+        """
+        按优先级加载基准序列：
+        1. 基准指数日线缓存
+        2. 基准数据表
+
+        Args:
+            repository: 数据库仓库实例（可选）
+
+        Returns:
+            基准序列，都不可用时为空序列
+        """
+        series = cls.from_cache()
+        if not series.empty:
+            return series
+        return cls.from_repository(repository)
+
+    @classmethod
+    def from_cache(cls) -> 'BenchmarkSeries':
+        """从基准指数日线缓存加载"""
+        try:
+            from strategy_tracker.data.collector import load_stock_from_cache
+
+            df = load_stock_from_cache(BENCHMARK_INDEX)
+            if df is None or df.empty:
+                return cls()
+            df.columns = [str(col).lower() for col in df.columns]
+            if 'close' not in df.columns:
+                return cls()
+            if isinstance(df.index, pd.DatetimeIndex):
+                index = df.index
+            elif 'date' in df.columns:
+                index = pd.DatetimeIndex(pd.to_datetime(df['date']))
+            else:
+                index = pd.DatetimeIndex(pd.to_datetime(df.index))
+            if index.tz is not None:
+                index = index.tz_convert(None)
+            return cls(index.values, df['close'].to_numpy(dtype=float), source='cache')
+        except Exception:
+            return cls()
+
+    @classmethod
+    def from_repository(cls, repository=None) -> 'BenchmarkSeries':
+        """从基准数据表加载"""
+        try:
+            from strategy_tracker.db import get_repository
+            from strategy_tracker.db.models import BenchmarkData
+
+            repository = repository or get_repository()
+            with repository.get_session() as session:
+                rows = session.query(BenchmarkData.trade_date, BenchmarkData.close_price).all()
+            if not rows:
+                return cls()
+            return cls(
+                [row[0] for row in rows],
+                [row[1] if row[1] is not None else np.nan for row in rows],
+                source='db'
+            )
+        except Exception:
+            return cls()
+
+    # ========== 查询 ==========
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    @property
+    def empty(self) -> bool:
+        return len(self._days) == 0
+
+    @property
+    def first(self) -> Optional[datetime]:
+        return pd.Timestamp(self._days[0]).to_pydatetime() if len(self._days) else None
+
+    @property
+    def last(self) -> Optional[datetime]:
+        return pd.Timestamp(self._days[-1]).to_pydatetime() if len(self._days) else None
+
+    def close_on(self, value: DateLike) -> Optional[float]:
+        """指定日期的收盘价，非交易日返回 None"""
+        day = _to_day(value)
+        i = np.searchsorted(self._days, day)
+        if i < len(self._days) and self._days[i] == day:
+            return float(self._closes[i])
+        return None
+
+    def return_between(self, start: DateLike, end: DateLike, exact: bool = False) -> Optional[float]:
+        """
+        区间基准收益率（%）
+
+        Args:
+            start: 开始日期
+            end: 结束日期
+            exact: True 时要求开始与结束日期都是交易日（按两日收盘价计算）；
+                   False 时取 [start, end] 内第一个与最后一个交易日
+
+        Returns:
+            基准收益率（%），数据不足时返回 None
+        """
+        value = self.returns_between_many([start], [end], exact)[0]
+        return None if np.isnan(value) else float(value)
+
+    def returns_between_many(
+        self,
+        starts: Iterable[DateLike],
+        ends: Iterable[DateLike],
+        exact: bool = False
+    ) -> np.ndarray:
+        """
+        批量计算区间基准收益率（%）
+
+        Returns:
+            收益率数组，数据不足的为 NaN
+        """
+        start_days = self._as_days(starts)
+        end_days = self._as_days(ends)
+        result = np.full(len(start_days), np.nan)
+        if self.empty or len(start_days) == 0:
+            return result
+
+        lo = np.searchsorted(self._days, start_days, side='left')
+        hi = np.searchsorted(self._days, end_days, side='right') - 1
+        lo_safe = np.clip(lo, 0, len(self._days) - 1)
+        hi_safe = np.clip(hi, 0, len(self._days) - 1)
+
+        if exact:
+            valid = ((lo < len(self._days)) & (hi >= 0)
+                     & (self._days[lo_safe] == start_days) & (self._days[hi_safe] == end_days))
+        else:
+            valid = hi > lo
+
+        returns = np.expm1(self._log_cum[hi_safe] - self._log_cum[lo_safe]) * 100
+        result[valid] = returns[valid]
+        return result
+
+    @staticmethod
+    def _as_days(values: Iterable[DateLike]) -> np.ndarray:
+        if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+            return values.astype('datetime64[D]')
+        return np.array([_to_day(v) for v in values], dtype='datetime64[D]')
+
+
+# 全局基准序列实例
+_series = None
+
+
+def get_benchmark_series(reload: bool = False) -> BenchmarkSeries:
+    """获取基准序列实例（单例，首次调用时加载）"""
+    global _series
+    if _series is None or reload:
+        _series = BenchmarkSeries.load()
+    return _series
+
+
+def reset_benchmark_series():
+    """清除基准序列实例（基准数据更新后调用，下次使用时重新加载）"""
+    global _series
+    _series = None
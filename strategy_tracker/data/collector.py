@@ -5,7 +5,6 @@
 """
 import sys
 import os
-import pickle
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
@@ -16,8 +15,11 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from data.data_resilient import DataResilient
+from data.bar_store import BarStore
 from strategy_tracker.config import BENCHMARK_INDEX, DATE_FORMAT_COMPACT
 from strategy_tracker.db import get_repository
+from strategy_tracker.data.trading_calendar import get_trading_calendar, reset_trading_calendar
+from strategy_tracker.data.benchmark_series import get_benchmark_series, reset_benchmark_series
 
 
 # ========== 工具函数 ==========
@@ -36,7 +38,7 @@ def normalize_symbol(symbol: str) -> str:
 def load_stock_from_cache(stock_code: str) -> Optional[pd.DataFrame]:
     """
     从缓存加载股票数据
-    参考 trend_stocks.py 的实现方式
+    优先读取日线存储，其次读取合并存储（含旧版 pickle 缓存）
 
     Args:
         stock_code: 股票代码
@@ -44,41 +46,8 @@ def load_stock_from_cache(stock_code: str) -> Optional[pd.DataFrame]:
     Returns:
         缓存的DataFrame，如果不存在或加载失败返回None
     """
-    cache_dir = Path("cache/stock")
-
-    # 确保缓存目录存在
-    if not cache_dir.exists():
-        return None
-
     # 标准化代码（纯数字，用于缓存文件匹配）
-    code = normalize_symbol(stock_code)
-
-    # 查找该股票的所有缓存文件
-    stock_files = []
-
-    for cache_file in cache_dir.glob(f"{code}_*.pkl"):
-        try:
-            parts = cache_file.stem.split('_')
-            if len(parts) >= 3:
-                start_date = parts[1]
-                end_date = parts[2]
-                stock_files.append((cache_file, start_date, end_date))
-        except Exception:
-            continue
-
-    if not stock_files:
-        return None
-
-    # 按修改时间排序，取最新的
-    stock_files.sort(key=lambda x: x[0].stat().st_mtime, reverse=True)
-    latest_file, start_date, end_date = stock_files[0]
-
-    try:
-        with open(latest_file, 'rb') as f:
-            df = pickle.load(f)
-        return df
-    except Exception:
-        return None
+    return BarStore.read_cached(normalize_symbol(stock_code))
 
 
 class DataCollector:
@@ -249,7 +218,7 @@ class DataCollector:
     ) -> Optional[float]:
         """
         计算基准收益率
-        如果缓存不可用，静默返回None
+        使用预加载的基准序列（区间内第一个与最后一个交易日），序列不可用时静默返回None
 
         Args:
             start_date: 开始日期
@@ -261,21 +230,13 @@ class DataCollector:
             基准收益率（%）
         """
         try:
-            # 1. 先尝试从缓存读取基准数据
+            # 1. 基准序列（缓存或基准数据表，只加载一次）
             if use_cache:
-                df = load_stock_from_cache(BENCHMARK_INDEX)
-                if df is not None and not df.empty:
-                    df = self._standardize_dataframe(df)
-                    start_norm = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                    end_norm = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                    df_filtered = df[(df.index >= start_norm) & (df.index <= end_norm)]
-                    if not df_filtered.empty and len(df_filtered) >= 2:
-                        start_price = df_filtered.iloc[0]['close']
-                        end_price = df_filtered.iloc[-1]['close']
-                        if start_price and end_price and start_price > 0:
-                            return ((end_price - start_price) / start_price) * 100
-
-            # 2. 缓存不存在，返回None（不再尝试网络请求）
+                series = get_benchmark_series()
+                if not series.empty:
+                    return series.return_between(start_date, end_date)
+
+            # 2. 基准数据不可用，返回None（不再尝试网络请求）
             if not silent:
                 print("基准数据缓存不可用，跳过基准收益率计算")
             return None
@@ -285,10 +246,15 @@ class DataCollector:
                 print(f"计算基准收益率失败: {e}")
             return None
 
+    @property
+    def calendar(self):
+        """交易日历（进程内共享，首次使用时加载）"""
+        return get_trading_calendar()
+
     def is_trading_day(self, date: datetime) -> bool:
         """
         判断是否为交易日
-        优先从缓存读取基准数据
+        优先使用交易日历
 
         Args:
             date: 待检查的日期
@@ -297,19 +263,12 @@ class DataCollector:
             是否为交易日
         """
         try:
-            # 1. 先尝试从缓存读取
-            df = load_stock_from_cache(BENCHMARK_INDEX)
-            if df is not None and not df.empty:
-                df = self._standardize_dataframe(df)
-                target_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-                # 对于pandas DatetimeIndex，使用 normalize()
-                if hasattr(df.index, 'normalize'):
-                    df_date = df.index.normalize()
-                else:
-                    df_date = df.index
-                return target_date in df_date
-
-            # 2. 缓存不存在，使用 DataResilient
+            # 1. 交易日历（二分查找）
+            calendar = self.calendar
+            if not calendar.empty:
+                return calendar.is_trading_day(date)
+
+            # 2. 日历不可用，使用 DataResilient
             start = (date - timedelta(days=3)).strftime(DATE_FORMAT_COMPACT)
             end = (date + timedelta(days=1)).strftime(DATE_FORMAT_COMPACT)
 
@@ -343,6 +302,13 @@ class DataCollector:
         Returns:
             下一个交易日的日期
         """
+        calendar = self.calendar
+        if not calendar.empty:
+            next_date = calendar.next(date)
+            if next_date is not None and next_date - date <= timedelta(days=max_days):
+                return next_date
+            return None
+
         for i in range(1, max_days + 1):
             next_date = date + timedelta(days=i)
             if self.is_trading_day(next_date):
@@ -366,6 +332,13 @@ class DataCollector:
         Returns:
             第n个交易日的日期
         """
+        calendar = self.calendar
+        if not calendar.empty:
+            nth_date = calendar.nth_after(start_date, n)
+            if nth_date is not None and nth_date - start_date <= timedelta(days=max_days):
+                return nth_date
+            return None
+
         trading_days_found = 0
         current_date = start_date
 
@@ -467,6 +440,11 @@ class BenchmarkCollector:
         # 批量存储
         count = self.repository.bulk_create_benchmark_data(records)
         print(f"存储基准数据: {count} 条记录")
+
+        # 新增交易日后重新加载交易日历与基准序列
+        if count:
+            reset_trading_calendar()
+            reset_benchmark_series()
         return count
 
     def update_recent_benchmark(self, days: int = 30) -> int:
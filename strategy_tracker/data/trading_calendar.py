@@ -0,0 +1,241 @@
+"""
+交易日历
+一次性加载交易日（基准指数缓存/基准数据表、掘金 get_trading_dates 或本地日历文件），
+保存在排序的 numpy 数组中，所有查询均为二分查找
+"""
+from datetime import datetime, date as date_type
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from strategy_tracker.config import BENCHMARK_INDEX, TRADING_CALENDAR_FILE
+
+
+DateLike = Union[datetime, date_type, str, pd.Timestamp, np.datetime64]
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    """日期转换为 datetime64[D]（去掉时间与时区）"""
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[D]')
+    if isinstance(value, datetime):
+        return np.datetime64(value.date(), 'D')
+    if isinstance(value, date_type):
+        return np.datetime64(value, 'D')
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+def _from_day(day: np.datetime64, like: Optional[DateLike] = None) -> datetime:
+    """datetime64[D] 转换为 datetime，保留参考日期的时分秒（与按天累加的旧逻辑一致）"""
+    result = pd.Timestamp(day).to_pydatetime()
+    if isinstance(like, datetime):
+        result = datetime.combine(result.date(), like.time(), tzinfo=like.tzinfo)
+    return result
+
+
+class TradingCalendar:
+    """交易日历 - 排序的 datetime64[D] 数组 + 二分查找"""
+
+    def __init__(self, dates: Iterable[DateLike] = (), source: str = 'empty'):
+        """
+        初始化交易日历
+
+        Args:
+            dates: 交易日列表（无需排序、可重复）
+            source: 数据来源描述
+        """
+        days = [_to_day(d) for d in dates if d is not None and not pd.isna(d)]
+        self._days = np.unique(np.array(days, dtype='datetime64[D]'))
+        self.source = source
+
+    # ========== 加载 ==========
+
+    @classmethod
+    def load(cls, repository=None) -> 'TradingCalendar':
+        """
+        按优先级加载交易日历：
+        1. 基准指数缓存 + 基准数据表（两者合并）
+        2. 掘金 get_trading_dates（截止今天）
+        3. 本地日历文件 TRADING_CALENDAR_FILE
+
+        Args:
+            repository: 数据库仓库实例（可选）
+
+        Returns:
+            交易日历，所有来源都不可用时为空日历
+        """
+        days = cls._dates_from_benchmark_cache() + cls._dates_from_benchmark_db(repository)
+        if days:
+            return cls(days, source='benchmark')
+
+        days = cls._dates_from_diggold()
+        if days:
+            return cls(days, source='diggold')
+
+        days = cls._dates_from_file(TRADING_CALENDAR_FILE)
+        if days:
+            return cls(days, source='file')
+
+        return cls()
+
+    @staticmethod
+    def _dates_from_benchmark_cache() -> List[DateLike]:
+        """基准指数日线缓存中的交易日"""
+        try:
+            from strategy_tracker.data.collector import load_stock_from_cache
+
+            df = load_stock_from_cache(BENCHMARK_INDEX)
+            if df is None or df.empty:
+                return []
+            if isinstance(df.index, pd.DatetimeIndex):
+                index = df.index
+            elif 'date' in df.columns:
+                index = pd.DatetimeIndex(pd.to_datetime(df['date']))
+            else:
+                index = pd.DatetimeIndex(pd.to_datetime(df.index))
+            if index.tz is not None:
+                index = index.tz_convert(None)
+            return list(index.values.astype('datetime64[D]'))
+        except Exception:
+            return []
+
+    @staticmethod
+    def _dates_from_benchmark_db(repository=None) -> List[DateLike]:
+        """基准数据表中的交易日"""
+        try:
+            from strategy_tracker.db import get_repository
+            from strategy_tracker.db.models import BenchmarkData
+
+            repository = repository or get_repository()
+            with repository.get_session() as session:
+                rows = session.query(BenchmarkData.trade_date).all()
+            return [row[0] for row in rows]
+        except Exception:
+            return []
+
+    @staticmethod
+    def _dates_from_diggold(start: str = '2005-01-01') -> List[DateLike]:
+        """掘金SDK交易日（只取到今天，避免把未来日期当作已有数据的交易日）"""
+        try:
+            from gm.api import get_trading_dates
+            from data.diggold_data import DiggoldDataSource
+
+            if not DiggoldDataSource.init():
+                return []
+            today = datetime.now().strftime('%Y-%m-%d')
+            return list(get_trading_dates(exchange='SHSE', start_date=start, end_date=today) or [])
+        except Exception:
+            return []
+
+    @staticmethod
+    def _dates_from_file(path) -> List[DateLike]:
+        """本地日历文件（每行一个日期，YYYY-MM-DD 或 YYYYMMDD）"""
+        try:
+            path = Path(path)
+            if not path.exists():
+                return []
+            lines = [line.strip() for line in path.read_text(encoding='utf-8').splitlines()]
+            return list(pd.to_datetime([line for line in lines if line and not line.startswith('#')]))
+        except Exception:
+            return []
+
+    # ========== 查询 ==========
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def __contains__(self, value: DateLike) -> bool:
+        return self.is_trading_day(value)
+
+    @property
+    def empty(self) -> bool:
+        return len(self._days) == 0
+
+    @property
+    def first(self) -> Optional[datetime]:
+        return _from_day(self._days[0]) if len(self._days) else None
+
+    @property
+    def last(self) -> Optional[datetime]:
+        return _from_day(self._days[-1]) if len(self._days) else None
+
+    @property
+    def days(self) -> np.ndarray:
+        """全部交易日（datetime64[D]，只读视图）"""
+        view = self._days.view()
+        view.flags.writeable = False
+        return view
+
+    def is_trading_day(self, value: DateLike) -> bool:
+        """是否为交易日"""
+        day = _to_day(value)
+        i = np.searchsorted(self._days, day)
+        return bool(i < len(self._days) and self._days[i] == day)
+
+    def next(self, value: DateLike) -> Optional[datetime]:
+        """严格晚于指定日期的下一个交易日，超出日历范围返回 None"""
+        return self.nth_after(value, 1)
+
+    def nth_after(self, value: DateLike, n: int) -> Optional[datetime]:
+        """
+        指定日期之后的第 n 个交易日（不含当天）
+
+        Args:
+            value: 起始日期
+            n: 第n个交易日（n >= 1）
+
+        Returns:
+            交易日（保留起始日期的时分秒），超出日历范围返回 None
+        """
+        if n < 1:
+            raise ValueError(f"n 必须 >= 1: {n}")
+        i = np.searchsorted(self._days, _to_day(value), side='right') + n - 1
+        if i >= len(self._days):
+            return None
+        return _from_day(self._days[i], like=value)
+
+    def nth_after_many(self, values: Iterable[DateLike], n: int) -> np.ndarray:
+        """
+        批量计算第 n 个交易日
+
+        Returns:
+            datetime64[D] 数组，超出日历范围的为 NaT
+        """
+        days = np.array([_to_day(v) for v in values], dtype='datetime64[D]')
+        idx = np.searchsorted(self._days, days, side='right') + n - 1
+        result = np.full(len(days), np.datetime64('NaT'), dtype='datetime64[D]')
+        valid = idx < len(self._days)
+        result[valid] = self._days[idx[valid]]
+        return result
+
+    def between(self, start: DateLike, end: DateLike) -> List[datetime]:
+        """[start, end] 区间内的交易日"""
+        lo = np.searchsorted(self._days, _to_day(start), side='left')
+        hi = np.searchsorted(self._days, _to_day(end), side='right')
+        return [_from_day(day) for day in self._days[lo:hi]]
+
+    def count_between(self, start: DateLike, end: DateLike) -> int:
+        """[start, end] 区间内的交易日数量"""
+        lo = np.searchsorted(self._days, _to_day(start), side='left')
+        hi = np.searchsorted(self._days, _to_day(end), side='right')
+        return int(max(hi - lo, 0))
+
+
+# 全局交易日历实例
+_calendar = None
+
+
+def get_trading_calendar(reload: bool = False) -> TradingCalendar:
+    """获取交易日历实例（单例，首次调用时加载）"""
+    global _calendar
+    if _calendar is None or reload:
+        _calendar = TradingCalendar.load()
+    return _calendar
+
+
+def reset_trading_calendar():
+    """清除交易日历实例（基准数据更新后调用，下次使用时重新加载）"""
+    global _calendar
+    _calendar = None
@@ -0,0 +1,139 @@
+"""
+数据库性能基准测试
+对比不同 SQLite 性能配置（config.SQLITE_PROFILES）的写入与查询吞吐量
+
+用法:
+    python -m strategy_tracker.db.benchmark --positions 20000
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from strategy_tracker.config import DB_CONFIG, HOLDING_PERIODS, SQLITE_PROFILES
+from strategy_tracker.db.repository import DatabaseRepository
+
+
+def _timed(func):
+    """执行并返回 (结果, 耗时秒)"""
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run_profile(profile: str, positions: int, screenings: int, queries: int) -> dict:
+    """
+    在临时数据库上运行一轮基准测试
+
+    Args:
+        profile: SQLite 性能配置名称
+        positions: 批量写入的持仓数
+        screenings: 逐条写入的筛选记录数（模拟每晚筛选脚本逐条提交）
+        queries: 查询次数
+
+    Returns:
+        各项操作的每秒吞吐量
+    """
+    results = {}
+    original_path = DB_CONFIG['sqlite_path']
+    with tempfile.TemporaryDirectory() as tmp:
+        # DatabaseRepository 从全局 DB_CONFIG 读取路径，结束后恢复，避免同一进程后续使用已删除的临时库
+        DB_CONFIG['sqlite_path'] = str(Path(tmp) / f'benchmark_{profile}.db')
+        try:
+            repo = DatabaseRepository(sqlite_profile=profile)
+        finally:
+            DB_CONFIG['sqlite_path'] = original_path
+        repo.create_tables()
+
+        # 1. 逐条提交（每晚筛选：一条筛选记录 + 10 只股票，每行一个事务）
+        def insert_screenings():
+            for i in range(screenings):
+                screen_date = datetime(2024, 1, 1) + timedelta(days=i)
+                screening_id = repo.create_screening_record('benchmark', screen_date, screen_date, 10)
+                for k in range(10):
+                    repo.create_position(screening_id, f'{k:06d}', screen_date=screen_date, screen_price=10.0)
+        _, elapsed = _timed(insert_screenings)
+        results['逐条写入 (行/秒)'] = screenings * 11 / elapsed
+
+        # 2. 批量写入持仓
+        screening_id = repo.create_screening_record('benchmark', datetime(2020, 1, 1), datetime(2020, 1, 1))
+        rows = [
+            {
+                'screening_id': screening_id,
+                'stock_code': f'{i % 4000:06d}',
+                'screen_date': datetime(2020, 1, 1) + timedelta(hours=i % 20000),
+                'screen_price': 10.0
+            }
+            for i in range(positions)
+        ]
+        _, elapsed = _timed(lambda: repo.bulk_create_positions(rows))
+        results['批量写入持仓 (行/秒)'] = positions / elapsed
+
+        # 3. 批量 upsert 收益记录（90% 的持仓已有收益）
+        records = [
+            {
+                'position_id': position_id, 'holding_days': holding_days,
+                'check_date': datetime(2024, 1, 1), 'close_price': 10.0, 'return_rate': 0.0,
+                'benchmark_return': 0.0, 'excess_return': 0.0, 'is_trading_day': True, 'notes': None
+            }
+            for holding_days in HOLDING_PERIODS
+            for position_id in range(1, int(positions * 0.9))
+        ]
+        _, elapsed = _timed(lambda: repo.bulk_upsert_return_records(records))
+        results['批量写入收益 (行/秒)'] = len(records) / elapsed
+
+        # 4. 查询：待更新持仓 + 单持仓收益
+        def run_queries():
+            for i in range(queries):
+                repo.get_positions_need_update(HOLDING_PERIODS[i % len(HOLDING_PERIODS)], datetime(2030, 1, 1))
+                for position_id in range(1, 101):
+                    repo.get_returns_by_position(position_id * (i + 1))
+        _, elapsed = _timed(run_queries)
+        results['查询 (次/秒)'] = queries * 101 / elapsed
+
+        repo.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 性能配置基准测试')
+    parser.add_argument('--positions', type=int, default=20000, help='批量写入的持仓数')
+    parser.add_argument('--screenings', type=int, default=100, help='逐条写入的筛选记录数')
+    parser.add_argument('--queries', type=int, default=20, help='查询轮数')
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES), help='要对比的配置')
+    args = parser.parse_args()
+
+    if DB_CONFIG['type'] != 'sqlite':
+        print("基准测试仅支持 SQLite")
+        return
+
+    print("=" * 60)
+    print("SQLite 性能配置基准测试")
+    print("=" * 60)
+
+    all_results = {}
+    for profile in args.profiles:
+        print(f"运行配置: {profile} ...")
+        all_results[profile] = run_profile(profile, args.positions, args.screenings, args.queries)
+
+    print()
+    print(f"{'操作':<20}" + ''.join(f"{p:>14}" for p in args.profiles))
+    for metric in next(iter(all_results.values())):
+        print(f"{metric:<20}" + ''.join(f"{all_results[p][metric]:>14.0f}" for p in args.profiles))
+
+    if len(args.profiles) > 1:
+        base = args.profiles[0]
+        print()
+        for profile in args.profiles[1:]:
+            for metric, value in all_results[profile].items():
+                print(f"{profile} / {base} {metric}: {value / all_results[base][metric]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,13 @@
 兼容 SQLite 和 MySQL
 """
 from datetime import datetime, date as date_type, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from contextlib import contextmanager
-from sqlalchemy import create_engine, and_, or_, func, cast, Date
+from sqlalchemy import create_engine, event, text, and_, or_, func, cast, Date
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import IntegrityError
 
-from ..config import get_database_url, DB_CONFIG
+from ..config import get_database_url, get_sqlite_pragmas, DB_CONFIG, SQLITE_OPTIMIZE_MIN_ROWS
 from .models import (
     Base, ScreeningRecord, StockPosition, ReturnRecord,
     BenchmarkData, StrategyStats
@@ -37,8 +37,13 @@ def _date_filter(column, target_date: datetime):
 class DatabaseRepository:
     """数据库仓库类 - 封装所有数据库操作"""
 
-    def __init__(self):
-        """初始化数据库连接"""
+    def __init__(self, sqlite_profile: Optional[str] = None):
+        """
+        初始化数据库连接
+
+        Args:
+            sqlite_profile: SQLite 性能配置名称（见 config.SQLITE_PROFILES），默认 SQLITE_PROFILE
+        """
         db_url = get_database_url()
         # SQLite 需要特殊配置
         if DB_CONFIG['type'] == 'sqlite':
@@ -47,10 +52,14 @@ class DatabaseRepository:
                 echo=False,
                 connect_args={"check_same_thread": False}  # SQLite 多线程支持
             )
+            self.sqlite_pragmas = get_sqlite_pragmas(sqlite_profile)
+            event.listen(self.engine, 'connect', self._apply_sqlite_pragmas)
         else:
             self.engine = create_engine(db_url, echo=False, pool_pre_ping=True)
 
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # 基准收盘价序列（首次计算基准收益率时加载，写入基准数据后清除）
+        self._benchmark_series = None
 
     @contextmanager
     def get_session(self):
@@ -65,9 +74,45 @@ class DatabaseRepository:
         finally:
             session.close()
 
+    def _apply_sqlite_pragmas(self, dbapi_connection, connection_record):
+        """连接事件：对每个新的 SQLite 连接执行性能配置 PRAGMA"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.sqlite_pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    def optimize(self, analyze: bool = False):
+        """
+        更新查询计划统计信息（SQLite）
+        默认执行采样 ANALYZE（每个索引最多扫描 1000 行，耗时与表大小无关），
+        analyze=True 时执行完整 ANALYZE
+
+        Args:
+            analyze: 是否执行完整 ANALYZE
+        """
+        if DB_CONFIG['type'] != 'sqlite':
+            return
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(f"PRAGMA analysis_limit={0 if analyze else 1000}"))
+                conn.execute(text("ANALYZE"))
+                conn.execute(text("PRAGMA optimize"))
+                conn.commit()
+        except Exception as e:
+            print(f"数据库优化失败: {e}")
+
+    def _after_bulk_load(self, count: int) -> int:
+        """批量写入后的钩子：写入行数较多时更新统计信息"""
+        if SQLITE_OPTIMIZE_MIN_ROWS and count >= SQLITE_OPTIMIZE_MIN_ROWS:
+            self.optimize()
+        return count
+
     def create_tables(self):
         """创建所有表"""
         Base.metadata.create_all(self.engine)
+        self.optimize(analyze=True)
 
     def drop_tables(self):
         """删除所有表（谨慎使用）"""
@@ -173,7 +218,7 @@ class DatabaseRepository:
             ]
             session.add_all(positions)
             session.commit()
-            return len(positions)
+        return self._after_bulk_load(len(positions))
 
     def get_position(self, position_id: int) -> Optional[StockPosition]:
         """获取持仓"""
@@ -190,48 +235,92 @@ class DatabaseRepository:
         with self.get_session() as session:
             return session.query(StockPosition).filter_by(stock_code=stock_code).all()
 
-    def get_positions_need_update(
+    # 待更新持仓查询的列（只取列，不构造ORM对象）
+    _PENDING_POSITION_COLUMNS = (
+        StockPosition.id, StockPosition.screening_id, StockPosition.stock_code,
+        StockPosition.stock_name, StockPosition.screen_date, StockPosition.screen_price,
+        StockPosition.score, StockPosition.reason, StockPosition.status, StockPosition.created_at
+    )
+
+    def _positions_need_update_query(
         self,
+        session: Session,
         holding_days: int,
-        check_date: datetime
-    ) -> List[StockPosition]:
-        """获取需要更新收益的持仓"""
-        with self.get_session() as session:
-            # 找出没有对应holding_days收益记录的持仓ID
-            position_ids_with_return = session.query(ReturnRecord.position_id).filter(
+        check_date: datetime,
+        include_existing: bool = False
+    ):
+        """
+        待更新持仓查询：screen_date <= check_date 且没有该持仓周期的收益记录
+        NOT EXISTS 反连接，由 uk_position_days (position_id, holding_days) 索引完成探测
+        """
+        query = session.query(*self._PENDING_POSITION_COLUMNS).filter(
+            StockPosition.screen_date <= check_date
+        )
+        if not include_existing:
+            has_return = session.query(ReturnRecord.id).filter(
                 and_(
-                    ReturnRecord.holding_days == holding_days,
-                    _date_filter(ReturnRecord.check_date, check_date)
+                    ReturnRecord.position_id == StockPosition.id,
+                    ReturnRecord.holding_days == holding_days
                 )
-            ).all()
-
-            existing_ids = [pid[0] for pid in position_ids_with_return]
+            ).exists()
+            query = query.filter(~has_return)
+        return query.order_by(StockPosition.id)
 
-            # 获取所有符合条件的持仓（screen_date <= check_date 且没有收益记录）
-            positions = session.query(StockPosition).filter(
-                and_(
-                    StockPosition.screen_date <= check_date,
-                    ~StockPosition.id.in_(existing_ids) if existing_ids else True
-                )
-            ).all()
+    def get_positions_need_update(
+        self,
+        holding_days: int,
+        check_date: datetime,
+        include_existing: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        获取需要更新收益的持仓
+
+        Args:
+            holding_days: 持仓天数
+            check_date: 检查日期（只包含此前筛选的持仓）
+            include_existing: 是否包含已有收益记录的持仓（强制重算时使用）
+
+        Returns:
+            持仓字典列表
+        """
+        with self.get_session() as session:
+            query = self._positions_need_update_query(session, holding_days, check_date, include_existing)
+            return [dict(row._mapping) for row in query.yield_per(1000)]
 
-            # 将对象转换为字典列表，避免 detached instance 问题
-            result = []
-            for p in positions:
-                result.append({
-                    'id': p.id,
-                    'screening_id': p.screening_id,
-                    'stock_code': p.stock_code,
-                    'stock_name': p.stock_name,
-                    'screen_date': p.screen_date,
-                    'screen_price': p.screen_price,
-                    'score': p.score,
-                    'reason': p.reason,
-                    'status': p.status,
-                    'created_at': p.created_at
-                })
-
-            return result
+    def iter_positions_need_update(
+        self,
+        holding_days: int,
+        check_date: datetime,
+        page_size: int = 1000,
+        include_existing: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        分页获取需要更新收益的持仓（按ID键集分页，每页一个会话，内存占用有界）
+        调用方可以在两页之间写入收益记录，不会与读游标冲突
+
+        Args:
+            holding_days: 持仓天数
+            check_date: 检查日期
+            page_size: 每页持仓数
+            include_existing: 是否包含已有收益记录的持仓
+
+        Yields:
+            每页的持仓字典列表
+        """
+        last_id = 0
+        while True:
+            with self.get_session() as session:
+                query = self._positions_need_update_query(session, holding_days, check_date, include_existing)
+                page = [
+                    dict(row._mapping)
+                    for row in query.filter(StockPosition.id > last_id).limit(page_size)
+                ]
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
 
     # ========== ReturnRecord 操作 ==========
 
@@ -280,10 +369,54 @@ class DatabaseRepository:
             session.add_all(records)
             try:
                 session.commit()
-                return len(records)
             except IntegrityError:
                 session.rollback()
                 return 0
+        return self._after_bulk_load(len(records))
+
+    def bulk_upsert_return_records(self, records_data: List[Dict[str, Any]]) -> int:
+        """
+        批量写入收益记录（单个事务）
+        (position_id, holding_days) 已存在时更新，否则插入
+        """
+        if not records_data:
+            return 0
+
+        update_columns = [
+            'check_date', 'close_price', 'return_rate', 'benchmark_return',
+            'excess_return', 'is_trading_day', 'notes'
+        ]
+        dialect = self.engine.dialect.name
+
+        with self.get_session() as session:
+            if dialect in ('sqlite', 'postgresql'):
+                if dialect == 'sqlite':
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(ReturnRecord)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['position_id', 'holding_days'],
+                    set_={col: stmt.excluded[col] for col in update_columns}
+                )
+                session.execute(stmt, records_data)
+            elif dialect == 'mysql':
+                from sqlalchemy.dialects.mysql import insert
+                stmt = insert(ReturnRecord)
+                stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+                session.execute(stmt, records_data)
+            else:
+                # 其他数据库：先删除已有记录再批量插入
+                for data in records_data:
+                    session.query(ReturnRecord).filter(
+                        and_(
+                            ReturnRecord.position_id == data['position_id'],
+                            ReturnRecord.holding_days == data['holding_days']
+                        )
+                    ).delete(synchronize_session=False)
+                session.bulk_insert_mappings(ReturnRecord, records_data)
+
+        return self._after_bulk_load(len(records_data))
 
     def get_returns_by_position(self, position_id: int) -> List[ReturnRecord]:
         """获取持仓的所有收益记录"""
@@ -333,6 +466,7 @@ class DatabaseRepository:
             try:
                 session.commit()
                 session.refresh(data)
+                self._benchmark_series = None
                 return data.id
             except IntegrityError:
                 session.rollback()
@@ -345,10 +479,11 @@ class DatabaseRepository:
             session.add_all(data_objects)
             try:
                 session.commit()
-                return len(data_objects)
             except IntegrityError:
                 session.rollback()
                 return 0
+        self._benchmark_series = None
+        return self._after_bulk_load(len(data_objects))
 
     def get_benchmark_data(
         self,
@@ -378,21 +513,11 @@ class DatabaseRepository:
         start_date: datetime,
         end_date: datetime
     ) -> Optional[float]:
-        """计算基准收益率"""
-        with self.get_session() as session:
-            start_data = session.query(BenchmarkData).filter(
-                _date_filter(BenchmarkData.trade_date, start_date)
-            ).first()
-
-            end_data = session.query(BenchmarkData).filter(
-                _date_filter(BenchmarkData.trade_date, end_date)
-            ).first()
-
-            if start_data and end_data:
-                if start_data.close_price and end_data.close_price:
-                    return ((end_data.close_price - start_data.close_price) / start_data.close_price) * 100
-
-            return None
+        """计算基准收益率（开始与结束日期的收盘价之比，两日都须有基准数据）"""
+        if self._benchmark_series is None:
+            from ..data.benchmark_series import BenchmarkSeries
+            self._benchmark_series = BenchmarkSeries.from_repository(self)
+        return self._benchmark_series.return_between(start_date, end_date, exact=True)
 
     # ========== StrategyStats 操作 ==========
 
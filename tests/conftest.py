@@ -0,0 +1,51 @@
+"""
+pytest 公共配置
+
+向量化改写的对照测试：在固定随机种子生成的日线上，比较新实现与原逐只/逐行实现（或 TA-Lib）的结果
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+# 以下为需要联网/Token 的手动验证脚本，不参与 pytest 收集
+collect_ignore = [
+    'test_akshare_sources.py',
+    'test_alternative_sources.py',
+    'test_env_token.py',
+]
+
+
+def _make_frames(n=40, t=400, min_bars=40, gap_frac=0.3, seed=0):
+    """
+    生成 {6位代码: OHLCV DataFrame}
+
+    Args:
+        n: 股票数
+        t: 最长K线数（各股票长度在 [min_bars, t) 之间随机，模拟上市时间不同）
+        min_bars: 最短K线数
+        gap_frac: 含一根全 NaN K线（数据缺失）的股票比例
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    calendar = pd.bdate_range('2022-01-03', periods=t)
+    frames = {}
+    for j in range(n):
+        k = int(rng.integers(min_bars, t)) if t > min_bars else t
+        close = 10 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, k)))
+        df = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.01, k)),
+            'high': close * (1 + rng.uniform(0, 0.03, k)),
+            'low': close * (1 - rng.uniform(0, 0.03, k)),
+            'close': close,
+            'volume': rng.lognormal(12, 0.5, k),
+        }, index=calendar[-k:])
+        if rng.random() < gap_frac:
+            df.iloc[int(rng.integers(1, k - 1)), :] = np.nan
+        frames[f'{600000 + j:06d}'] = df
+    return frames
+
+
+@pytest.fixture
+def make_frames():
+    """合成日线生成函数（见 _make_frames）"""
+    return _make_frames
@@ -0,0 +1,84 @@
+"""异步监控引擎：截止时间调度、超时、背压跳过与错过周期统计"""
+import threading
+import time
+
+import pytest
+
+async_engine = pytest.importorskip('realtime_monitor.async_engine')
+AsyncMonitorEngine = async_engine.AsyncMonitorEngine
+
+INTERVAL = 0.5
+
+
+def test_slow_batch_times_out_then_is_skipped_then_retried():
+    calls = []
+    handled = []
+
+    def fetch(batch):
+        calls.append(batch[0])
+        # 第二批第一次请求耗时 1.5 个周期：本轮超时，下一轮仍在执行被跳过，再下一轮重试
+        if batch[0] == 'c' and calls.count('c') == 1:
+            time.sleep(INTERVAL * 1.5)
+        return {symbol: symbol.upper() for symbol in batch}
+
+    engine = AsyncMonitorEngine(['a', 'b', 'c', 'd'], fetch, handle=lambda batch, result: handled.append(result),
+                                interval_seconds=INTERVAL, batch_size=2, max_workers=2)
+    engine.run(max_cycles=3)
+
+    assert calls == ['a', 'c', 'a', 'a', 'c']
+    assert handled[-1] == {'c': 'C', 'd': 'D'}
+    assert len(handled) == 4
+    stats = engine.get_stats()
+    assert (stats['cycles'], stats['batches'], stats['timeouts'], stats['skipped']) == (3, 5, 1, 1)
+    assert (stats['errors'], stats['missed_cycles'], stats['idle_cycles']) == (0, 0, 0)
+
+
+def test_request_timeout_shorter_than_interval():
+    release = threading.Event()
+
+    def fetch(batch):
+        release.wait(INTERVAL)
+        return {}
+
+    engine = AsyncMonitorEngine(['a'], fetch, interval_seconds=INTERVAL, timeout=0.05)
+    started = time.perf_counter()
+    engine.run(max_cycles=1)
+    release.set()
+
+    assert engine.get_stats()['timeouts'] == 1
+    assert engine.get_stats()['latency_max'] < INTERVAL / 2
+    # 即使请求提前放弃，下一轮仍按截止时间启动
+    assert time.perf_counter() - started >= INTERVAL * 0.9
+
+
+def test_overrun_cycle_counts_missed_cycles_and_keeps_deadlines():
+    def handle(batch, result):
+        # 第一轮的处理阻塞事件循环 2.4 个周期：错过第 2 轮，之后对齐到原截止时间
+        if engine.get_stats()['batches'] == 0:
+            time.sleep(INTERVAL * 2.4)
+
+    engine = AsyncMonitorEngine(['a'], lambda batch: {}, handle=handle, interval_seconds=INTERVAL)
+    started = time.perf_counter()
+    engine.run(max_cycles=3)
+    elapsed = time.perf_counter() - started
+
+    stats = engine.get_stats()
+    assert stats['cycles'] == 3
+    assert stats['missed_cycles'] == 1
+    # 第 0、2、3 轮执行，结束于第 4 个截止时间
+    assert INTERVAL * 3.9 <= elapsed < INTERVAL * 4.5
+
+
+def test_idle_cycles_count_toward_max_cycles():
+    active = iter([False, False, True])
+    fetched = []
+    engine = AsyncMonitorEngine(['a'], fetched.append, interval_seconds=0.05,
+                                is_active=lambda now: next(active, False))
+    engine.run(max_cycles=3)
+    assert (engine.get_stats()['idle_cycles'], engine.get_stats()['cycles']) == (2, 1)
+    assert fetched == [['a']]
+
+    # 始终处于非交易时间也会在 max_cycles 轮后结束
+    idle = AsyncMonitorEngine(['a'], fetched.append, interval_seconds=0.05, is_active=lambda now: False)
+    idle.run(max_cycles=2)
+    assert idle.total_cycles == 2 and idle.get_stats()['cycles'] == 0
@@ -0,0 +1,131 @@
+"""单遍 BacktestAnalyzer 与原逐日筛选/逐标的匹配实现的对照"""
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+backtest_analyzer = pytest.importorskip('Efinance_Strategy.backtest_analyzer')
+BacktestAnalyzer = backtest_analyzer.BacktestAnalyzer
+
+PATTERN = (r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?标的：([a-zA-Z0-9.]+)，操作：以(?:限价|市价)'
+           r'(开多仓|平多仓|开空仓|平空仓)，委托价格：([\d.]+)，目标仓位：([\d.]+)%')
+
+
+def _log_text(seed=51, n=300):
+    """合成交易日志：多个标的开平仓、重复行、无关日志行、委托价格为0的市价单"""
+    rng = np.random.default_rng(seed)
+    symbols = ['SHSE.6000{:02d}'.format(i) for i in range(8)]
+    start = pd.Timestamp('2024-01-02 09:31:00')
+    lines = []
+    for k in range(n):
+        when = start + pd.Timedelta(days=int(k // 3), minutes=int(k % 3))
+        action = '开多仓' if rng.random() < 0.55 else '平多仓'
+        price = 0.0 if rng.random() < 0.05 else round(float(rng.uniform(5, 50)), 2)
+        percent = 100.0 if rng.random() < 0.05 else round(float(rng.uniform(1, 20)), 2)
+        line = '{} 标的：{}，操作：以{}{}，委托价格：{}，目标仓位：{}%'.format(
+            when.strftime('%Y-%m-%d %H:%M:%S'), rng.choice(symbols), rng.choice(['限价', '市价']),
+            action, price, percent)
+        lines.append(line)
+        if rng.random() < 0.1:
+            lines.append(line)
+        if rng.random() < 0.3:
+            lines.append('{} 调仓完成，持仓 {} 只'.format(when.strftime('%Y-%m-%d %H:%M:%S'), k % 8))
+    return '\n'.join(lines)
+
+
+def _parse(log_text):
+    trades = [{'datetime': pd.to_datetime(m.group(1)), 'date': pd.to_datetime(m.group(1)).date(),
+               'symbol': m.group(2), 'action': m.group(3), 'price': float(m.group(4)),
+               'target_percent': float(m.group(5)) / 100.0}
+              for m in re.finditer(PATTERN, log_text)]
+    return pd.DataFrame(trades).drop_duplicates().sort_values('datetime').reset_index(drop=True)
+
+
+def _returns(trades, initial_cash, commission_rate):
+    """原 calculate_returns：逐日筛选交易、逐笔重算总资产"""
+    positions, cash, values = {}, initial_cash, []
+    for date in pd.date_range(trades['datetime'].min(), trades['datetime'].max(), freq='D'):
+        for _, trade in trades[trades['datetime'].dt.date == date.date()].iterrows():
+            symbol, price, percent = trade['symbol'], trade['price'], trade['target_percent']
+            if trade['action'] == '开多仓':
+                total_asset = cash + sum(p['shares'] * p['buy_price'] for p in positions.values())
+                if percent >= 0.99:
+                    buy_amount = cash / (1 + commission_rate)
+                else:
+                    buy_amount = total_asset * percent
+                    if buy_amount * (1 + commission_rate) > cash:
+                        buy_amount = cash / (1 + commission_rate)
+                calc_price = price if price > 0 else 1.0
+                cash -= buy_amount * (1 + commission_rate)
+                positions[symbol] = {'shares': buy_amount / calc_price, 'buy_price': calc_price}
+            elif trade['action'] == '平多仓' and symbol in positions:
+                calc_price = price if price > 0 else positions[symbol]['buy_price']
+                cash += positions[symbol]['shares'] * calc_price * (1 - commission_rate)
+                del positions[symbol]
+        total = cash + sum(p['shares'] * p['buy_price'] for p in positions.values())
+        values.append((date, cash, total))
+    return pd.DataFrame(values, columns=['date', 'cash', 'total_value'])
+
+
+def _trade_stats(trades):
+    """原 calculate_metrics 的盈亏统计：逐标的维护开仓队列"""
+    wins, losses, profit, loss = 0, 0, 0.0, 0.0
+    for symbol in trades['symbol'].unique():
+        buys = []
+        for _, trade in trades[trades['symbol'] == symbol].sort_values('datetime').iterrows():
+            if trade['action'] == '开多仓':
+                buys.append(trade['price'])
+            elif trade['action'] == '平多仓' and buys:
+                buy_price, sell_price = buys.pop(0), trade['price']
+                if buy_price <= 0 or sell_price <= 0:
+                    continue
+                pct = (sell_price - buy_price) / buy_price
+                if pct > 0:
+                    wins, profit = wins + 1, profit + pct
+                else:
+                    losses, loss = losses + 1, loss + abs(pct)
+    return wins, losses, profit, loss
+
+
+@pytest.fixture
+def log_text():
+    return _log_text()
+
+
+def test_parse_log_and_parse_file_match_regex_scan(log_text, tmp_path):
+    expected = _parse(log_text)
+    pd.testing.assert_frame_equal(BacktestAnalyzer().parse_log(log_text), expected, check_dtype=False)
+
+    path = tmp_path / 'backtest_log.txt'
+    path.write_text(log_text, encoding='gbk')
+    pd.testing.assert_frame_equal(BacktestAnalyzer().parse_file(str(path)), expected, check_dtype=False)
+
+
+def test_single_pass_returns_and_metrics_match_per_day_replay(log_text):
+    analyzer = BacktestAnalyzer(initial_cash=1e7, commission_rate=0.0001)
+    trades = analyzer.parse_log(log_text)
+    result = analyzer.calculate_returns()
+    expected = _returns(trades, 1e7, 0.0001)
+
+    np.testing.assert_array_equal(result['date'].to_numpy(), expected['date'].to_numpy())
+    np.testing.assert_allclose(result['cash'], expected['cash'], rtol=1e-10)
+    np.testing.assert_allclose(result['total_value'], expected['total_value'], rtol=1e-10)
+
+    metrics = analyzer.calculate_metrics()
+    wins, losses, profit, loss = _trade_stats(trades)
+    assert (metrics['win_trades'], metrics['loss_trades']) == (wins, losses)
+    assert metrics['profit_loss_ratio'] == pytest.approx(profit / loss)
+    assert metrics['final_value'] == pytest.approx(expected['total_value'].iloc[-1], rel=1e-10)
+
+
+def test_current_positions_match_buy_sell_counts(log_text):
+    analyzer = BacktestAnalyzer()
+    trades = analyzer.parse_log(log_text)
+    expected = []
+    for symbol in trades['symbol'].unique():
+        symbol_trades = trades[trades['symbol'] == symbol]
+        buys = symbol_trades[symbol_trades['action'] == '开多仓']
+        if len(buys) > (symbol_trades['action'] == '平多仓').sum():
+            expected.append({'symbol': symbol, 'date': buys['datetime'].iloc[-1], 'price': buys['price'].iloc[-1]})
+    assert analyzer.get_current_positions() == expected
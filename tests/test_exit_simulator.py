@@ -0,0 +1,119 @@
+"""离场模拟（前向价格面板）与原逐笔 iterrows 回测的对照"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.exit_simulator import ForwardPanel, simulate_exits, sweep_exits
+
+HOLDING_DAYS = 20
+
+
+def _entries(frames, seed, n=120):
+    """随机买入信号：(代码, 买入日期, 买入价)，含一个没有数据的代码"""
+    rng = np.random.default_rng(seed)
+    symbols = list(frames)
+    entries = []
+    for _ in range(n):
+        symbol = symbols[int(rng.integers(len(symbols)))]
+        df = frames[symbol]
+        i = int(rng.integers(len(df)))
+        entries.append((symbol, df.index[i], float(df['close'].iloc[i])))
+    entries.append(('999999', frames[symbols[0]].index[-30], 10.0))
+    return entries
+
+
+def _old_backtest(frames, entries, take_profit, stop_loss):
+    """原 volume_breakout backtest_strategy 的逐笔模拟（后续数据为买入日后 HOLDING_DAYS 个自然日）"""
+    results = []
+    for symbol, buy_date, buy_price in entries:
+        df = frames.get(symbol)
+        if df is None:
+            continue
+        future_df = df.loc[pd.Timestamp(buy_date) + pd.Timedelta(days=1):
+                           pd.Timestamp(buy_date) + pd.Timedelta(days=HOLDING_DAYS)]
+        if future_df.empty:
+            continue
+        max_price = min_price = final_price = buy_price
+        exit_days, exit_reason = HOLDING_DAYS, '到期'
+        for i, (_, row) in enumerate(future_df.iterrows()):
+            current_price = row['close']
+            max_price, min_price = max(max_price, current_price), min(min_price, current_price)
+            profit_pct = (current_price - buy_price) / buy_price
+            if profit_pct >= take_profit:
+                final_price, exit_days, exit_reason = current_price, i + 1, '止盈'
+                break
+            if profit_pct <= stop_loss:
+                final_price, exit_days, exit_reason = current_price, i + 1, '止损'
+                break
+            final_price = current_price
+        results.append({'symbol': symbol, 'buy_price': buy_price, 'final_price': final_price,
+                        'total_return': (final_price - buy_price) / buy_price, 'exit_days': exit_days,
+                        'exit_reason': exit_reason, 'max_price': max_price, 'min_price': min_price,
+                        'max_drawdown': (min_price - buy_price) / buy_price})
+    return pd.DataFrame(results)
+
+
+@pytest.fixture
+def frames(make_frames):
+    return make_frames(n=30, t=250, min_bars=60, gap_frac=0, seed=61)
+
+
+def test_volume_breakout_backtest_matches_per_trade_loop(frames, monkeypatch):
+    volume_breakout = pytest.importorskip('strategies.volume_breakout_strategy')
+    config = volume_breakout.StrategyConfig
+    # 收窄止盈止损，让三种离场原因都出现
+    monkeypatch.setattr(config, 'TAKE_PROFIT_PCT', 0.06)
+    monkeypatch.setattr(config, 'STOP_LOSS_PCT', -0.05)
+    monkeypatch.setattr(volume_breakout.DataResilient, 'fetch_many', staticmethod(
+        lambda symbols, start_date, end_date, use_cache=True: {s: frames[s] for s in symbols if s in frames}))
+
+    entries = _entries(frames, seed=62)
+    stock_list = [{'symbol': ('SHSE.' if s.startswith('6') else 'SZSE.') + s, 'date': d.strftime('%Y-%m-%d'),
+                   'price': p} for s, d, p in entries]
+    result = volume_breakout.backtest_strategy(stock_list)
+    expected = _old_backtest(frames, entries, 0.06, -0.05)
+
+    assert set(expected['exit_reason']) == {'到期', '止盈', '止损'}
+    assert result['symbol'].str[-6:].tolist() == expected['symbol'].tolist()
+    assert result['exit_reason'].tolist() == expected['exit_reason'].tolist()
+    np.testing.assert_array_equal(result['exit_days'].to_numpy(), expected['exit_days'].to_numpy())
+    for name in ('buy_price', 'final_price', 'total_return', 'max_price', 'min_price', 'max_drawdown'):
+        np.testing.assert_allclose(result[name].to_numpy(), expected[name].to_numpy(), rtol=1e-12, err_msg=name)
+
+
+def test_intraday_exits_match_per_trade_loop(frames):
+    entries = _entries(frames, seed=63)
+    panel = ForwardPanel.from_frames(frames, entries, horizon=HOLDING_DAYS)
+    result = simulate_exits(panel, take_profit=0.05, stop_loss=-0.04, intraday=True)
+
+    for row, (symbol, buy_date, buy_price) in zip(result.itertuples(), entries):
+        df = frames.get(symbol)
+        future = df.loc[df.index > buy_date].iloc[:HOLDING_DAYS] if df is not None else pd.DataFrame()
+        if future.empty:
+            assert np.isnan(row.exit_price)
+            continue
+        reason, days, price = '到期', len(future), future['close'].iloc[-1]
+        for i, bar in enumerate(future.itertuples()):
+            # 同一根K线同时触及止盈止损时按止损处理
+            if bar.low <= buy_price * 0.96:
+                reason, days, price = '止损', i + 1, buy_price * 0.96
+                break
+            if bar.high >= buy_price * 1.05:
+                reason, days, price = '止盈', i + 1, buy_price * 1.05
+                break
+        assert (row.exit_reason, row.exit_days) == (reason, days)
+        assert row.exit_price == pytest.approx(price, rel=1e-12)
+        assert row.exit_date == future.index[days - 1]
+
+
+def test_sweep_matches_simulate_per_combination(frames):
+    panel = ForwardPanel.from_frames(frames, _entries(frames, seed=64), horizon=HOLDING_DAYS)
+    grid = sweep_exits(panel, [0.05, 0.1], [-0.03, -0.08], [5, 20])
+
+    for row in grid.itertuples():
+        result = simulate_exits(panel, row.take_profit, row.stop_loss, row.holding_days)
+        result = result[result['exit_price'].notna()]
+        assert row.trades == len(result)
+        assert row.avg_return == pytest.approx(result['exit_return'].mean(), rel=1e-12)
+        assert row.stop_loss_rate == pytest.approx((result['exit_reason'] == '止损').mean())
+        assert row.avg_mae == pytest.approx(result['mae'].mean(), rel=1e-12)
@@ -0,0 +1,86 @@
+"""DataResilient 增量获取：复权因子校验与尾部合并"""
+import numpy as np
+import pandas as pd
+import pytest
+
+data_resilient = pytest.importorskip('data.data_resilient')
+DataResilient = data_resilient.DataResilient
+
+from data.bar_store import BarStore
+
+
+def _bars(start, periods, close=10.0):
+    index = pd.bdate_range(start, periods=periods)
+    prices = close + np.arange(periods) * 0.01
+    return pd.DataFrame({'open': prices, 'high': prices + 0.05, 'low': prices - 0.05,
+                         'close': prices, 'volume': 1e6}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(BarStore, 'STORE_DIR', tmp_path / 'bars')
+    monkeypatch.setattr(BarStore, 'settled_date', classmethod(lambda cls: '20991231'))
+    history = _bars('2024-01-01', 60)
+    assert BarStore.merge('600000', history, '20240101', history.index[-1].strftime('%Y%m%d'))
+    return history
+
+
+def test_overlap_unchanged(store):
+    tail = _bars('2024-01-01', 70).iloc[59:]
+    last = store.index[-1].strftime('%Y%m%d')
+    stored = BarStore.read('600000', last, last)
+    assert not DataResilient._adjust_factor_changed(stored, BarStore.to_bars(tail))
+
+
+@pytest.mark.parametrize('factor', [1 - 5e-4, 1 - 1e-5])
+def test_small_dividend_detected(store, factor):
+    # 小额分红：前复权价格整体下调不到 0.1%
+    tail = _bars('2024-01-01', 70).iloc[59:]
+    tail[['open', 'high', 'low', 'close']] *= factor
+    last = store.index[-1].strftime('%Y%m%d')
+    stored = BarStore.read('600000', last, last)
+    assert DataResilient._adjust_factor_changed(stored, BarStore.to_bars(tail))
+
+
+def test_apply_tail_refreshes_after_dividend(store, monkeypatch):
+    adjusted = _bars('2024-01-01', 70)
+    adjusted[['open', 'high', 'low', 'close']] *= 1 - 5e-4
+    requests = []
+
+    def fetch(symbol, start_date, end_date):
+        requests.append((start_date, end_date))
+        return adjusted.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+    monkeypatch.setattr(DataResilient, '_fetch_from_source', staticmethod(fetch))
+    coverage = BarStore.get_coverage('600000')
+    result = DataResilient._fetch_missing_tail(
+        '600000', coverage[0], '20240408', coverage)
+
+    # 先请求尾部，发现复权变化后全量刷新，存储中不再有旧口径的价格
+    assert requests[-1][0] == coverage[0]
+    np.testing.assert_allclose(result['close'].to_numpy(), adjusted['close'].to_numpy(), rtol=1e-12)
+
+
+def test_fetch_batch_without_cache_is_standardized(tmp_path, monkeypatch):
+    monkeypatch.setattr(BarStore, 'STORE_DIR', tmp_path / 'bars')
+    monkeypatch.setattr(BarStore, 'settled_date', classmethod(lambda cls: '20991231'))
+    monkeypatch.setattr(data_resilient._rate_limiter, 'wait', lambda source_id: None)
+    monkeypatch.setattr(data_resilient._source_router, 'allow', lambda source_id: True)
+
+    def fetch_batch(symbols, start_date, end_date):
+        # 与掘金 history 一致：eob 为带时区的收盘时间
+        frames = {}
+        for symbol in symbols:
+            df = _bars('2024-01-01', 20)
+            df.index = (df.index + pd.Timedelta(hours=15)).tz_localize('Asia/Shanghai').rename('date')
+            frames[symbol] = df
+        return frames
+
+    monkeypatch.setattr(DataResilient, '_fetch_batch_from_diggold', staticmethod(fetch_batch))
+    raw = DataResilient._fetch_batch(['600000', '000001'], '20240101', '20240126', use_cache=False)
+    cached = DataResilient._fetch_batch(['600000', '000001'], '20240101', '20240126', use_cache=True)
+
+    assert list(raw) == list(cached) == ['600000', '000001']
+    for symbol, df in raw.items():
+        assert df.index.tz is None and df.index.name == 'date'
+        pd.testing.assert_frame_equal(df, cached[symbol][df.columns], check_freq=False)
@@ -0,0 +1,103 @@
+"""增量指标状态（IndicatorState）与 IndicatorEngine.calculate_all（TA-Lib）的对照"""
+import numpy as np
+import pandas as pd
+import pytest
+
+indicator_engine = pytest.importorskip('realtime_monitor.indicator_engine')
+indicator_state = pytest.importorskip('realtime_monitor.indicator_state')
+IndicatorEngine = indicator_engine.IndicatorEngine
+IndicatorState = indicator_state.IndicatorState
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+WARM_BARS = 30
+
+
+@pytest.fixture
+def bars(make_frames):
+    """两个交易日的分钟K线（high/low 覆盖 open/close，便于用 tick 还原整根K线）"""
+    df = next(iter(make_frames(n=1, t=160, min_bars=160, gap_frac=0, seed=81).values()))
+    df['high'] = df[['open', 'high', 'close']].max(axis=1)
+    df['low'] = df[['open', 'low', 'close']].min(axis=1)
+    day1 = pd.date_range('2024-01-02 09:31', periods=90, freq='min')
+    day2 = pd.date_range('2024-01-03 09:31', periods=len(df) - 90, freq='min')
+    df.index = day1.append(day2)
+    return df
+
+
+def _expected(df, k):
+    """前 k 根K线整体计算时最后一根的指标"""
+    return IndicatorEngine.calculate_all(df.iloc[:k].copy()).iloc[-1]
+
+
+def _assert_matches(values, expected):
+    assert set(expected.index) <= set(values)
+    for name in expected.index:
+        np.testing.assert_allclose(values[name], expected[name], rtol=1e-12, atol=1e-12, err_msg=name)
+
+
+def test_extend_and_update_match_calculate_all(bars):
+    state = IndicatorState().extend(bars.iloc[:WARM_BARS])
+    assert set(state.latest()) == set(_expected(bars, WARM_BARS).index)
+    _assert_matches(state.latest(), _expected(bars, WARM_BARS))
+
+    # 与已有K线重叠的增量下载：重叠部分被跳过
+    state.extend(bars.iloc[WARM_BARS - 5:WARM_BARS + 10])
+    assert state.count == WARM_BARS + 10
+    _assert_matches(state.latest(), _expected(bars, WARM_BARS + 10))
+
+    for k in range(WARM_BARS + 10, len(bars)):
+        values = state.update(bars.iloc[k], bars.index[k])
+        _assert_matches(values, _expected(bars, k + 1))
+        # ma60 在第60根K线前为 NaN
+        assert np.isnan(values['ma60']) == (k + 1 < 60)
+    assert state.last_time == bars.index[-1]
+
+
+def test_update_live_recomputes_from_closed_state(bars):
+    state = IndicatorState().extend(bars.iloc[:WARM_BARS])
+    for k in range(WARM_BARS, len(bars)):
+        bar = bars.iloc[k]
+        # 先推一根偏离的K线，再推真实K线：结果只取决于最后一次
+        state.update_live(dict(bar[FIELDS], close=bar['close'] * 1.05, volume=1.0), bars.index[k])
+        _assert_matches(state.update_live(bar, bars.index[k]), _expected(bars, k + 1))
+        assert state.count == k
+        assert state.live_time == bars.index[k]
+
+        state.update(bar, bars.index[k])
+        _assert_matches(state.latest(), _expected(bars, k + 1))
+
+
+def test_update_tick_rebuilds_bar_from_cum_volume(bars):
+    state = IndicatorState().extend(bars.iloc[:WARM_BARS])
+    day_volume = bars['volume'].iloc[:WARM_BARS].sum()
+    for k in range(WARM_BARS, len(bars)):
+        bar, time = bars.iloc[k], bars.index[k]
+        if time.date() != bars.index[k - 1].date():
+            day_volume = 0.0
+        # 开、高、低、收四个 tick，累计成交量逐步增加到当日已收盘K线成交量 + 本根K线成交量
+        ticks = [(bar['open'], 0.1), (bar['high'], 0.4), (bar['low'], 0.7), (bar['close'], 1.0)]
+        for price, fraction in ticks:
+            values = state.update_tick(price, cum_volume=day_volume + bar['volume'] * fraction, time=time)
+        assert values['volume'] == pytest.approx(bar['volume'], rel=1e-9)
+        for name in ('open', 'high', 'low', 'close'):
+            assert values[name] == bar[name]
+        _assert_matches(values, _expected(bars, k + 1).drop(['volume', 'volume_ratio']))
+        np.testing.assert_allclose([values['volume_ratio']], [_expected(bars, k + 1)['volume_ratio']],
+                                   rtol=1e-9)
+
+        state.update(bar, time)
+        day_volume += bar['volume']
+
+    # 不晚于最后一根收盘K线的 tick 被忽略
+    before = state.latest()
+    assert state.update_tick(1.0, cum_volume=1.0, time=bars.index[-1]) == before
+
+
+def test_ma60_before_and_after_60_bars(bars):
+    state = IndicatorState().extend(bars.iloc[:59])
+    assert state.ready and np.isnan(state.latest()['ma60'])
+
+    values = state.update_live(bars.iloc[59], bars.index[59])
+    assert values['ma60'] == pytest.approx(bars['close'].iloc[:60].mean(), rel=1e-12)
+    state.update(bars.iloc[59], bars.index[59])
+    assert state.latest()['ma60'] == pytest.approx(_expected(bars, 60)['ma60'], rel=1e-12)
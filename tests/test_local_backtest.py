@@ -0,0 +1,97 @@
+"""本地回测引擎：match_mode=0 的市价单在下一交易日开盘撮合"""
+import numpy as np
+import pandas as pd
+import pytest
+
+local_backtest = pytest.importorskip('Efinance_Strategy.local_backtest')
+
+from data.bar_store import BarStore
+
+DAYS = pd.bdate_range('2024-01-01', periods=5)
+INITIAL_CASH = 1e6
+
+
+def _bars(close, days=DAYS):
+    close = np.asarray(close, dtype=float)
+    return BarStore.to_bars(pd.DataFrame({
+        'open': close - 0.5, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1e6,
+    }, index=days))
+
+
+def _run(algo, pre_open=None):
+    """按交易日调用 algo(engine, i)（09:31）与 pre_open(engine, i)（09:25），返回引擎和委托回调记录"""
+    engine = local_backtest.LocalBacktest('strategy.py')
+    engine._calendar = DAYS.values.astype('datetime64[D]')
+    engine._bar_cache = {
+        '600000': _bars(10 + np.arange(len(DAYS))),
+        # 000001 第3个交易日停牌
+        '000001': _bars([20, 21, 23, 24], DAYS.delete(2)),
+    }
+    statuses = []
+
+    def init(context):
+        engine.schedule(lambda context: algo(engine, engine._calendar.tolist().index(engine._today)),
+                        '1d', '09:31:00')
+        if pre_open is not None:
+            engine.schedule(lambda context: pre_open(engine, engine._calendar.tolist().index(engine._today)),
+                            '1d', '09:25:00')
+
+    def on_order_status(context, order):
+        statuses.append((order['cl_ord_id'], order['status'], str(context.now.date())))
+
+    engine._execute({'init': init, 'on_order_status': on_order_status},
+                    {'backtest_match_mode': 0, 'backtest_initial_cash': INITIAL_CASH})
+    return engine, statuses
+
+
+def test_next_open_fill_is_booked_on_fill_day():
+    def algo(engine, i):
+        if i == 0:
+            engine.order_target_percent('SHSE.600000', 0.5, order_type=local_backtest.OrderType_Market)
+
+    engine, statuses = _run(algo)
+    order = engine.orders[0]
+    # 下单当天只报单，资金和持仓不变
+    assert engine.nav.iloc[0] == INITIAL_CASH
+    assert statuses[0] == ('1', local_backtest.OrderStatus_New, '2024-01-01')
+    assert statuses[1] == ('1', local_backtest.OrderStatus_Filled, '2024-01-02')
+
+    trade = engine.trades[0]
+    assert trade['date'] == '2024-01-02' and trade['price'] == 10.5
+    assert order['filled_volume'] == INITIAL_CASH * 0.5 / 10.5 // 100 * 100
+    assert engine.nav.iloc[1] == pytest.approx(INITIAL_CASH + order['filled_volume'] * (11 - 10.5))
+
+
+def test_fill_day_position_not_sellable():
+    def algo(engine, i):
+        if i == 0:
+            engine.order_target_percent('SHSE.600000', 0.5, order_type=local_backtest.OrderType_Market)
+
+    def pre_open(engine, i):
+        # 开盘前的市价单以当天开盘价立即撮合：成交日买入的股票不可卖
+        if i == 1:
+            engine.order_volume('SHSE.600000', 100, local_backtest.OrderSide_Sell, local_backtest.OrderType_Market)
+
+    engine, _ = _run(algo, pre_open)
+    sell = engine.orders[1]
+    assert sell['status'] == local_backtest.OrderStatus_Rejected
+    assert sell['ord_rej_reason_detail'] == '没有可卖持仓（T+1）'
+
+
+def test_suspended_target_order_rejected_as_buy():
+    def algo(engine, i):
+        if i == 1:
+            engine.order_target_percent('SZSE.000001', 0.3, order_type=local_backtest.OrderType_Market)
+        if i == len(DAYS) - 1:
+            engine.order_target_percent('SHSE.600000', 0.3, order_type=local_backtest.OrderType_Market)
+
+    engine, _ = _run(algo)
+    suspended, last = engine.orders
+    assert suspended['status'] == local_backtest.OrderStatus_Rejected
+    assert suspended['ord_rej_reason_detail'] == '停牌或没有行情'
+    assert suspended['side'] == local_backtest.OrderSide_Buy
+    assert suspended['position_effect'] == local_backtest.PositionEffect_Open
+    # 最后一个交易日开盘后的市价单没有下一交易日可以撮合
+    assert last['status'] == local_backtest.OrderStatus_Rejected
+    assert last['ord_rej_reason_detail'] == '回测结束，没有下一交易日'
+    assert not engine.trades and engine.nav.iloc[-1] == INITIAL_CASH
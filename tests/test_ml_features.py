@@ -0,0 +1,105 @@
+"""SVM 策略的滚动窗口特征矩阵与原逐窗口循环的对照"""
+import numpy as np
+import pandas as pd
+import pytest
+
+ml_features = pytest.importorskip('Efinance_Strategy.ml_features')
+
+HISTORY_LEN = 10
+FORECAST_LEN = 5
+
+
+@pytest.fixture
+def data(make_frames):
+    return next(iter(make_frames(n=1, t=300, min_bars=300, gap_frac=0, seed=41).values()))
+
+
+def _rsi(prices, period=14):
+    if len(prices) < period + 1:
+        return 50
+    deltas = np.diff(prices)
+    avg_gain = np.mean(np.where(deltas > 0, deltas, 0)[-period:])
+    avg_loss = np.mean(np.where(deltas < 0, -deltas, 0)[-period:])
+    if avg_loss == 0:
+        return 100
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _macd(prices, fast=12, slow=26, signal=9):
+    prices = pd.Series(prices)
+    macd = prices.ewm(span=fast, adjust=False).mean() - prices.ewm(span=slow, adjust=False).mean()
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return macd.iloc[-1], signal_line.iloc[-1], (macd - signal_line).iloc[-1]
+
+
+def _enhanced_row(data):
+    close, high, low, volume = (data[c].values for c in ('close', 'high', 'low', 'volume'))
+    macd, signal, hist = _macd(close)
+    bb_mid, bb_std = np.mean(close[-20:]), np.std(close[-20:])
+    bb_upper, bb_lower = bb_mid + 2 * bb_std, bb_mid - 2 * bb_std
+    return [close[-1] / np.mean(close),
+            volume[-1] / np.mean(volume) if np.mean(volume) > 0 else 1,
+            high[-1] / np.mean(high), low[-1] / np.mean(low), volume[-1],
+            close[-1] / close[0], np.std(close), macd, signal, hist, _rsi(close),
+            (close[-1] - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else 0.5,
+            (close[-1] - close[-5]) / close[-5],
+            np.std(np.diff(close) / close[:-1]) * np.sqrt(252)]
+
+
+def test_basic_features_match_ml_strategy_loop(data):
+    # 原 ml_strategy.clf_fit：按日期切片回溯 HISTORY_LEN 个交易日（含两端）
+    x_train, y_train = [], []
+    for index in range(HISTORY_LEN, len(data)):
+        window = data.loc[data.index[index - HISTORY_LEN]:data.index[index]]
+        close, high, low, volume = (window[c].values for c in ('close', 'high', 'low', 'volume'))
+        x_train.append([close[-1] / np.mean(close), volume[-1] / np.mean(volume), high[-1] / np.mean(high),
+                        low[-1] / np.mean(low), volume[-1], close[-1] / close[0], np.std(close)])
+        if index < len(data) - FORECAST_LEN:
+            y_data = data['close'].iloc[index + 1:index + FORECAST_LEN + 1]
+            y_train.append(int(y_data.iloc[-1] > y_data.iloc[0]))
+
+    features = ml_features.basic_features(data, HISTORY_LEN + 1)
+    labels = ml_features.forward_labels(data['close'].values, FORECAST_LEN)
+    np.testing.assert_allclose(features[:-FORECAST_LEN], x_train[:-FORECAST_LEN], rtol=1e-12)
+    np.testing.assert_allclose(features[-1], x_train[-1], rtol=1e-12)
+    np.testing.assert_array_equal(labels[HISTORY_LEN:], y_train)
+
+
+def test_enhanced_features_match_ml_strategy_enhanced_loop(data):
+    # 原 ml_strategy_enhanced.clf_fit：第 index 个样本使用 index 之前的 HISTORY_LEN + 20 根K线
+    window = HISTORY_LEN + 20
+    x_train, y_train = [], []
+    for index in range(window, len(data)):
+        x_train.append(_enhanced_row(data.iloc[index - window:index]))
+        if index < len(data) - FORECAST_LEN:
+            future = data['close'].iloc[index + 1:index + FORECAST_LEN + 1].values
+            y_train.append(int(future[-1] > future[0] * 1.01))
+    new_x = _enhanced_row(data.iloc[-window:])
+
+    features = ml_features.enhanced_features(data, window)
+    labels = ml_features.forward_labels(data['close'].values, FORECAST_LEN, 1.01)
+    np.testing.assert_allclose(features[:-1], x_train, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(features[-1], new_x, rtol=1e-10, atol=1e-12)
+    np.testing.assert_array_equal(labels[window:], y_train)
+
+
+def test_trend_features_match_style_ml_enhanced_loop(data):
+    # 原 style_ml_enhanced.prepare_training_data
+    history_len = 30
+    close_values = data['close'].values
+    x_train, y_train = [], []
+    for i in range(history_len + 10, len(close_values) - 5):
+        close = close_values[i - history_len:i]
+        ma_short, ma_long = np.mean(close[-5:]), np.mean(close[-20:])
+        x_train.append([close[-1] / np.mean(close), (close[-1] - close[0]) / close[0],
+                        np.std(close) / np.mean(close), _rsi(close),
+                        (close[-1] - close[-5]) / close[-5], (close[-1] - close[-10]) / close[-10],
+                        (ma_short - ma_long) / ma_long])
+        future = close_values[i + 1:i + 6]
+        y_train.append(int(future[-1] > future[0] * 1.005))
+
+    start, stop = history_len + 10, len(close_values) - 5
+    features = ml_features.trend_features(ml_features.rolling_windows(close_values, history_len))
+    labels = ml_features.forward_labels(close_values, 5, 1.005)
+    np.testing.assert_allclose(features[start - history_len:stop - history_len], x_train, rtol=1e-12)
+    np.testing.assert_array_equal(labels[start:stop], y_train)
@@ -0,0 +1,117 @@
+"""PanelIndicators 与 pandas / TA-Lib 逐只计算结果的对照"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.panel_indicators import PricePanel, PanelIndicators
+
+
+def _columns(panel, values):
+    """按股票还原面板中的有效K线（按K线对齐，取最后 lengths[j] 行）"""
+    t = len(panel.dates)
+    return {symbol: values[t - panel.lengths[j]:, j] for j, symbol in enumerate(panel.symbols)}
+
+
+@pytest.fixture
+def panel(make_frames):
+    return PricePanel.from_frames(make_frames(seed=1))
+
+
+@pytest.fixture
+def frames(make_frames):
+    return make_frames(seed=1)
+
+
+def test_from_frames_aligns_last_bar(frames, panel):
+    for symbol, close in _columns(panel, panel['close']).items():
+        np.testing.assert_array_equal(close, frames[symbol]['close'].to_numpy())
+    assert np.isnan(panel['close'][0, panel.lengths < len(panel.dates)]).all()
+
+
+@pytest.mark.parametrize('window', [5, 20, 60])
+def test_sma_matches_pandas_rolling(frames, panel, window):
+    result = _columns(panel, PanelIndicators.sma(panel['close'], window))
+    for symbol, df in frames.items():
+        expected = df['close'].rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(result[symbol], expected, rtol=1e-10, equal_nan=True)
+
+
+def test_rolling_std_max_min_match_pandas(frames, panel):
+    std = _columns(panel, PanelIndicators.rolling_std(panel['close'], 20))
+    high = _columns(panel, PanelIndicators.rolling_max(panel['high'], 30))
+    low = _columns(panel, PanelIndicators.rolling_min(panel['low'], 30))
+    for symbol, df in frames.items():
+        np.testing.assert_allclose(std[symbol], df['close'].rolling(20).std().to_numpy(),
+                                   rtol=1e-9, equal_nan=True)
+        np.testing.assert_array_equal(high[symbol], df['high'].rolling(30).max().to_numpy())
+        np.testing.assert_array_equal(low[symbol], df['low'].rolling(30).min().to_numpy())
+
+
+@pytest.mark.parametrize('adjust', [False, True])
+def test_ema_matches_pandas_ewm(frames, panel, adjust):
+    result = _columns(panel, PanelIndicators.ema(panel['close'], 12, adjust=adjust))
+    for symbol, df in frames.items():
+        expected = df['close'].ewm(span=12, adjust=adjust).mean().to_numpy()
+        np.testing.assert_allclose(result[symbol], expected, rtol=1e-10, equal_nan=True)
+
+
+def test_rsi_sma_matches_pandas(frames, panel):
+    result = _columns(panel, PanelIndicators.rsi(panel['close'], 14))
+    for symbol, df in frames.items():
+        delta = df['close'].diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        expected = (100 - 100 / (1 + gain / loss)).to_numpy()
+        np.testing.assert_allclose(result[symbol], expected, rtol=1e-9, equal_nan=True)
+
+
+def test_macd_sma_seed_matches_talib(make_frames):
+    talib = pytest.importorskip('talib')
+    # TA-Lib 在K线中间的缺失值之后全部为 NaN，TA-Lib 口径的比较只用没有缺失的K线
+    frames = make_frames(seed=2, gap_frac=0)
+    panel = PricePanel.from_frames(frames)
+    result = {name: _columns(panel, values)
+              for name, values in PanelIndicators.macd(panel['close'], 12, 26, 9, seed='sma').items()}
+
+    for symbol, df in frames.items():
+        expected = talib.MACD(df['close'].to_numpy(), fastperiod=12, slowperiod=26, signalperiod=9)
+        for name, values in zip(('macd', 'macd_signal', 'macd_hist'), expected):
+            np.testing.assert_allclose(result[name][symbol], values, rtol=1e-9, atol=1e-12, equal_nan=True)
+        assert np.flatnonzero(~np.isnan(result['macd'][symbol]))[0] == 33
+
+
+@pytest.mark.parametrize('name,panel_fn,talib_fn', [
+    ('sma', lambda x: PanelIndicators.sma(x, 20), lambda talib, x: talib.SMA(x, 20)),
+    ('rsi', lambda x: PanelIndicators.rsi(x, 14, method='wilder'), lambda talib, x: talib.RSI(x, 14)),
+    ('boll', lambda x: PanelIndicators.bollinger(x, 20, 2, ddof=0)['boll_upper'],
+     lambda talib, x: talib.BBANDS(x, 20, 2, 2)[0]),
+])
+def test_talib_seeded_indicators_match_talib(make_frames, name, panel_fn, talib_fn):
+    talib = pytest.importorskip('talib')
+    frames = make_frames(seed=3, gap_frac=0)
+    panel = PricePanel.from_frames(frames)
+    result = _columns(panel, panel_fn(panel['close']))
+    for symbol, df in frames.items():
+        np.testing.assert_allclose(result[symbol], talib_fn(talib, df['close'].to_numpy()),
+                                   rtol=1e-8, equal_nan=True)
+
+
+def test_atr_matches_talib(make_frames):
+    talib = pytest.importorskip('talib')
+    frames = make_frames(seed=4, gap_frac=0)
+    panel = PricePanel.from_frames(frames)
+    result = _columns(panel, PanelIndicators.atr(panel['high'], panel['low'], panel['close'], 14))
+    for symbol, df in frames.items():
+        expected = talib.ATR(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), 14)
+        np.testing.assert_allclose(result[symbol], expected, rtol=1e-9, equal_nan=True)
+        assert np.flatnonzero(~np.isnan(result[symbol]))[0] == 14
+
+
+def test_talib_valid_matches_talib_sma_nan_propagation(frames, panel):
+    talib = pytest.importorskip('talib')
+    valid = _columns(panel, PanelIndicators.talib_valid(panel['close']))
+    sma = _columns(panel, PanelIndicators.sma(panel['close'], 5))
+    for symbol, df in frames.items():
+        expected = talib.SMA(df['close'].to_numpy(), 5)
+        np.testing.assert_array_equal(np.isnan(np.where(valid[symbol], sma[symbol], np.nan)),
+                                      np.isnan(expected))
@@ -0,0 +1,114 @@
+"""各选股策略的面板版计算与原逐只计算的对照"""
+import numpy as np
+import pytest
+
+from utils.panel_indicators import PricePanel
+
+
+def test_stockpre_panel_indicators_match_calculate_indicators(make_frames):
+    stock_pre = pytest.importorskip('strategies.stockPre')
+    frames = make_frames(n=60, seed=11)
+    panel = PricePanel.from_frames(frames)
+    ind = stock_pre.calculate_panel_indicators(panel)
+    signal, _ = stock_pre.panel_signals(ind)
+
+    t = len(panel.dates)
+    for j, symbol in enumerate(panel.symbols):
+        rows = slice(t - panel.lengths[j], None)
+        expected = stock_pre.calculate_indicators(frames[symbol].copy())
+        for name in ('ma5', 'ma20', 'rsi', 'macd', 'macd_signal', 'macd_hist',
+                     'boll_upper', 'boll_mid', 'boll_lower', 'volume_pct_change'):
+            np.testing.assert_allclose(ind[name][rows, j], expected[name].to_numpy(),
+                                       rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=f"{symbol} {name}")
+        np.testing.assert_array_equal(signal[rows, j],
+                                      stock_pre.generate_signals(expected)['signal'].to_numpy())
+
+
+def test_stockpre_screen_panel_matches_backtest(make_frames):
+    stock_pre = pytest.importorskip('strategies.stockPre')
+    frames = make_frames(n=60, seed=12)
+    latest = stock_pre.screen_panel(PricePanel.from_frames(frames))
+
+    for symbol, df in frames.items():
+        df = stock_pre.calculate_indicators(df.copy())
+        signals = stock_pre.generate_signals(df)
+        df = stock_pre.backtest_strategy(df, signals)
+        assert latest.loc[symbol, 'signal'] == signals['signal'].iloc[-1]
+        np.testing.assert_allclose(latest.loc[symbol, 'cum_returns'], df['cum_returns'].iloc[-1],
+                                   rtol=1e-9, equal_nan=True)
+
+
+def test_volume_breakout_panel_factors_match_per_symbol(make_frames):
+    volume_breakout = pytest.importorskip('strategies.volume_breakout_strategy')
+    calculator = volume_breakout.FactorCalculator
+    frames = make_frames(n=80, t=600, seed=13)
+    for df in frames.values():
+        # 最近几天放量，让部分股票通过放量条件
+        df.loc[df.index[-5:], 'volume'] *= 3
+
+    results = volume_breakout.score_factor_chunk(frames)
+
+    expected = {}
+    for symbol, df in frames.items():
+        factors = calculator.calculate_all_factors(df.copy())
+        if factors is None or len(factors) < 2:
+            continue
+        expected[symbol] = (calculator.calculate_stock_score(factors)[0], factors.index[-1])
+
+    assert set(results) == set(expected)
+    for symbol, (score, date) in expected.items():
+        assert results[symbol]['score'] == pytest.approx(score)
+        assert results[symbol]['date'] == date.strftime('%Y-%m-%d')
+
+
+def test_low_volume_breakout_panel_indicators_match(make_frames):
+    indicators = pytest.importorskip('strategies.low_volume_breakout.indicators')
+    config = indicators.StrategyConfig()
+    frames = make_frames(n=30, t=config.min_data_points + 150, min_bars=config.min_data_points, seed=14)
+    calculator = indicators.IndicatorCalculator(config)
+    panel = PricePanel.from_frames(frames)
+    ind = calculator.calculate_panel_indicators(panel)
+
+    t = len(panel.dates)
+    for j, symbol in enumerate(panel.symbols):
+        expected = calculator.calculate_all_indicators(frames[symbol].copy())
+        rows = slice(t - panel.lengths[j], None)
+        for name in expected.columns:
+            if name in ind:
+                np.testing.assert_allclose(np.asarray(ind[name][rows, j], dtype=float),
+                                           expected[name].to_numpy(dtype=float),
+                                           rtol=1e-9, equal_nan=True, err_msg=f"{symbol} {name}")
+
+
+def test_quick_select_analyze_panel_matches_analyze_stock(make_frames):
+    quick_select = pytest.importorskip('strategies.quick_select')
+    frames = make_frames(n=60, t=300, seed=15)
+    results = quick_select.analyze_panel(PricePanel.from_frames(frames, fields=('close', 'volume')))
+
+    expected = {}
+    for symbol, df in frames.items():
+        result = quick_select.analyze_stock(df.copy())
+        if result and result['satisfied_count'] >= 2:
+            expected[symbol] = result
+
+    assert set(results) == set(expected)
+    for symbol, result in expected.items():
+        assert results[symbol]['conditions'] == result['conditions']
+        for key in ('price', 'rsi', 'ma5', 'ma20', 'macd'):
+            np.testing.assert_allclose(results[symbol][key], result[key], rtol=1e-9, equal_nan=True)
+
+
+def test_trend_panel_matches_check_trend_stock(make_frames):
+    trend_stocks = pytest.importorskip('strategies.trend_stocks')
+    frames = make_frames(n=60, t=120, seed=16)
+    results = trend_stocks.screen_trend_chunk(frames)
+
+    expected = {}
+    for symbol, df in frames.items():
+        result = trend_stocks.check_trend_stock(trend_stocks.calculate_trend_indicators(df.copy()))
+        if result['is_trend']:
+            expected[symbol] = result
+
+    assert set(results) == set(expected)
+    for symbol, result in expected.items():
+        assert results[symbol]['trend_score'] == pytest.approx(result['trend_score'])
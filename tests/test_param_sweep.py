@@ -0,0 +1,116 @@
+"""参数网格扫描：面板条件与逐只/逐日计算的对照"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from utils.panel_indicators import PricePanel
+from utils.param_sweep import expand_grid, run_sweep
+
+HORIZONS = (3, 10)
+
+
+@pytest.fixture
+def low_volume_breakout(make_frames):
+    """缩短周期、放宽阈值的低位放量突破配置，让合成数据上出现买入信号"""
+    config_module = pytest.importorskip('strategies.low_volume_breakout.config')
+    indicators = pytest.importorskip('strategies.low_volume_breakout.indicators')
+    config = replace(config_module.StrategyConfig(), min_data_points=120, high_period=120, ma_trend=120,
+                     low_threshold=0.95, volume_ratio=1.0, max_volatility_20d=0.5, buy_threshold=40.0)
+    frames = make_frames(n=8, t=220, min_bars=150, gap_frac=0, seed=71)
+    panel = PricePanel.from_frames(frames)
+    ind = indicators.IndicatorCalculator(config).calculate_panel_indicators(panel)
+    ind['market_cap'] = np.linspace(30, 150, len(panel.symbols))
+    return config, frames, panel, ind
+
+
+@pytest.mark.parametrize('overrides', [{}, {'buy_threshold': 70.0, 'require_volume_progressive': False}])
+def test_low_volume_breakout_panel_signals_match_per_bar(low_volume_breakout, overrides):
+    signals = pytest.importorskip('strategies.low_volume_breakout.signals')
+    indicators = pytest.importorskip('strategies.low_volume_breakout.indicators')
+    config, frames, panel, ind = low_volume_breakout
+    config = replace(config, **overrides)
+    generator = signals.SignalGenerator(config)
+    mask, score = generator.panel_signals(ind, ind['market_cap'])
+
+    t = len(panel.dates)
+    passed_bars = 0
+    for j, symbol in enumerate(panel.symbols):
+        df = indicators.IndicatorCalculator(config).calculate_all_indicators(frames[symbol].copy())
+        offset = t - len(df)
+        for r in range(len(df)):
+            # 逐根K线：以该K线为最新一根做 check_basic_conditions + calculate_score
+            history = df.iloc[:r + 1]
+            passed, _ = generator.check_basic_conditions(history)
+            if passed:
+                passed_bars += 1
+                expected = generator.calculate_score(history, ind['market_cap'][j])
+                assert score[offset + r, j] == pytest.approx(expected)
+                assert mask[offset + r, j] == (expected > config.buy_threshold)
+            else:
+                assert not mask[offset + r, j]
+    assert passed_bars > 0
+
+
+def _per_date_sweep(evaluate, ind, params, close, valid, step, top_n):
+    """逐个入场日、逐只股票统计入选结果与前向收益"""
+    mask, score = evaluate(ind, params)
+    t, n = close.shape
+    per_day, returns = [], {h: [] for h in HORIZONS}
+    for row in range(t - 1, -1, -step):
+        picks = [j for j in range(n) if mask[row, j] and valid[row, j]]
+        if top_n is not None and score is not None:
+            picks = sorted(picks, key=lambda j: -score[row, j])[:top_n]
+        per_day.append(len(picks))
+        for h in HORIZONS:
+            for j in picks:
+                if row + h < t and not np.isnan(close[row + h, j] / close[row, j]):
+                    returns[h].append(close[row + h, j] / close[row, j] - 1)
+    result = {'signals': sum(per_day), 'signal_days': sum(1 for k in per_day if k), 'latest_signals': per_day[0]}
+    for h in HORIZONS:
+        r = np.array(returns[h])
+        result[f'trades_{h}d'] = len(r)
+        result[f'win_rate_{h}d'] = np.mean(r > 0) if len(r) else np.nan
+        result[f'avg_return_{h}d'] = np.mean(r) if len(r) else np.nan
+        result[f'median_return_{h}d'] = np.median(r) if len(r) else np.nan
+    return result
+
+
+@pytest.mark.parametrize('step,top_n', [(1, None), (1, 1), (3, None)])
+def test_run_sweep_matches_per_date_loop(low_volume_breakout, step, top_n):
+    param_sweep_script = pytest.importorskip('scripts.param_sweep')
+    _, _, panel, ind = low_volume_breakout
+    evaluate = param_sweep_script.evaluate_low_volume_breakout
+    grid = expand_grid({'low_threshold': [0.7, 0.95], 'buy_threshold': [40.0, 60.0],
+                        'min_data_points': [120], 'high_period': [120], 'ma_trend': [120],
+                        'volume_ratio': [1.0], 'max_volatility_20d': [0.5]})
+    valid = param_sweep_script.bar_valid(panel, 120)
+
+    table = run_sweep(evaluate, ind, grid, close=ind['close'], valid=valid, horizons=HORIZONS,
+                      step=step, top_n=top_n)
+    pooled = run_sweep(evaluate, ind, grid, close=ind['close'], valid=valid, horizons=HORIZONS,
+                       step=step, top_n=top_n, max_workers=2)
+    assert table.equals(pooled)
+    assert table[f'avg_return_{HORIZONS[-1]}d'].dropna().is_monotonic_decreasing
+
+    for row in table.to_dict('records'):
+        params = {name: row[name] for name in grid[0]}
+        expected = _per_date_sweep(evaluate, ind, params, ind['close'], valid, step, top_n)
+        for name, value in expected.items():
+            np.testing.assert_allclose(row[name], value, rtol=1e-12, err_msg=name)
+    assert (table[f'trades_{HORIZONS[-1]}d'] > 0).any()
+
+
+def test_stockpre_default_thresholds_match_generate_signals(make_frames):
+    stock_pre = pytest.importorskip('strategies.stockPre')
+    param_sweep_script = pytest.importorskip('scripts.param_sweep')
+    frames = make_frames(n=20, seed=72)
+    panel = PricePanel.from_frames(frames)
+    ind = stock_pre.calculate_panel_indicators(panel)
+    mask, _ = param_sweep_script.evaluate_stockpre(
+        ind, {'min_conditions': 2, 'rsi_oversold': 30, 'rsi_overbought': 70, 'volume_surge': 0.2})
+
+    t = len(panel.dates)
+    for j, symbol in enumerate(panel.symbols):
+        expected = stock_pre.generate_signals(stock_pre.calculate_indicators(frames[symbol].copy()))
+        np.testing.assert_array_equal(mask[t - panel.lengths[j]:, j], expected['signal'].to_numpy() == 1)
@@ -0,0 +1,140 @@
+"""批量收益计算（calculate_batch）与逐条计算（calculate_position_return）的对照"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+calculator_module = pytest.importorskip('strategy_tracker.core.calculator')
+
+from strategy_tracker.config import DB_CONFIG, HOLDING_PERIODS, PRICE_RETRY_DAYS
+from strategy_tracker.data import benchmark_series, collector, trading_calendar
+from strategy_tracker.db.repository import DatabaseRepository
+
+CALENDAR = pd.bdate_range('2023-01-02', '2023-12-29')
+CHECK_DATE = datetime(2023, 12, 29)
+
+
+class _NoNetwork:
+    """DataResilient 替身：缓存之外没有任何数据"""
+
+    def fetch_stock_data(self, *args, **kwargs):
+        return None
+
+    def fetch_many(self, symbols, *args, **kwargs):
+        return {}
+
+
+@pytest.fixture
+def calculator(tmp_path, monkeypatch, make_frames):
+    monkeypatch.setitem(DB_CONFIG, 'type', 'sqlite')
+    monkeypatch.setitem(DB_CONFIG, 'sqlite_path', str(tmp_path / 'tracker.db'))
+
+    rng = np.random.default_rng(21)
+    monkeypatch.setattr(trading_calendar, '_calendar', trading_calendar.TradingCalendar(CALENDAR))
+    monkeypatch.setattr(benchmark_series, '_series', benchmark_series.BenchmarkSeries(
+        CALENDAR, 4000 * np.exp(np.cumsum(rng.normal(0, 0.01, len(CALENDAR))))))
+
+    # 缓存中的日线：部分股票停牌一段时间、部分股票缓存只到年中
+    frames = {}
+    for j, (_, df) in enumerate(make_frames(n=12, t=len(CALENDAR), min_bars=200, gap_frac=0, seed=22).items()):
+        df = df.set_axis(CALENDAR[-len(df):])
+        if j % 3 == 0:
+            df = df.drop(df.index[100:110])
+        if j % 4 == 1:
+            df = df.loc[:'2023-07-31']
+        frames[f'{j:06d}'] = df
+
+    def load_stock_from_cache(code):
+        df = frames.get(collector.normalize_symbol(code))
+        return None if df is None else df.copy()
+
+    monkeypatch.setattr(calculator_module, 'load_stock_from_cache', load_stock_from_cache)
+    monkeypatch.setattr(collector, 'load_stock_from_cache', load_stock_from_cache)
+
+    repo = DatabaseRepository(sqlite_profile='default')
+    repo.create_tables()
+    calc = calculator_module.ReturnCalculator(repository=repo)
+    calc.data_collector.data_resilient = _NoNetwork()
+
+    # 持仓：缓存中有的股票 + 缓存中没有的股票（'999999'）
+    screening_id = repo.create_screening_record('test', CALENDAR[0].to_pydatetime(), CALENDAR[0].to_pydatetime())
+    rows = []
+    for i, day in enumerate(CALENDAR[::7]):
+        code = '999999' if i % 10 == 0 else f'{i % 12:06d}'
+        price = float(frames[code]['close'].asof(day)) if code in frames and day >= frames[code].index[0] else 10.0
+        rows.append({'screening_id': screening_id, 'stock_code': code,
+                     'screen_date': day.to_pydatetime(), 'screen_price': price})
+    repo.bulk_create_positions(rows)
+
+    yield calc
+    repo.engine.dispose()
+
+
+def _records(repo):
+    from strategy_tracker.db.models import ReturnRecord
+    with repo.get_session() as session:
+        return {(r.position_id, r.holding_days): {
+                    'check_date': r.check_date, 'close_price': r.close_price, 'return_rate': r.return_rate,
+                    'benchmark_return': r.benchmark_return, 'excess_return': r.excess_return, 'notes': r.notes,
+                } for r in session.query(ReturnRecord).all()}
+
+
+def test_calculate_batch_matches_per_position(calculator):
+    repo = calculator.repository
+    positions = {holding_days: repo.get_positions_need_update(holding_days, CHECK_DATE)
+                 for holding_days in HOLDING_PERIODS}
+    expected = {
+        (position['id'], holding_days): calculator.calculate_position_return(position, holding_days)
+        for holding_days, items in positions.items() for position in items
+    }
+
+    calculator.calculate_batch(HOLDING_PERIODS, CHECK_DATE)
+    records = _records(repo)
+
+    compared = 0
+    for key, old in expected.items():
+        if old is None:
+            assert key not in records
+            continue
+        if old['close_price'] is None:
+            continue
+        record = records[key]
+        compared += 1
+        assert record['check_date'].date() == old['check_date'].date()
+        for name in ('close_price', 'return_rate', 'benchmark_return', 'excess_return'):
+            assert record[name] == pytest.approx(old[name], rel=1e-9), (key, name)
+    assert compared > 50
+
+
+def test_missing_price_retried_then_recorded_as_failure(calculator):
+    repo = calculator.repository
+    calculator.calculate_batch(HOLDING_PERIODS, CHECK_DATE)
+    records = _records(repo)
+
+    calendar = trading_calendar.get_trading_calendar()
+
+    def retry_expired(position):
+        check_day = calendar.nth_after(position['screen_date'], HOLDING_PERIODS[0])
+        retry_until = calendar.nth_after(check_day, PRICE_RETRY_DAYS) if check_day else None
+        return retry_until is not None and retry_until <= CHECK_DATE
+
+    failures = 0
+    for position in repo.get_positions_need_update(HOLDING_PERIODS[0], CHECK_DATE, include_existing=True):
+        if position['stock_code'] != '999999':
+            continue
+        if calendar.nth_after(position['screen_date'], HOLDING_PERIODS[0]) is None:
+            continue
+        record = records.get((position['id'], HOLDING_PERIODS[0]))
+        if retry_expired(position):
+            assert record is not None and record['close_price'] is None
+            assert record['notes'] == '无法获取价格数据'
+            failures += 1
+        else:
+            # 检查日之后不足 PRICE_RETRY_DAYS 个交易日：保持待计算，下次重试
+            assert record is None
+    assert failures > 0
+
+    # 写入失败记录后不再出现在待更新列表中，只剩未到期或仍在重试期限内的
+    pending = repo.get_positions_need_update(HOLDING_PERIODS[0], CHECK_DATE)
+    assert pending and not any(retry_expired(p) for p in pending)
@@ -0,0 +1,33 @@
+"""ScreenRunner 计算阶段：主进程串行与进程池两条路径的输入一致"""
+import numpy as np
+import pandas as pd
+
+from utils.screen_runner import ScreenRunner
+
+
+def mutate_chunk(frames, context):
+    """修改传入的 DataFrame，并返回计算函数看到的输入"""
+    results = {}
+    for symbol, df in frames.items():
+        df['close'] *= 2
+        df['ma'] = df['close'].rolling(5).mean()
+        results[symbol] = (list(df.columns), df.index.name, df['close'].to_numpy().copy())
+    return results
+
+
+def test_serial_and_pool_paths_leave_input_untouched(make_frames, monkeypatch):
+    frames = make_frames(n=8, t=60, min_bars=20, seed=31)
+    for df in frames.values():
+        df['amount'] = df['close'] * df['volume']
+    originals = {symbol: df.copy() for symbol, df in frames.items()}
+
+    serial = ScreenRunner(max_workers=1, fields=('close', 'volume')).compute(frames, mutate_chunk)
+    monkeypatch.setattr(ScreenRunner, 'MIN_PARALLEL_SYMBOLS', 1)
+    pooled = ScreenRunner(max_workers=2, fields=('close', 'volume')).compute(frames, mutate_chunk)
+
+    for symbol, df in frames.items():
+        pd.testing.assert_frame_equal(df, originals[symbol])
+    assert list(serial) == list(pooled) == list(frames)
+    for symbol in frames:
+        assert serial[symbol][:2] == pooled[symbol][:2] == (['close', 'volume', 'ma'], 'date')
+        np.testing.assert_array_equal(serial[symbol][2], pooled[symbol][2])
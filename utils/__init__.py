@@ -1,4 +1,8 @@
 """工具模块"""
 from . import ta_helper
+from . import panel_indicators
+from . import screen_runner
+from . import exit_simulator
+from . import param_sweep
 
-__all__ = ['ta_helper']
+__all__ = ['ta_helper', 'panel_indicators', 'screen_runner', 'exit_simulator', 'param_sweep']
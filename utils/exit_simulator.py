@@ -0,0 +1,288 @@
+"""
+止盈/止损/到期离场模拟
+把所有买入信号之后的日线对齐成 (交易 × 持有天数) 的前向价格面板，
+用布尔掩码的 argmax 一次求出每笔交易首次触发止盈、止损的位置，
+同时给出离场价格、离场天数、最大浮盈(MFE)和最大浮亏(MAE)；
+多组 (止盈, 止损, 持有天数) 参数共用同一份首次触发位置，一次扫完整个参数网格
+
+用法:
+    panel = ForwardPanel.from_frames(frames, entries, horizon=20)
+    result = simulate_exits(panel, take_profit=0.20, stop_loss=-0.08, holding_days=20)
+    grid = sweep_exits(panel, [0.1, 0.2, 0.3], [-0.05, -0.08], [5, 10, 20])
+
+frames 为 {代码: 按日期索引的日线}（DataResilient.fetch_many、BarStore.read_cached、
+策略追踪的 load_stock_from_cache 返回的格式均可），entries 为 [(代码, 买入日期, 买入价)]
+"""
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 离场原因
+EXIT_EXPIRY = 0       # 到期（或数据截止）
+EXIT_TAKE_PROFIT = 1
+EXIT_STOP_LOSS = 2
+EXIT_REASONS = {EXIT_EXPIRY: '到期', EXIT_TAKE_PROFIT: '止盈', EXIT_STOP_LOSS: '止损'}
+
+
+class ForwardPanel:
+    """
+    前向价格面板：第 i 行为第 i 笔交易买入日之后的日线，第 k 列为买入后第 k + 1 根K线
+
+    数据不足 horizon 根（停牌、数据截止）的交易在右侧以 NaN 补齐
+    """
+
+    def __init__(self, symbols: List[str], entry_dates: np.ndarray, entry_prices: np.ndarray,
+                 close: np.ndarray, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                 dates: Optional[np.ndarray] = None):
+        self.symbols = list(symbols)
+        self.entry_dates = entry_dates
+        self.entry_prices = np.asarray(entry_prices, dtype=float)
+        self.close = close
+        self.high = high
+        self.low = low
+        self.dates = dates
+        self.lengths = np.sum(~np.isnan(close), axis=1) if close.size else np.zeros(len(symbols), dtype=int)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame],
+                    entries: Iterable[Tuple[str, object, float]],
+                    horizon: int, max_calendar_days: Optional[int] = None) -> 'ForwardPanel':
+        """
+        从日线数据构建前向面板
+
+        Args:
+            frames: {代码: 按日期索引、含 close（可选 high/low）的日线}
+            entries: [(代码, 买入日期, 买入价)]，买入日当天的K线不计入持有期
+            horizon: 最多保留的K线数（列数）
+            max_calendar_days: 只保留买入日后若干自然日内的K线
+
+        Returns:
+            ForwardPanel，没有数据的交易整行为 NaN
+        """
+        entries = list(entries)
+        n = len(entries)
+        close = np.full((n, horizon), np.nan)
+        high = np.full((n, horizon), np.nan)
+        low = np.full((n, horizon), np.nan)
+        dates = np.full((n, horizon), np.datetime64('NaT'), dtype='datetime64[ns]')
+        entry_dates = np.empty(n, dtype='datetime64[ns]')
+
+        indexed = {}
+        for i, (symbol, entry_date, _) in enumerate(entries):
+            entry_day = pd.Timestamp(entry_date).normalize()
+            entry_dates[i] = entry_day.to_datetime64()
+            df = frames.get(symbol)
+            if df is None or df.empty:
+                continue
+
+            if symbol not in indexed:
+                index = pd.DatetimeIndex(df.index)
+                if index.tz is not None:
+                    index = index.tz_localize(None)
+                indexed[symbol] = index.normalize().values
+            day_values = indexed[symbol]
+
+            lo = np.searchsorted(day_values, entry_day.to_datetime64(), side='right')
+            hi = min(lo + horizon, len(day_values))
+            if max_calendar_days is not None:
+                limit = (entry_day + pd.Timedelta(days=max_calendar_days)).to_datetime64()
+                hi = min(hi, np.searchsorted(day_values, limit, side='right'))
+            k = hi - lo
+            if k <= 0:
+                continue
+
+            dates[i, :k] = day_values[lo:hi]
+            close[i, :k] = df['close'].to_numpy(dtype=float)[lo:hi]
+            if 'high' in df.columns:
+                high[i, :k] = df['high'].to_numpy(dtype=float)[lo:hi]
+            if 'low' in df.columns:
+                low[i, :k] = df['low'].to_numpy(dtype=float)[lo:hi]
+
+        return cls([e[0] for e in entries], entry_dates, np.array([e[2] for e in entries], dtype=float),
+                   close, high, low, dates)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def horizon(self) -> int:
+        return self.close.shape[1]
+
+    def returns(self, field: str = 'close') -> np.ndarray:
+        """相对买入价的收益率面板"""
+        prices = getattr(self, field)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return prices / self.entry_prices[:, None] - 1
+
+
+def _first_hits(hit: np.ndarray) -> np.ndarray:
+    """每行第一个 True 的列号（沿最后一维），没有时为列数"""
+    width = hit.shape[-1]
+    first = np.argmax(hit, axis=-1)
+    return np.where(np.take_along_axis(hit, first[..., None], axis=-1)[..., 0], first, width)
+
+
+def _exit_paths(panel: ForwardPanel, intraday: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """止盈、止损的触发序列：收盘价触发，或按最高/最低价盘中触发"""
+    if intraday and panel.high is not None and panel.low is not None:
+        return panel.returns('high'), panel.returns('low')
+    close = panel.returns('close')
+    return close, close
+
+
+def _prepare(panel: ForwardPanel, intraday: bool) -> Dict[str, np.ndarray]:
+    """各组参数共用的收益率面板和逐日累计最大浮盈/最大浮亏（以买入价为起点）"""
+    up, down = _exit_paths(panel, intraday)
+    return {
+        'close': panel.returns('close'),
+        'run_max': np.fmax.accumulate(np.where(np.isnan(up), -np.inf, up), axis=1),
+        'run_min': np.fmin.accumulate(np.where(np.isnan(down), np.inf, down), axis=1),
+    }
+
+
+def _resolve(panel: ForwardPanel, paths: Dict[str, np.ndarray], first_tp: np.ndarray, first_sl: np.ndarray,
+             take_profit: float, stop_loss: float, holding_days: int, intraday: bool) -> Dict[str, np.ndarray]:
+    """由首次触发位置和持有天数确定离场位置、原因、价格（每组参数 O(交易数)）"""
+    rows = np.arange(len(panel))
+    # 到期：持有期内最后一根有效K线
+    last = np.minimum(panel.lengths, holding_days) - 1
+
+    first = np.minimum(first_tp, first_sl)
+    triggered = (first <= last) & (last >= 0)
+    exit_index = np.where(triggered, first, last)
+    # 同一根K线同时触发止盈止损时按止损处理（盘中先后无法判断，取保守结果）
+    reason = np.where(~triggered, EXIT_EXPIRY, np.where(first_sl <= first_tp, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT))
+
+    safe_index = np.maximum(exit_index, 0)
+    exit_return = paths['close'][rows, safe_index] if panel.horizon else np.full(len(panel), np.nan)
+    if intraday:
+        # 盘中触发按止盈/止损价离场
+        exit_return = np.where(reason == EXIT_TAKE_PROFIT, take_profit,
+                               np.where(reason == EXIT_STOP_LOSS, stop_loss, exit_return))
+
+    # 离场前（含离场当天）的最大浮盈、最大浮亏
+    valid = last >= 0
+    mfe = paths['run_max'][rows, safe_index] if panel.horizon else np.zeros(len(panel))
+    mae = paths['run_min'][rows, safe_index] if panel.horizon else np.zeros(len(panel))
+    return {
+        'exit_index': np.where(valid, exit_index, -1),
+        'exit_days': np.where(valid, exit_index + 1, 0),
+        'exit_reason': np.where(valid, reason, EXIT_EXPIRY),
+        'exit_return': np.where(valid, exit_return, np.nan),
+        'mfe': np.where(valid, np.maximum(mfe, 0.0), np.nan),
+        'mae': np.where(valid, np.minimum(mae, 0.0), np.nan),
+        'valid': valid,
+    }
+
+
+def _first_crossings(panel: ForwardPanel, take_profits: Sequence[float], stop_losses: Sequence[float],
+                     intraday: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每个止盈/止损水平的首次触发位置
+
+    Returns:
+        (止盈 (K, N), 止损 (M, N))，未触发为列数
+    """
+    take_profits = np.asarray(take_profits, dtype=float)
+    stop_losses = np.asarray(stop_losses, dtype=float)
+    if panel.horizon == 0:
+        return (np.zeros((len(take_profits), len(panel)), dtype=int),
+                np.zeros((len(stop_losses), len(panel)), dtype=int))
+
+    up, down = _exit_paths(panel, intraday)
+    # NaN 的比较结果为 False，补齐位置不会触发
+    with np.errstate(invalid='ignore'):
+        first_tp = _first_hits(up[None, :, :] >= take_profits[:, None, None])
+        first_sl = _first_hits(down[None, :, :] <= stop_losses[:, None, None])
+    return first_tp, first_sl
+
+
+def simulate_exits(panel: ForwardPanel, take_profit: float = np.inf, stop_loss: float = -np.inf,
+                   holding_days: Optional[int] = None, intraday: bool = False) -> pd.DataFrame:
+    """
+    模拟单组离场规则
+
+    Args:
+        panel: 前向价格面板
+        take_profit: 止盈收益率（如 0.20），默认不止盈
+        stop_loss: 止损收益率（如 -0.08），默认不止损
+        holding_days: 最长持有K线数，默认为面板的全部列
+        intraday: True 时按最高/最低价盘中触发并以止盈/止损价离场，否则按收盘价触发、以收盘价离场
+
+    Returns:
+        每笔交易一行: symbol, entry_date, entry_price, exit_date, exit_price, exit_return,
+        exit_days, exit_reason, mfe, mae（没有后续数据的交易 exit_price 为 NaN）
+    """
+    holding_days = panel.horizon if holding_days is None else min(int(holding_days), panel.horizon)
+    first_tp, first_sl = _first_crossings(panel, [take_profit], [stop_loss], intraday)
+    result = _resolve(panel, _prepare(panel, intraday), first_tp[0], first_sl[0],
+                      take_profit, stop_loss, holding_days, intraday)
+
+    rows = np.arange(len(panel))
+    exit_index = np.maximum(result['exit_index'], 0)
+    if panel.horizon:
+        exit_dates = panel.dates[rows, exit_index]
+        exit_prices = panel.close[rows, exit_index]
+    else:
+        exit_dates = np.full(len(panel), np.datetime64('NaT'), dtype='datetime64[ns]')
+        exit_prices = np.full(len(panel), np.nan)
+    if intraday:
+        # 盘中触发以止盈/止损价离场
+        triggered = result['exit_reason'] != EXIT_EXPIRY
+        exit_prices = np.where(triggered, panel.entry_prices * (1 + result['exit_return']), exit_prices)
+    return pd.DataFrame({
+        'symbol': panel.symbols,
+        'entry_date': panel.entry_dates,
+        'entry_price': panel.entry_prices,
+        'exit_date': np.where(result['valid'], exit_dates, np.datetime64('NaT')),
+        'exit_price': np.where(result['valid'], exit_prices, np.nan),
+        'exit_return': result['exit_return'],
+        'exit_days': result['exit_days'],
+        'exit_reason': [EXIT_REASONS[r] for r in result['exit_reason']],
+        'mfe': result['mfe'],
+        'mae': result['mae'],
+    })
+
+
+def sweep_exits(panel: ForwardPanel, take_profits: Sequence[float], stop_losses: Sequence[float],
+                holding_days: Sequence[int], intraday: bool = False) -> pd.DataFrame:
+    """
+    扫描 (止盈, 止损, 持有天数) 参数网格
+
+    每个止盈/止损水平的首次触发位置只计算一次，组合之间只比较位置，
+    总计算量为 (止盈数 + 止损数) × 交易数 × 持有天数 + 组合数 × 交易数
+
+    Returns:
+        每个组合一行: take_profit, stop_loss, holding_days, trades, win_rate, avg_return,
+        median_return, total_return（等权逐笔复利）, take_profit_rate, stop_loss_rate,
+        avg_exit_days, avg_mfe, avg_mae；按组合顺序排列
+    """
+    first_tp, first_sl = _first_crossings(panel, take_profits, stop_losses, intraday)
+    paths = _prepare(panel, intraday)
+
+    rows = []
+    for (k, tp), (m, sl), days in product(enumerate(take_profits), enumerate(stop_losses), holding_days):
+        days = min(int(days), panel.horizon)
+        result = _resolve(panel, paths, first_tp[k], first_sl[m], tp, sl, days, intraday)
+        valid = result['valid']
+        returns = result['exit_return'][valid]
+        reasons = result['exit_reason'][valid]
+        trades = int(valid.sum())
+        rows.append({
+            'take_profit': tp,
+            'stop_loss': sl,
+            'holding_days': days,
+            'trades': trades,
+            'win_rate': float(np.mean(returns > 0)) if trades else np.nan,
+            'avg_return': float(np.mean(returns)) if trades else np.nan,
+            'median_return': float(np.median(returns)) if trades else np.nan,
+            'total_return': float(np.prod(1 + returns) - 1) if trades else np.nan,
+            'take_profit_rate': float(np.mean(reasons == EXIT_TAKE_PROFIT)) if trades else np.nan,
+            'stop_loss_rate': float(np.mean(reasons == EXIT_STOP_LOSS)) if trades else np.nan,
+            'avg_exit_days': float(np.mean(result['exit_days'][valid])) if trades else np.nan,
+            'avg_mfe': float(np.mean(result['mfe'][valid])) if trades else np.nan,
+            'avg_mae': float(np.mean(result['mae'][valid])) if trades else np.nan,
+        })
+    return pd.DataFrame(rows)
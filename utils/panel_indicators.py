@@ -0,0 +1,371 @@
+"""
+面板指标计算模块
+把全市场日线对齐成 (日期 × 股票) 的二维数组，一次计算所有股票的技术指标，
+避免在 Python 循环里逐只股票调用 pandas rolling
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PricePanel:
+    """
+    日线面板：每个字段一个 (T, N) 的 float64 数组
+
+    默认按K线对齐（align='bars'）：每只股票的最后一根K线都落在最后一行，
+    停牌、上市时间不同的股票也能保证窗口内的K线数与逐只计算完全一致；
+    数据不足 T 根的股票在顶部以 NaN 补齐。
+    align='date' 时按日期并集对齐，缺失日期为 NaN，适合横截面比较。
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbols: List[str], dates: np.ndarray, arrays: Dict[str, np.ndarray],
+                 lengths: np.ndarray):
+        self.symbols = list(symbols)
+        self.dates = dates          # (T, N) datetime64[ns]，补齐位置为 NaT
+        self.arrays = arrays
+        self.lengths = lengths      # 每只股票的有效K线数
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], fields=FIELDS,
+                    max_bars: Optional[int] = None, align: str = 'bars') -> 'PricePanel':
+        """
+        从 {股票代码: OHLCV DataFrame} 构建面板
+
+        Args:
+            frames: 按日期索引的日线数据
+            fields: 需要的字段
+            max_bars: 只保留每只股票最近的K线数
+            align: 'bars' 按K线对齐，'date' 按日期对齐
+        """
+        frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+        symbols = list(frames)
+        n = len(symbols)
+
+        if align == 'date':
+            index = pd.DatetimeIndex([])
+            for df in frames.values():
+                index = index.union(pd.DatetimeIndex(cls._index_dates(df)).dropna())
+            if max_bars:
+                index = index[-max_bars:]
+            t = len(index)
+            dates = np.broadcast_to(index.values[:, None], (t, n)).copy()
+            arrays = {field: np.full((t, n), np.nan) for field in fields}
+            lengths = np.zeros(n, dtype=int)
+            for j, symbol in enumerate(symbols):
+                df = frames[symbol]
+                rows = index.get_indexer(pd.DatetimeIndex(cls._index_dates(df)))
+                mask = rows >= 0
+                for field in fields:
+                    if field in df.columns:
+                        arrays[field][rows[mask], j] = df[field].to_numpy(dtype=float)[mask]
+                lengths[j] = mask.sum()
+            return cls(symbols, dates, arrays, lengths)
+
+        lengths = np.array([len(df) for df in frames.values()], dtype=int)
+        if max_bars:
+            lengths = np.minimum(lengths, max_bars)
+        t = int(lengths.max()) if n else 0
+
+        dates = np.full((t, n), np.datetime64('NaT'), dtype='datetime64[ns]')
+        arrays = {field: np.full((t, n), np.nan) for field in fields}
+        for j, symbol in enumerate(symbols):
+            df = frames[symbol]
+            k = lengths[j]
+            dates[t - k:, j] = cls._index_dates(df)[-k:]
+            for field in fields:
+                if field in df.columns:
+                    arrays[field][t - k:, j] = df[field].to_numpy(dtype=float)[-k:]
+
+        return cls(symbols, dates, arrays, lengths)
+
+    @staticmethod
+    def _index_dates(df: pd.DataFrame) -> np.ndarray:
+        """DataFrame 索引转 datetime64[ns]，非日期索引返回 NaT"""
+        try:
+            index = pd.DatetimeIndex(df.index)
+        except (TypeError, ValueError):
+            return np.full(len(df), np.datetime64('NaT'), dtype='datetime64[ns]')
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.values.astype('datetime64[ns]')
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.arrays[field]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def last_dates(self) -> pd.DatetimeIndex:
+        """每只股票最新K线的日期"""
+        if not len(self.dates):
+            return pd.DatetimeIndex([])
+        return pd.DatetimeIndex(self.dates[-1])
+
+    def latest(self, values: Dict[str, np.ndarray], offset: int = 0) -> pd.DataFrame:
+        """
+        取每只股票的最新值（offset=1 为前一根K线）
+
+        Returns:
+            以股票代码为索引、指标名为列的 DataFrame
+        """
+        row = -1 - offset
+        data = {name: (arr[row] if len(arr) > offset else np.full(len(self), np.nan))
+                for name, arr in values.items()}
+        return pd.DataFrame(data, index=pd.Index(self.symbols, name='symbol'))
+
+    def frame(self, symbol: str, values: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """还原单只股票的指标序列（去掉顶部补齐）"""
+        j = self._index[symbol]
+        k = self.lengths[j]
+        t = len(self.dates)
+        data = {name: arr[t - k:, j] for name, arr in values.items()}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self.dates[t - k:, j], name='date'))
+
+
+class PanelIndicators:
+    """(T, N) 面板上的向量化指标，沿时间轴(axis=0)计算，窗口内含 NaN 时结果为 NaN（与 pandas rolling 一致）"""
+
+    @staticmethod
+    def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+        out = np.full_like(x, np.nan)
+        if periods == 0:
+            return x.copy()
+        if periods > 0:
+            out[periods:] = x[:-periods]
+        else:
+            out[:periods] = x[-periods:]
+        return out
+
+    @staticmethod
+    def diff(x: np.ndarray, periods: int = 1) -> np.ndarray:
+        return x - PanelIndicators.shift(x, periods)
+
+    @staticmethod
+    def pct_change(x: np.ndarray, periods: int = 1) -> np.ndarray:
+        prev = PanelIndicators.shift(x, periods)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return x / prev - 1
+
+    @staticmethod
+    def sma(x: np.ndarray, window: int) -> np.ndarray:
+        """简单移动平均（前缀和实现，O(T·N)）"""
+        out = np.full_like(x, np.nan)
+        if len(x) < window:
+            return out
+
+        valid = ~np.isnan(x)
+        csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+        ccount = np.cumsum(valid, axis=0)
+
+        zero = np.zeros((1,) + x.shape[1:])
+        csum = np.concatenate([zero, csum])
+        ccount = np.concatenate([zero, ccount])
+
+        total = csum[window:] - csum[:-window]
+        count = ccount[window:] - ccount[:-window]
+        out[window - 1:] = np.where(count == window, total / window, np.nan)
+        return out
+
+    @staticmethod
+    def talib_valid(x: np.ndarray) -> np.ndarray:
+        """
+        TA-Lib 口径的有效位置：跳过开头的缺失值，之后出现缺失值时 TA-Lib 的累加/递推结果全部为 NaN，
+        用于把 sma 等按窗口处理缺失值的结果对齐到 talib.SMA
+        """
+        started = np.cumsum(~np.isnan(x), axis=0) > 0
+        return started & (np.cumsum(started & np.isnan(x), axis=0) == 0)
+
+    @staticmethod
+    def _windows(x: np.ndarray, window: int) -> Optional[np.ndarray]:
+        if len(x) < window:
+            return None
+        return sliding_window_view(x, window, axis=0)
+
+    @staticmethod
+    def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+        out = np.full_like(x, np.nan)
+        windows = PanelIndicators._windows(x, window)
+        if windows is not None:
+            out[window - 1:] = windows.std(axis=-1, ddof=ddof)
+        return out
+
+    @staticmethod
+    def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+        out = np.full_like(x, np.nan)
+        windows = PanelIndicators._windows(x, window)
+        if windows is not None:
+            out[window - 1:] = windows.max(axis=-1)
+        return out
+
+    @staticmethod
+    def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+        out = np.full_like(x, np.nan)
+        windows = PanelIndicators._windows(x, window)
+        if windows is not None:
+            out[window - 1:] = windows.min(axis=-1)
+        return out
+
+    @staticmethod
+    def ema(x: np.ndarray, span: int = None, alpha: float = None, seed: str = 'first',
+            adjust: bool = False, skip: int = 0) -> np.ndarray:
+        """
+        指数移动平均（时间轴循环，股票维度向量化）
+
+        Args:
+            span: 周期，alpha = 2 / (span + 1)
+            alpha: 平滑系数（Wilder 平滑为 1 / n）
+            seed: 'first' 以第一个有效值起算（pandas ewm(adjust=False)）；
+                  'sma' 以前 span 个有效值的均值起算（TA-Lib）
+            adjust: True 时按 pandas ewm(adjust=True) 的权重归一化计算，忽略 seed
+            skip: seed='sma' 时先跳过的有效值个数（TA-Lib MACD 的快线与慢线在同一根K线起算）
+        """
+        if alpha is None:
+            alpha = 2.0 / (span + 1)
+        period = span if span is not None else int(round(1 / alpha))
+
+        out = np.full_like(x, np.nan)
+
+        if adjust:
+            numerator = np.zeros(x.shape[1:])
+            denominator = np.zeros(x.shape[1:])
+            for t in range(len(x)):
+                xt = x[t]
+                valid = ~np.isnan(xt)
+                numerator = (1 - alpha) * numerator
+                denominator = (1 - alpha) * denominator
+                numerator[valid] += xt[valid]
+                denominator[valid] += 1
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    out[t] = np.where(denominator > 0, numerator / denominator, np.nan)
+            return out
+
+        state = np.full(x.shape[1:], np.nan)
+        warm_sum = np.zeros(x.shape[1:])
+        warm_count = np.zeros(x.shape[1:], dtype=int)
+        # pandas ewm(adjust=False) 遇到缺失值时旧值权重继续衰减，下一个有效值按权重归一化
+        old_weight = np.ones(x.shape[1:])
+
+        for t in range(len(x)):
+            xt = x[t]
+            valid = ~np.isnan(xt)
+            started = ~np.isnan(state)
+
+            if seed == 'sma':
+                warming = valid & ~started
+                warm_count[warming] += 1
+                summing = warming & (warm_count > skip)
+                warm_sum[summing] += xt[summing]
+                ready = warming & (warm_count == period + skip)
+                state[ready] = warm_sum[ready] / period
+                step = valid & started
+                state[step] = alpha * xt[step] + (1 - alpha) * state[step]
+            else:
+                ready = valid & ~started
+                state[ready] = xt[ready]
+
+                old_weight[started] *= 1 - alpha
+                step = valid & started
+                state[step] = ((old_weight[step] * state[step] + alpha * xt[step])
+                               / (old_weight[step] + alpha))
+                old_weight[step] = 1.0
+
+            out[t] = state
+
+        return out
+
+    @staticmethod
+    def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9,
+             seed: str = 'first', adjust: bool = False) -> Dict[str, np.ndarray]:
+        """
+        MACD
+
+        seed='sma' 时与 talib.MACD 一致：快线跳过前 slow - fast 个值，与慢线在同一根K线以均值起算，
+        三个输出都从信号线起算处（第 slow + signal - 2 个有效值）开始
+        """
+        skip = max(slow - fast, 0) if seed == 'sma' else 0
+        macd = (PanelIndicators.ema(close, fast, seed=seed, adjust=adjust, skip=skip)
+                - PanelIndicators.ema(close, slow, seed=seed, adjust=adjust))
+        macd_signal = PanelIndicators.ema(macd, signal, seed=seed, adjust=adjust)
+        if seed == 'sma':
+            macd = np.where(np.isnan(macd_signal), np.nan, macd)
+        return {'macd': macd, 'macd_signal': macd_signal, 'macd_hist': macd - macd_signal}
+
+    @staticmethod
+    def rsi(close: np.ndarray, period: int = 14, method: str = 'sma') -> np.ndarray:
+        """
+        RSI
+
+        Args:
+            method: 'sma' 涨跌幅简单平均（pandas rolling 写法）；'wilder' Wilder 平滑（TA-Lib）
+        """
+        delta = PanelIndicators.diff(close)
+
+        if method == 'wilder':
+            gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+            loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+            avg_gain = PanelIndicators.ema(gain, alpha=1.0 / period, seed='sma')
+            avg_loss = PanelIndicators.ema(loss, alpha=1.0 / period, seed='sma')
+        else:
+            # delta.where(delta > 0, 0)：第一根K线和缺失值前后的涨跌幅按 0 计，只有补齐的K线为 NaN
+            started = np.cumsum(~np.isnan(close), axis=0) > 0
+            gain = np.where(started, np.where(delta > 0, delta, 0.0), np.nan)
+            loss = np.where(started, np.where(delta < 0, -delta, 0.0), np.nan)
+            avg_gain = PanelIndicators.sma(gain, period)
+            avg_loss = PanelIndicators.sma(loss, period)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+            return 100 - 100 / (1 + rs)
+
+    @staticmethod
+    def bollinger(close: np.ndarray, period: int = 20, num_std: float = 2.0,
+                  ddof: int = 1) -> Dict[str, np.ndarray]:
+        """布林带（pandas rolling std 为 ddof=1，TA-Lib BBANDS 为 ddof=0）"""
+        mid = PanelIndicators.sma(close, period)
+        std = PanelIndicators.rolling_std(close, period, ddof=ddof)
+        return {'boll_mid': mid, 'boll_upper': mid + num_std * std, 'boll_lower': mid - num_std * std}
+
+    @staticmethod
+    def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        prev_close = PanelIndicators.shift(close)
+        ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        with np.errstate(invalid='ignore'):
+            tr = np.nanmax(np.where(np.isnan(ranges).all(axis=0), 0.0, ranges), axis=0)
+        return np.where(np.isnan(high - low), np.nan, tr)
+
+    @staticmethod
+    def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """
+        平均真实波幅（与 talib.ATR 一致）：第一根K线没有前收盘价，真实波幅从第二根起算，
+        以前 period 个真实波幅的均值起算，之后 Wilder 平滑
+        """
+        tr = PanelIndicators.true_range(high, low, close)
+        tr[np.isnan(PanelIndicators.shift(close))] = np.nan
+        return PanelIndicators.ema(tr, alpha=1.0 / period, seed='sma')
+
+    @staticmethod
+    def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+        """平均趋向指数（与 utils.ta_helper.calculate_adx 相同的 ewm 平滑）"""
+        tr = PanelIndicators.true_range(high, low, close)
+
+        up = PanelIndicators.diff(high)
+        down = -PanelIndicators.diff(low)
+        with np.errstate(invalid='ignore'):
+            plus_dm = np.where((up > 0) & (up > down), up, 0.0)
+            minus_dm = np.where((down > 0) & (down > up), down, 0.0)
+        plus_dm[np.isnan(high)] = np.nan
+        minus_dm[np.isnan(low)] = np.nan
+
+        alpha = 1.0 / period
+        atr = PanelIndicators.ema(tr, alpha=alpha)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * PanelIndicators.ema(plus_dm, alpha=alpha) / atr
+            minus_di = 100 * PanelIndicators.ema(minus_dm, alpha=alpha) / atr
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        return PanelIndicators.ema(dx, alpha=alpha)
@@ -0,0 +1,237 @@
+"""
+选股参数网格扫描
+指标只与日线有关、与阈值参数无关，因此面板和指标只计算一次；
+每组参数只做一次 (日期 × 股票) 的布尔条件运算得到历史上每一天的入选股票，
+再用预先算好的前向收益面板统计该组参数的胜率、平均收益等，最后按指定指标排序
+
+用法:
+    ind = calculator.calculate_panel_indicators(panel)
+    table = run_sweep(evaluate, ind, expand_grid({'low_threshold': [0.3, 0.4]}),
+                      close=ind['close'], valid=valid, horizons=(5, 10, 20))
+
+evaluate(ind, params) -> (入选掩码, 得分或 None) 需为模块顶层函数（进程池以 pickle 传递函数引用）
+"""
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .screen_runner import _attach_shared_memory
+
+
+# 计算进程内的共享指标与参数（由 _init_worker 设置）
+_worker_state = {}
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """{参数名: 候选值列表} 展开为参数组合列表（按参数顺序的笛卡尔积）"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def parse_grid(items: Optional[Sequence[str]]) -> Dict[str, list]:
+    """
+    解析命令行参数网格
+
+    Args:
+        items: ['low_threshold=0.3,0.4', 'require_trend_filter=True,False'] 形式的列表，
+               候选值按 Python 字面量解析，解析失败时作为字符串
+
+    Returns:
+        {参数名: 候选值列表}
+    """
+    grid = {}
+    for item in items or []:
+        name, sep, values = item.partition('=')
+        if not sep:
+            raise ValueError(f"参数网格格式应为 KEY=V1,V2: {item}")
+        candidates = []
+        for value in values.split(','):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                candidates.append(ast.literal_eval(value))
+            except (ValueError, SyntaxError):
+                candidates.append(value)
+        grid[name.strip()] = candidates
+    return grid
+
+
+def forward_returns(close: np.ndarray, horizons: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    前向收益面板：第 t 行为第 t 根K线收盘买入、持有 h 根K线后按收盘卖出的收益
+
+    Returns:
+        {h: (T, N) 数组}，最后 h 行为 NaN
+    """
+    out = {}
+    for h in horizons:
+        fwd = np.full_like(close, np.nan)
+        if 0 < h < len(close):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fwd[:-h] = close[h:] / close[:-h] - 1
+        out[h] = fwd
+    return out
+
+
+def entry_rows(t: int, step: int = 1, lookback: Optional[int] = None) -> np.ndarray:
+    """
+    参与统计的入场行：从最后一行起每 step 行取一行（step=5 约为每周调仓一次），
+    lookback 限制为最近若干行
+
+    Returns:
+        长度为 T 的布尔数组
+    """
+    rows = np.zeros(t, dtype=bool)
+    first = 0 if lookback is None else max(0, t - lookback)
+    rows[np.arange(t - 1, first - 1, -max(1, step))] = True
+    return rows
+
+
+def _top_n(mask: np.ndarray, score: np.ndarray, n: int) -> np.ndarray:
+    """每行只保留得分最高的 n 只入选股票"""
+    if n is None or mask.shape[1] <= n:
+        return mask
+    ranked = np.where(mask, score, -np.inf)
+    kth = -np.partition(-ranked, n - 1, axis=1)[:, n - 1:n]
+    keep = mask & (ranked >= kth)
+    # 并列时按列顺序截断，保证每行不超过 n 只
+    return keep & (np.cumsum(keep, axis=1) <= n)
+
+
+def _evaluate_one(evaluate: Callable, ind: Dict[str, np.ndarray], forward: Dict[int, np.ndarray],
+                  allowed: np.ndarray, params: Dict[str, Any], top_n: Optional[int]) -> Dict[str, Any]:
+    """统计一组参数的入选数量与前向收益"""
+    mask, score = evaluate(ind, params)
+    mask = np.asarray(mask, dtype=bool) & allowed
+    if top_n is not None and score is not None:
+        mask = _top_n(mask, score, top_n)
+
+    per_row = mask.sum(axis=1)
+    result = dict(params)
+    result['signals'] = int(per_row.sum())
+    result['signal_days'] = int(np.count_nonzero(per_row))
+    result['latest_signals'] = int(per_row[-1]) if len(per_row) else 0
+
+    for h, fwd in forward.items():
+        returns = fwd[mask]
+        returns = returns[~np.isnan(returns)]
+        trades = len(returns)
+        result[f'trades_{h}d'] = trades
+        result[f'win_rate_{h}d'] = float(np.mean(returns > 0)) if trades else np.nan
+        result[f'avg_return_{h}d'] = float(np.mean(returns)) if trades else np.nan
+        result[f'median_return_{h}d'] = float(np.median(returns)) if trades else np.nan
+    return result
+
+
+def _pack(arrays: Dict[str, np.ndarray]):
+    """把指标数组依次写入一块共享内存，返回 (共享内存, [(名称, dtype, 形状, 偏移量)])"""
+    layout = []
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        layout.append((name, arr.dtype.str, arr.shape, offset))
+        offset += -(-arr.nbytes // 8) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+    try:
+        for (name, dtype, shape, start), arr in zip(layout, arrays.values()):
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view[...] = arr
+            del view
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, layout
+
+
+def _init_worker(shm_name: str, layout: list, n_ind: int, horizons: list, evaluate: Callable, top_n):
+    """计算进程初始化：挂载共享内存上的指标、前向收益与入场掩码"""
+    shm = _attach_shared_memory(shm_name)
+    views = [np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+             for _, dtype, shape, start in layout]
+    _worker_state['shm'] = shm
+    _worker_state['ind'] = {layout[i][0]: views[i] for i in range(n_ind)}
+    _worker_state['forward'] = dict(zip(horizons, views[n_ind:n_ind + len(horizons)]))
+    _worker_state['allowed'] = views[-1]
+    _worker_state['evaluate'] = evaluate
+    _worker_state['top_n'] = top_n
+
+
+def _run_chunk(param_chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """计算进程中评估一批参数组合"""
+    state = _worker_state
+    return [_evaluate_one(state['evaluate'], state['ind'], state['forward'], state['allowed'],
+                          params, state['top_n'])
+            for params in param_chunk]
+
+
+def run_sweep(evaluate: Callable, ind: Dict[str, np.ndarray], grid: List[Dict[str, Any]],
+              close: np.ndarray, valid: Optional[np.ndarray] = None,
+              horizons: Sequence[int] = (5, 10, 20), step: int = 1, lookback: Optional[int] = None,
+              top_n: Optional[int] = None, rank_by: Optional[str] = None, min_trades: int = 0,
+              max_workers: Optional[int] = 1) -> pd.DataFrame:
+    """
+    扫描参数网格
+
+    Args:
+        evaluate: 条件函数 evaluate(ind, params) -> (入选掩码, 得分或 None)，均为 (T, N) 数组
+        ind: 指标面板 {名称: (T, N) 数组}，所有组合共用
+        grid: 参数组合列表（见 expand_grid）
+        close: 收盘价面板，用于计算前向收益
+        valid: (T, N) 布尔数组，False 的位置不参与统计（如上市不足、补齐的K线）
+        horizons: 前向收益的持有K线数
+        step: 每隔 step 根K线统计一次入选结果（1 为每天，5 约为每周）
+        lookback: 只统计最近若干根K线
+        top_n: 每个入场日只取得分最高的 N 只（evaluate 返回得分时有效）
+        rank_by: 排序指标，默认为最长持有期的平均收益
+        min_trades: 交易数不足的组合排在最后
+        max_workers: 进程数，1 为主进程串行，None 为 CPU 核数
+
+    Returns:
+        每组参数一行：参数列、signals, signal_days, latest_signals，
+        以及每个持有期的 trades/win_rate/avg_return/median_return，按 rank_by 降序排列
+    """
+    horizons = list(horizons)
+    forward = forward_returns(close, horizons)
+    allowed = np.repeat(entry_rows(len(close), step, lookback)[:, None], close.shape[1], axis=1)
+    if valid is not None:
+        allowed &= valid
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max(1, max_workers), len(grid))
+
+    if max_workers <= 1:
+        results = [_evaluate_one(evaluate, ind, forward, allowed, params, top_n) for params in grid]
+    else:
+        arrays = {**ind, **{f'__fwd_{h}': forward[h] for h in horizons}, '__allowed': allowed}
+        shm, layout = _pack(arrays)
+        try:
+            chunk_size = max(1, -(-len(grid) // (max_workers * 4)))
+            chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(shm.name, layout, len(ind), horizons, evaluate, top_n)) as executor:
+                results = [row for chunk in executor.map(_run_chunk, chunks) for row in chunk]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame(results)
+    if table.empty:
+        return table
+
+    rank_by = rank_by or f'avg_return_{horizons[-1]}d'
+    if rank_by not in table.columns:
+        raise ValueError(f"未知的排序指标: {rank_by}，可选: {list(table.columns)}")
+    trades = table[f'trades_{horizons[-1]}d']
+    table['_enough'] = trades >= max(min_trades, 1)
+    table = table.sort_values(['_enough', rank_by], ascending=[False, False], kind='stable', na_position='last')
+    return table.drop(columns='_enough').reset_index(drop=True)
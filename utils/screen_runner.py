@@ -0,0 +1,240 @@
+"""
+选股运行器
+把选股拆成两个阶段：
+1. I/O 阶段：批量/并发获取日线数据（线程池，受网络与数据源限速约束）
+2. 计算阶段：把全部日线打包进一块共享内存，按股票分块提交到进程池计算指标与信号，
+   结果按输入顺序返回
+
+计算函数签名为 fn(frames: Dict[str, DataFrame], context) -> Dict[str, Any]，
+需定义在模块顶层（进程池以 pickle 传递函数引用）
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .panel_indicators import PricePanel
+
+
+# 计算进程内的共享内存句柄与上下文（由 _init_worker 设置）
+_worker_state = {}
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 不支持 track 参数
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(shm_name: str, shape: tuple, fields: tuple, context: Any):
+    """计算进程初始化：挂载共享内存（每个进程只挂载一次）"""
+    shm = _attach_shared_memory(shm_name)
+    _worker_state['shm'] = shm
+    _worker_state['block'] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker_state['fields'] = fields
+    _worker_state['context'] = context
+
+
+def _unpack_frames(block: np.ndarray, fields: tuple, entries: list) -> Dict[str, pd.DataFrame]:
+    """按 (symbol, start, stop) 从共享内存还原 DataFrame（复制一份，计算函数可自由修改）"""
+    dates = block[0].view(np.int64)
+    frames = {}
+    for symbol, start, stop in entries:
+        index = pd.DatetimeIndex(dates[start:stop].view('datetime64[ns]'), name='date')
+        data = {field: block[i + 1, start:stop].copy() for i, field in enumerate(fields)}
+        frames[symbol] = pd.DataFrame(data, index=index)
+    return frames
+
+
+def _copy_frames(frames: Dict[str, pd.DataFrame], fields: tuple, symbols: list) -> Dict[str, pd.DataFrame]:
+    """主进程串行计算时的输入：与 _unpack_frames 还原的 DataFrame 一致（只含 fields、float64、复制一份）"""
+    copies = {}
+    for symbol in symbols:
+        df = frames[symbol]
+        index = pd.DatetimeIndex(PricePanel._index_dates(df), name='date')
+        data = {field: df[field].to_numpy(dtype=float, copy=True) if field in df.columns
+                else np.full(len(df), np.nan) for field in fields}
+        copies[symbol] = pd.DataFrame(data, index=index)
+    return copies
+
+
+def _run_chunk(fn: Callable, entries: list) -> Dict[str, Any]:
+    """计算进程中执行一个分块"""
+    frames = _unpack_frames(_worker_state['block'], _worker_state['fields'], entries)
+    return fn(frames, _worker_state['context'])
+
+
+class ScreenRunner:
+    """选股运行器：I/O 阶段与计算阶段分离，计算阶段使用进程池 + 共享内存"""
+
+    # 股票数少于该值时直接在主进程计算（进程启动开销大于收益）
+    MIN_PARALLEL_SYMBOLS = 200
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 io_workers: int = 4, fields: tuple = PricePanel.FIELDS):
+        """
+        Args:
+            max_workers: 计算进程数，默认读取环境变量 SCREEN_MAX_WORKERS，否则为 CPU 核数；
+                         设为 1 时在主进程串行计算
+            chunk_size: 每个计算任务包含的股票数，默认按进程数均分（每进程约4个分块）
+            io_workers: I/O 阶段逐只获取时的线程数
+            fields: 传入计算阶段的字段
+        """
+        if max_workers is None:
+            max_workers = int(os.environ.get('SCREEN_MAX_WORKERS', 0)) or os.cpu_count() or 1
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = chunk_size
+        self.io_workers = io_workers
+        self.fields = tuple(fields)
+
+    # ========== I/O 阶段 ==========
+    def fetch(self, symbols: List[str], fetch_one: Callable[[str], Optional[pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+        """线程池逐只获取数据（数据源不支持批量请求时使用）"""
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.io_workers) as executor:
+            futures = {executor.submit(fetch_one, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    print(f"获取 {symbol} 失败: {str(e)[:50]}")
+                    continue
+                if df is not None and not df.empty:
+                    frames[symbol] = df
+
+        # 保持输入顺序
+        return {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+
+    # ========== 计算阶段 ==========
+    def compute(self, frames: Dict[str, pd.DataFrame], fn: Callable, context: Any = None) -> Dict[str, Any]:
+        """
+        计算阶段
+
+        Args:
+            frames: {股票代码: 日线DataFrame}
+            fn: 分块计算函数 fn(frames, context) -> {股票代码: 结果}，需为模块顶层函数
+            context: 传给计算函数的只读参数（需可 pickle）
+
+        Returns:
+            {股票代码: 结果}，按 frames 的顺序排列
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return {}
+
+        chunks = self._chunk(list(frames))
+
+        if self.max_workers <= 1 or len(frames) < self.MIN_PARALLEL_SYMBOLS:
+            results = {}
+            for chunk in chunks:
+                results.update(fn(_copy_frames(frames, self.fields, chunk), context))
+            return self._ordered(frames, results)
+
+        shm, shape, entries = self._pack(frames)
+        try:
+            entry_map = {entry[0]: entry for entry in entries}
+            chunk_entries = [[entry_map[symbol] for symbol in chunk] for chunk in chunks]
+            chunk_results = self._run_pool(fn, chunk_entries, shm.name, shape, context)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        results = {}
+        for chunk_result in chunk_results:
+            if chunk_result:
+                results.update(chunk_result)
+        return self._ordered(frames, results)
+
+    def run(self, symbols: List[str], fn: Callable, context: Any = None,
+            fetch_many: Optional[Callable[[List[str]], Dict[str, pd.DataFrame]]] = None,
+            fetch_one: Optional[Callable[[str], Optional[pd.DataFrame]]] = None) -> Dict[str, Any]:
+        """
+        完整运行：先获取数据，再计算
+
+        Args:
+            symbols: 股票代码列表
+            fn: 分块计算函数
+            context: 计算参数
+            fetch_many: 批量获取函数（如 DataResilient.fetch_many 的包装），优先使用
+            fetch_one: 逐只获取函数
+        """
+        if fetch_many is not None:
+            frames = fetch_many(symbols)
+        elif fetch_one is not None:
+            frames = self.fetch(symbols, fetch_one)
+        else:
+            raise ValueError("需要提供 fetch_many 或 fetch_one")
+
+        return self.compute(frames, fn, context)
+
+    def _chunk(self, symbols: List[str]) -> List[List[str]]:
+        chunk_size = self.chunk_size
+        if not chunk_size:
+            chunk_size = max(1, -(-len(symbols) // (self.max_workers * 4)))
+        return [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+    def _pack(self, frames: Dict[str, pd.DataFrame]):
+        """把全部日线拼接写入共享内存：第0行为日期(int64)，其余每行一个字段"""
+        total = sum(len(df) for df in frames.values())
+        shape = (len(self.fields) + 1, total)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            dates = block[0].view(np.int64)
+
+            entries = []
+            offset = 0
+            for symbol, df in frames.items():
+                n = len(df)
+                dates[offset:offset + n] = PricePanel._index_dates(df).view(np.int64)
+                for i, field in enumerate(self.fields):
+                    if field in df.columns:
+                        block[i + 1, offset:offset + n] = df[field].to_numpy(dtype=float)
+                    else:
+                        block[i + 1, offset:offset + n] = np.nan
+                entries.append((symbol, offset, offset + n))
+                offset += n
+            del block, dates
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+        return shm, shape, entries
+
+    def _run_pool(self, fn: Callable, chunk_entries: list, shm_name: str, shape: tuple, context: Any) -> list:
+        """分块提交到进程池（限制在途任务数），按提交顺序收集结果"""
+        results = [None] * len(chunk_entries)
+        max_in_flight = self.max_workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(shm_name, shape, self.fields, context)) as executor:
+            pending = {}
+            next_index = 0
+
+            while next_index < len(chunk_entries) or pending:
+                while next_index < len(chunk_entries) and len(pending) < max_in_flight:
+                    future = executor.submit(_run_chunk, fn, chunk_entries[next_index])
+                    pending[future] = next_index
+                    next_index += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        print(f"计算分块 {index} 失败 ({len(chunk_entries[index])} 只): {str(e)[:80]}")
+
+        return results
+
+    @staticmethod
+    def _ordered(frames: Dict[str, pd.DataFrame], results: Dict[str, Any]) -> Dict[str, Any]:
+        return {symbol: results[symbol] for symbol in frames if symbol in results}